@@ -0,0 +1,39 @@
+"""A 股体制全历史回填 job（ADR-0012 headless 入口）。
+
+    uv run python -m jobs.china_regime_backfill [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+
+职责仅限组装：backfill_china_regime 读取现有缓存（不发网络请求）对齐成日度序列
+→ 逐列计算 L1/L2、单遍推进 L3 冷却状态 → 一次性写入 china_regime_history.csv。
+不读写实盘哨兵状态表（sentinel_state.csv）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from src.data.china_inputs import backfill_china_regime
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="A 股体制全历史回填")
+    parser.add_argument("--start", help="回填起始日 YYYY-MM-DD，默认缓存最早日")
+    parser.add_argument("--end", help="回填截止日 YYYY-MM-DD，默认缓存最新日")
+    args = parser.parse_args(argv)
+
+    frame = backfill_china_regime(args.start, args.end)
+    print(json.dumps({
+        "ok": True,
+        "days": len(frame),
+        "first": frame.index[0].strftime("%Y-%m-%d") if len(frame) else None,
+        "last": frame.index[-1].strftime("%Y-%m-%d") if len(frame) else None,
+        "l1_regime": frame["l1_regime"].value_counts().to_dict(),
+        "l2_regime": frame["l2_regime"].value_counts().to_dict(),
+        "emergency_days": int(frame["is_emergency"].sum()),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
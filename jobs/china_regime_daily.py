@@ -0,0 +1,53 @@
+"""A 股三层体制日度刷新 job（ADR-0012 headless 入口）。
+
+    uv run python -m jobs.china_regime_daily [--as-of YYYY-MM-DD] [--deadline 秒]
+
+职责仅限组装：gather_china_inputs（并发取数 + 共享截止时间）→ compute_china_regime
+→ 写体制历史快照。超时/失败的指标沿用缓存最后值并标 stale，与 Streamlit 页同口径。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from datetime import date
+
+from dotenv import load_dotenv
+
+from src.analysis.china_regime import compute_china_regime, write_china_regime_snapshot
+from src.data.china_inputs import DEFAULT_DEADLINE_S, gather_china_inputs
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="A 股三层体制日度刷新")
+    parser.add_argument("--as-of", help="数据日期 YYYY-MM-DD，默认今天")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE_S, help="取数共享截止时间（秒）")
+    args = parser.parse_args(argv)
+
+    as_of = date.fromisoformat(args.as_of) if args.as_of else date.today()
+    load_dotenv()
+    gathered = gather_china_inputs(as_of, deadline=args.deadline)
+    result = compute_china_regime(gathered.inputs)
+    write_china_regime_snapshot(
+        snapshot_date=as_of,
+        l1_result=result.layer1,
+        l2_result=result.layer2,
+        l3_state=result.layer3,
+        envelope=result.envelope,
+        csi300_close=gathered.inputs.csi300_close,
+    )
+    print(json.dumps({
+        "ok": True,
+        "as_of": as_of.isoformat(),
+        "stale_count": gathered.stale_count,
+        "indicators": {k: asdict(s) for k, s in gathered.status.items()},
+        "data_dates": gathered.data_dates,
+        "regime": result.to_dict(),
+    }, ensure_ascii=False, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
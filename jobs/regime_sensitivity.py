@@ -0,0 +1,103 @@
+"""美股体制参数敏感性 job（ADR-0012 headless 入口，ADR-0009 年度校准材料）。
+
+    uv run python -m jobs.regime_sensitivity --grid sweep.yaml [--days 3650] [--start YYYY-MM-DD]
+        [--param layer1.ceiling_map.neutral=70,80,90] [--workers N] [--csv out.csv]
+
+grid 文件为 {点分配置路径: [取值...]}，路径按 config/regime_defaults.yaml 的层级书写，
+如 `layer2.indicators.vix_level.high_threshold`；--param 可重复，与文件合并。
+
+职责仅限组装：DataLoader 取数 → src/regime/sensitivity 对网格中每组配置整段回放
+（进程池并行，每个进程共享一个 FeatureCache）→ 每组的体制翻转频率、包络稳定性、
+前瞻 SPX 收益 + 各参数敏感度 → JSON。输出只用于看「阈值动一下包络动多少」，
+不挑最优参数（ADR-0009：不做参数优化回测）。不写 regime_history.csv。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+import yaml
+from dotenv import load_dotenv
+
+from src.analysis.engine import calculate_net_liquidity
+from src.data.constituent_breadth import load_breadth_history
+from src.data.loader import DataLoader
+from src.regime.config import load_raw_config
+from src.regime.sensitivity import DEFAULT_HORIZONS, parameter_sensitivity, run_sensitivity
+
+
+def _parse_value(text: str):
+    return yaml.safe_load(text)
+
+
+def _load_grid(path: str | None, params: list[str]) -> dict[str, list]:
+    grid: dict[str, list] = {}
+    if path:
+        with open(path) as f:
+            grid.update({k: list(v) for k, v in (yaml.safe_load(f) or {}).items()})
+    for item in params:
+        key, _, values = item.partition("=")
+        grid[key.strip()] = [_parse_value(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="美股体制参数敏感性（不做参数优化）")
+    parser.add_argument("--grid", help="网格 YAML：{配置路径: [取值...]}")
+    parser.add_argument("--param", action="append", default=[], help="path=v1,v2,...（可重复）")
+    parser.add_argument("--days", type=int, default=3650, help="取数回看天数（含滚动窗口预热）")
+    parser.add_argument("--start", help="统计起始日 YYYY-MM-DD，默认全部")
+    parser.add_argument("--end", help="统计截止日 YYYY-MM-DD，默认全部")
+    parser.add_argument("--horizons", default=",".join(map(str, DEFAULT_HORIZONS)), help="前瞻收益交易日数，逗号分隔")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--csv", help="可选：逐配置明细写出路径")
+    args = parser.parse_args(argv)
+
+    grid = _load_grid(args.grid, args.param)
+    if not grid:
+        print(json.dumps({"ok": False, "error": "empty grid"}, ensure_ascii=False))
+        return 2
+    raw = load_raw_config()
+
+    load_dotenv()
+    loader = DataLoader()
+    df = calculate_net_liquidity(loader.fetch_all_data(days_back=args.days, use_cache=True))
+    sector_df = loader.fetch_sector_etf_data(days_back=args.days, use_cache=True)
+    if df is None or df.empty:
+        print(json.dumps({"ok": False, "error": "no market data"}, ensure_ascii=False))
+        return 1
+    breadth = load_breadth_history() if raw.get("breadth", {}).get("source") == "constituents" else None
+
+    try:
+        results = run_sensitivity(
+            df, grid, sector_df=sector_df, raw=raw,
+            constituent_breadth=None if breadth is None else breadth["pct_above_50"],
+            start=args.start, end=args.end,
+            horizons=tuple(int(h) for h in args.horizons.split(",")), workers=args.workers,
+        )
+    except KeyError as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=False))
+        return 2
+    if args.csv:
+        results.to_csv(args.csv)
+
+    metrics = [c for c in results.columns if c not in grid and c != "days"]
+    print(json.dumps({
+        "ok": True,
+        "variants": len(results) - 1,
+        "days": int(results["days"].iloc[0]),
+        "baseline": {k: round(float(v), 4) for k, v in results.loc["baseline", metrics].items()},
+        "range": {m: [round(float(results[m].min()), 4), round(float(results[m].max()), 4)] for m in metrics},
+        "sensitivity": {
+            m: json.loads(parameter_sensitivity(results, grid, m).round(4).to_json(orient="index"))
+            for m in ("l2_flips_per_year", "target_mid_mean", "target_mid_abs_change", "emergency_pct")
+        },
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
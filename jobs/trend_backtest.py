@@ -0,0 +1,71 @@
+"""趋势阶段 / 衰竭信号历史复盘 job（ADR-0012 headless 入口，ADR-0009 年度校准材料）。
+
+    uv run python -m jobs.trend_backtest [--tickers 600519.SH,AAPL] [--horizon 60] [--workers N]
+
+职责仅限组装：bar store 中已缓存的日线（不联网）→ src/analysis/trend_backtest
+逐标的向量化复盘（进程池按标的并行）→ 按阶段 / 按信号汇总 → JSON。
+只度量现有规则的历史表现，不做参数优化（ADR-0009）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.analysis.trend_backtest import DEFAULT_HORIZON, backtest_ticker, summarize
+from src.data.stock_daily_fetcher import cached_tickers, load_daily_bars
+
+
+def _backtest_one(args: tuple[str, int]) -> pd.DataFrame:
+    """进程池 worker：自己从 bar store 内存映射读取日线，避免在进程间传大表。"""
+    ticker, horizon = args
+    return backtest_ticker(load_daily_bars(ticker), ticker=ticker, horizon=horizon)
+
+
+def run(tickers: list[str], horizon: int = DEFAULT_HORIZON, workers: int = 1) -> pd.DataFrame:
+    jobs = [(t, horizon) for t in tickers]
+    if workers <= 1 or len(jobs) <= 1:
+        frames = [_backtest_one(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_backtest_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _records(df: pd.DataFrame) -> dict:
+    return json.loads(df.round(4).to_json(orient="index", force_ascii=False)) if not df.empty else {}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="趋势阶段 / 衰竭信号历史复盘")
+    parser.add_argument("--tickers", help="逗号分隔；默认 bar store 中全部个股")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="最长持有 bar 数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--events-csv", help="可选：逐 bar 事件明细写出路径")
+    args = parser.parse_args(argv)
+
+    tickers = args.tickers.split(",") if args.tickers else cached_tickers()
+    events = run(tickers, horizon=args.horizon, workers=args.workers)
+    if args.events_csv and not events.empty:
+        events.to_csv(args.events_csv, index=False)
+    summary = summarize(events)
+    print(json.dumps({
+        "ok": True,
+        "tickers": len(tickers),
+        "tickers_with_data": int(events["ticker"].nunique()) if not events.empty else 0,
+        "bars": len(events),
+        "horizon": args.horizon,
+        "by_phase": _records(summary["by_phase"]),
+        "by_signal": _records(summary["by_signal"]),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
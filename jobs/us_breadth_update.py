@@ -0,0 +1,58 @@
+"""美股成分股宽度日更 job（ADR-0012 headless 入口）。
+
+    uv run python -m jobs.us_breadth_update [--refresh-constituents] [--full]
+
+职责仅限组装：刷新 S&P 500 成分股名单（缓存 30 天）→ 分批增量下载成分股收盘价
+写入 bar store（SP500_CONSTITUENTS）→ 增量重算 20/50/200DMA 之上占比、52 周新高/新低、
+涨跌家数与 A/D 线（SP500_BREADTH）。重叠窗口与已存收盘价不一致（拆股、历史修订）的
+ticker 重拉全量历史；新增成分股或修订改动的最早日期起自动重算宽度。`breadth.source: constituents` 时
+RegimeEngine 用其中 pct_above_50 作 S5FI，缺失或过期回退板块 ETF 估算。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+
+from src.data.constituent_breadth import (
+    load_constituents,
+    update_breadth_history,
+    update_constituent_closes,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="美股成分股宽度日更（增量）")
+    parser.add_argument("--refresh-constituents", action="store_true", help="强制重新拉取成分股名单")
+    parser.add_argument("--full", action="store_true", help="强制全量重算宽度历史（拆股修订与成分股变动已自动从最早变动日重算）")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    tickers = load_constituents(refresh=args.refresh_constituents)
+    if not tickers:
+        print(json.dumps({"ok": False, "error": "no constituent list"}, ensure_ascii=False))
+        return 1
+
+    panel = update_constituent_closes(tickers)
+    history = update_breadth_history(full=args.full)
+    if panel is None or history is None or history.empty:
+        print(json.dumps({"ok": False, "error": "no constituent closes"}, ensure_ascii=False))
+        return 1
+
+    latest = history.iloc[-1]
+    print(json.dumps({
+        "ok": True,
+        "constituents": len(tickers),
+        "panel_tickers": len(panel.columns),
+        "first": history.index[0].strftime("%Y-%m-%d"),
+        "last": history.index[-1].strftime("%Y-%m-%d"),
+        "latest": {k: round(float(v), 2) for k, v in latest.items()},
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
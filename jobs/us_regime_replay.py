@@ -0,0 +1,52 @@
+"""美股体制历史回放 job（ADR-0012 headless 入口）。
+
+    uv run python -m jobs.us_regime_replay [--days 3650] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+
+职责仅限组装：DataLoader 取宏观/市场与板块 ETF 数据 → RegimeEngine.replay
+逐交易日重算 L1/L2/L3 与目标仓位区间 → 一次性重写 regime_history.csv 中对应区间。
+回放不读写实盘哨兵状态表（sentinel_state.csv）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+
+from src.analysis.engine import calculate_net_liquidity
+from src.data.loader import DataLoader
+from src.regime.engine import RegimeEngine
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="美股体制历史回放（稠密重写体制历史）")
+    parser.add_argument("--days", type=int, default=3650, help="取数回看天数（含滚动窗口预热）")
+    parser.add_argument("--start", help="写入历史的起始日 YYYY-MM-DD，默认全部")
+    parser.add_argument("--end", help="写入历史的截止日 YYYY-MM-DD，默认全部")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    loader = DataLoader()
+    df = calculate_net_liquidity(loader.fetch_all_data(days_back=args.days, use_cache=True))
+    sector_df = loader.fetch_sector_etf_data(days_back=args.days, use_cache=True)
+    if df is None or df.empty:
+        print(json.dumps({"ok": False, "error": "no market data"}, ensure_ascii=False))
+        return 1
+
+    replayed = RegimeEngine().replay(df, sector_df, start=args.start, end=args.end)
+    print(json.dumps({
+        "ok": True,
+        "days": len(replayed),
+        "first": replayed.index[0].strftime("%Y-%m-%d") if len(replayed) else None,
+        "last": replayed.index[-1].strftime("%Y-%m-%d") if len(replayed) else None,
+        "l1_regime": replayed["l1_regime"].value_counts().to_dict(),
+        "l2_regime": replayed["l2_regime"].value_counts().to_dict(),
+        "emergency_days": int((replayed["mode"] == "EMERGENCY").sum()),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
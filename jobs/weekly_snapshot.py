@@ -1,8 +1,9 @@
 """周度快照 job（ADR-0012 headless 入口，ADR-0007 周度快照）。
 
-    uv run python -m jobs.weekly_snapshot [--as-of YYYY-MM-DD] [--db PATH]
+    uv run python -m jobs.weekly_snapshot [--as-of YYYY-MM-DD] [--db PATH] [--trend-weeks 12]
 
-职责仅限组装：现有取数层 → MarketQuoteProvider → Ledger Facade 打快照。
+职责仅限组装：现有取数层 → MarketQuoteProvider → Ledger Facade 打快照，
+并附最近 N 周走势（weekly_rollup 一次查询）供周度仪式叙事。
 不含业务逻辑；由 Agent 仪式层或本地调度器触发。
 """
 
@@ -27,12 +28,14 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--as-of", help="快照日期 YYYY-MM-DD，默认今天")
     parser.add_argument("--db", default=DEFAULT_DB_PATH)
     parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--trend-weeks", type=int, default=12, help="输出最近 N 周走势，0 不输出")
     args = parser.parse_args(argv)
 
     as_of = date.fromisoformat(args.as_of) if args.as_of else date.today()
     load_dotenv()
     ledger = Ledger(db_path=args.db, baseline_path=args.baseline)
     snap = ledger.take_snapshot(as_of=as_of, quotes=MarketQuoteProvider())
+    trend = ledger.get_weekly_trend(weeks=args.trend_weeks) if args.trend_weeks > 0 else []
     print(json.dumps({
         "ok": True,
         "week_id": snap.week_id,
@@ -41,6 +44,15 @@ def main(argv: list[str] | None = None) -> int:
         "stale": snap.stale,
         "market_exposure": {k: round(v, 2) for k, v in snap.market_exposure.items()},
         "satellite_ratio": round(snap.satellite_ratio, 4),
+        "trend": [
+            {
+                "week_id": w.week_id,
+                "total_cny": round(w.total_cny, 2),
+                "satellite_ratio": round(w.satellite_ratio, 4),
+                "market_exposure": {k: round(v, 2) for k, v in w.market_exposure.items() if v},
+            }
+            for w in trend
+        ],
         "integrity_issues": ledger.validate_integrity(),
     }, ensure_ascii=False, indent=2))
     return 0
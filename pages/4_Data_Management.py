@@ -167,13 +167,10 @@ def _classify_status(record: dict | None, is_monthly: bool) -> str:
         return t("dm_status_unknown")
 
 
-def _csv_last_date(key: str) -> str | None:
-    csv_path = Path("data_cache") / key
-    if not csv_path.exists():
-        return None
+def _cache_last_date(key: str) -> str | None:
+    from src.data.cache_store import last_data_date
     try:
-        df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
-        return str(df.index[-1])[:10] if not df.empty else None
+        return last_data_date(key)
     except Exception:
         return None
 
@@ -205,7 +202,7 @@ def _build_rows(
                 duration = f"{dur:.1f}s" + (" ⚡" if dur > 30 else "")
             status = _classify_status(record, is_monthly)
         else:
-            data_date = _csv_last_date(key)
+            data_date = _cache_last_date(key)
             if data_date is None:
                 status = t("dm_status_unknown")
             elif is_monthly:
@@ -246,6 +243,29 @@ def _render_all_tables(
     st.subheader(t("dm_us_section"))
     _render_table(US_FILES, sync_log, syncing_key)
 
+
+def _render_network_metrics() -> None:
+    from src.data.network_executor import get_executor
+
+    st.subheader(t("dm_net_section"))
+    metrics = get_executor().metrics()
+    if not metrics:
+        st.caption(t("dm_net_empty"))
+        return
+    rows = [
+        {
+            t("dm_net_col_endpoint"):  endpoint,
+            t("dm_net_col_in_flight"): m["in_flight"],
+            t("dm_net_col_completed"): m["completed"],
+            t("dm_net_col_failed"):    m["failed"],
+            t("dm_net_col_timed_out"): m["timed_out"],
+            t("dm_net_col_abandoned"): f"{m['abandoned']} / {m['abandoned_total']}",
+        }
+        for endpoint, m in metrics.items()
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    st.caption(t("dm_net_caption"))
+
 # ---------------------------------------------------------------------------
 # Live refresh — triggered when dm_do_refresh is in session_state
 # ---------------------------------------------------------------------------
@@ -253,13 +273,16 @@ def _render_all_tables(
 def _do_refresh() -> None:
     today = date_type.today()
 
-    # Delete all cached CSVs so fetchers re-pull
-    for fname in ("macro_data.csv", "sector_etf_data.csv", "china_data.csv"):
+    from src.data.cache_store import get_store
+
+    # Delete all cached datasets so fetchers re-pull
+    for fname in ("macro_data.csv", "macro_raw.csv", "sector_etf_data.csv", "china_data.csv"):
         p = Path("data_cache") / fname
         if p.exists():
             p.unlink()
-    for china_file in Path("data_cache/china").glob("*.csv"):
-        china_file.unlink()
+    get_store(Path("data_cache/china")).clear()
+    # Without vintage records FredClient re-pulls every series in full
+    (Path("data_cache/fred") / "_vintages.json").unlink(missing_ok=True)
 
     # Invalidate process-level and session-level caches
     st.cache_data.clear()
@@ -309,6 +332,9 @@ if st.session_state.get("dm_do_refresh"):
 sync_log = _load_sync_log()
 _render_all_tables(sync_log)
 
+st.divider()
+_render_network_metrics()
+
 st.divider()
 
 # ---------------------------------------------------------------------------
@@ -344,12 +370,14 @@ if st.session_state.get("dm_confirm_clear"):
     yes_col2, no_col2, _ = st.columns([1, 1, 6])
     with yes_col2:
         if st.button("✅ Yes / 确认", key="dm_clear_yes"):
+            from src.data.cache_store import get_store
             today_str = date_type.today().strftime("%Y-%m-%d")
-            for china_file in Path("data_cache/china").glob("*.csv"):
+            china_store = get_store(Path("data_cache/china"))
+            for name in china_store.names():
                 try:
-                    df_c = pd.read_csv(china_file, index_col=0, parse_dates=True)
-                    if not df_c.empty and str(df_c.index[-1])[:10] == today_str:
-                        df_c.iloc[:-1].to_csv(china_file)
+                    if china_store.last_date(name) == today_str:
+                        df_c = china_store.load(name)
+                        china_store.save(name, df_c.iloc[:-1])
                 except Exception:
                     pass
             st.cache_data.clear()
@@ -9,27 +9,34 @@ Layer 2 (Market Regime): equity-bond spread · margin ratio · QVIX · northboun
   → Utilization Rate range
 
 Layer 3 (Instant Sentinels): limit-up/down counts · ZT/DT ratio · southbound surge · volume spike
-  → 3-trading-day hold-down · persisted to data_cache/china_sentinel_state.json
+  → 3-trading-day hold-down on the shared SentinelBank · persisted to the
+    sentinel state table (data_cache/sentinel_state.csv, stack "china")
 
 Envelope: Layer1 Ceiling × Layer2 Utilization, modified by Layer3 overrides.
+
+compute_china_regime scores one ChinaInputData snapshot; china_regime_frame
+scores a whole daily history of the same inputs at once (backfill).
 """
 
 from __future__ import annotations
 
-import json
 import logging
-from copy import copy
-from dataclasses import dataclass, field
-from datetime import date, datetime, timezone
+from dataclasses import dataclass, field, fields
+from datetime import date
 from enum import Enum
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
+from .sentinels import STATE_TABLE, SentinelBank, load_sentinel_bank, save_sentinel_bank
+
 logger = logging.getLogger(__name__)
 
-_SENTINEL_STATE_FILE = Path("data_cache/china_sentinel_state.json")
+_SENTINEL_STATE_FILE = STATE_TABLE
+_LEGACY_SENTINEL_STATE_FILE = Path("data_cache/china_sentinel_state.json")
+_SENTINEL_STACK = "china"
 _REGIME_HISTORY_FILE = Path("data_cache/china_regime_history.csv")
 
 _HOLD_DOWN_DAYS = 3
@@ -74,6 +81,55 @@ class SentinelStatus(str, Enum):
     COOLING = "COOLING"
 
 
+# SentinelBank status codes → enum
+_STATUS_ORDER = (SentinelStatus.CLEAR, SentinelStatus.TRIGGERED, SentinelStatus.COOLING)
+
+
+# ── Thresholds ────────────────────────────────────────────────────────────────
+# Shared by the scalar score_*/classify_*/evaluate_* path and china_regime_frame.
+
+# Layer 1: composite score → regime and Position Ceiling (%)
+_L1_EXPANSIONARY_MIN = 3
+_L1_CONTRACTING_MAX = -2
+_L1_CEILING_PCT: dict[ChinaL1Regime, int] = {
+    ChinaL1Regime.EXPANSIONARY: 80,
+    ChinaL1Regime.NEUTRAL: 60,
+    ChinaL1Regime.CONTRACTING: 40,
+}
+
+# Layer 2 signals
+_EQUITY_BOND_UNDERVALUED = 3.0   # spread % above → UNDERVALUED
+_EQUITY_BOND_OVERVALUED = 1.0    # spread % below → OVERVALUED
+_MARGIN_OVERHEATED = 2.5         # margin / market cap % above → OVERHEATED
+_MARGIN_COLD = 1.5               # below → COLD
+_QVIX_HIGH = 30
+_QVIX_LOW = 15
+_NORTHBOUND_FLOW = 20.0          # 5-day cumulative net flow (亿), either direction
+_NORTHBOUND_ADJUSTMENT = 0.05    # utilization shift when the flow threshold is crossed
+
+# Layer 2 regime → Utilization Rate range (%)
+_L2_UTILIZATION: dict[ChinaL2Regime, tuple[int, int]] = {
+    ChinaL2Regime.PANIC_BOTTOM: (40, 60),
+    ChinaL2Regime.VALUE_BULL: (80, 100),
+    ChinaL2Regime.OVERVALUATION_RISK: (20, 40),
+    ChinaL2Regime.SENTIMENT_BULL: (60, 80),
+    ChinaL2Regime.NEUTRAL: (50, 70),
+}
+
+# Layer 3 sentinel triggers
+_LIMIT_COUNT_MIN = 5             # limit-up/down counts below this are data anomalies
+_LIMIT_UP_HEAT = 200
+_LIMIT_DOWN_PANIC = 50
+_ZT_DT_HIGH = 10
+_ZT_DT_LOW = 0.2
+_SOUTHBOUND_SIGMA = 2.0
+_VOLUME_SPIKE_MULTIPLE = 1.5     # turnover vs its 20-day mean
+
+# Envelope: this many active sentinels force Ceiling × _EMERGENCY_FRACTION
+_EMERGENCY_SENTINELS = 2
+_EMERGENCY_FRACTION = 0.5
+
+
 # ── Data classes ──────────────────────────────────────────────────────────────
 
 @dataclass
@@ -198,6 +254,25 @@ class ChinaSentinelState:
     def to_dict(self) -> dict:
         return {sid: entry.to_dict() for sid, entry in self.all_entries()}
 
+    def to_bank(self) -> SentinelBank:
+        entries = self.all_entries()
+        bank = SentinelBank.clear([sid for sid, _ in entries])
+        for j, (_, e) in enumerate(entries):
+            bank.status[j] = _STATUS_ORDER.index(e.status)
+            bank.counter[j] = e.hold_down_days
+            bank.trigger_ts[j] = e.trigger_timestamp
+        return bank
+
+    @classmethod
+    def from_bank(cls, bank: SentinelBank) -> ChinaSentinelState:
+        state = cls()
+        for sid, e in state.all_entries():
+            j = bank.index(sid)
+            e.status = _STATUS_ORDER[int(bank.status[j])]
+            e.hold_down_days = int(bank.counter[j])
+            e.trigger_timestamp = bank.trigger_ts[j]
+        return state
+
 
 @dataclass
 class ChinaEnvelopeResult:
@@ -327,15 +402,13 @@ def compute_china_layer1(signals: ChinaL1Signals) -> ChinaL1Result:
 
     composite = dr007_score + m1_yoy_score + m1_m2_score + tsf_score
 
-    if composite >= 3:
+    if composite >= _L1_EXPANSIONARY_MIN:
         regime = ChinaL1Regime.EXPANSIONARY
-        ceiling_pct = 80
-    elif composite <= -2:
+    elif composite <= _L1_CONTRACTING_MAX:
         regime = ChinaL1Regime.CONTRACTING
-        ceiling_pct = 40
     else:
         regime = ChinaL1Regime.NEUTRAL
-        ceiling_pct = 60
+    ceiling_pct = _L1_CEILING_PCT[regime]
 
     return ChinaL1Result(
         dr007_score=dr007_score,
@@ -354,9 +427,9 @@ def classify_equity_bond_signal(
     spread_pct: float,
 ) -> Literal["UNDERVALUED", "NEUTRAL", "OVERVALUED"]:
     """Classify equity-bond yield spread. >3% → UNDERVALUED; <1% → OVERVALUED."""
-    if spread_pct > 3.0:
+    if spread_pct > _EQUITY_BOND_UNDERVALUED:
         return "UNDERVALUED"
-    if spread_pct < 1.0:
+    if spread_pct < _EQUITY_BOND_OVERVALUED:
         return "OVERVALUED"
     return "NEUTRAL"
 
@@ -365,9 +438,9 @@ def classify_margin_signal(
     ratio_pct: float,
 ) -> Literal["OVERHEATED", "NORMAL", "COLD"]:
     """Classify margin balance / market cap ratio. >2.5% → OVERHEATED; <1.5% → COLD."""
-    if ratio_pct > 2.5:
+    if ratio_pct > _MARGIN_OVERHEATED:
         return "OVERHEATED"
-    if ratio_pct < 1.5:
+    if ratio_pct < _MARGIN_COLD:
         return "COLD"
     return "NORMAL"
 
@@ -378,9 +451,9 @@ def classify_qvix_signal(
     """Classify QVIX. >30 → HIGH; <15 → LOW; None → None (graceful degradation)."""
     if qvix is None:
         return None
-    if qvix > 30:
+    if qvix > _QVIX_HIGH:
         return "HIGH"
-    if qvix < 15:
+    if qvix < _QVIX_LOW:
         return "LOW"
     return "NORMAL"
 
@@ -394,10 +467,10 @@ def compute_northbound_utilization_adjustment(
     """
     if northbound_5d_cumulative is None:
         return 0.0
-    if northbound_5d_cumulative > 20.0:
-        return 0.05
-    if northbound_5d_cumulative < -20.0:
-        return -0.05
+    if northbound_5d_cumulative > _NORTHBOUND_FLOW:
+        return _NORTHBOUND_ADJUSTMENT
+    if northbound_5d_cumulative < -_NORTHBOUND_FLOW:
+        return -_NORTHBOUND_ADJUSTMENT
     return 0.0
 
 
@@ -419,29 +492,25 @@ def classify_china_regime(
     """
     if equity_bond_signal == "UNDERVALUED" and qvix_signal == "HIGH":
         regime = ChinaL2Regime.PANIC_BOTTOM
-        util_min, util_max = 40, 60
 
     elif (equity_bond_signal == "UNDERVALUED"
           and margin_signal in ("NORMAL", "COLD")
           and qvix_signal != "HIGH"):
         regime = ChinaL2Regime.VALUE_BULL
-        util_min, util_max = 80, 100
 
     elif (equity_bond_signal == "OVERVALUED"
           and margin_signal == "OVERHEATED"):
         regime = ChinaL2Regime.OVERVALUATION_RISK
-        util_min, util_max = 20, 40
 
     elif (equity_bond_signal in ("UNDERVALUED", "NEUTRAL")
           and margin_signal == "OVERHEATED"
           and qvix_signal != "HIGH"):
         regime = ChinaL2Regime.SENTIMENT_BULL
-        util_min, util_max = 60, 80
 
     else:
         regime = ChinaL2Regime.NEUTRAL
-        util_min, util_max = 50, 70
 
+    util_min, util_max = _L2_UTILIZATION[regime]
     adj = int(northbound_adjustment * 100)
     util_min = max(0, min(100, util_min + adj))
     util_max = max(0, min(100, util_max + adj))
@@ -461,7 +530,7 @@ def classify_china_regime(
 
 def _advance_sentinel(entry: SentinelEntry, trigger_condition: bool) -> SentinelEntry:
     """
-    Generic 3-state sentinel state machine.
+    Generic 3-state sentinel state machine (one SentinelBank step, hold-down reset).
 
     CLEAR  → trigger_condition=True  → TRIGGERED (reset hold_down to 0)
     TRIGGERED/COOLING → trigger_condition=True  → TRIGGERED (restart hold_down)
@@ -469,55 +538,61 @@ def _advance_sentinel(entry: SentinelEntry, trigger_condition: bool) -> Sentinel
                         if hold_down_days >= 3 → CLEAR
                         else → COOLING
     """
-    e = copy(entry)
-
-    if e.status == SentinelStatus.CLEAR:
-        if trigger_condition:
-            e.status = SentinelStatus.TRIGGERED
-            e.trigger_timestamp = datetime.now(timezone.utc).isoformat()
-            e.hold_down_days = 0
-    else:  # TRIGGERED or COOLING
-        if trigger_condition:
-            e.status = SentinelStatus.TRIGGERED
-            e.hold_down_days = 0
-        else:
-            e.hold_down_days += 1
-            if e.hold_down_days >= _HOLD_DOWN_DAYS:
-                e.status = SentinelStatus.CLEAR
-                e.trigger_timestamp = None
-                e.hold_down_days = 0
-            else:
-                e.status = SentinelStatus.COOLING
+    bank = SentinelBank.clear([entry.sentinel_id])
+    bank.status[0] = _STATUS_ORDER.index(entry.status)
+    bank.counter[0] = entry.hold_down_days
+    bank.trigger_ts[0] = entry.trigger_timestamp
+    bank = bank.step([trigger_condition], reset_days=_HOLD_DOWN_DAYS)
+    return SentinelEntry(entry.sentinel_id, entry.name, _STATUS_ORDER[int(bank.status[0])],
+                         bank.trigger_ts[0], int(bank.counter[0]))
+
+
+def _limit_up_trigger(count: int | None) -> bool:
+    if count is not None and count < _LIMIT_COUNT_MIN:
+        logger.warning("limit_up_heat: implausibly low count %d — treating as missing", count)
+        count = None
+    return count is not None and count > _LIMIT_UP_HEAT
 
-    return e
+
+def _limit_down_trigger(count: int | None) -> bool:
+    if count is not None and count < _LIMIT_COUNT_MIN:
+        logger.warning("limit_down_panic: implausibly low count %d — treating as missing", count)
+        count = None
+    return count is not None and count > _LIMIT_DOWN_PANIC
+
+
+def _zt_dt_trigger(zt: int | None, dt: int | None) -> bool:
+    if zt is None or dt is None or dt == 0:
+        return False
+    ratio = zt / dt
+    return ratio > _ZT_DT_HIGH or ratio < _ZT_DT_LOW
+
+
+def _southbound_trigger(sigma_dev: float | None) -> bool:
+    return sigma_dev is not None and abs(sigma_dev) > _SOUTHBOUND_SIGMA
+
+
+def _volume_trigger(amount: float | None, ma20: float | None) -> bool:
+    if amount is None or ma20 is None or ma20 <= 0:
+        return False
+    return amount > ma20 * _VOLUME_SPIKE_MULTIPLE
 
 
 def evaluate_limit_up_heat(count: int | None, state: SentinelEntry) -> SentinelEntry:
     """count > 200 → TRIGGERED; count < 5 (data anomaly) → keep current; 3-day hold-down."""
-    if count is not None and count < 5:
-        logger.warning("limit_up_heat: implausibly low count %d — treating as missing", count)
-        count = None
-    trigger = count is not None and count > 200
-    return _advance_sentinel(state, trigger)
+    return _advance_sentinel(state, _limit_up_trigger(count))
 
 
 def evaluate_limit_down_panic(count: int | None, state: SentinelEntry) -> SentinelEntry:
     """count > 50 → TRIGGERED; count < 5 (data anomaly) → keep current; 3-day hold-down."""
-    if count is not None and count < 5:
-        logger.warning("limit_down_panic: implausibly low count %d — treating as missing", count)
-        count = None
-    trigger = count is not None and count > 50
-    return _advance_sentinel(state, trigger)
+    return _advance_sentinel(state, _limit_down_trigger(count))
 
 
 def evaluate_zt_dt_ratio(
     zt: int | None, dt: int | None, state: SentinelEntry
 ) -> SentinelEntry:
     """ZT/DT ratio > 10 or < 0.2 → TRIGGERED; dt=0 or missing → no trigger."""
-    if zt is None or dt is None or dt == 0:
-        return _advance_sentinel(state, False)
-    ratio = zt / dt
-    return _advance_sentinel(state, ratio > 10 or ratio < 0.2)
+    return _advance_sentinel(state, _zt_dt_trigger(zt, dt))
 
 
 def evaluate_southbound_surge(
@@ -526,9 +601,7 @@ def evaluate_southbound_surge(
     state: SentinelEntry,
 ) -> SentinelEntry:
     """|σ deviation| > 2 → TRIGGERED; missing sigma → no trigger."""
-    if sigma_dev is None:
-        return _advance_sentinel(state, False)
-    return _advance_sentinel(state, abs(sigma_dev) > 2.0)
+    return _advance_sentinel(state, _southbound_trigger(sigma_dev))
 
 
 def evaluate_volume_spike(
@@ -537,9 +610,7 @@ def evaluate_volume_spike(
     state: SentinelEntry,
 ) -> SentinelEntry:
     """amount > ma20 × 1.5 → TRIGGERED; missing data → no trigger."""
-    if amount is None or ma20 is None or ma20 <= 0:
-        return _advance_sentinel(state, False)
-    return _advance_sentinel(state, amount > ma20 * 1.5)
+    return _advance_sentinel(state, _volume_trigger(amount, ma20))
 
 
 def evaluate_china_sentinels(
@@ -553,45 +624,31 @@ def evaluate_china_sentinels(
     total_amount_ma20: float | None,
     current_state: ChinaSentinelState,
 ) -> ChinaSentinelState:
-    """Evaluate all 5 A-share sentinels and return updated state."""
-    return ChinaSentinelState(
-        limit_up_heat=evaluate_limit_up_heat(limit_up_count, current_state.limit_up_heat),
-        limit_down_panic=evaluate_limit_down_panic(limit_down_count, current_state.limit_down_panic),
-        zt_dt_extreme=evaluate_zt_dt_ratio(zt_count, dt_count, current_state.zt_dt_extreme),
-        southbound_surge=evaluate_southbound_surge(southbound_net_buy, southbound_sigma_dev, current_state.southbound_surge),
-        volume_spike=evaluate_volume_spike(total_amount, total_amount_ma20, current_state.volume_spike),
-    )
+    """Evaluate all 5 A-share sentinels and return updated state (one SentinelBank step)."""
+    trigger = [  # all_entries() order
+        _limit_up_trigger(limit_up_count),
+        _limit_down_trigger(limit_down_count),
+        _zt_dt_trigger(zt_count, dt_count),
+        _southbound_trigger(southbound_sigma_dev),
+        _volume_trigger(total_amount, total_amount_ma20),
+    ]
+    bank = current_state.to_bank().step(trigger, reset_days=_HOLD_DOWN_DAYS)
+    return ChinaSentinelState.from_bank(bank)
 
 
 # ── State Persistence ─────────────────────────────────────────────────────────
 
 def load_china_sentinel_state() -> ChinaSentinelState:
-    """Load sentinel state from JSON; return all-CLEAR on missing or corrupted file."""
-    try:
-        if _SENTINEL_STATE_FILE.exists():
-            with open(_SENTINEL_STATE_FILE) as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                state = ChinaSentinelState()
-                defaults = {sid: entry for sid, entry in state.all_entries()}
-                for sid in ("limit_up_heat", "limit_down_panic", "zt_dt_extreme",
-                            "southbound_surge", "volume_spike"):
-                    if sid in data:
-                        entry_data = dict(data[sid])
-                        entry_data.setdefault("sentinel_id", sid)
-                        entry_data.setdefault("name", defaults[sid].name)
-                        setattr(state, sid, SentinelEntry.from_dict(entry_data))
-                return state
-    except Exception:
-        logger.warning("China sentinel state file corrupted; resetting to CLEAR", exc_info=True)
-    return ChinaSentinelState()
+    """Load the china rows of the sentinel state table; all-CLEAR on missing or corrupted table."""
+    # the pre-table JSON is only imported into the real table, never into a redirected one
+    legacy = _LEGACY_SENTINEL_STATE_FILE if _SENTINEL_STATE_FILE == STATE_TABLE else None
+    return ChinaSentinelState.from_bank(
+        load_sentinel_bank(_SENTINEL_STACK, _SENTINEL_IDS, _SENTINEL_STATE_FILE, legacy_path=legacy))
 
 
 def save_china_sentinel_state(state: ChinaSentinelState) -> None:
-    """Persist sentinel state to JSON."""
-    _SENTINEL_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(_SENTINEL_STATE_FILE, "w") as f:
-        json.dump(state.to_dict(), f, indent=2, ensure_ascii=False)
+    """Persist sentinel state to the shared state table."""
+    save_sentinel_bank(_SENTINEL_STACK, state.to_bank(), _SENTINEL_STATE_FILE)
 
 
 # ── Envelope Synthesis ────────────────────────────────────────────────────────
@@ -624,8 +681,8 @@ def compute_china_envelope(
     triggered = [(sid, e) for sid, e in l3_state.all_entries()
                  if e.status != SentinelStatus.CLEAR]
 
-    if len(triggered) >= 2:
-        forced = ceiling_frac * 0.5 * 100.0
+    if len(triggered) >= _EMERGENCY_SENTINELS:
+        forced = ceiling_frac * _EMERGENCY_FRACTION * 100.0
         return ChinaEnvelopeResult(
             target_min=0.0,
             target_max=round(forced, 1),
@@ -737,6 +794,145 @@ def compute_china_regime(data: ChinaInputData) -> ChinaRegimeResult:
     )
 
 
+# ── Full-history Replay ───────────────────────────────────────────────────────
+
+CHINA_INPUT_COLUMNS: tuple[str, ...] = tuple(
+    f.name for f in fields(ChinaInputData) if f.name != "data_date"
+)
+
+_SENTINEL_IDS: tuple[str, ...] = tuple(sid for sid, _ in ChinaSentinelState().all_entries())
+
+
+def _col(inputs: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in inputs.columns:
+        return np.full(len(inputs), np.nan)
+    return pd.to_numeric(inputs[name], errors="coerce").to_numpy(dtype=float)
+
+
+def china_regime_frame(inputs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run the three-layer pipeline over a daily history in one vectorized pass.
+
+    inputs: one row per trading day (ascending), columns named after the
+    ChinaInputData fields (CHINA_INPUT_COLUMNS); NaN or a missing column means
+    None. Row t gives what compute_china_regime returns for row t's snapshot,
+    with the sentinels advanced through rows 0..t from all-CLEAR. Pure: the
+    persisted sentinel state is neither read nor written.
+    """
+    c = {name: _col(inputs, name) for name in CHINA_INPUT_COLUMNS}
+    has = {name: ~np.isnan(v) for name, v in c.items()}
+
+    # Layer 1 (mirrors the score_* functions; NaN comparisons are False)
+    dr007, omo = c["dr007"], c["omo_rate"]
+    dr007_score = np.where(has["dr007"] & has["omo_rate"],
+                           np.where(dr007 < omo, 1, np.where(dr007 > omo, -1, 0)), 0)
+    m1, m1_prev = c["m1_yoy"], c["m1_yoy_prev"]
+    m1_score = np.where(
+        (m1 > 0) & (~has["m1_yoy_prev"] | (m1 > m1_prev)), 1,
+        np.where((m1 < 0) & (m1_prev < 0) & (m1 <= m1_prev), -1, 0),
+    )
+    gap, gap_prev = c["m1_m2_spread"], c["m1_m2_spread_prev"]
+    gap_score = np.where(gap >= 0, 1, np.where((gap < 0) & (gap < gap_prev), -1, 0))
+    tsf, tsf_prev = c["tsf_yoy"], c["tsf_yoy_prev"]
+    tsf_score = np.where(tsf > tsf_prev, 1, np.where(tsf < tsf_prev, -1, 0))
+
+    composite = dr007_score + m1_score + gap_score + tsf_score
+    l1_rules = [composite >= _L1_EXPANSIONARY_MIN, composite <= _L1_CONTRACTING_MAX]
+    l1_choices = [ChinaL1Regime.EXPANSIONARY, ChinaL1Regime.CONTRACTING]
+    l1_regime = np.select(l1_rules, [r.value for r in l1_choices], ChinaL1Regime.NEUTRAL.value)
+    ceiling = np.select(l1_rules, [_L1_CEILING_PCT[r] for r in l1_choices],
+                        _L1_CEILING_PCT[ChinaL1Regime.NEUTRAL])
+
+    # Layer 2
+    pe, cgb = c["csi300_pe_ttm"], c["cgb10y_yield"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = (1.0 / pe * 100.0) - cgb
+    spread = np.where(has["equity_bond_spread"], c["equity_bond_spread"],
+                      np.where(pe > 0, derived, np.nan))
+    eq_bond = np.select([spread > _EQUITY_BOND_UNDERVALUED, spread < _EQUITY_BOND_OVERVALUED],
+                        ["UNDERVALUED", "OVERVALUED"], "NEUTRAL")
+    margin = c["margin_ratio_pct"]
+    margin_sig = np.select([margin > _MARGIN_OVERHEATED, margin < _MARGIN_COLD], ["OVERHEATED", "COLD"], "NORMAL")
+    qvix = c["qvix"]
+    qvix_sig = np.where(has["qvix"],
+                        np.select([qvix > _QVIX_HIGH, qvix < _QVIX_LOW], ["HIGH", "LOW"], "NORMAL"), None)
+    nb = c["northbound_5d_cumulative"]
+    nb_adj = np.select([nb > _NORTHBOUND_FLOW, nb < -_NORTHBOUND_FLOW],
+                       [_NORTHBOUND_ADJUSTMENT, -_NORTHBOUND_ADJUSTMENT], 0.0)
+
+    undervalued, overvalued = eq_bond == "UNDERVALUED", eq_bond == "OVERVALUED"
+    overheated, high_vol = margin_sig == "OVERHEATED", qvix_sig == "HIGH"
+    regime_rules = [
+        undervalued & high_vol,
+        undervalued & ~overheated & ~high_vol,
+        overvalued & overheated,
+        ~overvalued & overheated & ~high_vol,
+    ]
+    regime_choices = [ChinaL2Regime.PANIC_BOTTOM, ChinaL2Regime.VALUE_BULL,
+                      ChinaL2Regime.OVERVALUATION_RISK, ChinaL2Regime.SENTIMENT_BULL]
+    l2_regime = np.select(regime_rules, [r.value for r in regime_choices], ChinaL2Regime.NEUTRAL.value)
+    util_lo, util_hi = zip(*(_L2_UTILIZATION[r] for r in regime_choices))
+    neutral_lo, neutral_hi = _L2_UTILIZATION[ChinaL2Regime.NEUTRAL]
+    adj = (nb_adj * 100).astype(int)
+    util_min = np.clip(np.select(regime_rules, util_lo, neutral_lo) + adj, 0, 100)
+    util_max = np.clip(np.select(regime_rules, util_hi, neutral_hi) + adj, 0, 100)
+
+    # Layer 3 (mirrors the evaluate_* functions)
+    up, down = c["limit_up_count"], c["limit_down_count"]
+    zt, dt = c["zt_count"], c["dt_count"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(dt != 0, zt / dt, np.nan)
+    amount, amount_ma20 = c["total_amount"], c["total_amount_ma20"]
+    triggers = {
+        # counts below _LIMIT_COUNT_MIN are treated as missing, which never exceeds the trigger
+        "limit_up_heat": up > _LIMIT_UP_HEAT,
+        "limit_down_panic": down > _LIMIT_DOWN_PANIC,
+        "zt_dt_extreme": (ratio > _ZT_DT_HIGH) | (ratio < _ZT_DT_LOW),
+        "southbound_surge": np.abs(c["southbound_sigma_dev"]) > _SOUTHBOUND_SIGMA,
+        "volume_spike": (amount_ma20 > 0) & (amount > amount_ma20 * _VOLUME_SPIKE_MULTIPLE),
+    }
+    history = SentinelBank.clear(_SENTINEL_IDS).advance(
+        np.column_stack([triggers[sid] for sid in _SENTINEL_IDS]),
+        reset_days=_HOLD_DOWN_DAYS,
+        times=inputs.index.astype(str),
+    )
+    status = dict(zip(_SENTINEL_IDS, history.status_values().T))
+    active = history.status_values() != SentinelStatus.CLEAR.value
+    n_active = active.sum(axis=1)
+    l3_active = ["|".join(sid for sid, on in zip(_SENTINEL_IDS, row) if on) for row in active]
+
+    # Envelope
+    ceiling_frac = ceiling / 100.0
+    base_min, base_max = ceiling_frac * util_min, ceiling_frac * util_max
+    reductions = np.array([_SENTINEL_REDUCTIONS.get(sid, 0.10) for sid in _SENTINEL_IDS]) * 100.0
+    reduction = (active * reductions).sum(axis=1)
+    emergency = n_active >= _EMERGENCY_SENTINELS
+    target_min = np.where(emergency, 0.0,
+                          np.where(n_active == 1, np.maximum(0.0, base_min - reduction), base_min))
+    target_max = np.where(emergency, ceiling_frac * _EMERGENCY_FRACTION * 100.0,
+                          np.where(n_active == 1, np.maximum(0.0, base_max - reduction), base_max))
+
+    out = pd.DataFrame({
+        "l1_composite": composite,
+        "l1_regime": l1_regime,
+        "l1_ceiling": ceiling,
+        "equity_bond_signal": eq_bond,
+        "margin_signal": margin_sig,
+        "qvix_signal": qvix_sig,
+        "northbound_adjustment": nb_adj,
+        "l2_regime": l2_regime,
+        "l2_util_min": util_min,
+        "l2_util_max": util_max,
+        **status,
+        "l3_active": l3_active,
+        "target_min": [round(float(v), 1) for v in target_min],
+        "target_max": [round(float(v), 1) for v in target_max],
+        "is_emergency": emergency,
+        "csi300_close": c["csi300_close"],
+    }, index=inputs.index)
+    return out
+
+
 # ── History Persistence ───────────────────────────────────────────────────────
 
 def write_china_regime_snapshot(
@@ -773,6 +969,39 @@ def write_china_regime_snapshot(
     history.to_csv(_REGIME_HISTORY_FILE, index=False)
 
 
+def write_china_regime_history(frame: pd.DataFrame) -> None:
+    """
+    Bulk-write china_regime_frame output to data_cache/china_regime_history.csv.
+
+    Rows already in the history within the frame's date range are replaced;
+    the file is read and rewritten once for the whole range.
+    """
+    if frame.empty:
+        return
+    rows = pd.DataFrame({
+        "date": pd.DatetimeIndex(frame.index).strftime("%Y-%m-%d"),
+        "L1_regime": frame["l1_regime"].to_numpy(),
+        "L2_regime": frame["l2_regime"].to_numpy(),
+        "L3_active_sentinels": frame["l3_active"].to_numpy(),
+        "target_min": frame["target_min"].to_numpy(),
+        "target_max": frame["target_max"].to_numpy(),
+        "csi300_close": frame["csi300_close"].to_numpy(),
+    })
+    first, last = rows["date"].iloc[0], rows["date"].iloc[-1]
+
+    if _REGIME_HISTORY_FILE.exists():
+        try:
+            history = pd.read_csv(_REGIME_HISTORY_FILE)
+            history = history[(history["date"] < first) | (history["date"] > last)]
+            rows = pd.concat([history, rows], ignore_index=True)
+        except Exception:
+            logger.warning("china regime history unreadable; rewriting from backfill", exc_info=True)
+    rows = rows.sort_values("date", kind="stable")
+
+    _REGIME_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    rows.to_csv(_REGIME_HISTORY_FILE, index=False)
+
+
 # ── Utility Description Functions ─────────────────────────────────────────────
 
 def compute_margin_ratio_distance(current: float, references: dict) -> dict:
@@ -806,9 +1035,9 @@ def compute_margin_ratio_distance(current: float, references: dict) -> dict:
 
 def compute_equity_bond_spread_description(spread: float) -> str:
     """Return Chinese valuation interpretation text for the equity-bond spread."""
-    if spread > 3.0:
+    if spread > _EQUITY_BOND_UNDERVALUED:
         return "A 股低估，配置价值高"
-    if spread < 1.0:
+    if spread < _EQUITY_BOND_OVERVALUED:
         return "A 股相对高估"
     return "中性"
 
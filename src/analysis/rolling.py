@@ -0,0 +1,95 @@
+"""
+Cumulative-sum rolling-window kernels.
+
+Pure function interface, O(n) per column whatever the window:
+    rolling_sum(values, window)           -> trailing-window sums
+    rolling_corr(x, y, window)            -> trailing-window Pearson correlation
+    above_rolling_mean(values, window)    -> (last valid close > mean of its last
+                                              `window` valid closes, eligible mask)
+
+values are 1-D (one series) or 2-D (rows × columns, e.g. ~500 constituents'
+full history); every function works along axis 0. Each window is a difference
+of two cumulative sums instead of a fresh reduction, so a full history costs
+one pass. Columns are shifted by their first value before summing: the
+results are shift-invariant and the cumulative sums stay small, and since the
+shift only depends on the first row, row t is identical whether or not later
+rows exist (a live call on data up to t equals row t of the history).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def _cumsum0(values: np.ndarray) -> np.ndarray:
+    """Cumulative sums along axis 0 with a leading zero row."""
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def _shifted(values: np.ndarray) -> np.ndarray:
+    return values - values[:1] if len(values) else values
+
+
+def rolling_sum(values, window: int) -> np.ndarray:
+    """Sum of each trailing window of `window` rows; NaN for the first window - 1 rows.
+
+    values must be NaN-free (drop or compact NaNs first).
+    """
+    arr = np.asarray(values, dtype=float)
+    out = np.full(arr.shape, np.nan)
+    if window <= len(arr):
+        cum = _cumsum0(arr)
+        out[window - 1:] = cum[window:] - cum[:len(arr) - window + 1]
+    return out
+
+
+def rolling_corr(x, y, window: int) -> np.ndarray:
+    """Pearson correlation of each trailing window of x and y (NaN-free, same shape).
+
+    NaN for the first window - 1 rows and for windows where either side is flat.
+    """
+    x = _shifted(np.asarray(x, dtype=float))
+    y = _shifted(np.asarray(y, dtype=float))
+    sx, sy = rolling_sum(x, window), rolling_sum(y, window)
+    sxx, syy, sxy = rolling_sum(x * x, window), rolling_sum(y * y, window), rolling_sum(x * y, window)
+    vx = sxx - sx * sx / window
+    vy = syy - sy * sy / window
+    cov = sxy - sx * sy / window
+    # cancellation noise of a flat window is a tiny fraction of its sum of squares
+    flat = (vx <= 1e-10 * sxx) | (vy <= 1e-10 * syy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.sqrt(vx * vy)
+    return np.where(flat, np.nan, np.clip(corr, -1.0, 1.0))
+
+
+def above_rolling_mean(values, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per row and column: is the last valid value above the mean of its last `window` valid values?
+
+    NaNs are skipped (the window counts valid values, as ``series.dropna()
+    .rolling(window)`` does). Returns (above, eligible), both shaped like
+    values; eligible is False until a column has `window` valid values.
+    """
+    arr = np.asarray(values, dtype=float)
+    one_d = arr.ndim == 1
+    if one_d:
+        arr = arr[:, None]
+    valid = ~np.isnan(arr)
+    count = np.cumsum(valid, axis=0)
+
+    # compact each column's valid values to the top, in order — a scatter, no sort
+    compact = np.zeros(arr.shape)
+    rows, cols = np.nonzero(valid)
+    compact[count[rows, cols] - 1, cols] = arr[rows, cols]
+    first = compact[:1].copy()
+    compact -= first
+    sums = rolling_sum(compact, window)
+    with np.errstate(invalid="ignore"):
+        above_k = compact > sums / window  # NaN (short history) compares False
+
+    pos = np.maximum(count - 1, 0)
+    above = np.take_along_axis(above_k, pos, axis=0)
+    eligible = count >= window
+    above &= eligible
+    return (above[:, 0], eligible[:, 0]) if one_d else (above, eligible)
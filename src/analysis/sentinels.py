@@ -0,0 +1,256 @@
+"""
+Array-backed sentinel state machine shared by both Layer 3 stacks.
+
+Every instant sentinel — US (src/regime/layer3.py) and A-share
+(china_regime.py) — is the same three-state machine; the stacks differ only
+in what counts as a trigger day, what counts as a reset day and how many
+consecutive reset days clear the sentinel:
+
+    CLEAR             → trigger    → TRIGGERED (counter 0, trigger time stamped)
+    TRIGGERED/COOLING → trigger    → TRIGGERED (counter 0, stamp kept)
+    TRIGGERED/COOLING → no trigger → COOLING; counter + 1 on a reset day, else 0;
+                                     counter ≥ reset_days → CLEAR (stamp cleared)
+    no data (valid=False)          → unchanged
+
+US sentinels pass their own reset condition (e.g. VIX < 25 for 3 days); the
+A-share hold-down is reset = "not triggered" with reset_days = 3.
+
+A SentinelBank keeps one stack's sentinels as parallel NumPy arrays (status
+codes, counters, trigger timestamps). SentinelBank.advance runs a whole
+T × S trigger history in one vectorized pass; SentinelBank.step is the
+one-day case used by the live pipelines. Both stacks persist into a single
+state table (data_cache/sentinel_state.csv, one row per stack × sentinel).
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: atomic replace only, no cross-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CLEAR, TRIGGERED, COOLING = 0, 1, 2
+STATUS_VALUES: tuple[str, ...] = ("CLEAR", "TRIGGERED", "COOLING")
+_STATUS_CODES = {value: code for code, value in enumerate(STATUS_VALUES)}
+
+STATE_TABLE = Path("data_cache/sentinel_state.csv")
+_TABLE_COLUMNS = ["stack", "sentinel_id", "status", "counter", "trigger_timestamp"]
+
+
+@dataclass
+class SentinelBank:
+    """
+    One stack's sentinels as parallel arrays, column j ↔ ids[j].
+
+    A state has 1-D arrays of length S; the history returned by advance has
+    T × S arrays (row t = state after day t), and row(t) picks one day out.
+    """
+
+    ids: tuple[str, ...]
+    status: np.ndarray       # int8 codes: CLEAR / TRIGGERED / COOLING
+    counter: np.ndarray      # consecutive reset days while TRIGGERED/COOLING
+    trigger_ts: np.ndarray   # object: ISO timestamp of the episode's trigger, or None
+
+    @classmethod
+    def clear(cls, ids) -> SentinelBank:
+        n = len(ids)
+        return cls(tuple(ids), np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.int64),
+                   np.full(n, None, dtype=object))
+
+    def row(self, t: int) -> SentinelBank:
+        return SentinelBank(self.ids, self.status[t], self.counter[t], self.trigger_ts[t])
+
+    def index(self, sentinel_id: str) -> int:
+        return self.ids.index(sentinel_id)
+
+    def status_value(self, sentinel_id: str) -> str:
+        return STATUS_VALUES[int(self.status[self.index(sentinel_id)])]
+
+    def status_values(self) -> np.ndarray:
+        """Status codes as "CLEAR" / "TRIGGERED" / "COOLING" strings, same shape as status."""
+        return np.asarray(STATUS_VALUES, dtype=object)[self.status]
+
+    def advance(
+        self,
+        trigger,
+        reset=None,
+        valid=None,
+        reset_days=1,
+        times=None,
+    ) -> SentinelBank:
+        """
+        Run T days of observations (T × S bool arrays) from this state in one pass.
+
+        reset defaults to "not triggered" (hold-down), valid to all True;
+        reset_days is a scalar or one value per sentinel; times (length T)
+        stamps episodes that start on that row, default now (UTC).
+
+        No per-day loop: the counter is the length of the current run of reset
+        days (invalid days neither extend nor break it), an episode is open at
+        t while the last trigger is more recent than the last day that run
+        reached reset_days, and the stamp is the time of the trigger that
+        opened it — all cumulative sums and running maxima along axis 0.
+        """
+        fire = np.asarray(trigger, dtype=bool)
+        n_days = fire.shape[0]
+        valid = np.ones_like(fire) if valid is None else np.asarray(valid, dtype=bool)
+        reset = ~fire if reset is None else np.asarray(reset, dtype=bool)
+        reset_days = np.asarray(reset_days)
+        fire = fire & valid
+        rst = reset & valid & ~fire
+
+        days = np.arange(n_days)[:, None]
+        start_active = self.status != CLEAR
+
+        def last(mask: np.ndarray) -> np.ndarray:
+            return np.maximum.accumulate(np.where(mask, days, -1), axis=0)
+
+        runs = np.cumsum(rst, axis=0)
+        brk = last(valid & ~rst)
+        run = runs - np.where(brk >= 0, np.take_along_axis(runs, np.maximum(brk, 0), axis=0), 0)
+        run = run + np.where((brk < 0) & start_active, self.counter, 0)
+
+        last_fire = last(fire)
+        last_clear = last(rst & (run >= reset_days))
+        open_ = np.where(last_fire >= 0, last_clear < last_fire, start_active & (last_clear < 0))
+        last_valid = last(valid)
+
+        status = np.where(
+            ~open_, CLEAR,
+            np.where(last_valid < 0, self.status, np.where(last_fire == last_valid, TRIGGERED, COOLING)),
+        ).astype(np.int8)
+        counter = np.where(open_, run, 0).astype(np.int64)
+
+        if times is None:
+            times = np.full(n_days, datetime.now(timezone.utc).isoformat(), dtype=object)
+        times = np.asarray(times, dtype=object)
+        prev = np.vstack([self.status[None, :], status[:-1]])
+        opened = last(fire & (prev == CLEAR))
+        trigger_ts = np.where(
+            open_,
+            np.where(opened >= 0, times[np.maximum(opened, 0)], self.trigger_ts[None, :]),
+            None,
+        ).astype(object)
+        return SentinelBank(self.ids, status, counter, trigger_ts)
+
+    def step(self, trigger, reset=None, valid=None, reset_days=1, now: str | None = None) -> SentinelBank:
+        """Advance every sentinel by one observation (1-D arrays of length S)."""
+        history = self.advance(
+            np.atleast_2d(trigger),
+            None if reset is None else np.atleast_2d(reset),
+            None if valid is None else np.atleast_2d(valid),
+            reset_days,
+            [now or datetime.now(timezone.utc).isoformat()],
+        )
+        return history.row(-1)
+
+
+# ── State table ───────────────────────────────────────────────────────────────
+
+def _read_table(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != _TABLE_COLUMNS:
+            raise ValueError(f"unexpected sentinel state header: {reader.fieldnames}")
+        return list(reader)
+
+
+def _read_legacy(path: Path) -> dict[str, dict]:
+    """Per-sentinel JSON written before the shared table (one file per stack)."""
+    with open(path) as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {}
+
+
+def load_sentinel_bank(
+    stack: str,
+    ids,
+    path: Path | None = None,
+    legacy_path: Path | None = None,
+) -> SentinelBank:
+    """
+    Load one stack's rows of the state table; missing sentinels start CLEAR.
+
+    An unreadable table resets the stack to CLEAR. When the table has no rows
+    for the stack yet, a legacy per-stack JSON at legacy_path is imported.
+    """
+    bank = SentinelBank.clear(ids)
+    try:
+        rows = [r for r in _read_table(path or STATE_TABLE) if r["stack"] == stack]
+        if not rows and legacy_path is not None and legacy_path.exists():
+            rows = [
+                {"sentinel_id": sid, "status": e.get("status", "CLEAR"),
+                 "counter": e.get("cooling_days", e.get("hold_down_days", 0)),
+                 "trigger_timestamp": e.get("trigger_timestamp")}
+                for sid, e in _read_legacy(legacy_path).items() if isinstance(e, dict)
+            ]
+        for r in rows:
+            if r["sentinel_id"] not in bank.ids:
+                continue
+            j = bank.index(r["sentinel_id"])
+            bank.status[j] = _STATUS_CODES.get(r["status"], CLEAR)
+            bank.counter[j] = int(r["counter"] or 0) if bank.status[j] != CLEAR else 0
+            bank.trigger_ts[j] = (r["trigger_timestamp"] or None) if bank.status[j] != CLEAR else None
+    except Exception:
+        logger.warning("Sentinel state table unreadable; resetting %s sentinels to CLEAR", stack, exc_info=True)
+        return SentinelBank.clear(ids)
+    return bank
+
+
+@contextmanager
+def _table_lock(path: Path):
+    """Exclusive lock on a sidecar file, held across a state table read-modify-write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def save_sentinel_bank(stack: str, bank: SentinelBank, path: Path | None = None) -> None:
+    """Replace one stack's rows of the state table, keeping the other stacks' rows.
+
+    The rewrite runs under a file lock so concurrent stacks don't drop each
+    other's rows, and lands via a temp file + os.replace so readers never see
+    a half-written table.
+    """
+    path = path or STATE_TABLE
+    with _table_lock(path):
+        try:
+            others = [r for r in _read_table(path) if r["stack"] != stack]
+        except Exception:
+            others = []
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".csv.tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=_TABLE_COLUMNS)
+                writer.writeheader()
+                writer.writerows(others)
+                for j, sid in enumerate(bank.ids):
+                    writer.writerow({
+                        "stack": stack,
+                        "sentinel_id": sid,
+                        "status": STATUS_VALUES[int(bank.status[j])],
+                        "counter": int(bank.counter[j]),
+                        "trigger_timestamp": bank.trigger_ts[j] or "",
+                    })
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
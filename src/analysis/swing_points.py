@@ -0,0 +1,66 @@
+"""
+Vectorized swing-point (local extrema) detection.
+
+Pure function interface:
+    swing_lows(values, order=1)   -> bool mask of local minima
+    swing_highs(values, order=1)  -> bool mask of local maxima
+    recent_swings(values, mask, n) -> the n most recent swing values, oldest first
+
+values is 1-D (one series) or 2-D (bars × tickers, e.g. a whole pool's full
+history); every function works along axis 0 with array comparisons only — no
+per-bar Python loop. A point is a swing low (high) when it is strictly below
+(above) each of the `order` bars on either side, so the last `order` bars can
+never qualify: a swing is only confirmed once later bars exist. NaN bars are
+never swing points and do not confirm their neighbours.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def _swings(values, order: int, lower: bool) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    n = arr.shape[0]
+    mask = ~np.isnan(arr)
+    if n < 2 * order + 1:
+        return np.zeros(arr.shape, dtype=bool)
+    mask[:order] = False
+    mask[n - order:] = False
+    core = arr[order:n - order]
+    for k in range(1, order + 1):
+        before = arr[order - k:n - order - k]
+        after = arr[order + k:n - order + k]
+        if lower:
+            mask[order:n - order] &= (core < before) & (core < after)
+        else:
+            mask[order:n - order] &= (core > before) & (core > after)
+    return mask
+
+
+def swing_lows(values, order: int = 1) -> np.ndarray:
+    """True where a bar is strictly lower than the `order` bars on each side."""
+    return _swings(values, order, lower=True)
+
+
+def swing_highs(values, order: int = 1) -> np.ndarray:
+    """True where a bar is strictly higher than the `order` bars on each side."""
+    return _swings(values, order, lower=False)
+
+
+def recent_swings(values, mask, n: int) -> np.ndarray:
+    """The n most recent swing values per column, oldest first, NaN-padded at the front.
+
+    Returns shape (n,) for 1-D input and (n, columns) for 2-D input.
+    """
+    arr = np.asarray(values, dtype=float)
+    sel = np.asarray(mask, dtype=bool)
+    one_d = arr.ndim == 1
+    if one_d:
+        arr, sel = arr[:, None], sel[:, None]
+    # 1 = most recent swing in its column, 2 = the one before, ...
+    rank = np.cumsum(sel[::-1], axis=0)[::-1]
+    rows, cols = np.nonzero(sel & (rank <= n))
+    out = np.full((n, arr.shape[1]), np.nan)
+    out[n - rank[rows, cols], cols] = arr[rows, cols]
+    return out[:, 0] if one_d else out
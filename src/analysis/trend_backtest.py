@@ -0,0 +1,247 @@
+"""
+Walk-forward measurement of the trending-up phase and exhaustion rules.
+
+Pure function interface:
+    rule_signals(df)            -> per-bar trend_phase + exhaustion flags
+    simulate_trades(df, horizon) -> per-bar entry/stop/target outcome
+    backtest_ticker(df, ticker) -> per-bar events (signals + outcomes + forward returns)
+    summarize(events)           -> {"by_phase": DataFrame, "by_signal": DataFrame}
+
+rule_signals evaluates _determine_trend_phase and _check_exhaustion_signals
+for every bar at once with shifted/rolling arrays instead of calling analyze()
+on each prefix; the indicators are causal, so bar t sees exactly what
+analyze(df[:t+1]) would. Trades enter at the signal bar's close and exit at
+the first touch of the module's stop (-6.5%) or first target (+25%) — a tie
+on the same bar counts as a stop — or at the close `horizon` bars later.
+
+This measures fixed rules for the annual calibration review (ADR-0009); it
+is not a parameter search, and the stop/target levels are an evaluation exit
+rule only, not position advice (ADR-0006).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .trending_up import (
+    _ACCELERATION_DIST,
+    _ADX_HIGH_THRESHOLD,
+    _BREAKOUT_VOL_MULTIPLIER,
+    _CONSOLIDATION_DAYS,
+    _CONSOLIDATION_RANGE,
+    _INITIAL_STOP_LOSS_PCT,
+    _MIN_ROWS,
+    _PULLBACK_MA_BAND,
+    _PULLBACK_VOL_SHRINK,
+    _STEEP_SLOPE_MULTIPLIER,
+    _TARGET_1_PCT,
+    _TOPPING_VOL_LOOKBACK,
+    _compute_indicators,
+)
+
+DEFAULT_HORIZON = 60
+FORWARD_DAYS = (5, 20, 60)
+
+PHASES = ["breakout", "pullback", "consolidation", "acceleration", "topping", "neutral"]
+EXHAUSTION_FLAGS = [
+    "vol_no_price", "rsi_divergence", "macd_histogram_shrink", "steep_slope_acceleration",
+    "gap_up_long_upper_shadow", "below_ma20_no_recovery", "adx_peak_reversal",
+]
+
+
+def _last_valid_peak_reversal(adx: pd.Series) -> np.ndarray:
+    """ADX peak reversal over the last 5 non-NaN ADX values up to each bar."""
+    values = adx.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    compact = values[valid]
+    out = np.zeros(len(values), dtype=bool)
+    if len(compact) < 5:
+        return out
+    peak = pd.Series(compact).rolling(5).max().to_numpy()
+    flag = (peak > _ADX_HIGH_THRESHOLD) & (compact < peak * 0.95)
+    k = np.cumsum(valid) - 1               # index of the last valid value at each bar
+    has = k >= 4
+    out[has] = flag[k[has]]
+    return out
+
+
+def rule_signals(df: pd.DataFrame, ind: dict | None = None) -> pd.DataFrame:
+    """trend_phase and the seven exhaustion flags for every bar, as analyze() gives them.
+
+    Bars with fewer than 30 rows of history (analyze: data_insufficient) get phase "".
+    """
+    ind = ind if ind is not None else _compute_indicators(df)
+    close, high, low = df["close"], df["high"], df["low"]
+    open_, volume = df["open"], df["volume"]
+    ma20, rsi, adx = ind["ma20"], ind["rsi"], ind["adx"]
+    vol_ratio = ind["vol_ratio"]
+    hist = ind["macd"]["histogram"]
+    pos = np.arange(len(df))
+
+    # Shared by the topping phase and exhaustion signal 1 (天量滞涨)
+    vol_high = volume >= volume.rolling(_TOPPING_VOL_LOOKBACK, min_periods=1).max() * 0.98
+    price_high = close >= close.rolling(_TOPPING_VOL_LOOKBACK, min_periods=1).max() * 0.98
+    vol_no_price = (vol_high & ~price_high) & (pos + 1 >= _TOPPING_VOL_LOOKBACK)
+
+    # ── Phase (same priority as _determine_trend_phase) ──
+    rsi_div_10 = (close > close.shift(10)) & (rsi < rsi.shift(10)) & (rsi > 60) & (pos + 1 >= 20)
+    topping = vol_no_price | rsi_div_10
+
+    ma20_ok = ma20.notna() & (ma20 > 0)
+    dist = (close - ma20) / ma20
+    acceleration = ma20_ok & (dist > _ACCELERATION_DIST) & (rsi.fillna(50) > 70)
+    pullback = ma20_ok & (dist.abs() <= _PULLBACK_MA_BAND) & (vol_ratio.fillna(1.0) < _PULLBACK_VOL_SHRINK)
+
+    high_20 = close.shift(1).rolling(20).max()
+    breakout = (close > high_20) & vol_ratio.notna() & (vol_ratio >= _BREAKOUT_VOL_MULTIPLIER) & (pos + 1 >= 25)
+
+    span = (
+        high.rolling(_CONSOLIDATION_DAYS).max() - low.rolling(_CONSOLIDATION_DAYS).min()
+    ) / close.rolling(_CONSOLIDATION_DAYS).mean()
+    consolidation = span <= _CONSOLIDATION_RANGE
+
+    phase = np.select(
+        [topping, acceleration, pullback, breakout, consolidation],
+        ["topping", "acceleration", "pullback", "breakout", "consolidation"],
+        default="neutral",
+    ).astype(object)
+    phase[pos + 1 < _MIN_ROWS] = ""
+
+    # ── Exhaustion (same checks as _check_exhaustion_signals) ──
+    rsi_divergence = (close > close.shift(7)) & (rsi < rsi.shift(7)) & (rsi > 55)
+    macd_shrink = (
+        (hist > 0) & (hist.shift(1) > 0) & (hist.shift(2) > 0)
+        & (hist.shift(2) > hist.shift(1)) & (hist.shift(1) > hist)
+    )
+    daily_avg_20 = (close.shift(20) - close).abs() / 20 / close.shift(20)
+    recent_5 = (close - close.shift(5)).abs() / 5 / close.shift(5)
+    steep = (daily_avg_20 > 0) & (recent_5 > daily_avg_20 * _STEEP_SLOPE_MULTIPLIER) & (pos + 1 >= 25)
+    body = (close - open_).abs()
+    upper_shadow = high - np.maximum(close, open_)
+    gap_shadow = (open_ > close.shift(1) * 1.005) & (upper_shadow > body * 2) & (body > 0)
+    prev_above = (close.shift(1) >= ma20.shift(1)) | ma20.shift(1).isna()
+    below_ma20 = ma20.notna() & (close < ma20) & prev_above
+
+    flags = pd.DataFrame({
+        "vol_no_price": vol_no_price,
+        "rsi_divergence": rsi_divergence,
+        "macd_histogram_shrink": macd_shrink,
+        "steep_slope_acceleration": steep,
+        "gap_up_long_upper_shadow": gap_shadow,
+        "below_ma20_no_recovery": below_ma20,
+        "adx_peak_reversal": _last_valid_peak_reversal(adx),
+    }, index=df.index).fillna(False).astype(bool)
+    flags[pos + 1 < max(_MIN_ROWS, 20)] = False
+
+    out = pd.DataFrame({"trend_phase": phase}, index=df.index)
+    out[EXHAUSTION_FLAGS] = flags
+    out["exit_warning"] = flags.sum(axis=1) >= 2
+    return out
+
+
+def simulate_trades(df: pd.DataFrame, horizon: int = DEFAULT_HORIZON) -> pd.DataFrame:
+    """Entry at every bar's close; stop/target/timeout outcome over the next `horizon` bars.
+
+    outcome: "target" | "stop" | "timeout", or "open" when fewer than
+    `horizon` bars follow and neither level was touched (excluded from stats).
+    """
+    close = df["close"].to_numpy(dtype=float)
+    n = len(close)
+    pad = np.full(horizon, np.nan)
+    low_win = np.lib.stride_tricks.sliding_window_view(np.concatenate([df["low"].to_numpy(float)[1:], pad]), horizon)[:n]
+    high_win = np.lib.stride_tricks.sliding_window_view(np.concatenate([df["high"].to_numpy(float)[1:], pad]), horizon)[:n]
+
+    stop = close * (1 - _INITIAL_STOP_LOSS_PCT)
+    target = close * (1 + _TARGET_1_PCT)
+    stop_hit = low_win <= stop[:, None]
+    target_hit = high_win >= target[:, None]
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), horizon)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), horizon)
+
+    is_stop = (first_stop < horizon) & (first_stop <= first_target)
+    is_target = (first_target < horizon) & ~is_stop
+    full = np.arange(n) + horizon < n
+    outcome = np.select([is_stop, is_target, full], ["stop", "target", "timeout"], default="open").astype(object)
+
+    exit_idx = np.minimum(np.minimum(first_stop, first_target), horizon - 1)
+    timeout_close = np.concatenate([close[horizon:], np.full(min(horizon, n), np.nan)])[:n]
+    trade_return = np.select(
+        [is_stop, is_target, full],
+        [-_INITIAL_STOP_LOSS_PCT, _TARGET_1_PCT, timeout_close / close - 1],
+        default=np.nan,
+    )
+
+    # Max adverse excursion up to (and including) the exit bar
+    within = np.arange(horizon)[None, :] <= exit_idx[:, None]
+    worst_low = np.where(within & ~np.isnan(low_win), low_win, np.inf).min(axis=1)
+    mae = np.where(np.isfinite(worst_low), worst_low / close - 1, np.nan)
+
+    return pd.DataFrame({
+        "outcome": outcome,
+        "trade_return": trade_return,
+        "bars_held": np.where(outcome == "open", np.nan, exit_idx + 1),
+        "max_drawdown": np.where(outcome == "open", np.nan, mae),
+    }, index=df.index)
+
+
+def backtest_ticker(df: pd.DataFrame, ticker: str = "", horizon: int = DEFAULT_HORIZON) -> pd.DataFrame:
+    """Signals, trade outcome and forward returns for every bar with ≥30 bars of history."""
+    if df is None or len(df) < _MIN_ROWS:
+        return pd.DataFrame()
+    events = rule_signals(df).join(simulate_trades(df, horizon))
+    close = df["close"]
+    for k in FORWARD_DAYS:
+        events[f"fwd_{k}"] = close.shift(-k) / close - 1
+    events = events[events["trend_phase"] != ""]
+    events.insert(0, "ticker", ticker)
+    events.index.name = "date"
+    return events.reset_index()
+
+
+def _trade_stats(group: pd.DataFrame) -> dict:
+    closed = group[group["outcome"] != "open"]
+    stats = {
+        "signals": len(group),
+        "closed": len(closed),
+        "hit_rate": (closed["outcome"] == "target").mean() if len(closed) else np.nan,
+        "stop_rate": (closed["outcome"] == "stop").mean() if len(closed) else np.nan,
+        "timeout_rate": (closed["outcome"] == "timeout").mean() if len(closed) else np.nan,
+        "avg_return": closed["trade_return"].mean(),
+        "median_return": closed["trade_return"].median(),
+        "avg_max_drawdown": closed["max_drawdown"].mean(),
+        "worst_max_drawdown": closed["max_drawdown"].min(),
+    }
+    for k in FORWARD_DAYS:
+        stats[f"avg_fwd_{k}"] = group[f"fwd_{k}"].mean()
+    return stats
+
+
+def summarize(events: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Per-phase trade statistics and per-exhaustion-signal forward statistics.
+
+    by_signal.warning_hit_rate is the share of signals followed by a lower
+    close 20 bars later (the signal "worked" as a warning); the "all_bars"
+    row is the unconditional baseline to compare against.
+    """
+    if events.empty:
+        return {"by_phase": pd.DataFrame(), "by_signal": pd.DataFrame()}
+
+    by_phase = pd.DataFrame(
+        {phase: _trade_stats(events[events["trend_phase"] == phase]) for phase in PHASES}
+    ).T.astype({"signals": int, "closed": int})
+    by_phase.index.name = "trend_phase"
+
+    rows = {}
+    for name in [*EXHAUSTION_FLAGS, "exit_warning", "all_bars"]:
+        group = events if name == "all_bars" else events[events[name]]
+        fwd_20 = group["fwd_20"].dropna()
+        rows[name] = {
+            "signals": len(group),
+            "warning_hit_rate": (fwd_20 < 0).mean() if len(fwd_20) else np.nan,
+            **{f"avg_fwd_{k}": group[f"fwd_{k}"].mean() for k in FORWARD_DAYS},
+            "avg_max_drawdown": group["max_drawdown"].mean(),
+        }
+    by_signal = pd.DataFrame(rows).T.astype({"signals": int})
+    by_signal.index.name = "signal"
+    return {"by_phase": by_phase, "by_signal": by_signal}
@@ -0,0 +1,251 @@
+"""
+Incremental (streaming) indicator engine for the trending-up strategy.
+
+Pure function interface:
+    advance_frame(state, bars) -> indicator DataFrame for the new bars
+    TrendIndicatorState.to_dict() / from_dict() for persistence
+
+analyze() recomputes every indicator over the whole history; here each
+indicator is carried as a small recurrence state (EWM values, rolling-window
+sums, previous bar) and advanced one bar at a time, so a daily refresh costs
+O(new bars) instead of O(history).
+
+The kernels replay pandas' own recurrences — adjust=False EWM (including its
+NaN handling and com→alpha conversion) and rolling().mean()'s running
+Kahan-compensated sums — so the values equal the batch path's bit for bit,
+not just approximately. Column names match TrendAnalysis.indicators; ADX is
+trending_up.compute_adx, the single ADX definition analyze() also uses.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, field, fields
+
+import pandas as pd
+
+STATE_VERSION = 1
+
+INDICATOR_COLUMNS = [
+    "ma20", "ma60", "ma120", "vol_ma20", "adx", "rsi",
+    "macd", "macd_signal", "macd_histogram", "kdj_k", "kdj_d", "vol_ratio",
+]
+
+_NAN = float("nan")
+
+
+def _nz(x: float) -> float:
+    """Series.replace(0, np.nan) for a scalar."""
+    return _NAN if x == 0 else x
+
+
+def _fmax(a: float, b: float) -> float:
+    """np.fmax for scalars: NaN only if both are NaN."""
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
+
+
+# ── Recurrence kernels ────────────────────────────────────────────────────────
+
+@dataclass
+class _Ewm:
+    """ewm(com=..., adjust=False).mean() advanced one value at a time."""
+
+    com: float
+    weighted: float = _NAN
+    old_wt: float = 1.0
+
+    @classmethod
+    def from_alpha(cls, alpha: float) -> _Ewm:
+        return cls(com=(1.0 - alpha) / alpha)
+
+    @classmethod
+    def from_span(cls, span: int) -> _Ewm:
+        return cls(com=(span - 1) / 2.0)
+
+    def step(self, x: float) -> float:
+        alpha = 1.0 / (1.0 + self.com)
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - alpha
+            if x == x:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + alpha * x) / (self.old_wt + alpha)
+                self.old_wt = 1.0
+        elif x == x:
+            self.weighted = x
+        return self.weighted
+
+
+@dataclass
+class _RollingMean:
+    """rolling(window).mean() with pandas' running Kahan sums."""
+
+    window: int
+    values: list = field(default_factory=list)
+    nobs: int = 0
+    sum_x: float = 0.0
+    comp_add: float = 0.0
+    comp_remove: float = 0.0
+    neg_ct: int = 0
+    same_ct: int = 0
+    prev: float = _NAN
+
+    def step(self, x: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values.pop(0)
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.comp_remove
+                t = self.sum_x + y
+                self.comp_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+        self.values.append(x)
+        if x == x:
+            self.nobs += 1
+            y = x - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, x) < 0:
+                self.neg_ct += 1
+            self.same_ct = self.same_ct + 1 if x == self.prev else 1
+            self.prev = x
+
+        if self.nobs < self.window:
+            return _NAN
+        if self.same_ct >= self.nobs:
+            return self.prev
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+@dataclass
+class _RollingExtreme:
+    """rolling(window).min() / .max()."""
+
+    window: int
+    use_max: bool
+    values: list = field(default_factory=list)
+
+    def step(self, x: float) -> float:
+        self.values.append(x)
+        if len(self.values) > self.window:
+            self.values.pop(0)
+        valid = [v for v in self.values if v == v]
+        if len(valid) < self.window:
+            return _NAN
+        return max(valid) if self.use_max else min(valid)
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class TrendIndicatorState:
+    n_bars: int = 0
+    last_date: str | None = None
+    prev_close: float = _NAN
+    prev_high: float = _NAN
+    prev_low: float = _NAN
+
+    ma20: _RollingMean = field(default_factory=lambda: _RollingMean(20))
+    ma60: _RollingMean = field(default_factory=lambda: _RollingMean(60))
+    ma120: _RollingMean = field(default_factory=lambda: _RollingMean(120))
+    vol_ma20: _RollingMean = field(default_factory=lambda: _RollingMean(20))
+    low9: _RollingExtreme = field(default_factory=lambda: _RollingExtreme(9, use_max=False))
+    high9: _RollingExtreme = field(default_factory=lambda: _RollingExtreme(9, use_max=True))
+
+    ema12: _Ewm = field(default_factory=lambda: _Ewm.from_span(12))
+    ema26: _Ewm = field(default_factory=lambda: _Ewm.from_span(26))
+    macd_signal: _Ewm = field(default_factory=lambda: _Ewm.from_span(9))
+    rsi_gain: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    rsi_loss: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    atr: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    dm_pos: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    dm_neg: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    adx: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 14))
+    kdj_k: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 3))
+    kdj_d: _Ewm = field(default_factory=lambda: _Ewm.from_alpha(1 / 3))
+
+    def to_dict(self) -> dict:
+        return {"version": STATE_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> TrendIndicatorState | None:
+        """Rebuild from to_dict() output; None if written by another STATE_VERSION."""
+        if data.get("version") != STATE_VERSION:
+            return None
+        state = cls()
+        for f in fields(cls):
+            value = data.get(f.name)
+            current = getattr(state, f.name)
+            if isinstance(current, (_Ewm, _RollingMean, _RollingExtreme)):
+                setattr(state, f.name, type(current)(**value))
+            else:
+                setattr(state, f.name, value)
+        return state
+
+
+# ── Advance ───────────────────────────────────────────────────────────────────
+
+def _advance(s: TrendIndicatorState, o: float, h: float, l: float, c: float, v: float) -> tuple:
+    ma20, ma60, ma120 = s.ma20.step(c), s.ma60.step(c), s.ma120.step(c)
+    vol_ma20 = s.vol_ma20.step(v)
+
+    # ADX (Wilder, as trending_up.compute_adx)
+    pc, ph, pl = s.prev_close, s.prev_high, s.prev_low
+    tr = _fmax(_fmax(h - l, abs(h - pc)), abs(l - pc))
+    up, down = h - ph, pl - l
+    dm_pos = max(up if up > down else 0.0, 0.0)
+    dm_neg = max(down if down > up else 0.0, 0.0)
+    atr = _nz(s.atr.step(tr))
+    di_pos = 100 * s.dm_pos.step(dm_pos) / atr
+    di_neg = 100 * s.dm_neg.step(dm_neg) / atr
+    adx = s.adx.step(100 * abs(di_pos - di_neg) / _nz(di_pos + di_neg))
+
+    # RSI(14)
+    delta = c - pc
+    gain = delta if not delta < 0 else 0.0
+    loss = -(delta if not delta > 0 else 0.0)
+    rs = s.rsi_gain.step(gain) / _nz(s.rsi_loss.step(loss))
+    rsi = 100 - (100 / (1 + rs))
+
+    # MACD(12, 26, 9)
+    macd = s.ema12.step(c) - s.ema26.step(c)
+    signal = s.macd_signal.step(macd)
+
+    # KDJ(9, 3, 3)
+    low_n, high_n = s.low9.step(l), s.high9.step(h)
+    rsv = (c - low_n) / _nz(high_n - low_n) * 100
+    k = s.kdj_k.step(rsv)
+    d = s.kdj_d.step(k)
+
+    s.prev_close, s.prev_high, s.prev_low = c, h, l
+    s.n_bars += 1
+    return (
+        ma20, ma60, ma120, vol_ma20, adx, rsi,
+        macd, signal, macd - signal, k, d, v / _nz(vol_ma20),
+    )
+
+
+def advance_frame(state: TrendIndicatorState, bars: pd.DataFrame) -> pd.DataFrame:
+    """Advance state over bars (OHLCV, date index, oldest first); returns their indicator rows.
+
+    state is updated in place. A fresh TrendIndicatorState() over the full
+    history reproduces the batch indicators of analyze().
+    """
+    rows = [
+        _advance(state, *map(float, bar))
+        for bar in bars[["open", "high", "low", "close", "volume"]].itertuples(index=False, name=None)
+    ]
+    if len(bars):
+        state.last_date = bars.index[-1].strftime("%Y-%m-%d")
+    return pd.DataFrame(rows, index=bars.index, columns=INDICATOR_COLUMNS, dtype=float)
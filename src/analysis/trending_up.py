@@ -3,8 +3,13 @@ Trending-up strategy analysis engine.
 
 Pure function interface:
     analyze(df, entry_order=1, regime_multiplier=1.0) -> TrendAnalysis
+    compute_adx(df, period=14) -> Wilder ADX series (or wide frame for panels)
+    analyze_panel(bars, entry_order=1, regime_multiplier=1.0)
+        -> (dict[ticker, TrendAnalysis], ranked summary DataFrame)
 
 All logic is stateless. Input: OHLCV DataFrame (date index, ≥120 rows recommended).
+analyze_panel computes the indicators for every ticker at once on wide
+(bars × tickers) frames and gives the same per-ticker results as analyze.
 """
 
 from __future__ import annotations
@@ -15,6 +20,8 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
+from .swing_points import recent_swings, swing_lows
+
 # ── Base pyramid position fractions (entry order 1..4) ──────────────────────
 _PYRAMID_BASE = [0.40, 0.30, 0.20, 0.10]
 
@@ -36,6 +43,8 @@ _CONSOLIDATION_RANGE = 0.05       # max 5% high-low range
 _CONSOLIDATION_DAYS = 5           # at least 5 days
 _TOPPING_VOL_LOOKBACK = 20
 
+_MIN_ROWS = 30                    # below this, analysis is not attempted
+
 # ── Exhaustion signal constants ───────────────────────────────────────────────
 _ADX_HIGH_THRESHOLD = 40
 _STEEP_SLOPE_MULTIPLIER = 3.0
@@ -113,36 +122,24 @@ def _compute_mas(df: pd.DataFrame) -> dict:
     }
 
 
-def _compute_adx(df: pd.DataFrame) -> pd.Series:
-    """ADX(14) computed from scratch to avoid pandas_ta compatibility issues."""
-    try:
-        import pandas_ta as ta
-        adx_df = ta.adx(df["high"], df["low"], df["close"], length=14)
-        if adx_df is not None and "ADX_14" in adx_df.columns:
-            return adx_df["ADX_14"]
-    except Exception:
-        pass
-    # Manual fallback
-    return _adx_manual(df, 14)
-
+def compute_adx(df: pd.DataFrame | dict[str, pd.DataFrame], period: int = 14) -> pd.Series | pd.DataFrame:
+    """Wilder ADX(period) of an OHLC frame, or of wide high/low/close panels.
 
-def _adx_manual(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    The one ADX definition of the strategy: analyze(), analyze_panel() and the
+    streaming TrendIndicatorState (src/analysis/trend_incremental) all match it.
+    """
     high = df["high"]
     low = df["low"]
     close = df["close"]
-    tr = pd.concat([
-        high - low,
-        (high - close.shift(1)).abs(),
-        (low - close.shift(1)).abs(),
-    ], axis=1).max(axis=1)
+    # fmax (NaN-skipping max) works for a single series and for wide panels alike
+    tr = np.fmax(np.fmax(high - low, (high - close.shift(1)).abs()), (low - close.shift(1)).abs())
     dm_pos = (high - high.shift(1)).where((high - high.shift(1)) > (low.shift(1) - low), 0.0).clip(lower=0)
     dm_neg = (low.shift(1) - low).where((low.shift(1) - low) > (high - high.shift(1)), 0.0).clip(lower=0)
     atr = tr.ewm(alpha=1 / period, adjust=False).mean()
     di_pos = 100 * dm_pos.ewm(alpha=1 / period, adjust=False).mean() / atr.replace(0, np.nan)
     di_neg = 100 * dm_neg.ewm(alpha=1 / period, adjust=False).mean() / atr.replace(0, np.nan)
     dx = 100 * (di_pos - di_neg).abs() / (di_pos + di_neg).replace(0, np.nan)
-    adx = dx.ewm(alpha=1 / period, adjust=False).mean()
-    return adx
+    return dx.ewm(alpha=1 / period, adjust=False).mean()
 
 
 def _compute_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
@@ -221,17 +218,10 @@ def _check_trend_confirmation(df: pd.DataFrame, ind: dict) -> dict:
 
 
 def _check_higher_lows(df: pd.DataFrame) -> bool:
-    """Detect if last 3 local lows are successively higher."""
-    lows = df["low"]
-    local_lows = []
-    for i in range(1, len(lows) - 1):
-        if lows.iloc[i] < lows.iloc[i - 1] and lows.iloc[i] < lows.iloc[i + 1]:
-            local_lows.append(lows.iloc[i])
-        if len(local_lows) >= 3:
-            break
-    if len(local_lows) < 3:
-        return False
-    return local_lows[-1] > local_lows[-2] > local_lows[-3]
+    """Detect if the three most recent swing lows are successively higher."""
+    lows = df["low"].to_numpy(dtype=float)
+    last3 = recent_swings(lows, swing_lows(lows), 3)
+    return bool(last3[2] > last3[1] > last3[0])
 
 
 def _check_pullback_vol_shrink(df: pd.DataFrame, vol_ma20: pd.Series) -> bool:
@@ -427,47 +417,46 @@ def _trailing_stop_pct(entry_price: float, current_price: float) -> float:
     return _INITIAL_STOP_LOSS_PCT
 
 
-# ── Public API ────────────────────────────────────────────────────────────────
+# ── Assembly ──────────────────────────────────────────────────────────────────
 
-def analyze(
-    df: pd.DataFrame | None,
-    ticker: str = "",
-    entry_order: int = 1,
-    regime_multiplier: float = 1.0,
-) -> TrendAnalysis:
-    """
-    Main entry point. Pure function — no I/O side effects.
-
-    Args:
-        df: OHLCV DataFrame with date index. Needs ≥120 rows for full analysis.
-        ticker: Display name.
-        entry_order: 1–4 pyramid entry sequence.
-        regime_multiplier: Position ceiling from macro regime (0–1).
+def _compute_indicators(df) -> dict:
+    """Indicator dict for one ticker, or — given wide frames — for a whole panel."""
+    mas = _compute_mas(df)
+    return {
+        **mas,
+        "adx": compute_adx(df),
+        "rsi": _compute_rsi(df),
+        "macd": _compute_macd(df),
+        "kdj": _compute_kdj(df),
+        "vol_ratio": _compute_volume_ratio(df, mas["vol_ma20"]),
+    }
 
-    Returns:
-        TrendAnalysis dataclass.
-    """
-    if df is None or df.empty or len(df) < 30:
-        return TrendAnalysis(ticker=ticker, data_insufficient=True)
 
-    data_insufficient = len(df) < 120
+def _indicators_from_frame(frame: pd.DataFrame, index: pd.Index) -> dict:
+    """Flat indicator columns (TrendAnalysis.indicators names) → the nested ind dict."""
+    frame = frame.reindex(index)
+    return {
+        "ma20": frame["ma20"],
+        "ma60": frame["ma60"],
+        "ma120": frame["ma120"],
+        "vol_ma20": frame["vol_ma20"],
+        "adx": frame["adx"],
+        "rsi": frame["rsi"],
+        "macd": {"macd": frame["macd"], "signal": frame["macd_signal"], "histogram": frame["macd_histogram"]},
+        "kdj": {"k": frame["kdj_k"], "d": frame["kdj_d"]},
+        "vol_ratio": frame["vol_ratio"],
+    }
 
-    # Compute indicators
-    mas = _compute_mas(df)
-    adx_series = _compute_adx(df)
-    rsi_series = _compute_rsi(df)
-    macd_dict = _compute_macd(df)
-    kdj_dict = _compute_kdj(df)
-    vol_ratio = _compute_volume_ratio(df, mas["vol_ma20"])
 
-    ind = {
-        **mas,
-        "adx": adx_series,
-        "rsi": rsi_series,
-        "macd": macd_dict,
-        "kdj": kdj_dict,
-        "vol_ratio": vol_ratio,
-    }
+def _build_analysis(
+    df: pd.DataFrame,
+    ind: dict,
+    ticker: str,
+    entry_order: int,
+    regime_multiplier: float,
+) -> TrendAnalysis:
+    """Rule evaluation on precomputed indicators (shared by analyze and analyze_panel)."""
+    data_insufficient = len(df) < 120
 
     # Trend confirmation
     confirm = _check_trend_confirmation(df, ind)
@@ -491,18 +480,18 @@ def analyze(
 
     # Pack indicators for charting (serializable values)
     indicators_export = {
-        "ma20": mas["ma20"],
-        "ma60": mas["ma60"],
-        "ma120": mas["ma120"],
-        "vol_ma20": mas["vol_ma20"],
-        "adx": adx_series,
-        "rsi": rsi_series,
-        "macd": macd_dict["macd"],
-        "macd_signal": macd_dict["signal"],
-        "macd_histogram": macd_dict["histogram"],
-        "kdj_k": kdj_dict["k"],
-        "kdj_d": kdj_dict["d"],
-        "vol_ratio": vol_ratio,
+        "ma20": ind["ma20"],
+        "ma60": ind["ma60"],
+        "ma120": ind["ma120"],
+        "vol_ma20": ind["vol_ma20"],
+        "adx": ind["adx"],
+        "rsi": ind["rsi"],
+        "macd": ind["macd"]["macd"],
+        "macd_signal": ind["macd"]["signal"],
+        "macd_histogram": ind["macd"]["histogram"],
+        "kdj_k": ind["kdj"]["k"],
+        "kdj_d": ind["kdj"]["d"],
+        "vol_ratio": ind["vol_ratio"],
     }
 
     return TrendAnalysis(
@@ -529,3 +518,150 @@ def analyze(
         data_insufficient=data_insufficient,
         indicators=indicators_export,
     )
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def analyze(
+    df: pd.DataFrame | None,
+    ticker: str = "",
+    entry_order: int = 1,
+    regime_multiplier: float = 1.0,
+    indicators: pd.DataFrame | None = None,
+) -> TrendAnalysis:
+    """
+    Main entry point. Pure function — no I/O side effects.
+
+    Args:
+        df: OHLCV DataFrame with date index. Needs ≥120 rows for full analysis.
+        ticker: Display name.
+        entry_order: 1–4 pyramid entry sequence.
+        regime_multiplier: Position ceiling from macro regime (0–1).
+        indicators: Precomputed indicator frame for df's dates (columns as
+            TrendAnalysis.indicators, e.g. from trend_incremental); skips
+            the indicator computation.
+
+    Returns:
+        TrendAnalysis dataclass.
+    """
+    if df is None or df.empty or len(df) < _MIN_ROWS:
+        return TrendAnalysis(ticker=ticker, data_insufficient=True)
+
+    ind = _indicators_from_frame(indicators, df.index) if indicators is not None else _compute_indicators(df)
+    return _build_analysis(df, ind, ticker, entry_order, regime_multiplier)
+
+
+# ── Panel (cross-sectional) mode ─────────────────────────────────────────────
+
+_OHLCV = ("open", "high", "low", "close", "volume")
+
+# Summary table ordering: usable data first, then uptrends without exit
+# warnings, then by trend score and ADX strength.
+_RANK_COLUMNS = ["data_insufficient", "is_uptrend", "exit_warning", "trend_score", "adx"]
+_RANK_ASCENDING = [True, False, True, False, False]
+
+
+def _build_panel(frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """Right-align each ticker's bars into wide (bar position × ticker) frames.
+
+    Rows are bar positions, not dates: the last row is every ticker's latest
+    bar and shorter histories are NaN-padded at the top. Rolling and
+    adjust=False EWM kernels then see exactly the rows the per-ticker path
+    sees, so suspensions and different listing dates don't change the numbers.
+    """
+    tickers = list(frames)
+    n_rows = max(len(df) for df in frames.values())
+    panel = {}
+    for col in _OHLCV:
+        values = np.full((n_rows, len(tickers)), np.nan)
+        for j, df in enumerate(frames.values()):
+            values[n_rows - len(df):, j] = df[col].to_numpy(dtype=float)
+        panel[col] = pd.DataFrame(values, columns=tickers)
+    return panel
+
+
+def _ticker_slice(ind: dict, ticker: str, index: pd.Index) -> dict:
+    """One ticker's indicator series (re-indexed by its dates) from the panel dict."""
+    n = len(index)
+    out = {}
+    for key, value in ind.items():
+        if isinstance(value, dict):
+            out[key] = _ticker_slice(value, ticker, index)
+        else:
+            out[key] = pd.Series(value[ticker].to_numpy()[-n:], index=index)
+    return out
+
+
+def _summary_row(result: TrendAnalysis) -> dict:
+    ind = result.indicators
+
+    def _last(key: str) -> float:
+        series = ind.get(key)
+        return float(series.iloc[-1]) if series is not None and len(series) else np.nan
+
+    ma20 = _last("ma20")
+    return {
+        "ticker": result.ticker,
+        "trend_score": result.trend_score,
+        "is_uptrend": result.is_uptrend,
+        "trend_phase": result.trend_phase,
+        "exit_warning": result.exit_warning,
+        "exhaustion_count": result.exhaustion_signals.triggered_count(),
+        "close": result.entry_price if ind else np.nan,
+        "dist_ma20_pct": (result.entry_price - ma20) / ma20 * 100 if ma20 and not np.isnan(ma20) else np.nan,
+        "adx": _last("adx"),
+        "rsi": _last("rsi"),
+        "vol_ratio": _last("vol_ratio"),
+        "data_insufficient": result.data_insufficient,
+    }
+
+
+def analyze_panel(
+    bars: dict[str, pd.DataFrame | None],
+    entry_order: int = 1,
+    regime_multiplier: float = 1.0,
+    indicators: dict[str, pd.DataFrame] | None = None,
+) -> tuple[dict[str, TrendAnalysis], pd.DataFrame]:
+    """
+    Cross-sectional scan: analyze many tickers at once. Pure function.
+
+    MAs, ADX, RSI, MACD, KDJ and volume ratio are computed once on wide
+    (bar position × ticker) frames; the rule checks then run per ticker on
+    the last few bars. Each TrendAnalysis equals analyze(df, ticker, ...).
+
+    Args:
+        bars: {ticker: OHLCV DataFrame with date index}; None/short frames
+              come back as data_insufficient.
+        entry_order, regime_multiplier: as in analyze, applied to every ticker.
+        indicators: optional {ticker: precomputed indicator frame} (see
+              analyze); those tickers skip the panel computation.
+
+    Returns:
+        (results, table): {ticker: TrendAnalysis}, and a summary DataFrame
+        indexed by ticker, ranked best first (uptrend, no exit warning,
+        trend score, ADX).
+    """
+    indicators = indicators or {}
+    usable = {t: df for t, df in bars.items() if df is not None and len(df) >= _MIN_ROWS}
+    results: dict[str, TrendAnalysis] = {}
+
+    to_compute = {t: df for t, df in usable.items() if t not in indicators}
+    ind_panel = _compute_indicators(_build_panel(to_compute)) if to_compute else {}
+    for ticker, df in usable.items():
+        if ticker in indicators:
+            ind = _indicators_from_frame(indicators[ticker], df.index)
+        else:
+            ind = _ticker_slice(ind_panel, ticker, df.index)
+        results[ticker] = _build_analysis(df, ind, ticker, entry_order, regime_multiplier)
+
+    for ticker in bars:
+        if ticker not in results:
+            results[ticker] = TrendAnalysis(ticker=ticker, data_insufficient=True)
+
+    table = pd.DataFrame([_summary_row(results[t]) for t in bars])
+    if not table.empty:
+        table = (
+            table.sort_values(_RANK_COLUMNS, ascending=_RANK_ASCENDING, na_position="last", kind="stable")
+            .set_index("ticker")
+        )
+    return results, table
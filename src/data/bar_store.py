@@ -0,0 +1,249 @@
+"""
+Shared daily OHLCV bar store for stocks, indices and FX.
+
+Bars used to live in three places: per-ticker CSVs under data_cache/stocks/,
+index closes in the china cache (index_hs300_daily.csv / index_gem_daily.csv),
+and FX that MarketQuoteProvider re-downloaded on every snapshot. Every read
+re-parsed a CSV. All of them now go through one store:
+
+    data_cache/bars/
+        _index.json                     symbol index: symbol → {dir, kind}
+        <SAFE_SYMBOL>/meta.json         {symbol, kind, version, rows, first, last, columns, attrs}
+        <SAFE_SYMBOL>/v<N>/date.npy     datetime64[ns], ascending
+        <SAFE_SYMBOL>/v<N>/<col>.npy    float64, one file per column
+
+Reads memory-map the column files (np.load(mmap_mode="r")) and slice them by
+date with searchsorted, so repeated page renders and jobs get zero-copy views;
+open maps are memoized per symbol and reused until meta.json changes. Frames
+returned by `frame()` are therefore READ-ONLY — `.copy()` before mutating.
+A frame's `attrs` (source, as-of stamps, ...) are kept in meta.json and
+restored by `frame()`, so they survive `write()` / `upsert()` round trips.
+
+Writes never touch files a reader may have mapped: each write goes to a new
+version directory, meta.json is then swapped atomically, and versions older
+than the previous one are removed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+_DEFAULT_ROOT = Path("data_cache/bars")
+_INDEX_FILE = "_index.json"
+
+
+def _safe_dir(symbol: str) -> str:
+    """Filesystem-safe directory name ('600519.SH' → '600519_SH', 'USDCNY=X' → 'USDCNY_X')."""
+    return re.sub(r"[^0-9A-Za-z]+", "_", symbol).strip("_").upper() or "_"
+
+
+def _atomic_write_json(path: Path, payload: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+@dataclass
+class _Mapped:
+    meta_mtime_ns: int
+    dates: np.ndarray
+    columns: dict[str, np.ndarray]
+    attrs: dict
+
+
+class BarStore:
+    """Columnar, memory-mapped daily bars keyed by symbol."""
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._mapped: dict[str, _Mapped] = {}
+
+    # ── layout ──────────────────────────────────────────────────────────────
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / _safe_dir(symbol)
+
+    def _read_meta(self, symbol: str) -> dict | None:
+        try:
+            return json.loads((self._dir(symbol) / "meta.json").read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _read_index(self) -> dict:
+        try:
+            return json.loads((self.root / _INDEX_FILE).read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    # ── reads ───────────────────────────────────────────────────────────────
+
+    def _map(self, symbol: str) -> _Mapped | None:
+        meta_path = self._dir(symbol) / "meta.json"
+        try:
+            mtime_ns = meta_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._mapped.get(symbol)
+            if cached is not None and cached.meta_mtime_ns == mtime_ns:
+                return cached
+            meta = self._read_meta(symbol)
+            if meta is None:
+                return None
+            vdir = self._dir(symbol) / f"v{meta['version']}"
+            try:
+                dates = np.load(vdir / "date.npy", mmap_mode="r")
+                columns = {c: np.load(vdir / f"{c}.npy", mmap_mode="r") for c in meta["columns"]}
+            except (OSError, ValueError) as e:
+                logger.warning("bar store: %s v%s unreadable: %s", symbol, meta.get("version"), e)
+                return None
+            mapped = _Mapped(mtime_ns, dates, columns, meta.get("attrs") or {})
+            self._mapped[symbol] = mapped
+            return mapped
+
+    def _bounds(self, dates: np.ndarray, start, end) -> tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns"), "left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns"), "right"))
+        return lo, hi
+
+    def _slice(self, mapped: _Mapped, start, end) -> dict[str, np.ndarray]:
+        lo, hi = self._bounds(mapped.dates, start, end)
+        return {"date": mapped.dates[lo:hi], **{c: a[lo:hi] for c, a in mapped.columns.items()}}
+
+    def arrays(self, symbol: str, start=None, end=None) -> dict[str, np.ndarray] | None:
+        """Zero-copy column views {"date": ..., "close": ...} for [start, end]; None if unknown."""
+        mapped = self._map(symbol)
+        return None if mapped is None else self._slice(mapped, start, end)
+
+    def frame(self, symbol: str, start=None, end=None) -> pd.DataFrame | None:
+        """Read-only, zero-copy DataFrame (DatetimeIndex named 'date', stored attrs); None if unknown."""
+        mapped = self._map(symbol)
+        if mapped is None:
+            return None
+        arrays = self._slice(mapped, start, end)
+        index = pd.DatetimeIndex(arrays.pop("date"), name="date")
+        df = pd.DataFrame(arrays, index=index, copy=False)
+        df.attrs = dict(mapped.attrs)
+        return df
+
+    def last_date(self, symbol: str) -> date | None:
+        meta = self._read_meta(symbol)
+        if not meta or not meta.get("last"):
+            return None
+        return date.fromisoformat(meta["last"])
+
+    def symbols(self, kind: str | None = None) -> list[str]:
+        index = self._read_index()
+        return sorted(s for s, rec in index.items() if kind is None or rec.get("kind") == kind)
+
+    # ── writes ──────────────────────────────────────────────────────────────
+
+    def attrs(self, symbol: str) -> dict:
+        """JSON attrs stored with the symbol's current version ({} if none)."""
+        meta = self._read_meta(symbol)
+        return (meta or {}).get("attrs") or {}
+
+    def write(self, symbol: str, df: pd.DataFrame, kind: str = "stock", attrs: dict | None = None) -> None:
+        """Replace the symbol's bars with df (DatetimeIndex, numeric columns).
+
+        attrs (JSON-serializable; default df.attrs) are swapped in together
+        with the columns.
+        """
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        sdir = self._dir(symbol)
+        with self._lock:
+            meta = self._read_meta(symbol) or {}
+            version = int(meta.get("version", 0)) + 1
+            vdir = sdir / f"v{version}"
+            vdir.mkdir(parents=True, exist_ok=True)
+            np.save(vdir / "date.npy", pd.DatetimeIndex(df.index).as_unit("ns").values)
+            for c in columns:
+                np.save(vdir / f"{c}.npy", df[c].to_numpy(dtype=np.float64))
+            _atomic_write_json(sdir / "meta.json", {
+                "symbol": symbol,
+                "kind": kind,
+                "version": version,
+                "rows": len(df),
+                "first": df.index[0].strftime("%Y-%m-%d") if len(df) else None,
+                "last": df.index[-1].strftime("%Y-%m-%d") if len(df) else None,
+                "columns": columns,
+                "attrs": dict(df.attrs) if attrs is None else attrs,
+            })
+            # Keep the previous version for readers that resolved it a moment ago
+            for old in sdir.glob("v*"):
+                if old.is_dir() and old.name[1:].isdigit() and int(old.name[1:]) < version - 1:
+                    shutil.rmtree(old, ignore_errors=True)
+
+            index = self._read_index()
+            if index.get(symbol) != {"dir": sdir.name, "kind": kind}:
+                index[symbol] = {"dir": sdir.name, "kind": kind}
+                _atomic_write_json(self.root / _INDEX_FILE, index)
+
+    def set_attrs(self, symbol: str, attrs: dict) -> None:
+        """Replace the symbol's JSON attrs without rewriting its columns (no-op if unknown)."""
+        sdir = self._dir(symbol)
+        with self._lock:
+            meta = self._read_meta(symbol)
+            if meta is None:
+                return
+            _atomic_write_json(sdir / "meta.json", {**meta, "attrs": attrs})
+
+    def upsert(
+        self, symbol: str, new_df: pd.DataFrame, kind: str = "stock", attrs: dict | None = None,
+    ) -> pd.DataFrame:
+        """Merge new bars over the stored ones (new rows win) and write; returns the merged frame.
+
+        attrs default to the stored attrs updated with new_df.attrs.
+        """
+        current = self.frame(symbol)
+        if attrs is None:
+            attrs = {**(current.attrs if current is not None else {}), **new_df.attrs}
+        if current is not None and not current.empty:
+            merged = pd.concat([current, new_df])
+        else:
+            merged = new_df
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        merged.index.name = "date"
+        merged.attrs = dict(attrs)
+        self.write(symbol, merged, kind=kind, attrs=attrs)
+        return merged
+
+    def delete(self, symbol: str) -> None:
+        with self._lock:
+            shutil.rmtree(self._dir(symbol), ignore_errors=True)
+            self._mapped.pop(symbol, None)
+            index = self._read_index()
+            if index.pop(symbol, None) is not None:
+                _atomic_write_json(self.root / _INDEX_FILE, index)
+
+
+_STORES: dict[Path, BarStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_bar_store(root: Path | str | None = None) -> BarStore:
+    """Process-wide store per root (default data_cache/bars) so memory maps are shared."""
+    key = Path(root if root is not None else _DEFAULT_ROOT).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            key.mkdir(parents=True, exist_ok=True)
+            store = _STORES[key] = BarStore(key)
+        return store
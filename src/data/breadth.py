@@ -1,4 +1,4 @@
-"""Compute S5FI market breadth approximation from sector ETFs."""
+"""Compute S5FI market breadth approximation from sector ETFs (cumulative-sum breadth kernel)."""
 
 from __future__ import annotations
 
@@ -6,11 +6,48 @@ import pandas as pd
 import numpy as np
 import logging
 
+from ..analysis.rolling import above_rolling_mean
+
 logger = logging.getLogger(__name__)
 
 SECTOR_ETFS = ["XLK", "XLF", "XLV", "XLY", "XLC", "XLI", "XLP", "XLE", "XLRE", "XLU", "XLB"]
 
 
+def compute_breadth_series(
+    prices: pd.DataFrame,
+    weights: dict[str, float] | None = None,
+    window: int = 50,
+    fallback_value: float = 50.0,
+    require_current: bool = False,
+) -> pd.Series:
+    """Weighted % of columns closing above their *window*-day mean, for every row.
+
+    Each column counts once it has *window* valid closes, scored 1 when its
+    last valid close is above the mean of its last *window* valid closes.
+    With *require_current*, a column only counts on rows where it has a close
+    itself — a ticker that stopped trading (left the index, halted) drops out
+    instead of carrying its last close forward.
+    Columns are equal-weighted unless *weights* is given (missing keys weigh
+    0). Rows with no eligible column get ``fallback_value``. One cumulative-sum
+    pass over the whole (rows × columns) matrix, so it scales to constituent
+    level (~500 tickers) and the last row is the live value.
+    """
+    if prices.empty:
+        return pd.Series(fallback_value, index=prices.index, name="breadth", dtype=float)
+    w = np.array([1.0 if weights is None else weights.get(c, 0.0) for c in prices.columns])
+    values = prices.to_numpy(dtype=float)
+    above, eligible = above_rolling_mean(values, window)
+    if require_current:
+        current = ~np.isnan(values)
+        above &= current
+        eligible &= current
+    weighted_score = (above * w).sum(axis=1)
+    total_weight = (eligible * w).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breadth = np.where(total_weight == 0, fallback_value, weighted_score / total_weight * 100.0)
+    return pd.Series(breadth, index=prices.index, name="breadth")
+
+
 def compute_s5fi(
     sector_data: pd.DataFrame,
     sector_weights: dict[str, float],
@@ -22,39 +59,29 @@ def compute_s5fi(
     its approximate S&P 500 sector weight.
 
     Returns a value between 0 and 100, or ``fallback_value`` on failure.
+    The last row of ``compute_s5fi_series``.
     """
     try:
         if sector_data.empty:
             return fallback_value
-
-        total_weight = 0.0
-        weighted_score = 0.0
-
-        for etf in SECTOR_ETFS:
-            if etf not in sector_data.columns:
-                continue
-
-            series = sector_data[etf].dropna()
-            if len(series) < 50:
-                continue
-
-            ma50 = series.rolling(window=50).mean()
-            latest_price = series.iloc[-1]
-            latest_ma50 = ma50.iloc[-1]
-
-            if pd.isna(latest_ma50):
-                continue
-
-            weight = sector_weights.get(etf, 0.0)
-            above = 1.0 if latest_price > latest_ma50 else 0.0
-            weighted_score += above * weight
-            total_weight += weight
-
-        if total_weight == 0:
-            return fallback_value
-
-        return (weighted_score / total_weight) * 100.0
-
+        return float(compute_s5fi_series(sector_data, sector_weights, fallback_value).iloc[-1])
     except Exception:
         logger.warning("S5FI computation failed, returning fallback %s", fallback_value, exc_info=True)
         return fallback_value
+
+
+def compute_s5fi_series(
+    sector_data: pd.DataFrame,
+    sector_weights: dict[str, float],
+    fallback_value: float = 50.0,
+) -> pd.Series:
+    """``compute_s5fi`` for every row of *sector_data* at once.
+
+    Value at row t equals ``compute_s5fi(sector_data.iloc[:t + 1], ...)``: each
+    ETF counts once it has 50 valid closes, using its last valid close and
+    50DMA as of that row. Rows with no eligible ETF get ``fallback_value``.
+    """
+    etfs = [etf for etf in SECTOR_ETFS if etf in sector_data.columns]
+    breadth = compute_breadth_series(sector_data[etfs], {e: sector_weights.get(e, 0.0) for e in etfs},
+                                     50, fallback_value)
+    return breadth.rename("S5FI")
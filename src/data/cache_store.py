@@ -0,0 +1,432 @@
+"""
+Pluggable storage backends for the ETL-on-demand market data caches.
+
+Fetchers address datasets by their logical CSV name ("margin_ratio.csv") and
+never touch files directly; the backend decides how the frame is persisted.
+
+- ParquetCacheStore (default when pyarrow is importable): one directory per
+  dataset, partitioned by calendar year (`margin_ratio/2024.parquet`) plus a
+  `_manifest.json` holding per-partition content hashes, row count and the
+  last index date. A save only rewrites partitions whose content changed, so
+  a daily append touches the current year's file and the manifest. Typed
+  columns and the DatetimeIndex round-trip without re-parsing.
+- CsvCacheStore: the original single-CSV layout.
+
+Legacy CSVs are migrated automatically on first load, and a CSV that is
+edited by hand afterwards (mtime changed) is re-imported, so "delete it and
+re-fetch" / "fix it in a text editor" keep working. `export_csv` writes the
+diffable CSV on demand (ADR-0014):
+
+    uv run python -m src.data.cache_store export
+    uv run python -m src.data.cache_store export margin_ratio.csv qvix.csv
+
+Backend selection: MARKET_CACHE_BACKEND=parquet|csv (default parquet).
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    _HAS_PYARROW = False
+
+_CACHE_ROOT = Path("data_cache")
+_MANIFEST = "_manifest.json"
+_TAIL_BYTES = 4096
+
+
+def _read_csv_cache(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df.index.name = "date"
+    return df
+
+
+def _csv_tail_date(path: Path) -> str | None:
+    """Return the index value of the last CSV row by reading only the file tail."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - _TAIL_BYTES))
+            lines = [ln for ln in f.read().decode("utf-8", "ignore").splitlines() if ln.strip()]
+    except OSError:
+        return None
+    if not lines or (len(lines) < 2 and size <= _TAIL_BYTES):
+        return None  # empty or header only
+    return lines[-1].split(",", 1)[0][:10] or None
+
+
+def _normalize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce object columns holding only numbers/None to float so parquet gets a typed column."""
+    out = df
+    for col in df.columns:
+        if df[col].dtype == object:
+            converted = pd.to_numeric(df[col], errors="coerce")
+            if converted.notna().sum() == df[col].notna().sum():
+                if out is df:
+                    out = df.copy()
+                out[col] = converted.astype(float)
+    return out
+
+
+def _frame_hash(df: pd.DataFrame) -> str:
+    h = hashlib.sha1()
+    h.update("|".join(f"{c}:{t}" for c, t in df.dtypes.astype(str).items()).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def upsert_frame(cache: pd.DataFrame, new_df: pd.DataFrame, key: str | None = None) -> pd.DataFrame:
+    """Merge new_df into cache in one pass, last write wins on key collisions.
+
+    key=None matches on the index (the date for every market cache); a column
+    name matches on that column instead and the result keeps a RangeIndex.
+    Colliding rows are replaced whole, like the per-row upsert it supersedes;
+    duplicates inside new_df resolve to their last occurrence.
+    """
+    if new_df is None or new_df.empty:
+        return cache
+    if key is not None:
+        merged = upsert_frame(
+            cache.set_index(key) if not cache.empty else pd.DataFrame(),
+            new_df.set_index(key),
+        )
+        return merged.reset_index()
+
+    new_df = new_df[~new_df.index.duplicated(keep="last")]
+    if cache.empty:
+        merged = new_df.sort_index()
+    else:
+        merged = pd.concat([cache[~cache.index.isin(new_df.index)], new_df]).sort_index()
+    if merged.index.name is None:
+        merged.index.name = "date"
+    return merged
+
+
+class CacheStore(abc.ABC):
+    """Dataset-level persistence for date-indexed market caches."""
+
+    backend = "base"
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.RLock()
+
+    @abc.abstractmethod
+    def load(self, name: str) -> pd.DataFrame:
+        """The whole dataset; an empty frame when it doesn't exist."""
+
+    @abc.abstractmethod
+    def save(self, name: str, df: pd.DataFrame) -> None:
+        """Replace the dataset with df."""
+
+    @abc.abstractmethod
+    def delete(self, name: str) -> None:
+        """Remove the dataset; a no-op when it doesn't exist."""
+
+    @abc.abstractmethod
+    def last_date(self, name: str) -> str | None:
+        """Last index date as YYYY-MM-DD without parsing the whole dataset."""
+
+    @abc.abstractmethod
+    def mtime(self, name: str) -> float:
+        """Modification time of the dataset (0.0 when absent); used as a UI cache key."""
+
+    @abc.abstractmethod
+    def names(self) -> list[str]:
+        """Logical names of every dataset under root."""
+
+    def clear(self) -> None:
+        for name in self.names():
+            self.delete(name)
+
+    def export_csv(self, name: str, dest: Path | None = None) -> Path:
+        """Write the dataset as a plain CSV (default: its legacy path under root)."""
+        df = self.load(name)
+        dest = Path(dest) if dest is not None else self.root / name
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(dest)
+        return dest
+
+
+class CsvCacheStore(CacheStore):
+    """Original layout: one CSV per dataset, re-parsed on every load."""
+
+    backend = "csv"
+
+    def load(self, name: str) -> pd.DataFrame:
+        path = self.root / name
+        if path.exists():
+            try:
+                return _read_csv_cache(path)
+            except Exception as e:
+                logger.warning("Failed to load cache %s: %s", name, e)
+        return pd.DataFrame()
+
+    def save(self, name: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            df.to_csv(self.root / name)
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            (self.root / name).unlink(missing_ok=True)
+
+    def last_date(self, name: str) -> str | None:
+        path = self.root / name
+        return _csv_tail_date(path) if path.exists() else None
+
+    def mtime(self, name: str) -> float:
+        path = self.root / name
+        return path.stat().st_mtime if path.exists() else 0.0
+
+    def names(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.glob("*.csv"))
+
+    def export_csv(self, name: str, dest: Path | None = None) -> Path:
+        if dest is None:
+            return self.root / name  # already a CSV
+        return super().export_csv(name, dest)
+
+
+class ParquetCacheStore(CacheStore):
+    """Year-partitioned parquet datasets with a manifest and CSV auto-migration."""
+
+    backend = "parquet"
+
+    def __init__(self, root: Path) -> None:
+        super().__init__(root)
+        self._frames: dict[str, tuple[int, pd.DataFrame]] = {}
+
+    # ── paths / manifest ────────────────────────────────────────────────────
+
+    def _dataset_dir(self, name: str) -> Path:
+        return self.root / Path(name).stem
+
+    def _manifest_path(self, name: str) -> Path:
+        return self._dataset_dir(name) / _MANIFEST
+
+    def _read_manifest(self, name: str) -> dict | None:
+        path = self._manifest_path(name)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception as e:
+            logger.warning("Corrupt cache manifest %s: %s", path, e)
+            return None
+
+    def _write_manifest(self, name: str, manifest: dict) -> None:
+        path = self._manifest_path(name)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, path)
+
+    def _csv_mtime_ns(self, name: str) -> int | None:
+        path = self.root / name
+        return path.stat().st_mtime_ns if path.exists() else None
+
+    def _csv_is_newer(self, name: str, manifest: dict | None) -> bool:
+        csv_mtime = self._csv_mtime_ns(name)
+        if csv_mtime is None:
+            return False
+        return manifest is None or manifest.get("csv_mtime_ns") != csv_mtime
+
+    # ── migration ───────────────────────────────────────────────────────────
+
+    def _migrate(self, name: str) -> pd.DataFrame:
+        path = self.root / name
+        try:
+            df = _read_csv_cache(path)
+        except Exception as e:
+            logger.warning("Failed to load cache %s: %s", name, e)
+            return pd.DataFrame()
+        self._write(name, df, csv_mtime_ns=path.stat().st_mtime_ns)
+        logger.info("cache_store: migrated %s (%d rows) to parquet", name, len(df))
+        return df
+
+    # ── read / write ────────────────────────────────────────────────────────
+
+    def load(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            manifest = self._read_manifest(name)
+            if self._csv_is_newer(name, manifest):
+                return self._migrate(name).copy()
+            if manifest is None:
+                return pd.DataFrame()
+
+            stamp = self._manifest_path(name).stat().st_mtime_ns
+            hit = self._frames.get(name)
+            if hit is not None and hit[0] == stamp:
+                return hit[1].copy()
+
+            ds_dir = self._dataset_dir(name)
+            parts = []
+            try:
+                for key in sorted(manifest.get("partitions", {})):
+                    parts.append(pd.read_parquet(ds_dir / f"{key}.parquet", engine="pyarrow"))
+            except Exception as e:
+                logger.warning("Failed to load cache %s: %s", name, e)
+                return pd.DataFrame()
+
+            df = pd.concat(parts) if parts else pd.DataFrame(columns=manifest.get("columns", []))
+            if parts:
+                df = df.sort_index()
+            df.index.name = "date"
+            self._frames[name] = (stamp, df)
+            return df.copy()
+
+    def save(self, name: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            manifest = self._read_manifest(name) or {}
+            self._write(name, df, csv_mtime_ns=manifest.get("csv_mtime_ns"))
+
+    def _write(self, name: str, df: pd.DataFrame, csv_mtime_ns: int | None) -> None:
+        ds_dir = self._dataset_dir(name)
+        ds_dir.mkdir(parents=True, exist_ok=True)
+        old = (self._read_manifest(name) or {}).get("partitions", {})
+
+        df = _normalize_dtypes(df)
+        index = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.to_datetime(df.index)
+        df = df.set_axis(index.rename("date")).sort_index()
+
+        partitions: dict[str, str] = {}
+        for year, part in df.groupby(df.index.year, sort=True):
+            key = str(year)
+            digest = _frame_hash(part)
+            partitions[key] = digest
+            if old.get(key) != digest or not (ds_dir / f"{key}.parquet").exists():
+                part.to_parquet(ds_dir / f"{key}.parquet", engine="pyarrow")
+        for key in set(old) - set(partitions):
+            (ds_dir / f"{key}.parquet").unlink(missing_ok=True)
+
+        last = df.index[-1].strftime("%Y-%m-%d") if not df.empty else None
+        self._write_manifest(name, {
+            "name": name,
+            "columns": [str(c) for c in df.columns],
+            "rows": int(len(df)),
+            "last_date": last,
+            "partitions": partitions,
+            "csv_mtime_ns": csv_mtime_ns,
+        })
+        self._frames[name] = (self._manifest_path(name).stat().st_mtime_ns, df)
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._frames.pop(name, None)
+            ds_dir = self._dataset_dir(name)
+            if ds_dir.exists():
+                shutil.rmtree(ds_dir)
+            # Remove the legacy CSV too, otherwise the next load would re-migrate it
+            (self.root / name).unlink(missing_ok=True)
+
+    def last_date(self, name: str) -> str | None:
+        manifest = self._read_manifest(name)
+        if self._csv_is_newer(name, manifest):
+            return _csv_tail_date(self.root / name)
+        return manifest.get("last_date") if manifest else None
+
+    def mtime(self, name: str) -> float:
+        path = self._manifest_path(name)
+        if path.exists():
+            return path.stat().st_mtime
+        csv = self.root / name
+        return csv.stat().st_mtime if csv.exists() else 0.0
+
+    def names(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        found = {p.parent.name + ".csv" for p in self.root.glob(f"*/{_MANIFEST}")}
+        found |= {p.name for p in self.root.glob("*.csv")}
+        return sorted(found)
+
+    def export_csv(self, name: str, dest: Path | None = None) -> Path:
+        with self._lock:
+            out = super().export_csv(name, dest)
+            if dest is None:
+                # The exported file mirrors the store; don't re-import it on next load
+                manifest = self._read_manifest(name)
+                if manifest is not None:
+                    manifest["csv_mtime_ns"] = out.stat().st_mtime_ns
+                    self._write_manifest(name, manifest)
+            return out
+
+
+_STORES: dict[tuple[str, str], CacheStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def _backend_name() -> str:
+    backend = os.getenv("MARKET_CACHE_BACKEND", "parquet").strip().lower()
+    if backend == "parquet" and not _HAS_PYARROW:
+        logger.warning("MARKET_CACHE_BACKEND=parquet but pyarrow is missing; using csv")
+        return "csv"
+    return backend if backend in ("parquet", "csv") else "parquet"
+
+
+def get_store(root: Path | str) -> CacheStore:
+    """Return the process-wide store for a cache directory (one instance per root)."""
+    backend = _backend_name()
+    key = (str(Path(root).resolve()), backend)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            cls = ParquetCacheStore if backend == "parquet" else CsvCacheStore
+            store = cls(Path(root))
+            _STORES[key] = store
+        return store
+
+
+def last_data_date(key: str) -> str | None:
+    """Last index date for a sync-log key like 'china/margin_ratio.csv' or 'macro_data.csv'."""
+    path = _CACHE_ROOT / key
+    return get_store(path.parent).last_date(path.name)
+
+
+def cache_mtime(key: str) -> float:
+    """Modification time for a sync-log key; 0.0 when the dataset does not exist."""
+    path = _CACHE_ROOT / key
+    return get_store(path.parent).mtime(path.name)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="cache_store", description="Market cache maintenance")
+    parser.add_argument("--root", default=str(_CACHE_ROOT / "china"), help="cache directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write datasets as CSV next to the store")
+    p.add_argument("names", nargs="*", help="dataset names (default: all)")
+    p.add_argument("--out", help="output directory (default: --root)")
+    sub.add_parser("list", help="list datasets with their last date")
+    args = parser.parse_args(argv)
+
+    store = get_store(args.root)
+    if args.command == "list":
+        for name in store.names():
+            print(f"{name}\t{store.last_date(name) or '—'}")
+        return 0
+
+    for name in args.names or store.names():
+        dest = Path(args.out) / name if args.out else None
+        print(store.export_csv(name, dest))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,449 @@
+"""
+Headless assembly of ChinaInputData: concurrent indicator fan-out under a
+shared deadline.
+
+The China page used to call the eight regime fetchers one after another
+inside a 30s budget, so one slow endpoint pushed everything after it into
+stale mode. `gather_china_inputs` starts all of them at once on the shared
+network executor (`network_executor.get_executor().run_many`, endpoint
+"china_inputs"), waits until the shared deadline, and falls back to each
+indicator's last-known cached value for anything still running (the daemon
+worker keeps going in the background and lands its result in the cache for
+the next run, without holding up interpreter exit).
+
+Used by the Streamlit China page and by `jobs.china_regime_daily`.
+
+`backfill_china_regime` is the historical counterpart: it lines the same
+caches up as daily columns and scores every day in one pass, without any
+network calls.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.china_regime import (
+    CHINA_INPUT_COLUMNS,
+    ChinaInputData,
+    china_regime_frame,
+    write_china_regime_history,
+)
+
+from . import china_market_fetcher as fetcher
+from .bar_store import get_bar_store
+from .network_executor import get_executor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_S = 30.0
+
+_FANOUT_ENDPOINT = "china_inputs"
+_CHINA_DF = "china_data"        # run_many keys of the two non-indicator calls
+_CSI300 = "csi300"
+_CSI300_SYMBOL = "sh000300"
+
+_CHINA_DATA_FILE = Path("data_cache/china_data.csv")
+
+
+@dataclass
+class IndicatorStatus:
+    """Freshness and latency of one indicator in a gather run."""
+
+    key: str
+    cache_file: str
+    stale: bool = True
+    timed_out: bool = False
+    latency_s: float | None = None   # None when the deadline hit first
+    last_date: str | None = None     # last cached data date (YYYY-MM-DD)
+    error: str | None = None
+
+
+@dataclass
+class ChinaInputsResult:
+    inputs: ChinaInputData
+    status: dict[str, IndicatorStatus] = field(default_factory=dict)
+    data_dates: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def stale_count(self) -> int:
+        return sum(1 for s in self.status.values() if s.stale)
+
+    @property
+    def any_stale(self) -> bool:
+        return self.stale_count > 0
+
+
+# key → (cache file, fetcher name in china_market_fetcher); display order on the page
+_INDICATORS: dict[str, tuple[str, str]] = {
+    "margin_ratio":       ("margin_ratio.csv",       "fetch_margin_ratio"),
+    "equity_bond_spread": ("equity_bond_spread.csv", "fetch_equity_bond_spread"),
+    "deposit_ratio":      ("deposit_ratio.csv",      "fetch_deposit_ratio"),
+    "limit_counts":       ("limit_counts.csv",       "fetch_limit_counts"),
+    "northbound":         ("northbound_flow.csv",    "fetch_northbound_flow"),
+    "southbound":         ("southbound_flow.csv",    "fetch_southbound_flow"),
+    "total_amount":       ("total_amount.csv",       "fetch_market_total_amount"),
+    "qvix":               ("qvix.csv",               "fetch_qvix"),
+}
+
+INDICATOR_KEYS: tuple[str, ...] = tuple(_INDICATORS)
+
+
+def _last_row(cache_file: str, cols: list[str]) -> pd.Series | None:
+    cache = fetcher._load_cache(cache_file)
+    if cache.empty or cols[0] not in cache.columns:
+        return None
+    present = [c for c in cols if c in cache.columns]
+    rows = cache[present].dropna(subset=[cols[0]])
+    return None if rows.empty else rows.iloc[-1]
+
+
+def _float(row: pd.Series | None, col: str) -> float | None:
+    if row is None or col not in row.index or pd.isna(row[col]):
+        return None
+    return float(row[col])
+
+
+def _fallback(key: str) -> Any:
+    """Last-known cached value shaped like the fetcher's return (minus the stale flag)."""
+    if key == "margin_ratio":
+        cache = fetcher._load_cache("margin_ratio.csv")
+        return cache if not cache.empty else None
+    if key == "equity_bond_spread":
+        return _float(_last_row("equity_bond_spread.csv", ["Equity_Bond_Spread"]), "Equity_Bond_Spread")
+    if key == "deposit_ratio":
+        row = _last_row("deposit_ratio.csv", ["Deposit_Ratio", "Data_Month"])
+        month = None if row is None or pd.isna(row.get("Data_Month")) else str(row["Data_Month"])
+        return _float(row, "Deposit_Ratio"), month
+    if key == "limit_counts":
+        row = _last_row("limit_counts.csv", ["LimitUp_Count", "LimitDown_Count", "ZT_DT_Ratio"])
+        if row is None or _float(row, "LimitDown_Count") is None:
+            return None
+        return {
+            "up_count": int(row["LimitUp_Count"]),
+            "down_count": int(row["LimitDown_Count"]),
+            "zt_dt_ratio": _float(row, "ZT_DT_Ratio"),
+        }
+    if key == "northbound":
+        row = _last_row("northbound_flow.csv", ["Northbound_Net_Yi", "Northbound_5D_Cumulative_Yi"])
+        if row is None:
+            return None
+        return {"net_buy_yi": _float(row, "Northbound_Net_Yi"),
+                "cumulative_5d_yi": _float(row, "Northbound_5D_Cumulative_Yi") or 0.0}
+    if key == "southbound":
+        row = _last_row("southbound_flow.csv", ["Southbound_Net_Yi", "Southbound_Sigma_Dev"])
+        if row is None:
+            return None
+        return {"net_buy_yi": _float(row, "Southbound_Net_Yi"),
+                "sigma_deviation": _float(row, "Southbound_Sigma_Dev") or 0.0}
+    if key == "total_amount":
+        row = _last_row("total_amount.csv", ["Total_Amount_Yi", "Amount_MA20_Yi"])
+        return _float(row, "Total_Amount_Yi"), _float(row, "Amount_MA20_Yi")
+    if key == "qvix":
+        return _float(_last_row("qvix.csv", ["QVIX_Close"]), "QVIX_Close")
+    raise KeyError(key)
+
+
+def _split(key: str, result: tuple) -> tuple[Any, bool]:
+    """Split a fetcher return into (value, stale); multi-value returns keep their tuple."""
+    if key == "deposit_ratio":
+        ratio, month, stale = result
+        return (ratio, month), stale
+    if key == "total_amount":
+        amount, ma20, stale = result
+        return (amount, ma20), stale
+    value, stale = result
+    return value, stale
+
+
+def _timed(fetcher_name: str, today: date) -> tuple[Any, float]:
+    t0 = time.monotonic()
+    # Resolved at call time so tests (and the page) can monkeypatch the fetcher module
+    result = getattr(fetcher, fetcher_name)(today)
+    return result, time.monotonic() - t0
+
+
+def _l1_inputs(china_df: pd.DataFrame | None) -> dict[str, float | None]:
+    """Layer-1 fields from the merged china_data frame (DataLoader.fetch_china_data)."""
+    out: dict[str, float | None] = {
+        "dr007": None, "omo_rate": None,
+        "m1_yoy": None, "m1_yoy_prev": None,
+        "m1_m2_spread": None, "m1_m2_spread_prev": None,
+        "tsf_yoy": None, "tsf_yoy_prev": None,
+    }
+    if china_df is None or china_df.empty:
+        return out
+
+    def _tail(col: str) -> list[float]:
+        if col not in china_df.columns:
+            return []
+        return [float(v) for v in china_df[col].dropna().iloc[-2:]]
+
+    m1 = _tail("M1_YoY")
+    if m1:
+        out["m1_yoy"] = m1[-1]
+        out["m1_yoy_prev"] = m1[-2] if len(m1) == 2 else None
+    gap = _tail("M1_M2_Gap")
+    if gap:
+        out["m1_m2_spread"] = gap[-1]
+        out["m1_m2_spread_prev"] = gap[-2] if len(gap) == 2 else None
+    dr007 = _tail("DR007")
+    if dr007:
+        out["dr007"] = dr007[-1]
+    # OMO 7-day rate ≈ 1.5–2.0% (hardcode current PBoC rate as fallback)
+    out["omo_rate"] = 1.5
+    return out
+
+
+def _load_china_df() -> pd.DataFrame:
+    from .loader import DataLoader
+    return DataLoader().fetch_china_data(90, use_cache=True)
+
+
+def _csi300_close(series: pd.Series | None, today: date) -> float | None:
+    """Last CSI 300 close on or before today."""
+    if series is None:
+        return None
+    series = series.loc[:pd.Timestamp(today)].dropna()
+    return float(series.iloc[-1]) if len(series) else None
+
+
+def _fetch_csi300_close(today: date) -> float | None:
+    series, _ = fetcher.fetch_index_close(_CSI300_SYMBOL)
+    return _csi300_close(series, today)
+
+
+def _cached_csi300_close(today: date) -> float | None:
+    bars = get_bar_store().frame(_CSI300_SYMBOL)
+    return _csi300_close(bars["close"] if bars is not None and "close" in bars.columns else None, today)
+
+
+def gather_china_inputs(
+    today: date,
+    deadline: float = DEFAULT_DEADLINE_S,
+    china_df: pd.DataFrame | None = None,
+    on_progress: Callable[[IndicatorStatus], None] | None = None,
+) -> ChinaInputsResult:
+    """Fetch every China regime indicator concurrently and build ChinaInputData.
+
+    deadline: shared wall-clock budget in seconds for the whole fan-out.
+    china_df: merged china_data frame for Layer 1; loaded from the cache
+        when omitted (the page passes its st.cache_data copy).
+    on_progress: called on the caller's thread as each indicator settles
+        (completed, failed or timed out), in completion order.
+
+    The CSI 300 close (inputs.csi300_close, for the history snapshot) is
+    fetched in the same fan-out and falls back to the bar store.
+
+    Never raises for indicator failures; each one degrades to its last-known
+    value with stale=True, per the ETL-on-demand contract.
+    """
+    values: dict[str, Any] = {}
+    status: dict[str, IndicatorStatus] = {}
+
+    calls: dict[str, Callable[[], Any]] = {
+        key: partial(_timed, name, today) for key, (_, name) in _INDICATORS.items()
+    }
+    calls[_CSI300] = partial(_fetch_csi300_close, today)
+    if china_df is None:
+        calls[_CHINA_DF] = _load_china_df
+
+    def _settle(key: str, st: IndicatorStatus, value: Any) -> None:
+        values[key] = value
+        st.last_date = fetcher.get_store(fetcher._CACHE_DIR).last_date(st.cache_file)
+        status[key] = st
+        if on_progress is not None:
+            on_progress(st)
+
+    def _on_settle(key: str, outcome: Any) -> None:
+        if key not in _INDICATORS:
+            return
+        cache_file = _INDICATORS[key][0]
+        if isinstance(outcome, concurrent.futures.TimeoutError):
+            logger.warning("gather_china_inputs: %s exceeded the %.1fs deadline, using cache", key, deadline)
+            _settle(key, IndicatorStatus(key, cache_file, timed_out=True), _fallback(key))
+        elif isinstance(outcome, BaseException):
+            logger.warning("gather_china_inputs: %s failed: %s", key, outcome)
+            _settle(key, IndicatorStatus(key, cache_file, error=str(outcome)), _fallback(key))
+        else:
+            result, latency = outcome
+            value, stale = _split(key, result)
+            _settle(key, IndicatorStatus(key, cache_file, stale=stale, latency_s=round(latency, 2)), value)
+
+    # Stragglers are abandoned on daemon workers; they finish in the background and fill the cache
+    outcome = get_executor().run_many(calls, deadline, endpoint=_FANOUT_ENDPOINT, on_settle=_on_settle)
+
+    if china_df is None:
+        china_df = outcome[_CHINA_DF]
+        if isinstance(china_df, BaseException):
+            logger.warning("gather_china_inputs: china_data unavailable: %s", china_df)
+            china_df = None
+    csi300_close = outcome[_CSI300]
+    if isinstance(csi300_close, BaseException):
+        logger.warning("gather_china_inputs: CSI 300 close unavailable, using bar store: %s", csi300_close)
+        csi300_close = _cached_csi300_close(today)
+
+    margin_df = values.get("margin_ratio")
+    latest_margin_pct: float | None = None
+    if margin_df is not None and not margin_df.empty and "Margin_Ratio_Pct" in margin_df.columns:
+        series = margin_df["Margin_Ratio_Pct"].dropna()
+        if not series.empty:
+            latest_margin_pct = float(series.iloc[-1])
+
+    limit_data = values.get("limit_counts")
+    nb_data = values.get("northbound")
+    sb_data = values.get("southbound")
+    total_amount, amount_ma20 = values.get("total_amount") or (None, None)
+    _, dep_month = values.get("deposit_ratio") or (None, None)
+
+    inputs = ChinaInputData(
+        **_l1_inputs(china_df),
+        equity_bond_spread=values.get("equity_bond_spread"),
+        margin_ratio_pct=latest_margin_pct,
+        qvix=values.get("qvix"),
+        northbound_5d_cumulative=nb_data["cumulative_5d_yi"] if nb_data else None,
+        limit_up_count=limit_data["up_count"] if limit_data else None,
+        limit_down_count=limit_data["down_count"] if limit_data else None,
+        zt_count=limit_data["up_count"] if limit_data else None,
+        dt_count=limit_data["down_count"] if limit_data else None,
+        southbound_net_buy=sb_data["net_buy_yi"] if sb_data else None,
+        southbound_sigma_dev=sb_data["sigma_deviation"] if sb_data else None,
+        total_amount=total_amount,
+        total_amount_ma20=amount_ma20,
+        data_date=today,
+        csi300_close=csi300_close,
+    )
+
+    data_dates: dict[str, str] = {}
+    if dep_month:
+        data_dates["M2/Deposit"] = dep_month
+    data_dates["Market"] = today.strftime("%Y-%m-%d")
+
+    return ChinaInputsResult(
+        inputs=inputs,
+        status={key: status[key] for key in INDICATOR_KEYS},
+        data_dates=data_dates,
+    )
+
+
+# ── Full-history backfill ─────────────────────────────────────────────────────
+
+# input column → (cache file, cache column). Levels carry their last known
+# value forward (as the live page does for a stale indicator); daily flows and
+# counts only exist on their own dates, so a missing day cannot re-trigger L3.
+_LEVEL_COLUMNS: dict[str, tuple[str, str]] = {
+    "equity_bond_spread": ("equity_bond_spread.csv", "Equity_Bond_Spread"),
+    "margin_ratio_pct":   ("margin_ratio.csv",       "Margin_Ratio_Pct"),
+    "qvix":               ("qvix.csv",               "QVIX_Close"),
+}
+_DAILY_COLUMNS: dict[str, tuple[str, str]] = {
+    "northbound_5d_cumulative": ("northbound_flow.csv", "Northbound_5D_Cumulative_Yi"),
+    "limit_up_count":           ("limit_counts.csv",    "LimitUp_Count"),
+    "limit_down_count":         ("limit_counts.csv",    "LimitDown_Count"),
+    "southbound_net_buy":       ("southbound_flow.csv", "Southbound_Net_Yi"),
+    "southbound_sigma_dev":     ("southbound_flow.csv", "Southbound_Sigma_Dev"),
+    "total_amount":             ("total_amount.csv",    "Total_Amount_Yi"),
+    "total_amount_ma20":        ("total_amount.csv",    "Amount_MA20_Yi"),
+}
+# china_data column → (input column, input column for the previous value)
+_L1_COLUMNS: dict[str, tuple[str, str | None]] = {
+    "M1_YoY":    ("m1_yoy", "m1_yoy_prev"),
+    "M1_M2_Gap": ("m1_m2_spread", "m1_m2_spread_prev"),
+    "DR007":     ("dr007", None),
+}
+
+
+def _cache_column(cache_file: str, col: str) -> pd.Series:
+    cache = fetcher._load_cache(cache_file)
+    if cache.empty or col not in cache.columns:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+    series = pd.to_numeric(cache[col], errors="coerce").dropna()
+    series.index = pd.DatetimeIndex(series.index)
+    return series[~series.index.duplicated(keep="last")].sort_index()
+
+
+def _load_china_history() -> pd.DataFrame:
+    """The merged china_data frame as last cached by DataLoader (no refetch)."""
+    try:
+        return pd.read_csv(_CHINA_DATA_FILE, index_col=0, parse_dates=True).sort_index()
+    except Exception as e:
+        logger.warning("china_data cache unavailable for backfill: %s", e)
+        return pd.DataFrame()
+
+
+def _asof_last_two(series: pd.Series, index: pd.DatetimeIndex) -> tuple[np.ndarray, np.ndarray]:
+    """Last and second-to-last valid values on or before each date (NaN where absent)."""
+    values = np.append(np.nan, series.to_numpy(dtype=float))  # slot 0 = "no value yet"
+    pos = np.searchsorted(series.index.values, index.values, side="right")
+    return values[pos], values[np.maximum(pos - 1, 0)]
+
+
+def china_input_history(china_df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Daily ChinaInputData columns aligned on the trading days present in the caches.
+
+    Reads only cached data: the china/ indicator caches, the china_data frame
+    (Layer 1; loaded from its cache file when omitted) and the CSI 300 bars
+    in the bar store. One row per date seen in any daily cache, ascending.
+    """
+    level = {key: _cache_column(*src) for key, src in _LEVEL_COLUMNS.items()}
+    daily = {key: _cache_column(*src) for key, src in _DAILY_COLUMNS.items()}
+
+    dates = pd.DatetimeIndex([])
+    for series in (*level.values(), *daily.values()):
+        dates = dates.union(series.index)
+    dates = dates[dates.dayofweek < 5]
+    inputs = pd.DataFrame(index=pd.DatetimeIndex(dates, name="date"))
+
+    for key, series in level.items():
+        inputs[key] = _asof_last_two(series, inputs.index)[0]
+    for key, series in daily.items():
+        inputs[key] = series.reindex(inputs.index).to_numpy()
+    inputs["zt_count"] = inputs["limit_up_count"]
+    inputs["dt_count"] = inputs["limit_down_count"]
+
+    china_df = _load_china_history() if china_df is None else china_df
+    for src_col, (key, prev_key) in _L1_COLUMNS.items():
+        if china_df.empty or src_col not in china_df.columns:
+            continue
+        series = pd.to_numeric(china_df[src_col], errors="coerce").dropna()
+        series.index = pd.DatetimeIndex(series.index)
+        last, prev = _asof_last_two(series, inputs.index)
+        inputs[key] = last
+        if prev_key is not None:
+            inputs[prev_key] = prev
+    # OMO 7-day rate: same hardcoded fallback as the live path (_l1_inputs)
+    inputs["omo_rate"] = 1.5
+
+    bars = get_bar_store().frame("sh000300")
+    if bars is not None and "close" in bars.columns:
+        inputs["csi300_close"] = bars["close"].reindex(inputs.index).to_numpy()
+
+    return inputs.reindex(columns=list(CHINA_INPUT_COLUMNS))
+
+
+def backfill_china_regime(
+    start: date | str | None = None,
+    end: date | str | None = None,
+    china_df: pd.DataFrame | None = None,
+    write: bool = True,
+) -> pd.DataFrame:
+    """Score every cached trading day in [start, end] and bulk-write the regime history.
+
+    All cached history is scored (so carried levels and the L3 hold-down are
+    warm at start); only rows in the range are returned and written. The
+    live sentinel state file is not touched.
+    """
+    frame = china_regime_frame(china_input_history(china_df))
+    frame = frame.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+    if write:
+        write_china_regime_history(frame)
+    return frame
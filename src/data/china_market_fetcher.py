@@ -1,13 +1,15 @@
 """
-China A-share market data fetchers with ETL-on-demand CSV caching.
+China A-share market data fetchers with ETL-on-demand caching.
 
 Each fetcher:
-1. Checks the CSV cache; returns cached value if today's entry exists
+1. Checks the cache; returns cached value if today's entry exists
 2. Fetches from Tushare (primary) or AkShare (fallback) on cache miss
-3. Appends new data to the cache CSV
+3. Appends new data to the cache
 4. On API failure returns the last-known-good value with data_stale=True
 
-Cache files live under data_cache/china/.
+Caches live under data_cache/china/ and are addressed by their CSV name;
+persistence goes through src.data.cache_store (parquet by default, legacy
+CSVs are migrated on first load and can be exported back on demand).
 """
 
 from __future__ import annotations
@@ -16,6 +18,7 @@ import concurrent.futures
 import json
 import logging
 import os
+import threading
 import time
 from contextlib import contextmanager
 from datetime import date, datetime, timedelta
@@ -25,6 +28,11 @@ from typing import Any, Callable, Generator, Literal
 import akshare as ak
 import pandas as pd
 
+from .bar_store import OHLCV, get_bar_store
+from .cache_store import get_store, last_data_date, upsert_frame
+from .network_executor import get_executor
+from .tushare_scheduler import concat_results, get_scheduler
+
 logger = logging.getLogger(__name__)
 
 _CACHE_DIR = Path("data_cache/china")
@@ -44,6 +52,11 @@ MARGIN_RATIO_REFERENCES = {
 # Earliest date for historical backfill (2015 is sufficient for all indicators)
 HISTORY_START = date(2015, 1, 1)
 
+# total_mv_daily.csv is shared by the margin and deposit ratios; when both are
+# fetched concurrently (china_inputs.gather_china_inputs) only one may clean or
+# backfill it at a time.
+_TOTAL_MV_LOCK = threading.RLock()
+
 
 def _ensure_cache_dir() -> None:
     _CACHE_DIR.mkdir(parents=True, exist_ok=True)
@@ -65,34 +78,33 @@ def _last_weekday_before(d: date) -> date:
 
 
 def _load_cache(filename: str) -> pd.DataFrame:
-    path = _CACHE_DIR / filename
-    if path.exists():
-        try:
-            df = pd.read_csv(path, index_col=0, parse_dates=True)
-            df.index.name = "date"
-            return df
-        except Exception as e:
-            logger.warning("Failed to load cache %s: %s", filename, e)
-    return pd.DataFrame()
+    try:
+        return get_store(_CACHE_DIR).load(filename)
+    except Exception as e:
+        logger.warning("Failed to load cache %s: %s", filename, e)
+        return pd.DataFrame()
 
 
 def _save_cache(filename: str, df: pd.DataFrame) -> None:
     _ensure_cache_dir()
-    df.to_csv(_CACHE_DIR / filename)
+    get_store(_CACHE_DIR).save(filename, df)
+
+
+def _delete_cache(filename: str) -> None:
+    get_store(_CACHE_DIR).delete(filename)
 
 
 _API_TIMEOUT_S = 25
 
 
-def _run_with_timeout(fn: Callable, timeout_s: int = _API_TIMEOUT_S):
-    """Execute fn() in a daemon thread with a hard timeout.
+def _run_with_timeout(fn: Callable, timeout_s: int = _API_TIMEOUT_S, endpoint: str = "default"):
+    """Execute fn() on the shared network executor with a hard timeout.
 
-    Raises concurrent.futures.TimeoutError when the call exceeds timeout_s.
-    The worker thread is daemon so it won't block process exit even if it hangs.
+    Raises concurrent.futures.TimeoutError when the call exceeds timeout_s; the
+    caller returns immediately and a still-running call is abandoned to its
+    daemon worker. `endpoint` selects the concurrency cap and metrics bucket.
     """
-    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(fn)
-        return future.result(timeout=timeout_s)
+    return get_executor().run(fn, timeout_s, endpoint=endpoint)
 
 
 def _get_pro():
@@ -118,21 +130,17 @@ def _update_sync_log(filename: str, duration_s: float, status: str) -> None:
     """Write a sync record to data_cache/sync_log.json (create-or-update per key).
 
     filename: relative key like 'china/margin_ratio.csv' or 'macro_data.csv'.
-    Reads the corresponding CSV's last index row to populate last_data_date.
+    last_data_date comes from the cache store manifest (or the CSV tail), so
+    the bookkeeping never parses the whole dataset.
     """
     try:
         log: dict = json.loads(_SYNC_LOG_PATH.read_text()) if _SYNC_LOG_PATH.exists() else {}
     except Exception:
         log = {}
 
-    last_data_date: str | None = None
+    last_date: str | None = None
     try:
-        csv_path = Path("data_cache") / filename
-        if csv_path.exists():
-            df_tail = pd.read_csv(csv_path, index_col=0, parse_dates=True)
-            if not df_tail.empty:
-                last_idx = df_tail.index[-1]
-                last_data_date = last_idx.strftime("%Y-%m-%d") if hasattr(last_idx, "strftime") else str(last_idx)[:10]
+        last_date = last_data_date(filename)
     except Exception:
         pass
 
@@ -140,7 +148,7 @@ def _update_sync_log(filename: str, duration_s: float, status: str) -> None:
         "last_sync_utc": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S"),
         "duration_s": round(duration_s, 2),
         "status": status,
-        "last_data_date": last_data_date,
+        "last_data_date": last_date,
     }
 
     try:
@@ -170,17 +178,26 @@ def _record_sync(filename: str) -> Generator[None, None, None]:
 
 
 def _upsert_row(cache: pd.DataFrame, ts: pd.Timestamp, row_data: dict) -> pd.DataFrame:
-    """Insert or replace a row in the cache DataFrame, keeping sorted by date."""
+    """Insert or replace a single row; bulk paths use upsert_frame directly."""
     new_row = pd.DataFrame([row_data], index=[ts])
     new_row.index.name = "date"
-    if cache.empty:
-        return new_row
-    deduped = cache[~cache.index.isin([ts])]
-    return pd.concat([deduped, new_row]).sort_index()
+    return upsert_frame(cache, new_row)
 
 
 # ── Historical Backfill Helpers ───────────────────────────────────────────────
 
+def _year_windows(start_date: date, end_date: date) -> list[tuple[int, str, str]]:
+    """(year, YYYYMMDD start, YYYYMMDD end) per calendar year, clipped to the range."""
+    return [
+        (
+            year,
+            max(date(year, 1, 1), start_date).strftime("%Y%m%d"),
+            min(date(year, 12, 31), end_date).strftime("%Y%m%d"),
+        )
+        for year in range(start_date.year, end_date.year + 1)
+    ]
+
+
 def _clean_corrupted_mv_cache() -> bool:
     """Detect and remove corrupted entries from total_mv_daily.csv.
 
@@ -191,7 +208,7 @@ def _clean_corrupted_mv_cache() -> bool:
     underestimated (sometimes by 8–10×).
 
     Detection: any entry whose Total_MV_Yi is < 70% of its year's median is
-    considered corrupted. Also clears margin_ratio.csv and deposit_ratio.csv
+    considered corrupted. Also clears the margin_ratio and deposit_ratio caches
     so they are rebuilt from corrected data.
 
     Returns True if any corruption was found and cleaned.
@@ -220,10 +237,8 @@ def _clean_corrupted_mv_cache() -> bool:
 
     # Clear downstream caches that use total_mv as denominator
     for fname in ("margin_ratio.csv", "deposit_ratio.csv"):
-        fpath = _CACHE_DIR / fname
-        if fpath.exists():
-            fpath.unlink()
-            logger.info("_clean_corrupted_mv_cache: cleared %s for rebuild", fname)
+        _delete_cache(fname)
+        logger.info("_clean_corrupted_mv_cache: cleared %s for rebuild", fname)
 
     return True
 
@@ -235,15 +250,19 @@ def _backfill_total_mv_daily(start_date: date, end_date: date) -> None:
     individually via pro.daily_basic(trade_date=...). Single-date queries return
     all listed stocks with no row-count truncation, unlike date-range queries
     which hit Tushare's ~8000-row limit and produce underestimated sums.
+    The per-date calls run through the shared rate-limited scheduler and are
+    checkpointed to the cache every 20 results.
     """
     cache = _load_cache("total_mv_daily.csv")
     pro = _get_pro()
+    scheduler = get_scheduler()
 
     start_str = start_date.strftime("%Y%m%d")
     end_str = end_date.strftime("%Y%m%d")
 
     try:
-        cal = pro.trade_cal(
+        cal = scheduler.call(
+            "trade_cal", pro,
             exchange="SSE",
             start_date=start_str,
             end_date=end_str,
@@ -275,31 +294,27 @@ def _backfill_total_mv_daily(start_date: date, end_date: date) -> None:
 
     logger.info("_backfill_total_mv_daily: fetching %d month-end dates", len(dates_to_fetch))
 
-    for i, date_str in enumerate(dates_to_fetch):
-        dt_ts = pd.Timestamp(date_str)
-        try:
-            df = pro.daily_basic(trade_date=date_str, fields="ts_code,total_mv")
-            if df.empty:
+    def _checkpoint(batch: dict[str, pd.DataFrame]) -> None:
+        nonlocal cache
+        totals: dict[pd.Timestamp, float] = {}
+        for date_str, df in batch.items():
+            if df is None or df.empty:
                 logger.warning("_backfill_total_mv_daily: empty response for %s", date_str)
-            else:
-                total_mv_yi = (
-                    pd.to_numeric(df["total_mv"], errors="coerce").sum() * _WAN_TO_YI
-                )
-                if total_mv_yi > 0:
-                    cache = _upsert_row(cache, dt_ts, {"Total_MV_Yi": round(total_mv_yi, 2)})
-        except Exception as e:
-            logger.warning("_backfill_total_mv_daily: failed for %s: %s", date_str, e)
-
-        if (i + 1) % 20 == 0:
-            _save_cache("total_mv_daily.csv", cache)
-            logger.info(
-                "_backfill_total_mv_daily: progress %d/%d", i + 1, len(dates_to_fetch)
-            )
-
-        if i < len(dates_to_fetch) - 1:
-            time.sleep(0.2)  # stay within Tushare rate limits
-
-    _save_cache("total_mv_daily.csv", cache)
+                continue
+            total_mv_yi = pd.to_numeric(df["total_mv"], errors="coerce").sum() * _WAN_TO_YI
+            if total_mv_yi > 0:
+                totals[pd.Timestamp(date_str)] = round(total_mv_yi, 2)
+        if totals:
+            cache = upsert_frame(cache, pd.DataFrame({"Total_MV_Yi": pd.Series(totals, dtype=float)}))
+        _save_cache("total_mv_daily.csv", cache)
+
+    scheduler.run(
+        "daily_basic",
+        {d: {"trade_date": d, "fields": "ts_code,total_mv"} for d in dates_to_fetch},
+        client=pro,
+        checkpoint_every=20,
+        on_checkpoint=_checkpoint,
+    )
     logger.info("_backfill_total_mv_daily: done, %d total dates in cache", len(cache))
 
 
@@ -314,54 +329,38 @@ def _backfill_margin_ratio(start_date: date) -> None:
     today = date.today()
     pro = _get_pro()
 
-    frames = []
-    for year in range(start_date.year, today.year + 1):
-        yr_start = max(date(year, 1, 1), start_date).strftime("%Y%m%d")
-        yr_end = min(date(year, 12, 31), today).strftime("%Y%m%d")
-        try:
-            df_yr = pro.margin(
-                start_date=yr_start,
-                end_date=yr_end,
-                fields="trade_date,rzrqye",
-            )
-            if not df_yr.empty:
-                frames.append(df_yr)
-            logger.info("_backfill_margin_ratio: fetched %d rows for %d", len(df_yr), year)
-        except Exception as e:
-            logger.warning("_backfill_margin_ratio: pro.margin failed for %d: %s", year, e)
-
-    if not frames:
+    results = get_scheduler().run(
+        "margin",
+        {year: {"start_date": start, "end_date": end, "fields": "trade_date,rzrqye"}
+         for year, start, end in _year_windows(start_date, today)},
+        client=pro,
+    )
+    df_margin = concat_results(results)
+    if df_margin.empty:
         return
-
-    df_margin = pd.concat(frames, ignore_index=True)
+    logger.info("_backfill_margin_ratio: fetched %d rows over %d years", len(df_margin), len(results))
     df_margin["rzrqye_num"] = pd.to_numeric(df_margin["rzrqye"], errors="coerce")
     daily_margin = (
         df_margin.groupby("trade_date")["rzrqye_num"]
         .sum()
         * _YUAN_TO_YI
     )
+    daily_margin.index = pd.to_datetime(daily_margin.index.astype(str))
 
     total_mv_cache = _load_cache("total_mv_daily.csv")
     cache = _load_cache("margin_ratio.csv")
 
-    for dt_str, margin_yi in daily_margin.items():
-        dt_ts = pd.Timestamp(str(dt_str))
-        if pd.isna(margin_yi) or margin_yi <= 0:
-            continue
-        if total_mv_cache.empty or "Total_MV_Yi" not in total_mv_cache.columns:
-            continue
-        if dt_ts not in total_mv_cache.index:
-            continue
-        mv = total_mv_cache.loc[dt_ts, "Total_MV_Yi"]
-        if pd.isna(mv) or float(mv) <= 0:
-            continue
-        total_mv_yi = float(mv)
-        ratio_pct = (margin_yi / total_mv_yi) * 100
-        cache = _upsert_row(cache, dt_ts, {
-            "Margin_Balance_Yi": round(margin_yi, 2),
-            "Total_MV_Yi": round(total_mv_yi, 2),
-            "Margin_Ratio_Pct": round(ratio_pct, 4),
-        })
+    if not total_mv_cache.empty and "Total_MV_Yi" in total_mv_cache.columns:
+        mv = pd.to_numeric(total_mv_cache["Total_MV_Yi"], errors="coerce")
+        mv = mv[~mv.index.duplicated(keep="last")]
+        aligned = pd.DataFrame({"margin": daily_margin}).join(mv.rename("mv"), how="inner")
+        # NaN compares False, so this also drops missing margin / market cap
+        aligned = aligned[(aligned["margin"] > 0) & (aligned["mv"] > 0)]
+        cache = upsert_frame(cache, pd.DataFrame({
+            "Margin_Balance_Yi": aligned["margin"].round(2),
+            "Total_MV_Yi": aligned["mv"].round(2),
+            "Margin_Ratio_Pct": (aligned["margin"] / aligned["mv"] * 100).round(4),
+        }))
 
     _save_cache("margin_ratio.csv", cache)
     logger.info("_backfill_margin_ratio: wrote %d rows", len(cache))
@@ -380,7 +379,8 @@ def _backfill_equity_bond_spread(start_date: date) -> None:
 
     # CSI300 PE batch — index_dailybasic has no row-count truncation issue
     try:
-        df_pe = pro.index_dailybasic(
+        df_pe = get_scheduler().call(
+            "index_dailybasic", pro,
             ts_code="000300.SH",
             start_date=start_str,
             end_date=end_str,
@@ -398,49 +398,38 @@ def _backfill_equity_bond_spread(start_date: date) -> None:
     df_pe["pe_ttm"] = pd.to_numeric(df_pe["pe_ttm"], errors="coerce")
 
     # 10Y bond yield — must query year-by-year; single call > 1 year returns empty
-    bond_frames = []
-    for year in range(start_date.year, today.year + 1):
-        yr_start = max(date(year, 1, 1), start_date).strftime("%Y%m%d")
-        yr_end = min(date(year, 12, 31), today).strftime("%Y%m%d")
-        try:
-            raw_yr = ak.bond_china_yield(start_date=yr_start, end_date=yr_end)
-            gov_yr = raw_yr[raw_yr["曲线名称"] == "中债国债收益率曲线"].copy()
-            if not gov_yr.empty:
-                bond_frames.append(gov_yr)
-        except Exception as e:
-            logger.warning("_backfill_equity_bond_spread: bond yield %d failed: %s", year, e)
-
-    if not bond_frames:
+    raw = concat_results(get_scheduler().run(
+        "bond_china_yield",
+        {year: {"start_date": start, "end_date": end} for year, start, end in _year_windows(start_date, today)},
+        client=ak,
+    ))
+    gov = raw[raw["曲线名称"] == "中债国债收益率曲线"].copy() if not raw.empty else raw
+
+    if gov.empty:
         logger.warning("_backfill_equity_bond_spread: no bond yield data fetched")
         return
 
-    gov = pd.concat(bond_frames, ignore_index=True)
     gov["date"] = pd.to_datetime(gov["日期"])
     gov = gov.set_index("date").sort_index()
     gov["yield_10y"] = pd.to_numeric(gov["10年"], errors="coerce")
 
     # Update sub-caches
     pe_cache = _load_cache("csi300_pe.csv")
-    for dt_ts, row in df_pe.iterrows():
-        if pd.notna(row["pe_ttm"]):
-            pe_cache = _upsert_row(pe_cache, dt_ts, {"CSI300_PE_TTM": float(row["pe_ttm"])})
+    pe_cache = upsert_frame(pe_cache, df_pe[["pe_ttm"]].dropna().rename(columns={"pe_ttm": "CSI300_PE_TTM"}))
     _save_cache("csi300_pe.csv", pe_cache)
 
     yield_cache = _load_cache("cgb10y_yield.csv")
-    for dt_ts, row in gov.iterrows():
-        if pd.notna(row["yield_10y"]):
-            yield_cache = _upsert_row(yield_cache, dt_ts, {"CGB_10Y_Yield": float(row["yield_10y"])})
+    yield_cache = upsert_frame(
+        yield_cache, gov[["yield_10y"]].dropna().rename(columns={"yield_10y": "CGB_10Y_Yield"})
+    )
     _save_cache("cgb10y_yield.csv", yield_cache)
 
     # Compute spread on date-aligned intersection
     spread_cache = _load_cache("equity_bond_spread.csv")
-    combined = df_pe[["pe_ttm"]].join(gov[["yield_10y"]], how="inner")
-    for dt_ts, row in combined.iterrows():
-        pe = row["pe_ttm"]
-        yld = row["yield_10y"]
-        if pd.notna(pe) and pd.notna(yld) and pe > 0:
-            spread = (1.0 / pe) * 100.0 - yld
-            spread_cache = _upsert_row(spread_cache, dt_ts, {"Equity_Bond_Spread": round(spread, 4)})
+    combined = df_pe[["pe_ttm"]].join(gov[["yield_10y"]], how="inner").dropna()
+    combined = combined[combined["pe_ttm"] > 0]
+    spread = ((1.0 / combined["pe_ttm"]) * 100.0 - combined["yield_10y"]).round(4)
+    spread_cache = upsert_frame(spread_cache, spread.to_frame("Equity_Bond_Spread"))
 
     _save_cache("equity_bond_spread.csv", spread_cache)
     logger.info("_backfill_equity_bond_spread: wrote %d rows", len(spread_cache))
@@ -467,22 +456,21 @@ def _backfill_deposit_ratio(start_date: date) -> None:
     deposit_cache = _load_cache("deposit_ratio.csv")
 
     # Align by calendar period (M2 index is typically month-start)
-    m2_by_period = {pd.Period(dt, "M"): val for dt, val in m2_filtered.items()}
-    mv_by_period = {pd.Period(dt, "M"): val for dt, val in total_mv_monthly.items()}
-
-    for period in sorted(set(m2_by_period.keys()) & set(mv_by_period.keys())):
-        m2_val = m2_by_period[period]
-        mv_val = mv_by_period[period]
-        if pd.isna(m2_val) or pd.isna(mv_val) or float(mv_val) <= 0:
-            continue
-        ratio = float(m2_val) / float(mv_val)
-        month_ts = pd.Timestamp(period.to_timestamp())
-        deposit_cache = _upsert_row(deposit_cache, month_ts, {
-            "M2_Yi": round(float(m2_val), 2),
-            "Total_MV_Yi": round(float(mv_val), 2),
-            "Deposit_Ratio": round(ratio, 4),
-            "Data_Month": str(period),
-        })
+    m2_by_period = m2_filtered.set_axis(m2_filtered.index.to_period("M"))
+    mv_by_period = total_mv_monthly.set_axis(total_mv_monthly.index.to_period("M"))
+    aligned = pd.DataFrame({
+        "m2": m2_by_period[~m2_by_period.index.duplicated(keep="last")],
+    }).join(mv_by_period[~mv_by_period.index.duplicated(keep="last")].rename("mv"), how="inner")
+    aligned = aligned[aligned["m2"].notna() & (aligned["mv"] > 0)].sort_index()
+
+    new_rows = pd.DataFrame({
+        "M2_Yi": aligned["m2"].astype(float).round(2),
+        "Total_MV_Yi": aligned["mv"].astype(float).round(2),
+        "Deposit_Ratio": (aligned["m2"].astype(float) / aligned["mv"].astype(float)).round(4),
+        "Data_Month": aligned.index.astype(str),
+    })
+    new_rows.index = aligned.index.to_timestamp()
+    deposit_cache = upsert_frame(deposit_cache, new_rows)
 
     _save_cache("deposit_ratio.csv", deposit_cache)
     logger.info("_backfill_deposit_ratio: wrote %d rows", len(deposit_cache))
@@ -504,19 +492,20 @@ def fetch_margin_ratio(query_date: date | None = None) -> tuple[pd.DataFrame | N
     if query_date is None:
         query_date = date.today()
 
-    # Clean any corrupted total_mv entries before loading the cache
-    corrupted_cleaned = _clean_corrupted_mv_cache()
+    with _TOTAL_MV_LOCK:
+        # Clean any corrupted total_mv entries before loading the cache
+        corrupted_cleaned = _clean_corrupted_mv_cache()
 
-    cache = _load_cache("margin_ratio.csv")
+        cache = _load_cache("margin_ratio.csv")
 
-    # First-load or post-cleanup backfill: ensure history from HISTORY_START
-    if corrupted_cleaned or cache.empty or cache.index.min() > pd.Timestamp(HISTORY_START):
-        try:
-            _backfill_total_mv_daily(HISTORY_START, query_date)
-            _backfill_margin_ratio(HISTORY_START)
-            cache = _load_cache("margin_ratio.csv")
-        except Exception as e:
-            logger.warning("fetch_margin_ratio: backfill failed: %s", e)
+        # First-load or post-cleanup backfill: ensure history from HISTORY_START
+        if corrupted_cleaned or cache.empty or cache.index.min() > pd.Timestamp(HISTORY_START):
+            try:
+                _backfill_total_mv_daily(HISTORY_START, query_date)
+                _backfill_margin_ratio(HISTORY_START)
+                cache = _load_cache("margin_ratio.csv")
+            except Exception as e:
+                logger.warning("fetch_margin_ratio: backfill failed: %s", e)
 
     # Margin data is published T+1; fetch the last trading day before query_date
     target_date = _last_weekday_before(query_date)
@@ -553,7 +542,7 @@ def fetch_margin_ratio(query_date: date | None = None) -> tuple[pd.DataFrame | N
             return updated
 
     try:
-        fresh_cache = _run_with_timeout(_do_api)
+        fresh_cache = _run_with_timeout(_do_api, endpoint="margin")
         return fresh_cache, False
     except concurrent.futures.TimeoutError:
         logger.warning("API timeout for fetch_margin_ratio, using stale cache")
@@ -598,7 +587,7 @@ def fetch_csi300_pe(query_date: date | None = None) -> tuple[float | None, bool]
             return float(pe)
 
     try:
-        pe = _run_with_timeout(_do_api)
+        pe = _run_with_timeout(_do_api, endpoint="index_dailybasic")
         return pe, False
     except concurrent.futures.TimeoutError:
         logger.warning("API timeout for fetch_csi300_pe, using stale cache")
@@ -636,17 +625,16 @@ def fetch_cgb10y_yield(query_date: date | None = None) -> tuple[float | None, bo
             gov = raw[raw["曲线名称"] == "中债国债收益率曲线"]
             if gov.empty:
                 raise ValueError("no gov bond curve data in last 7 days")
-            updated = cache.copy()
-            for _, row in gov.iterrows():
-                dt = pd.to_datetime(row["日期"])
-                yld = pd.to_numeric(row["10年"], errors="coerce")
-                if pd.notna(yld):
-                    updated = _upsert_row(updated, dt, {"CGB_10Y_Yield": float(yld)})
+            rows = pd.DataFrame(
+                {"CGB_10Y_Yield": pd.to_numeric(gov["10年"], errors="coerce").to_numpy()},
+                index=pd.to_datetime(gov["日期"]).to_numpy(),
+            ).dropna()
+            updated = upsert_frame(cache, rows)
             _save_cache("cgb10y_yield.csv", updated)
             return updated
 
     try:
-        fresh_cache = _run_with_timeout(_do_api)
+        fresh_cache = _run_with_timeout(_do_api, endpoint="bond_china_yield")
         latest_val = fresh_cache["CGB_10Y_Yield"].dropna().iloc[-1]
         latest_dt = fresh_cache["CGB_10Y_Yield"].dropna().index[-1]
         stale = latest_dt.date() < query_date
@@ -736,7 +724,7 @@ def fetch_limit_counts(query_date: date | None = None) -> tuple[dict | None, boo
         def _tushare_stk_limit():
             pro = _get_pro()
             return pro.stk_limit(trade_date=date_str)
-        df = _run_with_timeout(_tushare_stk_limit)
+        df = _run_with_timeout(_tushare_stk_limit, endpoint="stk_limit")
         if not df.empty:
             up_count = int(len(df[df.get("up_limit", pd.Series()).notna()]))
             down_count = int(len(df[df.get("down_limit", pd.Series()).notna()]))
@@ -750,7 +738,7 @@ def fetch_limit_counts(query_date: date | None = None) -> tuple[dict | None, boo
         try:
             def _akshare_zt():
                 return ak.stock_zt_pool_em(date=date_str)
-            zt_df = _run_with_timeout(_akshare_zt)
+            zt_df = _run_with_timeout(_akshare_zt, endpoint="stock_zt_pool_em")
             up_count = len(zt_df) if not zt_df.empty else 0
         except concurrent.futures.TimeoutError:
             logger.warning("API timeout for fetch_limit_counts (zt_pool), using stale cache")
@@ -762,7 +750,7 @@ def fetch_limit_counts(query_date: date | None = None) -> tuple[dict | None, boo
         try:
             def _akshare_dt():
                 return ak.stock_zt_pool_dtgc_em(date=date_str)
-            dt_df = _run_with_timeout(_akshare_dt)
+            dt_df = _run_with_timeout(_akshare_dt, endpoint="stock_zt_pool_dtgc_em")
             down_count = len(dt_df) if not dt_df.empty else 0
         except concurrent.futures.TimeoutError:
             logger.warning("API timeout for fetch_limit_counts (dtgc_pool), using stale cache")
@@ -833,12 +821,10 @@ def fetch_northbound_flow(query_date: date | None = None) -> tuple[dict | None,
             df = df.set_index("date").sort_index()
             df["net_yi"] = pd.to_numeric(df["north_money"], errors="coerce") * _WAN_TO_YI
             df["cumul_5d"] = df["net_yi"].rolling(5, min_periods=1).sum()
-            updated = cache.copy()
-            for dt_ts, row in df.iterrows():
-                updated = _upsert_row(updated, dt_ts, {
-                    "Northbound_Net_Yi": round(float(row["net_yi"]), 2) if pd.notna(row["net_yi"]) else None,
-                    "Northbound_5D_Cumulative_Yi": round(float(row["cumul_5d"]), 2) if pd.notna(row["cumul_5d"]) else None,
-                })
+            updated = upsert_frame(cache, pd.DataFrame({
+                "Northbound_Net_Yi": df["net_yi"].round(2),
+                "Northbound_5D_Cumulative_Yi": df["cumul_5d"].round(2),
+            }))
             _save_cache("northbound_flow.csv", updated)
             latest = df.iloc[-1]
             return {
@@ -847,7 +833,7 @@ def fetch_northbound_flow(query_date: date | None = None) -> tuple[dict | None,
             }
 
     try:
-        return _run_with_timeout(_do_api), False
+        return _run_with_timeout(_do_api, endpoint="moneyflow_hsgt"), False
     except concurrent.futures.TimeoutError:
         logger.warning("API timeout for fetch_northbound_flow, using stale cache")
         if not cache.empty and "Northbound_Net_Yi" in cache.columns:
@@ -902,12 +888,10 @@ def fetch_southbound_flow(query_date: date | None = None) -> tuple[dict | None,
             df["ma20"] = df["net_yi"].rolling(20, min_periods=5).mean()
             df["std20"] = df["net_yi"].rolling(20, min_periods=5).std()
             df["sigma_dev"] = (df["net_yi"] - df["ma20"]) / df["std20"].replace(0, float("nan"))
-            updated = cache.copy()
-            for dt_ts, row in df.iterrows():
-                updated = _upsert_row(updated, dt_ts, {
-                    "Southbound_Net_Yi": round(float(row["net_yi"]), 2) if pd.notna(row["net_yi"]) else None,
-                    "Southbound_Sigma_Dev": round(float(row["sigma_dev"]), 4) if pd.notna(row.get("sigma_dev")) else None,
-                })
+            updated = upsert_frame(cache, pd.DataFrame({
+                "Southbound_Net_Yi": df["net_yi"].round(2),
+                "Southbound_Sigma_Dev": df["sigma_dev"].round(4),
+            }))
             _save_cache("southbound_flow.csv", updated)
             latest = df.iloc[-1]
             return {
@@ -916,7 +900,7 @@ def fetch_southbound_flow(query_date: date | None = None) -> tuple[dict | None,
             }
 
     try:
-        return _run_with_timeout(_do_api), False
+        return _run_with_timeout(_do_api, endpoint="moneyflow_hsgt"), False
     except concurrent.futures.TimeoutError:
         logger.warning("API timeout for fetch_southbound_flow, using stale cache")
         if not cache.empty and "Southbound_Net_Yi" in cache.columns:
@@ -962,16 +946,13 @@ def fetch_qvix(query_date: date | None = None) -> tuple[float | None, bool]:
                 raise ValueError("empty QVIX response")
             raw["date"] = pd.to_datetime(raw["date"])
             raw = raw.set_index("date").sort_index()
-            updated = cache.copy()
-            for dt_ts, row in raw.iterrows():
-                close = pd.to_numeric(row.get("close"), errors="coerce")
-                if pd.notna(close):
-                    updated = _upsert_row(updated, dt_ts, {"QVIX_Close": float(close)})
+            closes = pd.to_numeric(raw["close"], errors="coerce").dropna()
+            updated = upsert_frame(cache, closes.to_frame("QVIX_Close"))
             _save_cache("qvix.csv", updated)
             return updated
 
     try:
-        fresh_cache = _run_with_timeout(_do_api)
+        fresh_cache = _run_with_timeout(_do_api, endpoint="index_option_50etf_qvix")
         latest_ts = fresh_cache["QVIX_Close"].dropna().index[-1]
         latest_val = float(fresh_cache.loc[latest_ts, "QVIX_Close"])
         stale = latest_ts.date() < target_date
@@ -1016,7 +997,7 @@ def fetch_m2_monthly() -> tuple[pd.Series | None, str | None, bool]:
             return combined
 
     try:
-        combined = _run_with_timeout(_do_api)
+        combined = _run_with_timeout(_do_api, endpoint="cn_m")
         latest_month = combined.index[-1].strftime("%Y-%m") if not combined.empty else None
         return combined["M2_Yi"], latest_month, False
     except concurrent.futures.TimeoutError:
@@ -1072,17 +1053,15 @@ def fetch_market_total_amount(query_date: date | None = None) -> tuple[float | N
             combined = pd.concat(parts.values(), axis=1).sum(axis=1)
             combined.name = "Total_Amount_Yi"
             ma20 = combined.rolling(20, min_periods=1).mean()
-            updated = cache.copy()
-            for dt_ts in combined.index:
-                updated = _upsert_row(updated, dt_ts, {
-                    "Total_Amount_Yi": round(float(combined[dt_ts]), 2) if pd.notna(combined[dt_ts]) else None,
-                    "Amount_MA20_Yi": round(float(ma20[dt_ts]), 2) if pd.notna(ma20[dt_ts]) else None,
-                })
+            updated = upsert_frame(cache, pd.DataFrame({
+                "Total_Amount_Yi": combined.round(2),
+                "Amount_MA20_Yi": ma20.round(2),
+            }))
             _save_cache("total_amount.csv", updated)
             return float(combined.iloc[-1]) if pd.notna(combined.iloc[-1]) else None, float(ma20.iloc[-1]) if pd.notna(ma20.iloc[-1]) else None
 
     try:
-        latest_amount, latest_ma20 = _run_with_timeout(_do_api)
+        latest_amount, latest_ma20 = _run_with_timeout(_do_api, endpoint="index_daily")
         return latest_amount, latest_ma20, False
     except concurrent.futures.TimeoutError:
         logger.warning("API timeout for fetch_market_total_amount, using stale cache")
@@ -1111,18 +1090,19 @@ def fetch_deposit_ratio(query_date: date | None = None) -> tuple[float | None, s
 
     # _clean_corrupted_mv_cache already called by fetch_margin_ratio on the same load;
     # check independently here in case fetch_deposit_ratio is called first.
-    corrupted_cleaned = _clean_corrupted_mv_cache()
+    with _TOTAL_MV_LOCK:
+        corrupted_cleaned = _clean_corrupted_mv_cache()
 
-    cache = _load_cache("deposit_ratio.csv")
+        cache = _load_cache("deposit_ratio.csv")
 
-    # First-load or post-cleanup backfill (M2 already cached; only needs total_mv_daily)
-    if corrupted_cleaned or cache.empty or cache.index.min() > pd.Timestamp(HISTORY_START):
-        try:
-            _backfill_total_mv_daily(HISTORY_START, query_date)
-            _backfill_deposit_ratio(HISTORY_START)
-            cache = _load_cache("deposit_ratio.csv")
-        except Exception as e:
-            logger.warning("fetch_deposit_ratio: backfill failed: %s", e)
+        # First-load or post-cleanup backfill (M2 already cached; only needs total_mv_daily)
+        if corrupted_cleaned or cache.empty or cache.index.min() > pd.Timestamp(HISTORY_START):
+            try:
+                _backfill_total_mv_daily(HISTORY_START, query_date)
+                _backfill_deposit_ratio(HISTORY_START)
+                cache = _load_cache("deposit_ratio.csv")
+            except Exception as e:
+                logger.warning("fetch_deposit_ratio: backfill failed: %s", e)
 
     month_str = query_date.strftime("%Y-%m")
 
@@ -1187,26 +1167,38 @@ def fetch_index_close(
 
     symbol: "sh000300" (沪深300) or "sz399006" (创业板指)
     Returns (pd.Series with DatetimeIndex of close prices, data_stale).
-    ETL-on-demand: serves from cache if today's data exists, otherwise fetches full history.
+    ETL-on-demand: serves from the shared bar store (full OHLCV, kind="index")
+    if today's data exists, otherwise fetches full history. The legacy
+    Close-only china cache file is imported into the store on first use.
     """
-    _cache_file_map: dict[str, str] = {
+    _legacy_cache_map: dict[str, str] = {
         "sh000300": "index_hs300_daily.csv",
         "sz399006": "index_gem_daily.csv",
     }
-    cache_file = _cache_file_map.get(symbol)
-    if cache_file is None:
+    legacy_file = _legacy_cache_map.get(symbol)
+    if legacy_file is None:
         logger.warning("fetch_index_close: unknown symbol %s", symbol)
         return None, True
 
-    cache = _load_cache(cache_file)
-    col = "Close"
-    target_ts = pd.Timestamp(_last_weekday_before(date.today()))
-
-    if not cache.empty and col in cache.columns and target_ts in cache.index:
-        series = cache[col].dropna()
+    store = get_bar_store()
+    bars = store.frame(symbol)
+    if bars is None:
+        legacy = _load_cache(legacy_file)
+        if not legacy.empty and "Close" in legacy.columns:
+            store.write(symbol, legacy[["Close"]].rename(columns={"Close": "close"}).dropna(), kind="index")
+            bars = store.frame(symbol)
+
+    def _close(frame: pd.DataFrame | None) -> pd.Series | None:
+        if frame is None or frame.empty or "close" not in frame.columns:
+            return None
+        series = frame["close"].dropna().rename("Close")
         if start_date is not None:
             series = series[series.index >= pd.Timestamp(start_date)]
-        return series, False
+        return series
+
+    target_ts = pd.Timestamp(_last_weekday_before(date.today()))
+    if bars is not None and len(bars) and bars.index[-1] >= target_ts:
+        return _close(bars), False
 
     try:
         raw = ak.stock_zh_index_daily(symbol=symbol)
@@ -1215,20 +1207,14 @@ def fetch_index_close(
 
         raw["date"] = pd.to_datetime(raw["date"])
         raw = raw.set_index("date").sort_index()
-        raw[col] = pd.to_numeric(raw["close"], errors="coerce")
-        result = raw[[col]].dropna()
-        _save_cache(cache_file, result)
-
-        series = result[col].dropna()
-        if start_date is not None:
-            series = series[series.index >= pd.Timestamp(start_date)]
-        return series, False
+        cols = [c for c in OHLCV if c in raw.columns]
+        result = raw[cols].apply(pd.to_numeric, errors="coerce").dropna(subset=["close"])
+        store.write(symbol, result, kind="index")
+        return _close(store.frame(symbol)), False
 
     except Exception as e:
         logger.warning("fetch_index_close(%s) failed: %s", symbol, e)
-        if not cache.empty and col in cache.columns:
-            series = cache[col].dropna()
-            if start_date is not None:
-                series = series[series.index >= pd.Timestamp(start_date)]
+        series = _close(bars)
+        if series is not None:
             return series, True
         return None, True
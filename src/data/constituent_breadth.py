@@ -0,0 +1,335 @@
+"""
+Constituent-level S&P 500 breadth engine.
+
+S5FI used to be approximated from the 11 sector ETFs (src/data/breadth.py).
+This module keeps daily closes for the index constituents themselves and
+derives real breadth from them:
+
+    constituent list   data_cache/sp500_constituents.csv (Wikipedia, refreshed monthly)
+    closes panel       bar store symbol SP500_CONSTITUENTS (kind "panel"),
+                       one float64 column per ticker, NaN before listing
+    breadth history    bar store symbol SP500_BREADTH (kind "breadth"), columns:
+                       pct_above_20 / pct_above_50 / pct_above_200, new_highs,
+                       new_lows, advances, declines, ad_line, members
+
+Updates are incremental. ``update_constituent_closes`` downloads in batches of
+_BATCH_SIZE tickers and only from the stored last date minus a short overlap
+(yfinance revises the most recent bars); tickers new to the panel get full
+history. ``update_breadth_history`` recomputes only the new days plus the
+overlap, on a warm-up tail of the panel, and continues the A/D line from the
+stored value — so keeping ~500 series current costs a few requests and a few
+hundred rows of arithmetic per day.
+
+Older history can change too: a split rescales a ticker's whole close series
+and a constituent added to the index arrives with back history. When the
+overlap disagrees with the stored closes before the last stored day, that
+ticker's full history is refetched; any write that changes stored rows
+records the earliest changed date in the panel attrs ("recompute_from") and
+the next breadth update recomputes from there.
+
+pct_above_50 is what feeds ``score_market_breadth`` (and the L3 breadth
+trigger) when ``breadth.source: constituents``; see RegimeEngine. The panel
+is seeded from today's constituent list, so history (and any replay using
+it) carries survivorship bias; that is why the default source stays
+``sector_etf``.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .bar_store import BarStore, get_bar_store
+from .breadth import compute_breadth_series
+
+logger = logging.getLogger(__name__)
+
+PANEL_SYMBOL = "SP500_CONSTITUENTS"
+BREADTH_SYMBOL = "SP500_BREADTH"
+DMA_WINDOWS = (20, 50, 200)
+BREADTH_COLUMNS = (
+    "pct_above_20", "pct_above_50", "pct_above_200",
+    "new_highs", "new_lows", "advances", "declines", "ad_line", "members",
+)
+
+_CONSTITUENTS_FILE = Path("data_cache/sp500_constituents.csv")
+_CONSTITUENTS_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+_CONSTITUENTS_MAX_AGE_DAYS = 30
+
+_BATCH_SIZE = 100
+_INITIAL_DAYS = 800          # first download: enough for 200DMA and 52-week highs/lows
+_TAIL_OVERLAP_DAYS = 5       # re-fetch a few days to pick up yfinance revisions
+_RECOMPUTE_FROM = "recompute_from"   # panel attr: earliest date whose closes changed since the last breadth update
+_HIGH_LOW_WINDOW = 252       # 52-week new highs / lows, in trading days
+_WARMUP_ROWS = 300           # panel rows before the first recomputed day (≥ longest window)
+
+
+# ── Constituents ─────────────────────────────────────────────────────────────
+
+def _yf_symbol(symbol: str) -> str:
+    """Wikipedia lists share classes with a dot (BRK.B); yfinance wants BRK-B."""
+    return symbol.strip().upper().replace(".", "-")
+
+
+def _fetch_constituents() -> list[str]:
+    tables = pd.read_html(_CONSTITUENTS_URL, match="Symbol")
+    return sorted({_yf_symbol(s) for s in tables[0]["Symbol"].dropna().astype(str)})
+
+
+def load_constituents(refresh: bool = False) -> list[str]:
+    """Current constituent tickers (yfinance spelling), cached for _CONSTITUENTS_MAX_AGE_DAYS.
+
+    A failed refresh keeps the cached list; with no cache either, returns [].
+    """
+    path = _CONSTITUENTS_FILE
+    fresh = path.exists() and (
+        datetime.now() - datetime.fromtimestamp(path.stat().st_mtime)
+    ).days < _CONSTITUENTS_MAX_AGE_DAYS
+    if refresh or not fresh:
+        try:
+            symbols = _fetch_constituents()
+            if symbols:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                pd.DataFrame({"symbol": symbols}).to_csv(path, index=False)
+                return symbols
+        except Exception as exc:
+            logger.warning("S&P 500 constituent list fetch failed: %s", exc)
+    try:
+        return pd.read_csv(path)["symbol"].dropna().astype(str).tolist()
+    except (OSError, KeyError, pd.errors.EmptyDataError):
+        return []
+
+
+# ── Closes panel ─────────────────────────────────────────────────────────────
+
+def _download_closes(tickers: list[str], start: date) -> pd.DataFrame:
+    """Daily closes for one batch (date × ticker); missing tickers are simply absent."""
+    import yfinance as yf
+
+    data = yf.download(tickers, start=start.isoformat(), progress=False, auto_adjust=False,
+                       threads=True, group_by="column")
+    if data is None or data.empty or "Close" not in data.columns.get_level_values(0):
+        return pd.DataFrame()
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    closes.index = pd.to_datetime(closes.index).tz_localize(None)
+    return closes.dropna(axis=1, how="all").astype(float)
+
+
+def _download_batched(tickers: list[str], start: date) -> pd.DataFrame:
+    frames = []
+    for i in range(0, len(tickers), _BATCH_SIZE):
+        batch = tickers[i:i + _BATCH_SIZE]
+        try:
+            closes = _download_closes(batch, start)
+        except Exception as exc:
+            logger.warning("constituent download failed for %d tickers from %s: %s", len(batch), start, exc)
+            continue
+        if not closes.empty:
+            frames.append(closes)
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+
+def _revised_tickers(stored: pd.DataFrame, fresh: pd.DataFrame, before: pd.Timestamp) -> list[str]:
+    """Tickers whose fresh closes disagree with the stored ones on shared dates before *before*."""
+    rows = stored.index.intersection(fresh.index)
+    rows = rows[rows < before]
+    cols = stored.columns.intersection(fresh.columns)
+    a = stored.loc[rows, cols].to_numpy(dtype=float)
+    b = fresh.loc[rows, cols].to_numpy(dtype=float)
+    both = ~np.isnan(a) & ~np.isnan(b)
+    revised = both & ~np.isclose(a, b, rtol=1e-6, atol=1e-9)
+    return list(cols[revised.any(axis=0)])
+
+
+def _first_change(stored: pd.DataFrame, merged: pd.DataFrame) -> pd.Timestamp | None:
+    """Earliest stored date on which merged differs from stored (added tickers included)."""
+    old = stored.reindex(columns=merged.columns).to_numpy(dtype=float)
+    new = merged.reindex(index=stored.index).to_numpy(dtype=float)
+    both = ~np.isnan(old) & ~np.isnan(new)
+    changed = (np.isnan(old) != np.isnan(new)) | (both & ~np.isclose(old, new, rtol=1e-6, atol=1e-9))
+    rows = np.flatnonzero(changed.any(axis=1))
+    return stored.index[rows[0]] if len(rows) else None
+
+
+def update_constituent_closes(
+    tickers: list[str] | None = None,
+    store: BarStore | None = None,
+    today: date | None = None,
+) -> pd.DataFrame | None:
+    """Bring the closes panel up to *today*; returns the stored panel (None if empty).
+
+    Tickers already in the panel are fetched from its last date minus
+    _TAIL_OVERLAP_DAYS, new tickers from the panel's first date (at least
+    _INITIAL_DAYS back). A known ticker whose overlap disagrees with its stored
+    closes before the last stored day (split, restated history) is refetched
+    over the same full range and replaces its stored column. Otherwise
+    downloaded values win over stored ones; cells a download did not cover keep
+    their stored value. Tickers that left the index keep their history.
+
+    The earliest stored date that changed is kept in the panel attrs until
+    update_breadth_history has recomputed from it.
+    """
+    store = store or get_bar_store()
+    today = today or date.today()
+    tickers = load_constituents() if tickers is None else tickers
+    current = store.frame(PANEL_SYMBOL)
+    last = store.last_date(PANEL_SYMBOL)
+
+    known = [t for t in tickers if current is not None and t in current.columns]
+    new = [t for t in tickers if t not in known]
+    full_start = today - timedelta(days=_INITIAL_DAYS)
+    if current is not None and len(current):
+        full_start = min(full_start, current.index[0].date())
+    base = current
+    downloads = []
+    if known and last is not None:
+        tail = _download_batched(known, last - timedelta(days=_TAIL_OVERLAP_DAYS))
+        revised = _revised_tickers(current, tail, pd.Timestamp(last)) if not tail.empty else []
+        if revised:
+            logger.info("constituent closes revised for %s; refetching full history", revised)
+            refetched = _download_batched(revised, full_start)
+            # a ticker whose refetch failed keeps its stored (consistent) column and retries next run
+            tail = tail.drop(columns=revised)
+            base = current.drop(columns=[t for t in revised if t in refetched.columns])
+            downloads.append(refetched)
+        downloads.append(tail)
+    if new:
+        downloads.append(_download_batched(new, full_start))
+    fetched = [d for d in downloads if not d.empty]
+    if not fetched:
+        return current
+
+    update = pd.concat(fetched, axis=1)
+    update = update.loc[:, ~update.columns.duplicated()]
+    merged = update if base is None else update.combine_first(base)
+    merged = merged.sort_index().reindex(columns=sorted(merged.columns))
+    merged.index.name = "date"
+
+    attrs = {"tickers": len(merged.columns)}
+    pending = store.attrs(PANEL_SYMBOL).get(_RECOMPUTE_FROM)
+    changed = _first_change(current, merged) if current is not None else None
+    dates = [pd.Timestamp(d) for d in (pending, changed) if d is not None]
+    if dates:
+        attrs[_RECOMPUTE_FROM] = min(dates).strftime("%Y-%m-%d")
+    store.write(PANEL_SYMBOL, merged, kind="panel", attrs=attrs)
+    return store.frame(PANEL_SYMBOL)
+
+
+# ── Breadth metrics ──────────────────────────────────────────────────────────
+
+def compute_breadth_frame(closes: pd.DataFrame) -> pd.DataFrame:
+    """Breadth metrics for every row of a (date × ticker) closes panel.
+
+    - pct_above_N: % of constituents with a close today and N valid closes
+      whose close is above their N-day mean (NaN when none qualify); tickers
+      kept in the panel after leaving the index stop counting
+      once their closes stop
+    - new_highs / new_lows: constituents closing today at their highest /
+      lowest close of the last _HIGH_LOW_WINDOW sessions (52 weeks)
+    - advances / declines: constituents up / down vs their previous valid close
+    - ad_line: cumulative (advances - declines) from the first row
+    - members: constituents with a close today
+
+    Every metric is causal, so row t equals the last row of the same call on
+    closes.iloc[:t + 1].
+    """
+    values = closes.to_numpy(dtype=float)
+    out = pd.DataFrame(index=closes.index)
+    for window in DMA_WINDOWS:
+        out[f"pct_above_{window}"] = compute_breadth_series(
+            closes, window=window, fallback_value=np.nan, require_current=True,
+        ).to_numpy()
+
+    valid = ~np.isnan(values)
+    rolling = pd.DataFrame(values).rolling(_HIGH_LOW_WINDOW, min_periods=_HIGH_LOW_WINDOW // 2)
+    with np.errstate(invalid="ignore"):
+        out["new_highs"] = (valid & (values >= rolling.max().to_numpy())).sum(axis=1)
+        out["new_lows"] = (valid & (values <= rolling.min().to_numpy())).sum(axis=1)
+
+        previous = pd.DataFrame(values).ffill().shift(1).to_numpy()
+        change = values - previous
+        out["advances"] = (change > 0).sum(axis=1)
+        out["declines"] = (change < 0).sum(axis=1)
+    out["ad_line"] = np.cumsum(out["advances"].to_numpy() - out["declines"].to_numpy())
+    out["members"] = valid.sum(axis=1)
+    return out.astype(float)
+
+
+def update_breadth_history(store: BarStore | None = None, full: bool = False) -> pd.DataFrame | None:
+    """Extend the stored breadth history to the panel's last date; returns it (None if no panel).
+
+    Only panel days after the stored history, plus its last _TAIL_OVERLAP_DAYS
+    rows (closes may have been revised), are recomputed, on a tail of
+    _WARMUP_ROWS earlier rows; the A/D line continues from the stored value
+    before the first recomputed day. When update_constituent_closes changed
+    older closes (split refetch, added constituents) the recompute starts at
+    the panel's "recompute_from" date instead, which is then cleared.
+    ``full=True`` recomputes everything.
+    """
+    store = store or get_bar_store()
+    panel = store.frame(PANEL_SYMBOL)
+    if panel is None or panel.empty:
+        return None
+    panel_attrs = store.attrs(PANEL_SYMBOL)
+    pending = panel_attrs.get(_RECOMPUTE_FROM)
+    stored = None if full else store.frame(BREADTH_SYMBOL)
+
+    first = None
+    if stored is not None and len(stored) > _TAIL_OVERLAP_DAYS:
+        first = stored.index[-_TAIL_OVERLAP_DAYS]
+        if pending is not None:
+            first = min(first, pd.Timestamp(pending))
+    if first is None or first <= stored.index[0]:
+        history = compute_breadth_frame(panel)
+    else:
+        start = int(panel.index.searchsorted(first, side="left"))
+        kept = stored.loc[stored.index < first]
+        ad_start = float(kept["ad_line"].iloc[-1]) if len(kept) else 0.0
+        # the warm-up rows also give the first recomputed day its previous close
+        tail = compute_breadth_frame(panel.iloc[max(0, start - _WARMUP_ROWS):])
+        recomputed = tail.loc[tail.index >= first]
+        net = recomputed["advances"] - recomputed["declines"]
+        recomputed = recomputed.assign(ad_line=ad_start + net.cumsum())
+        history = pd.concat([kept, recomputed])
+
+    history.index.name = "date"
+    store.write(BREADTH_SYMBOL, history[list(BREADTH_COLUMNS)], kind="breadth",
+                attrs={"members": int(history["members"].iloc[-1]) if len(history) else 0})
+    if pending is not None:
+        store.set_attrs(PANEL_SYMBOL, {k: v for k, v in panel_attrs.items() if k != _RECOMPUTE_FROM})
+    return store.frame(BREADTH_SYMBOL)
+
+
+def load_breadth_history(store: BarStore | None = None) -> pd.DataFrame | None:
+    """Stored breadth history (read-only frame), None when never built."""
+    history = (store or get_bar_store()).frame(BREADTH_SYMBOL)
+    return history if history is not None and not history.empty else None
+
+
+def breadth_as_of(
+    history: pd.DataFrame | None,
+    as_of,
+    column: str = "pct_above_50",
+    max_stale_days: int | None = None,
+) -> float | None:
+    """Value of *column* on the last history day on or before *as_of*.
+
+    None when there is no such day, the value is NaN, or the day is more than
+    *max_stale_days* calendar days before *as_of*.
+    """
+    if history is None or history.empty:
+        return None
+    as_of = pd.Timestamp(as_of)
+    at = int(history.index.searchsorted(as_of, side="right")) - 1
+    if at < 0:
+        return None
+    if max_stale_days is not None and (as_of - history.index[at]).days > max_stale_days:
+        return None
+    value = float(history[column].iloc[at])
+    return None if np.isnan(value) else value
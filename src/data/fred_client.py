@@ -1,20 +1,54 @@
+import json
+import logging
 import os
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
 import pandas as pd
 from fredapi import Fred
 from dotenv import load_dotenv
 
+from .cache_store import get_store, upsert_frame
+from .network_executor import get_executor
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Liquidity components: column name -> FRED series ID
+LIQUIDITY_SERIES = {
+    "WALCL": "WALCL",      # F1: Fed Total Assets - Weekly (Wednesday)
+    "RRP": "RRPONTSYD",    # F2: Reverse Repo - Daily
+    "TGA": "WTREGEN",      # F3: TGA - Weekly
+    "SOFR": "SOFR",        # F4: SOFR - Daily
+}
+
+# Trailing window (days) FRED typically revises. An incremental pull re-requests
+# this much history; if even the oldest re-requested observation changed, the
+# revision may reach further back and the series is re-pulled in full.
+_REVISION_WINDOW_DAYS = {"WALCL": 35, "WTREGEN": 35}
+_DEFAULT_REVISION_WINDOW_DAYS = 14
+# Don't ask FRED whether a series changed more often than this
+_RECHECK_S = 3600
+_VINTAGES_FILE = "_vintages.json"
+_ENDPOINT = "fred"  # network_executor concurrency cap and metrics key
+_LIQUIDITY_TIMEOUT_S = 120.0  # shared deadline for the four series refreshes
+
+
 class FredClient:
-    def __init__(self):
+    def __init__(self, cache_dir: str | Path = "data_cache/fred"):
         self.api_key = os.getenv("FRED_API_KEY")
-        # Allow instantiation without key if not calling API (e.g. for testing mocks), 
+        # Allow instantiation without key if not calling API (e.g. for testing mocks),
         # but warn or fail when method called.
         if self.api_key:
             self.fred = Fred(api_key=self.api_key)
         else:
             self.fred = None
             print("Warning: FRED_API_KEY not found. FredClient will fail to fetch data.")
+        self.cache_dir = Path(cache_dir)
+        self._vintage_lock = threading.Lock()
 
     def get_series(self, series_id: str, start_date: str = None) -> pd.Series:
         """Fetch a series from FRED."""
@@ -22,31 +56,131 @@ class FredClient:
             raise ValueError("FRED_API_KEY not configured.")
         return self.fred.get_series(series_id, observation_start=start_date)
 
+    # ── Series-level cache ──────────────────────────────────────────────────
+
+    def _read_vintages(self) -> dict:
+        path = self.cache_dir / _VINTAGES_FILE
+        try:
+            return json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_vintage(self, series_id: str, record: dict) -> None:
+        with self._vintage_lock:
+            vintages = self._read_vintages()
+            vintages[series_id] = record
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / _VINTAGES_FILE).write_text(json.dumps(vintages, indent=2))
+
+    def _last_updated(self, series_id: str) -> str | None:
+        """FRED's last_updated stamp for the series (changes with every new vintage)."""
+        if not self.fred:
+            raise ValueError("FRED_API_KEY not configured.")
+        return str(self.fred.get_series_info(series_id).get("last_updated"))
+
+    def get_cached_series(self, series_id: str, start_date: str = None) -> pd.Series:
+        """Series from the local per-series cache, topped up from FRED when it changed.
+
+        - no cache, or start_date earlier than what was pulled before: full pull;
+        - FRED's last_updated unchanged since the last pull: no data request;
+        - otherwise re-pull only the trailing revision window and merge it,
+          unless the oldest re-pulled observation was revised too (full pull).
+
+        On any FRED error the cached series is returned as-is (stale).
+        """
+        store = get_store(self.cache_dir)
+        name = f"{series_id}.csv"
+        meta = self._read_vintages().get(series_id, {})
+        cached = store.load(name)
+        pulled_from = meta.get("observation_start")
+        # None = pulled from the start of the series, which covers any start_date
+        covers = bool(meta) and (pulled_from is None or (start_date is not None and start_date >= pulled_from))
+
+        try:
+            if cached.empty or not covers:
+                series = self._pull_full(series_id, start_date)
+                pulled_from = start_date
+            elif time.time() - meta.get("checked_at", 0) < _RECHECK_S:
+                series = cached["value"]
+            else:
+                vintage = self._last_updated(series_id)
+                if vintage == meta.get("last_updated"):
+                    series = cached["value"]
+                    self._write_vintage(series_id, {**meta, "checked_at": time.time()})
+                else:
+                    series = self._pull_window(series_id, cached["value"], pulled_from)
+                    self._write_vintage(series_id, {
+                        "last_updated": vintage, "observation_start": pulled_from, "checked_at": time.time(),
+                    })
+                    store.save(name, series.to_frame("value"))
+        except Exception as e:
+            if cached.empty:
+                raise
+            logger.warning("FRED %s refresh failed, using cached series: %s", series_id, e)
+            series = cached["value"]
+
+        if start_date:
+            series = series[series.index >= pd.Timestamp(start_date)]
+        return series.rename(series_id)
+
+    def _pull_full(self, series_id: str, start_date: str | None) -> pd.Series:
+        vintage = self._last_updated(series_id)
+        series = self.get_series(series_id, start_date).dropna().astype(float)
+        series.index.name = "date"
+        get_store(self.cache_dir).save(f"{series_id}.csv", series.to_frame("value"))
+        self._write_vintage(series_id, {
+            "last_updated": vintage, "observation_start": start_date, "checked_at": time.time(),
+        })
+        return series
+
+    def _pull_window(self, series_id: str, cached: pd.Series, pulled_from: str | None) -> pd.Series:
+        window = _REVISION_WINDOW_DAYS.get(series_id, _DEFAULT_REVISION_WINDOW_DAYS)
+        window_start = cached.index.max() - pd.Timedelta(days=window)
+        fresh = self.get_series(series_id, window_start.strftime("%Y-%m-%d")).dropna().astype(float)
+        if fresh.empty:
+            return cached
+
+        first = fresh.index.min()
+        if first in cached.index and abs(cached.loc[first] - fresh.loc[first]) > 1e-9 * max(1.0, abs(fresh.loc[first])):
+            logger.info("FRED %s revised beyond the %dd window; re-pulling full history", series_id, window)
+            fresh = self.get_series(series_id, pulled_from).dropna().astype(float)
+            fresh.index.name = "date"
+            return fresh
+
+        merged = upsert_frame(cached.to_frame("value"), fresh.to_frame("value"))
+        return merged["value"]
+
     def get_liquidity_data(self, start_date: str = None) -> pd.DataFrame:
-        """Fetch key liquidity components: WALCL, RRPONTSYD, WTREGEN, SOFR."""
-        # F1: Fed Total Assets (WALCL) - Weekly
-        # F2: Reverse Repo (RRPONTSYD) - Daily
-        # F3: TGA (WTREGEN) - Daily
-        # F4: SOFR (SOFR) - Daily
-        
+        """Fetch key liquidity components: WALCL, RRPONTSYD, WTREGEN, SOFR.
+
+        The four series are refreshed concurrently through the series cache on
+        the shared network executor (endpoint "fred") and only combined once all
+        of them are done, so the frame reflects a single refresh; the FRED
+        last_updated stamps used are in df.attrs["fred_vintage"]. A series that
+        fails (with no cache to fall back on) or misses the deadline raises.
+        """
         print("Fetching FRED data...")
-        walcl = self.get_series("WALCL", start_date)
-        rrp = self.get_series("RRPONTSYD", start_date)
-        tga = self.get_series("WTREGEN", start_date)
-        sofr = self.get_series("SOFR", start_date)
-        
+        outcome = get_executor().run_many(
+            {col: partial(self.get_cached_series, series_id, start_date)
+             for col, series_id in LIQUIDITY_SERIES.items()},
+            _LIQUIDITY_TIMEOUT_S, endpoint=_ENDPOINT,
+        )
+        series = {}
+        for col in LIQUIDITY_SERIES:
+            if isinstance(outcome[col], Exception):
+                raise outcome[col]
+            series[col] = outcome[col]
+
         # Create a DataFrame with all series
         # We use outer join to keep all dates initially
-        df = pd.DataFrame({
-            "WALCL": walcl,
-            "RRP": rrp,
-            "TGA": tga,
-            "SOFR": sofr
-        })
-        
+        df = pd.DataFrame(series)
+
         # Resample to daily and forward fill to handle weekly data (WALCL)
         # WALCL is reported on Wednesdays. We forward fill it to the next Tuesday.
         df = df.resample('D').ffill()
-        
-        return df
 
+        vintages = self._read_vintages()
+        df.attrs["fred_vintage"] = {
+            sid: vintages.get(sid, {}).get("last_updated") for sid in LIQUIDITY_SERIES.values()
+        }
+        return df
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime, timedelta
@@ -6,6 +7,29 @@ from .market_client import MarketClient
 from .china_market_client import ChinaMarketClient
 from .china_market_fetcher import _record_sync
 
+# Incremental macro refresh: every run re-requests this many days of Yahoo bars
+# before the oldest per-column last date. The older part of that overlap must
+# match the cache or the run falls back to a full refresh (split adjustment);
+# the newest _VOLATILE_TAIL_DAYS are simply overwritten, since partial intraday
+# bars legitimately change. FRED revisions are handled by FredClient.
+_OVERLAP_DAYS = 14
+_VOLATILE_TAIL_DAYS = 7
+
+
+def _find_revisions(cached: pd.DataFrame, fresh: pd.DataFrame, check_until: pd.Timestamp) -> list[str]:
+    """Columns whose values on shared dates up to check_until disagree between cached and fresh."""
+    rows = cached.index.intersection(fresh.index)
+    rows = rows[rows <= check_until]
+    revised = []
+    for col in cached.columns.intersection(fresh.columns):
+        a = pd.to_numeric(cached.loc[rows, col], errors="coerce").to_numpy(dtype=float)
+        b = pd.to_numeric(fresh.loc[rows, col], errors="coerce").to_numpy(dtype=float)
+        both = ~np.isnan(a) & ~np.isnan(b)
+        if not np.allclose(a[both], b[both], rtol=1e-6, atol=1e-9):
+            revised.append(col)
+    return revised
+
+
 class DataLoader:
     def __init__(self, data_dir: str = "data_cache"):
         self.fred_client = FredClient()
@@ -15,8 +39,20 @@ class DataLoader:
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
             
-    def fetch_all_data(self, days_back: int = 365, use_cache: bool = True) -> pd.DataFrame:
+    def fetch_all_data(self, days_back: int = 365, use_cache: bool = True, incremental: bool = True) -> pd.DataFrame:
+        """
+        FRED liquidity + Yahoo market closes, forward-filled onto one daily index.
+
+        macro_data.csv is the served (filled, trimmed) frame; macro_raw.csv keeps
+        the unfilled source values so each column's last real observation is
+        known. With incremental=True a stale cache is topped up by requesting
+        only the missing Yahoo tail (start=) and reading FRED from FredClient's
+        per-series cache instead of re-downloading the whole window; a full refresh runs when there is no
+        usable raw cache, it does not reach back far enough for days_back, or
+        the overlap shows revised history. use_cache=False always refetches in full.
+        """
         cache_file = os.path.join(self.data_dir, "macro_data.csv")
+        raw_file = os.path.join(self.data_dir, "macro_raw.csv")
         today = datetime.now().strftime("%Y-%m-%d")
         
         # Check cache
@@ -38,15 +74,22 @@ class DataLoader:
         
         try:
             with _record_sync("macro_data.csv"):
-                print("Fetching new data...")
-                fred_df = self.fred_client.get_liquidity_data(start_date=start_date)
-                market_df = self.market_client.get_market_data(period=period)
-
-                combined_df = pd.concat([fred_df, market_df], axis=1)
-                combined_df = combined_df.ffill()
+                cutoff_date = datetime.now() - timedelta(days=days_back)
+                raw_df = None
+                if use_cache and incremental and os.path.exists(raw_file):
+                    raw_df = self._refresh_macro_incremental(
+                        pd.read_csv(raw_file, index_col=0, parse_dates=True), cutoff_date,
+                    )
+                if raw_df is None:
+                    print("Fetching new data...")
+                    fred_df = self.fred_client.get_liquidity_data(start_date=start_date)
+                    market_df = self.market_client.get_market_data(period=period)
+                    raw_df = pd.concat([fred_df, market_df], axis=1)
+                raw_df.to_csv(raw_file)
+
+                combined_df = raw_df.ffill()
                 combined_df = combined_df.dropna()
 
-                cutoff_date = datetime.now() - timedelta(days=days_back)
                 combined_df = combined_df[combined_df.index >= cutoff_date]
 
                 combined_df.to_csv(cache_file)
@@ -60,6 +103,44 @@ class DataLoader:
                 return pd.read_csv(cache_file, index_col=0, parse_dates=True)
             raise e
 
+    def _refresh_macro_incremental(self, raw: pd.DataFrame, cutoff: datetime) -> pd.DataFrame | None:
+        """Append the missing tail to the raw macro cache; None means 'do a full refresh'."""
+        if raw.empty:
+            return None
+        first_dates = [raw[c].first_valid_index() for c in raw.columns]
+        if any(d is None for d in first_dates):
+            return None
+        # Every column must already reach back to the served window (Yahoo's
+        # period= window starts on the first trading day, hence the slack)
+        if max(first_dates) > pd.Timestamp(cutoff.date()) + pd.Timedelta(days=_VOLATILE_TAIL_DAYS):
+            return None
+
+        # FRED comes whole from FredClient's per-series cache, which only asks
+        # FRED for the trailing revision window and handles revisions itself
+        fred_df = self.fred_client.get_liquidity_data(start_date=raw.index.min().strftime("%Y-%m-%d"))
+        market_cols = raw.columns.difference(fred_df.columns, sort=False)
+        market_raw = raw[market_cols]
+
+        last_dates = [market_raw[c].last_valid_index() for c in market_cols]
+        tail_start = min([*last_dates, raw.index.max()]) - pd.Timedelta(days=_OVERLAP_DAYS)
+        tail_str = tail_start.strftime("%Y-%m-%d")
+        print(f"Fetching market data incrementally from {tail_str}...")
+        market_df = self.market_client.get_market_data(start=tail_str)
+
+        if not market_df.empty:
+            check_until = raw.index.max() - pd.Timedelta(days=_VOLATILE_TAIL_DAYS)
+            revised = _find_revisions(market_raw, market_df, check_until)
+            if revised:
+                print(f"Revisions detected in {revised}; falling back to full refresh")
+                return None
+            # Fresh values win; cells the tail request did not return keep their cached value
+            market_raw = market_df.combine_first(market_raw)
+
+        merged = pd.concat([fred_df, market_raw], axis=1)
+        merged = merged[list(dict.fromkeys([*raw.columns, *merged.columns]))]
+        merged.index.name = raw.index.name
+        return merged
+
     def fetch_sector_etf_data(self, days_back: int = 365, use_cache: bool = True) -> pd.DataFrame:
         """Fetch sector ETF data for S5FI market breadth approximation."""
         cache_file = os.path.join(self.data_dir, "sector_etf_data.csv")
@@ -22,10 +22,15 @@ class MarketClient:
             "XLRE": "XLRE", "XLU": "XLU", "XLB": "XLB",
         }
     
-    def get_market_data(self, period: str = "1y") -> pd.DataFrame:
-        """Fetch market data for all configured tickers."""
+    def get_market_data(self, period: str = "1y", start: str | None = None) -> pd.DataFrame:
+        """Fetch market data for all configured tickers.
+
+        start: YYYY-MM-DD; when given, only bars from that date on are
+        requested (incremental refresh) and `period` is ignored.
+        """
         print("Fetching Market data from Yahoo Finance...")
         ticker_list = list(self.tickers.values())
+        window = {"start": start} if start else {"period": period}
         
         # Download data
         # auto_adjust=False: We get 'Close' and 'Adj Close'. 
@@ -33,7 +38,7 @@ class MarketClient:
         # though 'Adj Close' is better for SPY returns. 
         # Given we want price levels for charts (SPY), Close is fine.
         try:
-            data = yf.download(ticker_list, period=period, progress=False, auto_adjust=False)
+            data = yf.download(ticker_list, progress=False, auto_adjust=False, **window)
         except Exception as e:
             print(f"Error downloading data: {e}")
             return pd.DataFrame()
@@ -0,0 +1,279 @@
+"""
+Process-wide managed executor for blocking network calls with hard timeouts.
+
+`china_market_fetcher._run_with_timeout` used to build a fresh
+`ThreadPoolExecutor(max_workers=1)` per API call inside a `with` block. The
+block's implicit `shutdown(wait=True)` joined the worker, so a call that
+timed out still held the caller until the underlying HTTP request gave up,
+and the timeout only decided which exception was raised afterwards.
+
+`NetworkExecutor.run` gives the timeout real teeth:
+
+- a persistent pool of *daemon* worker threads, so a hung request neither
+  blocks the caller past its timeout nor the interpreter at exit;
+- the caller waits at most `timeout_s`, including time spent waiting for a
+  concurrency slot; on timeout a not-yet-started call is cancelled and a
+  running one is abandoned (left to finish in the background, result dropped);
+- per-endpoint concurrency caps (semaphores) so one hanging endpoint cannot
+  accumulate unbounded abandoned workers; an abandoned call keeps its slot
+  until it actually returns;
+- per-endpoint counters (in-flight, completed, failed, timed-out, abandoned)
+  read by the Data Management page via `metrics()`.
+
+`NetworkExecutor.run_many` fans a batch of calls out under one shared
+deadline with the same slots, abandonment and counters.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Hashable, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Fan-outs (run_many) hold a worker per call while their fetchers make nested
+# run() calls, so leave room for both layers plus abandoned stragglers.
+_DEFAULT_MAX_WORKERS = 32
+_DEFAULT_ENDPOINT_CONCURRENCY = 4
+
+# Endpoint-specific concurrency caps. Anything not listed uses the default.
+ENDPOINT_CONCURRENCY: dict[str, int] = {
+    # AkShare scrapes eastmoney; parallel hits there get throttled quickly
+    "stock_zt_pool_em": 1,
+    "stock_zt_pool_dtgc_em": 1,
+    # ledger snapshot prefetch: one call per distinct ticker (yfinance / Tushare)
+    "ledger_quotes": 8,
+    # China regime fan-out: all eight indicator fetchers + china_data + CSI 300 at once
+    "china_inputs": 10,
+    # FRED liquidity refresh: the four series of fred_client.LIQUIDITY_SERIES together
+    "fred": 4,
+}
+
+
+@dataclass
+class EndpointMetrics:
+    """Counters for one endpoint. `abandoned` is a gauge of workers still
+    running after their caller timed out; the rest are cumulative."""
+
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    abandoned: int = 0
+    abandoned_total: int = 0
+
+
+class _DaemonPool:
+    """Minimal thread pool whose workers are daemon threads.
+
+    concurrent.futures.ThreadPoolExecutor joins its (non-daemon) workers at
+    interpreter exit, which is exactly what an abandoned, hung request must
+    not be allowed to do.
+    """
+
+    def __init__(self, max_workers: int, name: str) -> None:
+        self._max_workers = max(1, max_workers)
+        self._name = name
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads: list[threading.Thread] = []
+        self._idle = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], Any]) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            self._queue.put((future, fn))
+            if self._idle:
+                self._idle -= 1
+            elif len(self._threads) < self._max_workers:
+                t = threading.Thread(
+                    target=self._worker, name=f"{self._name}_{len(self._threads)}", daemon=True,
+                )
+                self._threads.append(t)
+                t.start()
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            future, fn = self._queue.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._lock:
+                self._idle += 1
+
+
+class NetworkExecutor:
+    """Run blocking calls with a hard per-call timeout on a shared daemon pool."""
+
+    def __init__(
+        self,
+        max_workers: int = _DEFAULT_MAX_WORKERS,
+        endpoint_concurrency: Mapping[str, int] | None = None,
+        default_concurrency: int = _DEFAULT_ENDPOINT_CONCURRENCY,
+    ) -> None:
+        self._pool = _DaemonPool(max_workers, "net")
+        self._caps = {**ENDPOINT_CONCURRENCY, **(endpoint_concurrency or {})}
+        self._default_cap = max(1, default_concurrency)
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._metrics: dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint: str) -> tuple[threading.BoundedSemaphore, EndpointMetrics]:
+        with self._lock:
+            if endpoint not in self._slots:
+                self._slots[endpoint] = threading.BoundedSemaphore(self._caps.get(endpoint, self._default_cap))
+                self._metrics[endpoint] = EndpointMetrics()
+            return self._slots[endpoint], self._metrics[endpoint]
+
+    def _launch(
+        self, fn: Callable[[], Any], slot: threading.BoundedSemaphore, m: EndpointMetrics,
+    ) -> tuple[concurrent.futures.Future, dict[str, bool]]:
+        """Submit fn holding an already-acquired slot; the task releases it when it returns."""
+        # Both flags are only touched under self._lock, so "finished" and
+        # "abandoned" can never disagree about who decrements the gauge
+        state = {"finished": False, "abandoned": False}
+
+        def _task() -> Any:
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    state["finished"] = True
+                    m.in_flight -= 1
+                    if state["abandoned"]:
+                        m.abandoned -= 1
+                slot.release()
+
+        with self._lock:
+            m.in_flight += 1
+        return self._pool.submit(_task), state
+
+    def _give_up(
+        self, future: concurrent.futures.Future, state: dict[str, bool],
+        slot: threading.BoundedSemaphore, m: EndpointMetrics,
+    ) -> None:
+        """Caller stopped waiting: cancel a not-yet-started call, abandon a running one."""
+        with self._lock:
+            m.timed_out += 1
+            if future.cancel():
+                # Never started: _task will not run, so undo its bookkeeping here
+                m.in_flight -= 1
+                slot.release()
+            elif not state["finished"]:
+                state["abandoned"] = True
+                m.abandoned += 1
+                m.abandoned_total += 1
+
+    def run(self, fn: Callable[[], Any], timeout_s: float, endpoint: str = "default") -> Any:
+        """Return fn() or raise concurrent.futures.TimeoutError after timeout_s.
+
+        Exceptions raised by fn propagate unchanged.
+        """
+        deadline = time.monotonic() + timeout_s
+        slot, m = self._endpoint(endpoint)
+
+        if not slot.acquire(timeout=max(0.0, timeout_s)):
+            with self._lock:
+                m.timed_out += 1
+            logger.warning("%s: no free slot within %.0fs", endpoint, timeout_s)
+            raise concurrent.futures.TimeoutError(f"{endpoint}: concurrency cap reached")
+
+        future, state = self._launch(fn, slot, m)
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            self._give_up(future, state, slot, m)
+            logger.warning("%s timed out after %.0fs", endpoint, timeout_s)
+            raise
+        except Exception:
+            with self._lock:
+                m.failed += 1
+            raise
+        with self._lock:
+            m.completed += 1
+        return result
+
+    def run_many(
+        self,
+        calls: Mapping[Hashable, Callable[[], Any]],
+        timeout_s: float,
+        endpoint: str = "default",
+        on_settle: Callable[[Hashable, Any], None] | None = None,
+    ) -> dict[Hashable, Any]:
+        """Run every call concurrently under one shared deadline; {key: result or exception}.
+
+        Calls take the endpoint's concurrency slots like `run`, so at most its
+        cap are in flight at once. A call not finished by the deadline maps to
+        concurrent.futures.TimeoutError (cancelled if it never started,
+        abandoned otherwise); a failing call maps to its exception. Never
+        raises for an individual call. on_settle(key, result or exception) is
+        called on the caller's thread as each call settles, in completion
+        order (timed-out calls last).
+        """
+        deadline = time.monotonic() + timeout_s
+        slot, m = self._endpoint(endpoint)
+        outcome: dict[Hashable, Any] = {}
+
+        def _settle(key: Hashable, value: Any) -> None:
+            outcome[key] = value
+            if on_settle is not None:
+                on_settle(key, value)
+
+        started: dict[concurrent.futures.Future, tuple[Hashable, dict[str, bool]]] = {}
+        for key, fn in calls.items():
+            if not slot.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                with self._lock:
+                    m.timed_out += 1
+                _settle(key, concurrent.futures.TimeoutError(f"{endpoint}: concurrency cap reached"))
+                continue
+            future, state = self._launch(fn, slot, m)
+            started[future] = (key, state)
+
+        try:
+            for future in concurrent.futures.as_completed(
+                started, timeout=max(0.0, deadline - time.monotonic()),
+            ):
+                error = future.exception()
+                with self._lock:
+                    if error is None:
+                        m.completed += 1
+                    else:
+                        m.failed += 1
+                _settle(started[future][0], future.result() if error is None else error)
+        except concurrent.futures.TimeoutError:
+            pass
+        for future, (key, state) in started.items():
+            if key not in outcome:
+                self._give_up(future, state, slot, m)
+                _settle(key, concurrent.futures.TimeoutError(f"{endpoint} timed out after {timeout_s:.1f}s"))
+        timed_out = sum(isinstance(v, concurrent.futures.TimeoutError) for v in outcome.values())
+        if timed_out:
+            logger.warning("%s: %d of %d calls exceeded the %.1fs deadline",
+                           endpoint, timed_out, len(calls), timeout_s)
+        return {key: outcome[key] for key in calls}
+
+    def metrics(self) -> dict[str, dict[str, int]]:
+        """Snapshot of per-endpoint counters, sorted by endpoint name."""
+        with self._lock:
+            return {name: asdict(m) for name, m in sorted(self._metrics.items())}
+
+
+_EXECUTOR: NetworkExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> NetworkExecutor:
+    """Process-wide executor shared by every fetcher (and the metrics view)."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = NetworkExecutor()
+        return _EXECUTOR
@@ -4,15 +4,22 @@ Daily bar fetcher for individual stocks with ETL-on-demand CSV caching.
 Supports A-share (Tushare) and US stocks (yfinance). HK stocks return
 (None, stale=True) as a placeholder until a data source is integrated.
 
-Cache: data_cache/stocks/{safe_ticker}/daily.csv
-       columns: date, open, high, low, close, volume  (date is index)
+fetch_daily_bars(item) refreshes one ticker; fetch_daily_bars_bulk(items)
+refreshes a whole stock pool in a handful of requests (Tushare trade_date
+slices + yfinance multi-ticker downloads).
+
+Cache: shared bar store (src/data/bar_store.py), symbol = safe_ticker(ticker),
+       columns: open, high, low, close, volume  (date is index). Reads are
+       zero-copy memory maps — returned frames are read-only.
+Legacy data_cache/stocks/{safe_ticker}/daily.csv files are imported on first read.
+load_daily_bars / cached_tickers are the public, network-free read side for
+jobs that only consume the cache.
 """
 
 from __future__ import annotations
 
 import logging
 import os
-import time
 from datetime import date, timedelta
 from pathlib import Path
 
@@ -20,6 +27,9 @@ import pandas as pd
 
 from src.portfolio.stock_pool import StockPoolItem
 
+from .bar_store import OHLCV, get_bar_store
+from .tushare_scheduler import concat_results, get_scheduler
+
 logger = logging.getLogger(__name__)
 
 _CACHE_BASE = Path("data_cache/stocks")
@@ -32,21 +42,34 @@ def safe_ticker(ticker: str) -> str:
 
 
 def _cache_path(ticker: str) -> Path:
+    """Legacy per-ticker CSV (pre bar store); only read for the one-time import."""
     return _CACHE_BASE / safe_ticker(ticker) / "daily.csv"
 
 
-def _load_daily_cache(ticker: str) -> pd.DataFrame | None:
-    """Load cached daily bars. Returns None if file missing or unreadable."""
+def _load_legacy_csv(ticker: str) -> pd.DataFrame | None:
     path = _cache_path(ticker)
     if not path.exists():
         return None
+    df = pd.read_csv(path, index_col="date", parse_dates=True)
+    df.index = pd.to_datetime(df.index)
+    if any(col not in df.columns for col in OHLCV):
+        return None
+    return df[list(OHLCV)].astype(float).sort_index()
+
+
+def _load_daily_cache(ticker: str) -> pd.DataFrame | None:
+    """Load cached daily bars (read-only view). Returns None if missing or unreadable."""
     try:
-        df = pd.read_csv(path, index_col="date", parse_dates=True)
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-        for col in ["open", "high", "low", "close", "volume"]:
-            if col not in df.columns:
+        store = get_bar_store()
+        df = store.frame(safe_ticker(ticker))
+        if df is None:
+            legacy = _load_legacy_csv(ticker)
+            if legacy is None:
                 return None
+            store.write(safe_ticker(ticker), legacy, kind="stock")
+            df = store.frame(safe_ticker(ticker))
+        if df is None or any(col not in df.columns for col in OHLCV):
+            return None
         return df
     except Exception as e:
         logger.warning(f"Failed to load daily cache for {ticker}: {e}")
@@ -54,10 +77,21 @@ def _load_daily_cache(ticker: str) -> pd.DataFrame | None:
 
 
 def _save_daily_cache(ticker: str, df: pd.DataFrame) -> None:
-    path = _cache_path(ticker)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.index.name = "date"
-    df.to_csv(path)
+    get_bar_store().write(safe_ticker(ticker), df[list(OHLCV)], kind="stock")
+
+
+def load_daily_bars(ticker: str) -> pd.DataFrame | None:
+    """Cached daily bars for ticker (read-only view, no network); None if missing."""
+    return _load_daily_cache(ticker)
+
+
+def cached_tickers() -> list[str]:
+    """Tickers with cached daily bars, in safe_ticker form (accepted by load_daily_bars).
+
+    Only kind="stock" symbols written by this module; older stores may still
+    list ledger HK quotes ("0700.HK") under that kind, which are skipped.
+    """
+    return [s for s in get_bar_store().symbols(kind="stock") if s == safe_ticker(s)]
 
 
 def _last_weekday(d: date) -> date:
@@ -87,29 +121,58 @@ def _normalize_ashare_ticker(ticker: str) -> str:
     return ticker
 
 
+def _get_pro():
+    import tushare as ts
+    token = os.environ.get("TUSHARE_API_KEY", "")
+    return ts.pro_api(token)
+
+
+def _tushare_bars(raw: pd.DataFrame) -> pd.DataFrame:
+    """pro.daily rows (one ts_code) → date-indexed float OHLCV."""
+    raw = raw.rename(columns={"trade_date": "date", "vol": "volume"})
+    raw["date"] = pd.to_datetime(raw["date"])
+    raw = raw.set_index("date")[["open", "high", "low", "close", "volume"]]
+    raw = raw.sort_index()
+    return raw.astype(float)
+
+
 def _fetch_ashare_daily(ticker: str, start_date: str, end_date: str) -> pd.DataFrame | None:
     """Fetch A-share daily bars via Tushare pro.daily()."""
     try:
-        import tushare as ts
-        import os
-        token = os.environ.get("TUSHARE_API_KEY", "")
-        pro = ts.pro_api(token)
-        time.sleep(0.3)
         ts_code = _normalize_ashare_ticker(ticker)
-        raw = pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
+        raw = get_scheduler().call("daily", _get_pro(), ts_code=ts_code, start_date=start_date, end_date=end_date)
         if raw is None or raw.empty:
             return None
-        raw = raw.rename(columns={"trade_date": "date", "vol": "volume"})
-        raw["date"] = pd.to_datetime(raw["date"])
-        raw = raw.set_index("date")[["open", "high", "low", "close", "volume"]]
-        raw = raw.sort_index()
-        raw = raw.astype(float)
-        return raw
+        return _tushare_bars(raw)
     except Exception as e:
         logger.warning(f"Tushare fetch failed for {ticker}: {e}")
         return None
 
 
+def _yf_bars(raw: pd.DataFrame) -> pd.DataFrame | None:
+    """yfinance single-ticker frame → date-indexed float OHLCV (None if no rows)."""
+    # Flatten columns: handle both plain strings and MultiIndex tuples
+    if hasattr(raw.columns, "levels"):
+        raw.columns = [c[0].lower() if isinstance(c, tuple) else c.lower() for c in raw.columns]
+    else:
+        raw.columns = [c.lower() for c in raw.columns]
+    raw.index = pd.to_datetime(raw.index)
+    raw.index.name = "date"
+    cols = [c for c in ["open", "high", "low", "close", "volume"] if c in raw.columns]
+    raw = raw[cols].dropna(how="all").sort_index()
+    if raw.empty:
+        return None
+    return raw.astype(float)
+
+
+def _yf_download(tickers: list[str], start_date: str, end_date: str) -> pd.DataFrame:
+    import yfinance as yf
+    return yf.download(
+        tickers, start=start_date, end=end_date, progress=False, auto_adjust=True,
+        group_by="ticker", threads=True,
+    )
+
+
 def _fetch_us_daily(ticker: str, start_date: str, end_date: str) -> pd.DataFrame | None:
     """Fetch US stock daily bars via yfinance."""
     try:
@@ -117,17 +180,7 @@ def _fetch_us_daily(ticker: str, start_date: str, end_date: str) -> pd.DataFrame
         raw = yf.download(ticker, start=start_date, end=end_date, progress=False, auto_adjust=True, multi_level_index=False)
         if raw is None or raw.empty:
             return None
-        # Flatten columns: handle both plain strings and MultiIndex tuples
-        if hasattr(raw.columns, "levels"):
-            raw.columns = [c[0].lower() if isinstance(c, tuple) else c.lower() for c in raw.columns]
-        else:
-            raw.columns = [c.lower() for c in raw.columns]
-        raw.index = pd.to_datetime(raw.index)
-        raw.index.name = "date"
-        cols = [c for c in ["open", "high", "low", "close", "volume"] if c in raw.columns]
-        raw = raw[cols].sort_index()
-        raw = raw.astype(float)
-        return raw
+        return _yf_bars(raw)
     except Exception as e:
         logger.warning(f"yfinance fetch failed for {ticker}: {e}")
         return None
@@ -169,6 +222,12 @@ def fetch_daily_bars(item: StockPoolItem) -> tuple[pd.DataFrame | None, bool]:
     else:
         return None, True
 
+    return _merge_and_save(item.ticker, cached, new_df)
+
+
+def _merge_and_save(
+    ticker: str, cached: pd.DataFrame | None, new_df: pd.DataFrame | None,
+) -> tuple[pd.DataFrame | None, bool]:
     if new_df is None or new_df.empty:
         # API failed — return stale cache if available
         return cached, True
@@ -180,8 +239,140 @@ def fetch_daily_bars(item: StockPoolItem) -> tuple[pd.DataFrame | None, bool]:
         combined = new_df
 
     try:
-        _save_daily_cache(item.ticker, combined)
+        _save_daily_cache(ticker, combined)
     except Exception as e:
-        logger.warning(f"Failed to save daily cache for {item.ticker}: {e}")
+        logger.warning(f"Failed to save daily cache for {ticker}: {e}")
 
     return combined, False
+
+
+# ── Bulk refresh ─────────────────────────────────────────────────────────────
+
+# A-share tickers whose gap is at most this many calendar days are refreshed
+# from pro.daily(trade_date=...) slices (all listed stocks for one day per call);
+# deeper gaps and first loads use per-ticker date-range calls instead.
+_SLICE_MAX_GAP_DAYS = 14
+
+
+def _fetch_start(cached: pd.DataFrame | None) -> date:
+    if cached is None or cached.empty:
+        return date.today() - timedelta(days=_FETCH_DAYS)
+    return cached.index[-1].date() + timedelta(days=1)
+
+
+def _bulk_ashare(pending: dict[str, pd.DataFrame | None]) -> dict[str, pd.DataFrame | None]:
+    """New bars for each stale A-share ticker (None where the fetch failed)."""
+    today = date.today()
+    end = today.strftime("%Y%m%d")
+    starts = {ticker: _fetch_start(cached) for ticker, cached in pending.items()}
+    sliced = [t for t, d in starts.items() if (today - d).days <= _SLICE_MAX_GAP_DAYS]
+    ranged = [t for t in starts if t not in sliced]
+    out: dict[str, pd.DataFrame | None] = {t: None for t in pending}
+
+    try:
+        pro = _get_pro()
+    except Exception as e:
+        logger.warning(f"Tushare unavailable for bulk refresh: {e}")
+        return out
+    scheduler = get_scheduler()
+
+    if sliced:
+        first = min(starts[t] for t in sliced).strftime("%Y%m%d")
+        try:
+            cal = scheduler.call(
+                "trade_cal", pro, exchange="SSE", start_date=first, end_date=end, is_open="1", fields="cal_date",
+            )
+            days = sorted(cal["cal_date"].astype(str)) if cal is not None and not cal.empty else []
+            frames = scheduler.run("daily", {d: {"trade_date": d} for d in days}, client=pro)
+        except Exception as e:
+            logger.warning(f"Tushare trade_date slices failed: {e}")
+            frames = {}
+        day_rows = concat_results(frames)
+        if not day_rows.empty:
+            codes = {_normalize_ashare_ticker(t): t for t in sliced}
+            day_rows = day_rows[day_rows["ts_code"].isin(codes)]
+            for ts_code, rows in day_rows.groupby("ts_code"):
+                ticker = codes[ts_code]
+                bars = _tushare_bars(rows)
+                out[ticker] = bars[bars.index >= pd.Timestamp(starts[ticker])]
+
+    if ranged:
+        calls = {
+            t: {"ts_code": _normalize_ashare_ticker(t), "start_date": starts[t].strftime("%Y%m%d"), "end_date": end}
+            for t in ranged
+        }
+        for ticker, raw in scheduler.run("daily", calls, client=pro).items():
+            if raw is not None and not raw.empty:
+                out[ticker] = _tushare_bars(raw)
+    return out
+
+
+def _bulk_us(pending: dict[str, pd.DataFrame | None]) -> dict[str, pd.DataFrame | None]:
+    """New bars for each stale US ticker; first loads and top-ups are separate downloads."""
+    end = date.today().strftime("%Y-%m-%d")
+    starts = {ticker: _fetch_start(cached) for ticker, cached in pending.items()}
+    cold = [t for t, cached in pending.items() if cached is None or cached.empty]
+    warm = [t for t in pending if t not in cold]
+    out: dict[str, pd.DataFrame | None] = {t: None for t in pending}
+
+    for group in (cold, warm):
+        if not group:
+            continue
+        start = min(starts[t] for t in group).strftime("%Y-%m-%d")
+        try:
+            raw = _yf_download(group, start, end)
+        except Exception as e:
+            logger.warning(f"yfinance bulk download failed for {group}: {e}")
+            continue
+        if raw is None or raw.empty:
+            continue
+        for ticker in group:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if ticker not in raw.columns.get_level_values(0):
+                    continue
+                frame = raw[ticker].copy()
+            else:
+                frame = raw.copy()
+            bars = _yf_bars(frame)
+            if bars is not None:
+                out[ticker] = bars[bars.index >= pd.Timestamp(starts[ticker])]
+    return out
+
+
+def fetch_daily_bars_bulk(items: list[StockPoolItem]) -> dict[str, tuple[pd.DataFrame | None, bool]]:
+    """
+    Refresh daily bars for many stock pool items at once.
+
+    Fresh caches are returned without any request. Stale A-share tickers are
+    topped up from pro.daily(trade_date=...) slices — one call per missing
+    trading day for the whole group — or per-ticker range calls for first
+    loads; stale US tickers share one yf.download per group. Every ticker's
+    cache is written exactly as fetch_daily_bars would.
+
+    Returns {ticker: (df, stale)} with fetch_daily_bars semantics.
+    """
+    results: dict[str, tuple[pd.DataFrame | None, bool]] = {}
+    pending: dict[str, dict[str, pd.DataFrame | None]] = {"A股": {}, "美股": {}}
+
+    for item in items:
+        if item.ticker in results or item.ticker in pending.get(item.market, {}):
+            continue
+        if item.market not in pending:
+            results[item.ticker] = (None, True)
+            continue
+        cached = _load_daily_cache(item.ticker)
+        if cached is not None and _is_cache_fresh(cached):
+            results[item.ticker] = (cached, False)
+        else:
+            pending[item.market][item.ticker] = cached
+
+    fetched: dict[str, pd.DataFrame | None] = {}
+    if pending["A股"]:
+        fetched.update(_bulk_ashare(pending["A股"]))
+    if pending["美股"]:
+        fetched.update(_bulk_us(pending["美股"]))
+
+    for market_pending in pending.values():
+        for ticker, cached in market_pending.items():
+            results[ticker] = _merge_and_save(ticker, cached, fetched.get(ticker))
+    return results
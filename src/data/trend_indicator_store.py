@@ -0,0 +1,82 @@
+"""
+Per-ticker trend indicators persisted next to the daily bars.
+
+get_trend_indicators(ticker, bars) returns the indicator frame analyze()
+would compute for bars (columns as TrendAnalysis.indicators). The frame and
+the streaming state of src/analysis/trend_incremental live in the bar store
+under "<SAFE_TICKER>@trend" (kind="indicators", state in the meta attrs, so
+both are swapped together); each call only advances the state over bars
+appended since the last one and upserts just those rows.
+
+The stored state is only trusted if it lines up with the bars — same number
+of bars up to its last date and the same last close. Otherwise (split
+adjustment, backfilled history, STATE_VERSION change) it is rebuilt from
+the full history.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import pandas as pd
+
+from src.analysis.trend_incremental import INDICATOR_COLUMNS, TrendIndicatorState, advance_frame
+
+from .bar_store import get_bar_store
+from .stock_daily_fetcher import safe_ticker
+
+logger = logging.getLogger(__name__)
+
+
+def _symbol(ticker: str) -> str:
+    return f"{safe_ticker(ticker)}@trend"
+
+
+def _state_matches(state: TrendIndicatorState, stored: pd.DataFrame, bars: pd.DataFrame) -> bool:
+    if state.last_date is None or len(stored) != state.n_bars:
+        return False
+    last = pd.Timestamp(state.last_date)
+    head = bars.loc[:last]
+    return (
+        len(head) == state.n_bars
+        and head.index[-1] == last
+        and float(head["close"].iloc[-1]) == state.prev_close
+        and float(head["high"].iloc[-1]) == state.prev_high
+        and float(head["low"].iloc[-1]) == state.prev_low
+    )
+
+
+def get_trend_indicators(ticker: str, bars: pd.DataFrame) -> pd.DataFrame:
+    """Indicator frame for bars (OHLCV, date index), advanced incrementally and persisted.
+
+    Falls back to computing in memory (nothing persisted) if the store fails.
+    """
+    store = get_bar_store()
+    symbol = _symbol(ticker)
+    try:
+        stored = store.frame(symbol)
+        state = TrendIndicatorState.from_dict(store.attrs(symbol).get("state") or {})
+    except Exception as e:
+        logger.warning("trend indicator cache unreadable for %s: %s", ticker, e)
+        stored, state = None, None
+
+    if stored is not None and state is not None and _state_matches(state, stored, bars):
+        new_bars = bars[bars.index > pd.Timestamp(state.last_date)]
+        if new_bars.empty:
+            return stored
+        rows = advance_frame(state, new_bars)
+        try:
+            # only the new rows go to the store; the state is swapped in with them
+            return store.upsert(symbol, rows[INDICATOR_COLUMNS], kind="indicators",
+                                attrs={"state": state.to_dict()})
+        except Exception as e:
+            logger.warning("failed to save trend indicators for %s: %s", ticker, e)
+            return pd.concat([stored, rows])
+
+    state = TrendIndicatorState()
+    frame = advance_frame(state, bars)
+    try:
+        store.write(symbol, frame[INDICATOR_COLUMNS], kind="indicators", attrs={"state": state.to_dict()})
+    except Exception as e:
+        logger.warning("failed to save trend indicators for %s: %s", ticker, e)
+    return frame
@@ -0,0 +1,204 @@
+"""
+Shared, rate-limited request scheduler for historical backfills.
+
+Backfills used to walk their date/year grids serially with fixed sleeps
+between calls, so a first run on a fresh machine was bounded by the sleeps
+rather than by the API's actual quota. Every backfill now submits its grid
+here instead:
+
+- one token bucket per endpoint (calls/minute), shared process-wide so two
+  backfills hitting `daily_basic` at once still respect a single quota;
+- a bounded worker pool that keeps up to `max_workers` requests in flight;
+- retry with exponential, jittered backoff; a call that still fails is
+  logged and left out of the results (callers already treat gaps as "skip");
+- `on_checkpoint(batch)` every N completed results (and once for the
+  remainder) so long backfills persist progress as they go.
+
+Limits default to Tushare's 2000-point tier (200 calls/min per endpoint);
+TUSHARE_CALLS_PER_MINUTE raises or lowers that default for higher/lower
+tiers. AkShare functions can be scheduled too by passing `client=ak`.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Hashable, Mapping, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+_DEFAULT_CALLS_PER_MINUTE = 200
+_DEFAULT_MAX_WORKERS = 4
+_DEFAULT_MAX_RETRIES = 3
+_DEFAULT_BACKOFF_S = 1.0
+_DEFAULT_BURST = 5
+
+# Endpoint-specific ceilings (calls/minute). Anything not listed uses the default.
+ENDPOINT_CALLS_PER_MINUTE: dict[str, int] = {
+    # AkShare scrapes public sites; keep it polite
+    "bond_china_yield": 30,
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` sustained, `burst` tokens max."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int = _DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self._rate_per_s = rate_per_minute / 60.0
+        self._capacity = float(max(1, burst))
+        self._tokens = self._capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate_per_s)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate_per_s
+            self._sleep(wait)
+
+
+class TushareScheduler:
+    """Submit endpoint call grids; results come back keyed like the input."""
+
+    def __init__(
+        self,
+        calls_per_minute: Mapping[str, int] | None = None,
+        default_calls_per_minute: int | None = None,
+        max_workers: int = _DEFAULT_MAX_WORKERS,
+        max_retries: int = _DEFAULT_MAX_RETRIES,
+        backoff_s: float = _DEFAULT_BACKOFF_S,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        env_default = os.getenv("TUSHARE_CALLS_PER_MINUTE")
+        self._default_cpm = int(
+            default_calls_per_minute
+            or (env_default if env_default else _DEFAULT_CALLS_PER_MINUTE)
+        )
+        self._cpm = {**ENDPOINT_CALLS_PER_MINUTE, **(calls_per_minute or {})}
+        self._max_workers = max(1, max_workers)
+        self._max_retries = max(0, max_retries)
+        self._backoff_s = backoff_s
+        self._sleep = sleep
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = TokenBucket(self._cpm.get(endpoint, self._default_cpm), sleep=self._sleep)
+                self._buckets[endpoint] = bucket
+            return bucket
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="tushare",
+                )
+            return self._executor
+
+    def _call_with_retry(self, endpoint: str, fn: Callable[..., Any], kwargs: dict) -> Any:
+        bucket = self._bucket(endpoint)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                return fn(**kwargs)
+            except Exception as e:
+                if attempt >= self._max_retries:
+                    raise
+                delay = self._backoff_s * (2 ** attempt) * (0.5 + random.random())
+                logger.info("%s%s failed (%s); retry %d in %.1fs", endpoint, kwargs, e, attempt + 1, delay)
+                self._sleep(delay)
+                attempt += 1
+
+    def call(self, endpoint: str, client: Any, **kwargs: Any) -> Any:
+        """Single rate-limited call with retries, run on the caller's thread."""
+        return self._call_with_retry(endpoint, getattr(client, endpoint), kwargs)
+
+    def run(
+        self,
+        endpoint: str,
+        calls: Mapping[K, dict],
+        client: Any,
+        checkpoint_every: int = 0,
+        on_checkpoint: Callable[[dict[K, Any]], None] | None = None,
+    ) -> dict[K, Any]:
+        """Run `client.<endpoint>(**kwargs)` for every entry of `calls` concurrently.
+
+        Returns {key: result} for calls that succeeded (after retries).
+        `on_checkpoint` runs on the caller's thread, so it may write caches
+        without extra locking.
+        """
+        if not calls:
+            return {}
+        fn = getattr(client, endpoint)
+        pool = self._pool()
+        futures = {
+            pool.submit(self._call_with_retry, endpoint, fn, dict(kwargs)): key
+            for key, kwargs in calls.items()
+        }
+
+        results: dict[K, Any] = {}
+        pending: dict[K, Any] = {}
+        for future in concurrent.futures.as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = pending[key] = future.result()
+            except Exception as e:
+                logger.warning("%s failed for %s after retries: %s", endpoint, key, e)
+                continue
+            if on_checkpoint is not None and checkpoint_every and len(pending) >= checkpoint_every:
+                on_checkpoint(pending)
+                pending = {}
+                logger.info("%s: progress %d/%d", endpoint, len(results), len(calls))
+
+        if on_checkpoint is not None and pending:
+            on_checkpoint(pending)
+        return results
+
+
+def concat_results(results: Mapping[Any, pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate non-empty frames from `run` in key order."""
+    frames = [results[k] for k in sorted(results) if results[k] is not None and not results[k].empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+_SCHEDULER: TushareScheduler | None = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> TushareScheduler:
+    """Process-wide scheduler so concurrent backfills share per-endpoint quotas."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = TushareScheduler()
+        return _SCHEDULER
@@ -4,24 +4,31 @@ from .core import (
     BaselineDeviation,
     BucketEntry,
     GoalProgress,
+    HistoryPoint,
     HoldingDetail,
     Ledger,
     PositionValue,
     SatelliteStatus,
     Snapshot,
+    SnapshotSummary,
     Transaction,
+    WeeklyTrend,
 )
-from .quotes import Quote, QuoteProvider, StaticQuoteProvider
+from .quotes import Quote, QuoteProvider, QuoteRequest, StaticQuoteProvider
 
 __all__ = [
     "BaselineDeviation",
     "GoalProgress",
+    "HistoryPoint",
     "Ledger",
     "PositionValue",
     "Quote",
     "QuoteProvider",
+    "QuoteRequest",
     "SatelliteStatus",
     "Snapshot",
+    "SnapshotSummary",
     "StaticQuoteProvider",
     "Transaction",
+    "WeeklyTrend",
 ]
@@ -7,7 +7,6 @@
 
 from __future__ import annotations
 
-import json
 import sqlite3
 from dataclasses import dataclass, field, replace
 from datetime import date, timedelta
@@ -15,8 +14,16 @@ from pathlib import Path
 
 import yaml
 
-from .db import connect
-from .quotes import Quote, QuoteProvider
+from .db import (
+    EXPOSURE_CATEGORIES,
+    INSERT_ROLLUP,
+    INSERT_SNAPSHOT_EXPOSURE,
+    INSERT_SNAPSHOT_POSITION,
+    ROLLUP_EXPOSURE_COLUMNS,
+    ROLLUP_SELECT,
+    get_connection,
+)
+from .quotes import Quote, QuoteMap, QuoteProvider, QuoteRequest, resolve_each
 
 VALID_MARKETS = ("CN", "HK", "US")
 VALID_CURRENCIES = ("CNY", "HKD", "USD")
@@ -69,6 +76,41 @@ class Snapshot:
     satellite_ratio: float = 0.0
 
 
+@dataclass(frozen=True)
+class SnapshotSummary:
+    """快照表头（不含逐持仓明细）：总额曲线、目标进度等时间序列的轻量读取口径。"""
+
+    week_id: str
+    as_of: date
+    total_cny: float
+    stale: bool
+    satellite_cny: float
+    satellite_ratio: float
+
+
+@dataclass(frozen=True)
+class WeeklyTrend:
+    """一周的走势点：总额、卫星口径与各穿透暴露分类（weekly_rollup 一行）。"""
+
+    week_id: str
+    as_of: date
+    total_cny: float
+    stale: bool
+    satellite_cny: float
+    satellite_ratio: float
+    market_exposure: dict[str, float]  # EXPOSURE_CATEGORIES 全部分类，未持有为 0
+
+
+@dataclass(frozen=True)
+class HistoryPoint:
+    """某口径（单持仓 / 暴露分类 / 卫星仓）在一个快照周的市值及占总资产比例。"""
+
+    week_id: str
+    as_of: date
+    value_cny: float
+    share: float
+
+
 @dataclass(frozen=True)
 class SatelliteStatus:
     """穿透后卫星仓占比对 35% 上限的距离（ADR-0018）。"""
@@ -140,15 +182,78 @@ class BucketEntry:
     is_split: bool  # 是否为跨桶基金的拆分条目
 
 
+@dataclass
+class _SnapshotLookup:
+    """一次快照的内存查表：最新 X-Ray、卫星标记、最近有效价（含本次待写入的新价）。
+
+    估值期间不再逐持仓查库；新报价先记入 last_prices 供后续持仓复用，
+    pending 在快照落库的同一事务里批量写入。
+    """
+
+    xray: dict[str, tuple[dict[str, float], date]]
+    satellite: set[tuple[str, str, str]]
+    last_prices: dict[tuple[str, str], Quote]
+    pending: dict[tuple[str, str], tuple] = field(default_factory=dict)
+
+    def remember(self, asset_type: str, symbol: str, quote: Quote, currency: str) -> None:
+        self.last_prices[(asset_type, symbol)] = Quote(quote.price, quote.quoted_on)
+        self.pending[(asset_type, symbol)] = (
+            asset_type, symbol, quote.price, currency, quote.quoted_on.isoformat(),
+        )
+
+
+_UPSERT_LAST_PRICE = (
+    "INSERT INTO last_prices (asset_type, symbol, price, currency, quoted_on)"
+    " VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT (asset_type, symbol) DO UPDATE SET"
+    " price = excluded.price, quoted_on = excluded.quoted_on"
+)
+
+
 def _week_id(d: date) -> str:
     iso = d.isocalendar()
     return f"{iso.year}-W{iso.week:02d}"
 
 
 class Ledger:
-    def __init__(self, db_path: str | Path, baseline_path: str | Path | None = None) -> None:
-        self._conn = connect(db_path)
+    def __init__(
+        self,
+        db_path: str | Path,
+        baseline_path: str | Path | None = None,
+        weekly_rollup: bool = True,
+        read_only: bool = False,
+    ) -> None:
+        """weekly_rollup=False 时不维护物化走势表，走势读取改为对明细表即时聚合。
+
+        连接取自进程内连接池（同一库文件的多个实例共用一个连接）。read_only=True
+        给查阅层用：只读连接不阻塞、也不被写快照的 job 阻塞，写入口径会报错。
+        """
+        self._conn = get_connection(db_path, read_only=read_only)
         self._baseline_path = Path(baseline_path) if baseline_path else None
+        self._weekly_rollup = weekly_rollup
+        if weekly_rollup:
+            if read_only:
+                # 只读方不能补齐物化表；缺周时本实例改走即时聚合
+                self._weekly_rollup = not self._rollup_missing_weeks()
+            else:
+                self._sync_weekly_rollup()
+
+    def _rollup_missing_weeks(self) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM snapshots"
+            " WHERE week_id NOT IN (SELECT week_id FROM weekly_rollup) LIMIT 1"
+        ).fetchone() is not None
+
+    def _sync_weekly_rollup(self) -> None:
+        """补齐物化表缺失的周（旧库升级、或此前以 weekly_rollup=False 打过快照）。"""
+        if not self._rollup_missing_weeks():
+            return
+        with self._conn:
+            self._conn.execute(
+                INSERT_ROLLUP
+                + " WHERE s.week_id NOT IN (SELECT week_id FROM weekly_rollup)"
+                " GROUP BY s.week_id"
+            )
 
     # ------------------------------------------------------------------
     # 写路径：手工股票 / 现金
@@ -289,14 +394,6 @@ class Ledger:
                 (asset_type, market, symbol, theme, int(is_satellite)),
             )
 
-    def _is_satellite(self, asset_type: str, market: str, symbol: str) -> bool:
-        row = self._conn.execute(
-            "SELECT 1 FROM theme_map"
-            " WHERE asset_type = ? AND market = ? AND symbol = ? AND is_satellite = 1",
-            (asset_type, market, symbol),
-        ).fetchone()
-        return row is not None
-
     # ------------------------------------------------------------------
     # 写路径：Agent 基金 JSON（ttfund Skill 输出，ADR-0012/0014）
     # ------------------------------------------------------------------
@@ -383,18 +480,21 @@ class Ledger:
                 ],
             )
 
-    def _latest_xray(self, fund_code: str) -> tuple[dict[str, float], date] | None:
+    def _latest_xrays(self) -> dict[str, tuple[dict[str, float], date]]:
+        """全部基金的最新一期穿透（一次查询）：fund_code → (buckets, data_as_of)。"""
         rows = self._conn.execute(
-            "SELECT data_as_of, bucket, weight FROM fund_xray"
-            " WHERE fund_code = ?"
-            " ORDER BY data_as_of DESC",
-            (fund_code,),
+            "SELECT x.fund_code, x.data_as_of, x.bucket, x.weight FROM fund_xray x"
+            " JOIN (SELECT fund_code, MAX(data_as_of) AS latest FROM fund_xray"
+            "       GROUP BY fund_code) m"
+            " ON m.fund_code = x.fund_code AND m.latest = x.data_as_of"
         ).fetchall()
-        if not rows:
-            return None
-        latest = rows[0]["data_as_of"]
-        buckets = {r["bucket"]: r["weight"] for r in rows if r["data_as_of"] == latest}
-        return buckets, date.fromisoformat(latest)
+        xrays: dict[str, tuple[dict[str, float], date]] = {}
+        for r in rows:
+            buckets, _ = xrays.setdefault(
+                r["fund_code"], ({}, date.fromisoformat(r["data_as_of"]))
+            )
+            buckets[r["bucket"]] = r["weight"]
+        return xrays
 
     @staticmethod
     def _require_str(fund: dict, field_name: str) -> str:
@@ -415,30 +515,62 @@ class Ledger:
     # ------------------------------------------------------------------
 
     def take_snapshot(self, as_of: date, quotes: QuoteProvider) -> Snapshot:
+        """估值全部持仓并落库本周快照。
+
+        读库为集合查询：持仓 join 最近有效价与卫星标记一次取回，最新 X-Ray
+        与汇率各一次；外部报价经 `quotes.prefetch` 一次批量解析（去重，生产实现
+        并发取数）；新报价与快照在同一事务里批量写入。
+        """
         holdings = self._conn.execute(
-            "SELECT * FROM holdings ORDER BY id"
+            "SELECT h.*, lp.price AS last_price, lp.quoted_on AS last_quoted_on,"
+            "       EXISTS (SELECT 1 FROM theme_map t"
+            "               WHERE t.asset_type = h.asset_type AND t.market = h.market"
+            "               AND t.symbol = h.symbol AND t.is_satellite = 1) AS is_satellite"
+            " FROM holdings h"
+            " LEFT JOIN last_prices lp"
+            "   ON lp.asset_type = h.asset_type AND lp.symbol = h.symbol"
+            " ORDER BY h.id"
         ).fetchall()
+        lookup = _SnapshotLookup(
+            xray=self._latest_xrays(),
+            satellite={
+                (h["asset_type"], h["market"], h["symbol"])
+                for h in holdings if h["is_satellite"]
+            },
+            last_prices={
+                (h["asset_type"], h["symbol"]):
+                    Quote(h["last_price"], date.fromisoformat(h["last_quoted_on"]))
+                for h in holdings if h["last_price"] is not None
+            },
+        )
+        for r in self._conn.execute(
+            "SELECT symbol, price, quoted_on FROM last_prices WHERE asset_type = 'fx'"
+        ):
+            lookup.last_prices[("fx", r["symbol"])] = Quote(
+                r["price"], date.fromisoformat(r["quoted_on"])
+            )
+
+        resolved = self._prefetch_quotes(holdings, as_of, quotes)
+
         positions: list[PositionValue] = []
         any_stale = False
         for h in holdings:
-            pos = self._value_holding(h, as_of, quotes)
-            if pos.asset_type == "fund":
-                xray = self._latest_xray(pos.symbol)
-                if xray is not None:
-                    pos = replace(pos, xray_as_of=xray[1])
+            pos = self._value_holding(h, as_of, resolved, lookup)
+            if pos.asset_type == "fund" and pos.symbol in lookup.xray:
+                pos = replace(pos, xray_as_of=lookup.xray[pos.symbol][1])
             positions.append(pos)
             any_stale = any_stale or pos.stale
 
         total = sum(p.value_cny for p in positions)
         exposure: dict[str, float] = {}
         for p in positions:
-            for category, value in self._exposure_split(p).items():
+            for category, value in self._exposure_split(p, lookup.xray).items():
                 exposure[category] = exposure.get(category, 0.0) + value
 
         satellite = sum(
-            self._satellite_value(p)
+            self._satellite_value(p, lookup.xray)
             for p in positions
-            if self._is_satellite(p.asset_type, p.market, p.symbol)
+            if (p.asset_type, p.market, p.symbol) in lookup.satellite
         )
         ratio = satellite / total if total > 0 else 0.0
 
@@ -452,24 +584,32 @@ class Ledger:
             satellite_cny=satellite,
             satellite_ratio=ratio,
         )
-        self._persist_snapshot(snap)
+        with self._conn:
+            self._conn.executemany(_UPSERT_LAST_PRICE, list(lookup.pending.values()))
+            self._persist_snapshot(snap)
         return snap
 
-    def _satellite_value(self, p: PositionValue) -> float:
+    @staticmethod
+    def _satellite_value(
+        p: PositionValue, xrays: dict[str, tuple[dict[str, float], date]]
+    ) -> float:
         """卫星口径市值：基金按权益暴露折算，未穿透基金保守按全额计。"""
         if p.asset_type != "fund":
             return p.value_cny
-        xray = self._latest_xray(p.symbol)
+        xray = xrays.get(p.symbol)
         if xray is None:
             return p.value_cny
         buckets, _ = xray
         equity = sum(w for b, w in buckets.items() if b in XRAY_EQUITY_BUCKETS)
         return p.value_cny * equity
 
-    def _exposure_split(self, p: PositionValue) -> dict[str, float]:
+    @staticmethod
+    def _exposure_split(
+        p: PositionValue, xrays: dict[str, tuple[dict[str, float], date]]
+    ) -> dict[str, float]:
         """持仓市值 → 穿透后暴露分类（CN/HK/US/CASH/BOND/OTHER/UNPENETRATED）。"""
         if p.asset_type == "fund":
-            xray = self._latest_xray(p.symbol)
+            xray = xrays.get(p.symbol)
             if xray is None:
                 return {"UNPENETRATED": p.value_cny}
             buckets, _ = xray
@@ -481,12 +621,31 @@ class Ledger:
             return {"CASH": p.value_cny}
         return {p.market: p.value_cny}
 
+    @staticmethod
+    def _prefetch_quotes(
+        holdings: list[sqlite3.Row], as_of: date, quotes: QuoteProvider
+    ) -> QuoteMap:
+        """全部持仓所需的股价 / 净值 / 汇率 → 一次 prefetch（现金与 CNY 不请求）。"""
+        requests: list[QuoteRequest] = []
+        for h in holdings:
+            if h["asset_type"] != "cash":
+                market = h["market"] if h["asset_type"] == "stock" else ""
+                requests.append(QuoteRequest(h["asset_type"], h["symbol"], market))
+            if h["currency"] != "CNY":
+                requests.append(QuoteRequest("fx", h["currency"]))
+        requests = list(dict.fromkeys(requests))
+        prefetch = getattr(quotes, "prefetch", None)
+        if prefetch is None:  # 只实现单价接口的提供者
+            return resolve_each(quotes, requests, as_of)
+        return prefetch(requests, as_of)
+
     def _value_holding(
-        self, h: sqlite3.Row, as_of: date, quotes: QuoteProvider
+        self, h: sqlite3.Row, as_of: date, resolved: QuoteMap,
+        lookup: _SnapshotLookup,
     ) -> PositionValue:
-        quote = self._lookup_quote(h, as_of, quotes)
+        quote = self._lookup_quote(h, as_of, resolved)
         if quote is None:
-            quote = self._last_price(h["asset_type"], h["symbol"])
+            quote = lookup.last_prices.get((h["asset_type"], h["symbol"]))
         if quote is None:
             # 无报价且无历史价：计 0 并标记 stale（快照不断档）
             return PositionValue(
@@ -496,17 +655,20 @@ class Ledger:
             )
         stale = quote.stale or (as_of - quote.quoted_on).days > PRICE_STALE_DAYS
         if not quote.stale:
-            self._remember_price(h["asset_type"], h["symbol"], quote, h["currency"])
-
-        fx = self._lookup_fx(h["currency"], as_of, quotes)
-        if fx is not None:
-            fx_rate = fx
-            self._remember_price("fx", h["currency"], Quote(fx, as_of), "CNY")
+            lookup.remember(h["asset_type"], h["symbol"], quote, h["currency"])
+
+        fx = self._lookup_fx(h["currency"], as_of, resolved)
+        if fx is None:
+            fx = lookup.last_prices.get(("fx", h["currency"]))
+        if fx is None:
+            fx_rate = 0.0
+            stale = True
         else:
-            last_fx = self._last_price("fx", h["currency"])
-            fx_rate = last_fx.price if last_fx else 0.0
-            if last_fx is None or (as_of - last_fx.quoted_on).days > PRICE_STALE_DAYS:
+            fx_rate = fx.price
+            if fx.stale or (as_of - fx.quoted_on).days > PRICE_STALE_DAYS:
                 stale = True
+            if not fx.stale:
+                lookup.remember("fx", h["currency"], fx, "CNY")
         return PositionValue(
             asset_type=h["asset_type"], market=h["market"],
             symbol=h["symbol"], name=h["name"], quantity=h["quantity"],
@@ -514,74 +676,61 @@ class Ledger:
             value_cny=h["quantity"] * quote.price * fx_rate, stale=stale,
         )
 
-    def _lookup_quote(
-        self, h: sqlite3.Row, as_of: date, quotes: QuoteProvider
-    ) -> Quote | None:
+    @staticmethod
+    def _lookup_quote(h: sqlite3.Row, as_of: date, resolved: QuoteMap) -> Quote | None:
         if h["asset_type"] == "cash":
             return Quote(price=1.0, quoted_on=as_of)
-        if h["asset_type"] == "fund":
-            return quotes.get_fund_nav(h["symbol"], as_of)
-        return quotes.get_stock_price(h["symbol"], h["market"], as_of)
+        market = h["market"] if h["asset_type"] == "stock" else ""
+        return resolved.get(QuoteRequest(h["asset_type"], h["symbol"], market))
 
-    def _lookup_fx(
-        self, currency: str, as_of: date, quotes: QuoteProvider
-    ) -> float | None:
+    @staticmethod
+    def _lookup_fx(currency: str, as_of: date, resolved: QuoteMap) -> Quote | None:
+        """汇率报价（price 为汇率）；stale=True 表示提供者给的是最近有效价而非当日价。"""
         if currency == "CNY":
-            return 1.0
-        return quotes.get_fx_rate(currency, as_of)
+            return Quote(price=1.0, quoted_on=as_of)
+        return resolved.get(QuoteRequest("fx", currency))
 
     def _remember_price(
         self, asset_type: str, symbol: str, quote: Quote, currency: str
     ) -> None:
-        # 注意：调用方不得在外层再包事务（本方法自提交，保证跨进程持久）
+        # 单条写入（基金导入用）；快照估值走 _SnapshotLookup 批量写入
         with self._conn:
             self._conn.execute(
-                "INSERT INTO last_prices (asset_type, symbol, price, currency, quoted_on)"
-                " VALUES (?, ?, ?, ?, ?)"
-                " ON CONFLICT (asset_type, symbol) DO UPDATE SET"
-                " price = excluded.price, quoted_on = excluded.quoted_on",
+                _UPSERT_LAST_PRICE,
                 (asset_type, symbol, quote.price, currency,
                  quote.quoted_on.isoformat()),
             )
 
-    def _last_price(self, asset_type: str, symbol: str) -> Quote | None:
-        row = self._conn.execute(
-            "SELECT price, quoted_on FROM last_prices"
-            " WHERE asset_type = ? AND symbol = ?",
-            (asset_type, symbol),
-        ).fetchone()
-        if row is None:
-            return None
-        return Quote(
-            price=row["price"],
-            quoted_on=date.fromisoformat(row["quoted_on"]),
-        )
-
     def _persist_snapshot(self, snap: Snapshot) -> None:
-        payload = {
-            "positions": [
-                {
-                    "asset_type": p.asset_type, "market": p.market,
-                    "symbol": p.symbol, "name": p.name, "quantity": p.quantity,
-                    "currency": p.currency, "price": p.price,
-                    "value_cny": p.value_cny, "stale": p.stale,
-                    "xray_as_of": p.xray_as_of.isoformat() if p.xray_as_of else None,
-                }
-                for p in snap.positions
-            ],
-            "market_exposure": snap.market_exposure,
-            "satellite_cny": snap.satellite_cny,
-            "satellite_ratio": snap.satellite_ratio,
-        }
-        with self._conn:
+        # 调用方负责事务（take_snapshot 与报价批量写入同一事务提交）
+        self._conn.execute(
+            "INSERT INTO snapshots"
+            " (week_id, as_of, total_cny, stale, satellite_cny, satellite_ratio)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (week_id) DO UPDATE SET"
+            " as_of = excluded.as_of, total_cny = excluded.total_cny,"
+            " stale = excluded.stale, satellite_cny = excluded.satellite_cny,"
+            " satellite_ratio = excluded.satellite_ratio",
+            (snap.week_id, snap.as_of.isoformat(), snap.total_cny, int(snap.stale),
+             snap.satellite_cny, snap.satellite_ratio),
+        )
+        # 同周重拍：整周明细替换
+        self._conn.execute("DELETE FROM snapshot_positions WHERE week_id = ?", (snap.week_id,))
+        self._conn.execute("DELETE FROM snapshot_exposure WHERE week_id = ?", (snap.week_id,))
+        self._conn.executemany(INSERT_SNAPSHOT_POSITION, [
+            (snap.week_id, seq, p.asset_type, p.market, p.symbol, p.name, p.quantity,
+             p.currency, p.price, p.value_cny, int(p.stale),
+             p.xray_as_of.isoformat() if p.xray_as_of else None)
+            for seq, p in enumerate(snap.positions)
+        ])
+        self._conn.executemany(INSERT_SNAPSHOT_EXPOSURE, [
+            (snap.week_id, category, value) for category, value in snap.market_exposure.items()
+        ])
+        # 物化走势表只重算本周一行；关闭时删掉本周旧行，重新开启时由同步补齐
+        self._conn.execute("DELETE FROM weekly_rollup WHERE week_id = ?", (snap.week_id,))
+        if self._weekly_rollup:
             self._conn.execute(
-                "INSERT INTO snapshots (week_id, as_of, total_cny, stale, payload)"
-                " VALUES (?, ?, ?, ?, ?)"
-                " ON CONFLICT (week_id) DO UPDATE SET"
-                " as_of = excluded.as_of, total_cny = excluded.total_cny,"
-                " stale = excluded.stale, payload = excluded.payload",
-                (snap.week_id, snap.as_of.isoformat(), snap.total_cny,
-                 int(snap.stale), json.dumps(payload, ensure_ascii=False)),
+                INSERT_ROLLUP + " WHERE s.week_id = ? GROUP BY s.week_id", (snap.week_id,)
             )
 
     # ------------------------------------------------------------------
@@ -592,20 +741,33 @@ class Ledger:
         row = self._conn.execute(
             "SELECT * FROM snapshots ORDER BY as_of DESC LIMIT 1"
         ).fetchone()
-        return self._snapshot_from_row(row) if row else None
+        return self._load_snapshots([row])[0] if row else None
 
     def get_snapshot_history(self) -> list[Snapshot]:
+        """全部快照（含逐持仓与暴露明细），按日期升序。只要总额曲线时用 get_snapshot_summaries。"""
         rows = self._conn.execute(
             "SELECT * FROM snapshots ORDER BY as_of"
         ).fetchall()
-        return [self._snapshot_from_row(r) for r in rows]
+        return self._load_snapshots(rows)
+
+    def get_snapshot_summaries(self) -> list[SnapshotSummary]:
+        """全部快照表头，按日期升序；单表一次查询，不读持仓明细。"""
+        rows = self._conn.execute(
+            "SELECT * FROM snapshots ORDER BY as_of"
+        ).fetchall()
+        return [self._summary_from_row(r) for r in rows]
 
     def get_goal_progress(self) -> GoalProgress | None:
         """起点（首个快照）以来的真实年化 vs 17.5% 需求线。快照不足返回 None。"""
-        history = self.get_snapshot_history()
-        if len(history) < 2:
+        rows = self._conn.execute(
+            "SELECT * FROM snapshots"
+            " WHERE as_of IN ((SELECT MIN(as_of) FROM snapshots),"
+            "                 (SELECT MAX(as_of) FROM snapshots))"
+            " ORDER BY as_of"
+        ).fetchall()
+        if len(rows) < 2:
             return None
-        start, latest = history[0], history[-1]
+        start, latest = self._summary_from_row(rows[0]), self._summary_from_row(rows[-1])
         if start.total_cny <= 0:
             return None
         total_return = latest.total_cny / start.total_cny - 1.0
@@ -626,9 +788,12 @@ class Ledger:
         )
 
     def get_satellite_status(self) -> SatelliteStatus:
-        snap = self.get_latest_snapshot()
-        if snap is None:
+        row = self._conn.execute(
+            "SELECT * FROM snapshots ORDER BY as_of DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
             return SatelliteStatus(0.0, 0.0, 0.0, SATELLITE_CAP, breached=False)
+        snap = self._summary_from_row(row)
         return SatelliteStatus(
             satellite_cny=snap.satellite_cny,
             total_cny=snap.total_cny,
@@ -638,30 +803,127 @@ class Ledger:
         )
 
     @staticmethod
-    def _snapshot_from_row(row: sqlite3.Row) -> Snapshot:
-        payload = json.loads(row["payload"])
-        positions = tuple(
-            PositionValue(
+    def _summary_from_row(row: sqlite3.Row) -> SnapshotSummary:
+        return SnapshotSummary(
+            week_id=row["week_id"],
+            as_of=date.fromisoformat(row["as_of"]),
+            total_cny=row["total_cny"],
+            stale=bool(row["stale"]),
+            satellite_cny=row["satellite_cny"],
+            satellite_ratio=row["satellite_ratio"],
+        )
+
+    def _load_snapshots(self, rows: list[sqlite3.Row]) -> list[Snapshot]:
+        """快照表头 → 完整 Snapshot：持仓与暴露明细各一次按 week_id 的索引查询。"""
+        if not rows:
+            return []
+        weeks = [r["week_id"] for r in rows]
+        marks = ", ".join("?" * len(weeks))
+        positions: dict[str, list[PositionValue]] = {w: [] for w in weeks}
+        for p in self._conn.execute(
+            f"SELECT * FROM snapshot_positions WHERE week_id IN ({marks})"
+            " ORDER BY week_id, seq", weeks,
+        ):
+            positions[p["week_id"]].append(PositionValue(
                 asset_type=p["asset_type"], market=p["market"],
                 symbol=p["symbol"], name=p["name"], quantity=p["quantity"],
                 currency=p["currency"], price=p["price"],
-                value_cny=p["value_cny"], stale=p["stale"],
+                value_cny=p["value_cny"], stale=bool(p["stale"]),
                 xray_as_of=(
-                    date.fromisoformat(p["xray_as_of"]) if p.get("xray_as_of") else None
+                    date.fromisoformat(p["xray_as_of"]) if p["xray_as_of"] else None
                 ),
+            ))
+        exposure: dict[str, dict[str, float]] = {w: {} for w in weeks}
+        for e in self._conn.execute(
+            f"SELECT * FROM snapshot_exposure WHERE week_id IN ({marks})", weeks,
+        ):
+            exposure[e["week_id"]][e["category"]] = e["value_cny"]
+        return [
+            Snapshot(
+                week_id=r["week_id"],
+                as_of=date.fromisoformat(r["as_of"]),
+                total_cny=r["total_cny"],
+                stale=bool(r["stale"]),
+                positions=tuple(positions[r["week_id"]]),
+                market_exposure=exposure[r["week_id"]],
+                satellite_cny=r["satellite_cny"],
+                satellite_ratio=r["satellite_ratio"],
             )
-            for p in payload.get("positions", [])
-        )
-        return Snapshot(
-            week_id=row["week_id"],
-            as_of=date.fromisoformat(row["as_of"]),
-            total_cny=row["total_cny"],
-            stale=bool(row["stale"]),
-            positions=positions,
-            market_exposure=payload.get("market_exposure", {}),
-            satellite_cny=payload.get("satellite_cny", 0.0),
-            satellite_ratio=payload.get("satellite_ratio", 0.0),
-        )
+            for r in rows
+        ]
+
+    # ------------------------------------------------------------------
+    # 读路径：周度走势（总资产页走势图 / 周度仪式）
+    # ------------------------------------------------------------------
+
+    def get_weekly_trend(self, weeks: int | None = None) -> list[WeeklyTrend]:
+        """最近 weeks 个快照周（默认全部）的走势宽表，按日期升序；一次查询。"""
+        if self._weekly_rollup:
+            source = "SELECT * FROM weekly_rollup"
+        else:
+            source = ROLLUP_SELECT + " GROUP BY s.week_id"
+        rows = self._conn.execute(
+            f"SELECT * FROM ({source}) ORDER BY as_of DESC LIMIT ?",
+            (-1 if weeks is None else weeks,),
+        ).fetchall()
+        return [
+            WeeklyTrend(
+                week_id=r["week_id"],
+                as_of=date.fromisoformat(r["as_of"]),
+                total_cny=r["total_cny"],
+                stale=bool(r["stale"]),
+                satellite_cny=r["satellite_cny"],
+                satellite_ratio=r["satellite_ratio"],
+                market_exposure={c: r[col] for c, col in ROLLUP_EXPOSURE_COLUMNS.items()},
+            )
+            for r in reversed(rows)
+        ]
+
+    def position_history(
+        self, asset_type: str, symbol: str, weeks: int | None = None
+    ) -> list[HistoryPoint]:
+        """单持仓逐周市值（未持有的周记 0），按日期升序；一次索引查询。"""
+        rows = self._conn.execute(
+            "SELECT s.week_id, s.as_of, s.total_cny,"
+            "       COALESCE(SUM(p.value_cny), 0) AS value_cny"
+            " FROM snapshots s"
+            " LEFT JOIN snapshot_positions p"
+            "   ON p.week_id = s.week_id AND p.asset_type = ? AND p.symbol = ?"
+            " GROUP BY s.week_id"
+            " ORDER BY s.as_of DESC LIMIT ?",
+            (asset_type, symbol, -1 if weeks is None else weeks),
+        ).fetchall()
+        return [
+            HistoryPoint(
+                week_id=r["week_id"], as_of=date.fromisoformat(r["as_of"]),
+                value_cny=r["value_cny"],
+                share=r["value_cny"] / r["total_cny"] if r["total_cny"] > 0 else 0.0,
+            )
+            for r in reversed(rows)
+        ]
+
+    def exposure_history(self, category: str, weeks: int | None = None) -> list[HistoryPoint]:
+        """某穿透暴露分类（CN/HK/US/CASH/BOND/OTHER/UNPENETRATED）的逐周市值与占比。"""
+        if category not in EXPOSURE_CATEGORIES:
+            raise ValueError(f"非法暴露分类: {category!r}（允许 {EXPOSURE_CATEGORIES}）")
+        return [
+            HistoryPoint(
+                week_id=w.week_id, as_of=w.as_of,
+                value_cny=w.market_exposure[category],
+                share=w.market_exposure[category] / w.total_cny if w.total_cny > 0 else 0.0,
+            )
+            for w in self.get_weekly_trend(weeks)
+        ]
+
+    def satellite_history(self, weeks: int | None = None) -> list[HistoryPoint]:
+        """卫星仓穿透口径的逐周市值与占比（对照 35% 上限）。"""
+        return [
+            HistoryPoint(
+                week_id=w.week_id, as_of=w.as_of,
+                value_cny=w.satellite_cny, share=w.satellite_ratio,
+            )
+            for w in self.get_weekly_trend(weeks)
+        ]
 
     # ------------------------------------------------------------------
     # 读路径：配置明细（review 穿透分类与卫星标签）
@@ -672,20 +934,19 @@ class Ledger:
         snap = self.get_latest_snapshot()
         if snap is None:
             return []
-        detail = []
-        for p in snap.positions:
-            xray = (
-                self._latest_xray(p.symbol) if p.asset_type == "fund" else None
-            )
-            tags = tuple(
+        xrays = self._latest_xrays()
+        themes: dict[tuple[str, str, str], list[tuple[str, bool]]] = {}
+        for r in self._conn.execute(
+            "SELECT asset_type, market, symbol, theme, is_satellite FROM theme_map"
+            " ORDER BY theme"
+        ):
+            themes.setdefault((r["asset_type"], r["market"], r["symbol"]), []).append(
                 (r["theme"], bool(r["is_satellite"]))
-                for r in self._conn.execute(
-                    "SELECT theme, is_satellite FROM theme_map"
-                    " WHERE asset_type = ? AND market = ? AND symbol = ?"
-                    " ORDER BY theme",
-                    (p.asset_type, p.market, p.symbol),
-                )
             )
+        detail = []
+        for p in snap.positions:
+            xray = xrays.get(p.symbol) if p.asset_type == "fund" else None
+            tags = tuple(themes.get((p.asset_type, p.market, p.symbol), ()))
             detail.append(HoldingDetail(
                 asset_type=p.asset_type, market=p.market, symbol=p.symbol,
                 name=p.name, value_cny=p.value_cny,
@@ -701,10 +962,11 @@ class Ledger:
         snap = self.get_latest_snapshot()
         if snap is None:
             return []
+        xrays = self._latest_xrays()
         entries: list[BucketEntry] = []
         for p in snap.positions:
             if p.asset_type == "fund":
-                xray = self._latest_xray(p.symbol)
+                xray = xrays.get(p.symbol)
                 if xray is None:
                     entries.append(BucketEntry(
                         bucket="UNPENETRATED", asset_type=p.asset_type,
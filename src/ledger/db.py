@@ -1,9 +1,24 @@
-"""账本 SQLite schema（ADR-0014：事务/外键/唯一约束保一致性）。"""
+"""账本 SQLite schema 与连接管理（ADR-0014：事务/外键/唯一约束保一致性）。
+
+快照按行存储：snapshots 为每周一行的表头（总额 / 卫星口径），逐持仓市值落
+snapshot_positions、穿透暴露落 snapshot_exposure，均按 week_id 与标的 / 分类
+建索引，时间序列读取走 SQL 聚合而非解码整段 JSON 历史。weekly_rollup 是
+按周物化的走势宽表（总额、卫星口径、各暴露分类一列），take_snapshot 逐周增量
+维护，走势图一次单表查询取回。
+
+连接：WAL 日志（读不阻塞写、写不阻塞读），synchronous=NORMAL + 16 MB 页缓存；
+schema 以 `PRAGMA user_version` 记版本，MIGRATIONS 按序只跑一次，之后打开
+库不再执行建表脚本。`get_connection` 按 (库路径, 只读) 在进程内复用一个连接；
+只读连接（Streamlit 查阅层）用 `mode=ro` 打开，不迁移、不写库。
+"""
 
 from __future__ import annotations
 
+import json
 import sqlite3
+import threading
 from pathlib import Path
+from typing import Callable
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS holdings (
@@ -48,14 +63,64 @@ CREATE TABLE IF NOT EXISTS theme_map (
 );
 
 CREATE TABLE IF NOT EXISTS snapshots (
-    id         INTEGER PRIMARY KEY,
-    week_id    TEXT NOT NULL UNIQUE,
-    as_of      TEXT NOT NULL,
-    total_cny  REAL NOT NULL,
-    stale      INTEGER NOT NULL DEFAULT 0,
-    payload    TEXT NOT NULL
+    id              INTEGER PRIMARY KEY,
+    week_id         TEXT NOT NULL UNIQUE,
+    as_of           TEXT NOT NULL,
+    total_cny       REAL NOT NULL,
+    stale           INTEGER NOT NULL DEFAULT 0,
+    satellite_cny   REAL NOT NULL DEFAULT 0,
+    satellite_ratio REAL NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_as_of ON snapshots (as_of);
+
+CREATE TABLE IF NOT EXISTS snapshot_positions (
+    week_id     TEXT NOT NULL REFERENCES snapshots (week_id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,
+    asset_type  TEXT NOT NULL,
+    market      TEXT NOT NULL,
+    symbol      TEXT NOT NULL,
+    name        TEXT NOT NULL DEFAULT '',
+    quantity    REAL NOT NULL,
+    currency    TEXT NOT NULL,
+    price       REAL NOT NULL,
+    value_cny   REAL NOT NULL,
+    stale       INTEGER NOT NULL DEFAULT 0,
+    xray_as_of  TEXT,
+    PRIMARY KEY (week_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_positions_symbol
+    ON snapshot_positions (asset_type, symbol, week_id);
+
+CREATE TABLE IF NOT EXISTS snapshot_exposure (
+    week_id    TEXT NOT NULL REFERENCES snapshots (week_id) ON DELETE CASCADE,
+    category   TEXT NOT NULL,
+    value_cny  REAL NOT NULL,
+    PRIMARY KEY (week_id, category)
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_exposure_category
+    ON snapshot_exposure (category, week_id);
+
+CREATE TABLE IF NOT EXISTS weekly_rollup (
+    week_id           TEXT PRIMARY KEY REFERENCES snapshots (week_id) ON DELETE CASCADE,
+    as_of             TEXT NOT NULL,
+    total_cny         REAL NOT NULL,
+    stale             INTEGER NOT NULL,
+    satellite_cny     REAL NOT NULL,
+    satellite_ratio   REAL NOT NULL,
+    cn_cny            REAL NOT NULL DEFAULT 0,
+    hk_cny            REAL NOT NULL DEFAULT 0,
+    us_cny            REAL NOT NULL DEFAULT 0,
+    cash_cny          REAL NOT NULL DEFAULT 0,
+    bond_cny          REAL NOT NULL DEFAULT 0,
+    other_cny         REAL NOT NULL DEFAULT 0,
+    unpenetrated_cny  REAL NOT NULL DEFAULT 0
 );
 
+CREATE INDEX IF NOT EXISTS idx_weekly_rollup_as_of ON weekly_rollup (as_of);
+
 CREATE TABLE IF NOT EXISTS last_prices (
     asset_type TEXT NOT NULL,
     symbol     TEXT NOT NULL,
@@ -67,9 +132,150 @@ CREATE TABLE IF NOT EXISTS last_prices (
 """
 
 
-def connect(db_path: str | Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+# 穿透暴露分类（快照 market_exposure 的全部取值）→ weekly_rollup 列
+EXPOSURE_CATEGORIES = ("CN", "HK", "US", "CASH", "BOND", "OTHER", "UNPENETRATED")
+ROLLUP_EXPOSURE_COLUMNS = {c: f"{c.lower()}_cny" for c in EXPOSURE_CATEGORIES}
+_ROLLUP_COLUMNS = (
+    "week_id", "as_of", "total_cny", "stale", "satellite_cny", "satellite_ratio",
+    *ROLLUP_EXPOSURE_COLUMNS.values(),
+)
+
+# 快照表头 + 暴露行 → weekly_rollup 行；调用方追加 WHERE 与 GROUP BY s.week_id
+ROLLUP_SELECT = (
+    "SELECT s.week_id, s.as_of, s.total_cny, s.stale, s.satellite_cny, s.satellite_ratio, "
+    + ", ".join(
+        f"COALESCE(SUM(CASE WHEN e.category = '{c}' THEN e.value_cny END), 0) AS {col}"
+        for c, col in ROLLUP_EXPOSURE_COLUMNS.items()
+    )
+    + " FROM snapshots s LEFT JOIN snapshot_exposure e ON e.week_id = s.week_id"
+)
+INSERT_ROLLUP = f"INSERT INTO weekly_rollup ({', '.join(_ROLLUP_COLUMNS)}) {ROLLUP_SELECT}"
+
+INSERT_SNAPSHOT_POSITION = (
+    "INSERT INTO snapshot_positions (week_id, seq, asset_type, market, symbol, name,"
+    " quantity, currency, price, value_cny, stale, xray_as_of)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_SNAPSHOT_EXPOSURE = (
+    "INSERT INTO snapshot_exposure (week_id, category, value_cny) VALUES (?, ?, ?)"
+)
+
+
+def _migrate_snapshot_payload(conn: sqlite3.Connection) -> None:
+    """旧库：snapshots.payload JSON 拆成持仓 / 暴露行与卫星列，再删除 payload 列。"""
+    with conn:
+        # 先拿写锁再检查，两个进程同时升级时后到者看到的已是新结构
+        conn.execute("BEGIN IMMEDIATE")
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(snapshots)")}
+        if "payload" not in columns:
+            return
+        conn.execute("ALTER TABLE snapshots ADD COLUMN satellite_cny REAL NOT NULL DEFAULT 0")
+        conn.execute("ALTER TABLE snapshots ADD COLUMN satellite_ratio REAL NOT NULL DEFAULT 0")
+        for row in conn.execute("SELECT week_id, payload FROM snapshots").fetchall():
+            payload = json.loads(row["payload"])
+            conn.executemany(INSERT_SNAPSHOT_POSITION, [
+                (row["week_id"], seq, p["asset_type"], p["market"], p["symbol"], p["name"],
+                 p["quantity"], p["currency"], p["price"], p["value_cny"], int(p["stale"]),
+                 p.get("xray_as_of"))
+                for seq, p in enumerate(payload.get("positions", []))
+            ])
+            conn.executemany(INSERT_SNAPSHOT_EXPOSURE, [
+                (row["week_id"], category, value)
+                for category, value in payload.get("market_exposure", {}).items()
+            ])
+            conn.execute(
+                "UPDATE snapshots SET satellite_cny = ?, satellite_ratio = ? WHERE week_id = ?",
+                (payload.get("satellite_cny", 0.0), payload.get("satellite_ratio", 0.0),
+                 row["week_id"]),
+            )
+        conn.execute("ALTER TABLE snapshots DROP COLUMN payload")
+
+
+def _migrate_v1(conn: sqlite3.Connection) -> None:
+    """v1：全部建表（IF NOT EXISTS，兼容无版本号的旧库）+ 旧 JSON 快照拆行。"""
     conn.executescript(SCHEMA)
+    _migrate_snapshot_payload(conn)
+
+
+# 追加式：新 schema 变更写成新函数追加在末尾，已发布的条目不改
+MIGRATIONS: tuple[Callable[[sqlite3.Connection], None], ...] = (_migrate_v1,)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",  # 写锁被占时等待而非立即 SQLITE_BUSY
+    "PRAGMA synchronous = NORMAL",  # WAL 下足够安全：掉电最多丢最后一次提交
+    "PRAGMA cache_size = -16000",  # 16 MB 页缓存
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """把库迁移到 SCHEMA_VERSION，返回迁移前版本；已是最新时不执行任何脚本。"""
+    version = schema_version(conn)
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"账本 schema 版本 {version} 高于当前代码支持的 {SCHEMA_VERSION}，请先升级代码"
+        )
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        MIGRATIONS[target - 1](conn)
+        conn.execute(f"PRAGMA user_version = {target}")
+    return version
+
+
+def connect(db_path: str | Path, read_only: bool = False) -> sqlite3.Connection:
+    """新开一个已调优的连接。写连接启用 WAL 并迁移 schema；只读连接不迁移不写库。
+
+    只读打开前若库不存在或版本落后，先经一次写连接把库带到最新版本。
+    连接可跨线程使用（sqlite 串行化模式），但事务不跨线程共享：写方为单线程 job/CLI。
+    """
+    path = Path(db_path)
+    if read_only:
+        if not path.exists() or _read_only_version(path) < SCHEMA_VERSION:
+            connect(path).close()
+        conn = sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+    else:
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.row_factory = sqlite3.Row
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    if not read_only:
+        migrate(conn)
     return conn
+
+
+def _read_only_version(path: Path) -> int:
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return schema_version(conn)
+    finally:
+        conn.close()
+
+
+_POOL: dict[tuple[str, bool], sqlite3.Connection] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_connection(db_path: str | Path, read_only: bool = False) -> sqlite3.Connection:
+    """进程内按 (库路径, 只读) 复用的连接；首次取用时打开（并迁移），之后零开销。"""
+    key = (str(Path(db_path).resolve()), read_only)
+    with _POOL_LOCK:
+        conn = _POOL.get(key)
+        if conn is None:
+            conn = _POOL[key] = connect(db_path, read_only=read_only)
+        return conn
+
+
+def close_connections() -> None:
+    """关闭并清空进程内连接池（测试清理、或库文件被替换后重开）。"""
+    with _POOL_LOCK:
+        for conn in _POOL.values():
+            conn.close()
+        _POOL.clear()
@@ -3,25 +3,92 @@
 - 股票价格：复用 `src/data/stock_daily_fetcher.fetch_daily_bars`
   （ETL-on-demand，A 股 Tushare / 美股 yfinance；港股暂不支持 → None 走降级）
 - 汇率：yfinance `USDCNY=X` / `HKDCNY=X`（开放项的钉死实现）
+- 港股与汇率日线落共享 bar store（`src/data/bar_store.py`，kind=hk_stock/fx；
+  港股不用 kind=stock，那是 stock_daily_fetcher 的 safe_ticker 日线），
+  已覆盖 as_of 时不再请求 yfinance；缺口只补尾部
 - 基金净值：永远返回 None —— 基金净值只经 ttfund 写入路径进账本，
   内核自动降级到最近导入净值（ADR-0012：不把天天基金重实现为 Python 客户端）
+- 批量：`prefetch` 按上游标的去重后经 `network_executor.run_many` 并发取数
+  （共享截止时间，超时记 None 走降级），
+  快照一次解析全部股价 / 港股 / 汇率
 
 import 边界（ADR-0017）：只依赖 src/data，不依赖 src/ui / src/portfolio。
 """
 
 from __future__ import annotations
 
+import concurrent.futures
 import logging
-from datetime import date
+from datetime import date, timedelta
+from functools import partial
 from types import SimpleNamespace
+from typing import Iterable
 
+import pandas as pd
+
+from ..data.bar_store import get_bar_store
+from ..data.network_executor import get_executor
 from ..data.stock_daily_fetcher import fetch_daily_bars
-from .quotes import Quote
+from .quotes import Quote, QuoteMap, QuoteRequest, resolve_each
 
 logger = logging.getLogger(__name__)
 
 _MARKET_LABEL = {"CN": "A股", "US": "美股", "HK": "港股"}
 _FX_TICKER = {"USD": "USDCNY=X", "HKD": "HKDCNY=X"}
+_HK_KIND = "hk_stock"  # bar store kind：yfinance 形式（0700.HK），与 kind=stock 的个股日线分开
+_INITIAL_DAYS = 30  # store 为空时的首拉窗口
+_TAIL_OVERLAP_DAYS = 5  # 补尾部时回看几天，覆盖 yfinance 对近几根 bar 的修订
+PREFETCH_DEADLINE_S = 60.0  # prefetch 全部请求共享的墙钟预算
+_PREFETCH_ENDPOINT = "ledger_quotes"  # network_executor 并发上限与指标的键
+
+
+def _last_weekday(d: date) -> date:
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d
+
+
+def _yf_download(ticker: str, start: date, end: date) -> pd.DataFrame | None:
+    import yfinance as yf
+
+    return yf.download(
+        ticker, start=start.isoformat(), end=(end + timedelta(days=1)).isoformat(),
+        progress=False, auto_adjust=False, multi_level_index=False,
+    )
+
+
+def _yf_close_on(ticker: str, kind: str, as_of: date) -> Quote | None:
+    """as_of 当日或之前最近一根日线收盘价；bar store 已覆盖到 as_of（今天则 T-1）时零请求。
+
+    下载失败时用 store 中的最近有效价（stale=True）；store 也没有 → None。
+    """
+    store = get_bar_store()
+    last = store.last_date(ticker)
+    target = _last_weekday(min(as_of, date.today() - timedelta(days=1)))
+    stale = False
+    if last is None or last < target:
+        start = (last - timedelta(days=_TAIL_OVERLAP_DAYS)) if last else as_of - timedelta(days=_INITIAL_DAYS)
+        try:
+            data = _yf_download(ticker, start, max(as_of, date.today()))
+        except Exception as exc:
+            logger.warning("yfinance fetch failed for %s: %s", ticker, exc)
+            data = None
+        if data is None or data.empty or "Close" not in data.columns:
+            stale = True
+        else:
+            bars = data.rename(columns=str.lower)
+            bars.index = pd.to_datetime(bars.index)
+            cols = [c for c in ("open", "high", "low", "close", "volume") if c in bars.columns]
+            store.upsert(ticker, bars[cols].astype(float).dropna(subset=["close"]), kind=kind)
+
+    frame = store.frame(ticker, end=as_of)
+    if frame is None or frame.empty:
+        return None
+    close = frame["close"].dropna()
+    if close.empty:
+        return None
+    quoted_on = close.index[-1].date()
+    return Quote(price=float(close.iloc[-1]), quoted_on=quoted_on, stale=stale or quoted_on < target)
 
 
 class MarketQuoteProvider:
@@ -30,7 +97,7 @@ class MarketQuoteProvider:
     def get_stock_price(self, symbol: str, market: str, as_of: date) -> Quote | None:
         if market == "HK":
             # stock_daily_fetcher 不支持港股；yfinance 兜底（0700.HK 形式）
-            return self._yf_last_close(f"{symbol.lstrip('0').zfill(4)}.HK")
+            return _yf_close_on(self._hk_ticker(symbol), _HK_KIND, as_of)
         label = _MARKET_LABEL.get(market)
         if label is None:
             return None
@@ -50,6 +117,10 @@ class MarketQuoteProvider:
             stale=stale,
         )
 
+    @staticmethod
+    def _hk_ticker(symbol: str) -> str:
+        return f"{symbol.lstrip('0').zfill(4)}.HK"
+
     @staticmethod
     def _cn_ticker(symbol: str) -> str:
         """裸 6 位代码补 Tushare 交易所后缀（60/68→SH，其余→SZ）；已带后缀原样返回。"""
@@ -57,42 +128,68 @@ class MarketQuoteProvider:
             return symbol
         return f"{symbol}.SH" if symbol[:2] in ("60", "68") else f"{symbol}.SZ"
 
-    @staticmethod
-    def _yf_last_close(ticker: str) -> Quote | None:
-        try:
-            import yfinance as yf
-
-            data = yf.download(
-                ticker, period="5d", progress=False,
-                auto_adjust=False, multi_level_index=False,
-            )
-        except Exception as exc:
-            logger.warning("yfinance fetch failed for %s: %s", ticker, exc)
-            return None
-        if data is None or data.empty:
-            return None
-        return Quote(
-            price=float(data["Close"].iloc[-1]),
-            quoted_on=data.index[-1].date(),
-        )
-
     def get_fund_nav(self, fund_code: str, as_of: date) -> Quote | None:
         return None  # 基金净值只来自 ttfund 写入路径
 
     def get_fx_rate(self, currency: str, as_of: date) -> float | None:
-        ticker = _FX_TICKER.get(currency)
-        if ticker is None:
-            return None
-        try:
-            import yfinance as yf
+        # 协议只回汇率数值：下载失败时的 store 旧价（stale）不冒充当日价，返回 None
+        # 让账本降级到 last_prices，按原报价日走 PRICE_STALE_DAYS
+        quote = self._fx_quote(currency, as_of)
+        return None if quote is None or quote.stale else quote.price
 
-            data = yf.download(
-                ticker, period="5d", progress=False,
-                auto_adjust=False, multi_level_index=False,
-            )
-        except Exception as exc:
-            logger.warning("yfinance fx fetch failed for %s: %s", ticker, exc)
-            return None
-        if data is None or data.empty:
+    @staticmethod
+    def _fx_quote(currency: str, as_of: date) -> Quote | None:
+        ticker = _FX_TICKER.get(currency)
+        return None if ticker is None else _yf_close_on(ticker, "fx", as_of)
+
+    def _resolve_one(self, req: QuoteRequest, as_of: date) -> Quote | None:
+        """prefetch 的单标的解析；汇率保留报价日与 stale 标记。"""
+        if req.kind == "fx":
+            return self._fx_quote(req.symbol, as_of)
+        return resolve_each(self, [req], as_of)[req]
+
+    def prefetch(
+        self, requests: Iterable[QuoteRequest], as_of: date,
+        deadline: float = PREFETCH_DEADLINE_S,
+    ) -> QuoteMap:
+        """并发解析一组请求；同一上游标的（如 700 与 00700、多持仓共用的币种）只取一次。
+
+        基金净值与不支持的市场/币种不触网直接 None；截止时间内未返回的请求记 None
+        （账本降级到最近有效价）。取数走 network_executor 的常驻 daemon 线程池
+        （endpoint=ledger_quotes），超时的请求在后台被遗弃、不拖住进程退出，
+        完成后照常落 bar store。
+        """
+        resolved: QuoteMap = {}
+        groups: dict[tuple[str, str], list[QuoteRequest]] = {}
+        for req in dict.fromkeys(requests):
+            key = self._fetch_key(req)
+            if key is None:
+                resolved[req] = None
+            else:
+                groups.setdefault(key, []).append(req)
+        if not groups:
+            return resolved
+
+        outcome = get_executor().run_many(
+            {key: partial(self._resolve_one, reqs[0], as_of) for key, reqs in groups.items()},
+            deadline, endpoint=_PREFETCH_ENDPOINT,
+        )
+        for key, quote in outcome.items():
+            if isinstance(quote, Exception):  # 单个标的失败 / 超时不影响其余请求
+                if not isinstance(quote, concurrent.futures.TimeoutError):
+                    logger.warning("quote prefetch failed for %s: %s", key[1], quote)
+                quote = None
+            for req in groups[key]:
+                resolved[req] = quote
+        return resolved
+
+    def _fetch_key(self, req: QuoteRequest) -> tuple[str, str] | None:
+        """请求 → 上游标的；None 表示无需取数（结果恒为 None）。"""
+        if req.kind == "fx":
+            ticker = _FX_TICKER.get(req.symbol)
+            return None if ticker is None else ("fx", ticker)
+        if req.kind != "stock" or req.market not in _MARKET_LABEL:
             return None
-        return float(data["Close"].iloc[-1])
+        if req.market == "HK":
+            return ("HK", self._hk_ticker(req.symbol))
+        return (req.market, self._cn_ticker(req.symbol) if req.market == "CN" else req.symbol)
@@ -1,13 +1,17 @@
 """报价提供者接缝：测试注入静态数据，生产实现组装现有取数层。
 
 汇率语义：1 单位外币 = fx 人民币（如 USD → 7.2）。CNY 恒为 1.0。
+
+批量扩展：`prefetch(requests, as_of)` 一次解析一组去重后的 QuoteRequest，
+返回 {请求: 报价}；快照估值先 prefetch 全部股价 / 净值 / 汇率再查表。
+生产实现可并发取数；没有 prefetch 的提供者由 `resolve_each` 逐条兜底。
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from typing import Protocol
+from typing import Iterable, Protocol
 
 
 @dataclass(frozen=True)
@@ -19,6 +23,25 @@ class Quote:
     stale: bool = False
 
 
+QUOTE_KINDS = ("stock", "fund", "fx")
+
+
+@dataclass(frozen=True)
+class QuoteRequest:
+    """一次报价请求，也是 prefetch 结果表的键。
+
+    kind=stock 时 market 为 CN/HK/US；fund 与 fx 的 market 为空，fx 的 symbol 为币种。
+    """
+
+    kind: str
+    symbol: str
+    market: str = ""
+
+
+# fx 请求的结果也用 Quote 表示：price 为汇率
+QuoteMap = dict[QuoteRequest, Quote | None]
+
+
 class QuoteProvider(Protocol):
     """账本估值所需的全部外部报价。缺失返回 None，由账本决定降级策略。"""
 
@@ -28,6 +51,26 @@ class QuoteProvider(Protocol):
 
     def get_fx_rate(self, currency: str, as_of: date) -> float | None: ...
 
+    def prefetch(self, requests: Iterable[QuoteRequest], as_of: date) -> QuoteMap: ...
+
+
+def resolve_each(
+    provider: QuoteProvider, requests: Iterable[QuoteRequest], as_of: date
+) -> QuoteMap:
+    """逐条调用单价接口解析一组请求（去重、保序）；prefetch 的串行默认实现。"""
+    resolved: QuoteMap = {}
+    for req in dict.fromkeys(requests):
+        if req.kind == "stock":
+            resolved[req] = provider.get_stock_price(req.symbol, req.market, as_of)
+        elif req.kind == "fund":
+            resolved[req] = provider.get_fund_nav(req.symbol, as_of)
+        elif req.kind == "fx":
+            rate = provider.get_fx_rate(req.symbol, as_of)
+            resolved[req] = None if rate is None else Quote(price=rate, quoted_on=as_of)
+        else:
+            raise ValueError(f"未知报价类型 {req.kind}，可选：{QUOTE_KINDS}")
+    return resolved
+
 
 class StaticQuoteProvider:
     """测试与脚本用的静态报价源。"""
@@ -58,3 +101,6 @@ class StaticQuoteProvider:
 
     def get_fx_rate(self, currency: str, as_of: date) -> float | None:
         return self._fx.get(currency)
+
+    def prefetch(self, requests: Iterable[QuoteRequest], as_of: date) -> QuoteMap:
+        return resolve_each(self, requests, as_of)
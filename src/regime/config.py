@@ -125,6 +125,8 @@ class PositionAdvisorConfig:
 class BreadthConfig:
     sector_weights: dict[str, float] = field(default_factory=dict)
     fallback_value: float = 50.0
+    source: str = "sector_etf"   # "constituents": S&P 500 constituent breadth, sector ETFs as fallback
+    max_stale_days: int = 5
 
 
 @dataclass(frozen=True)
@@ -191,14 +193,16 @@ def _build_breadth(raw: dict) -> BreadthConfig:
     return BreadthConfig(
         sector_weights=raw.get("sector_weights", {}),
         fallback_value=raw.get("fallback_value", 50.0),
+        source=raw.get("source", "sector_etf"),
+        max_stale_days=raw.get("max_stale_days", 5),
     )
 
 
-def load_config(
+def load_raw_config(
     defaults_path: str | Path | None = None,
     overrides_path: str | Path | None = None,
-) -> RegimeConfig:
-    """Load configuration from YAML, merging overrides on top of defaults.
+) -> dict[str, Any]:
+    """The merged YAML mapping (overrides on top of defaults) that ``build_config`` types.
 
     Raises ``FileNotFoundError`` if the defaults file is missing.
     """
@@ -215,7 +219,11 @@ def load_config(
         with open(overrides_path) as f:
             overrides: dict[str, Any] = yaml.safe_load(f) or {}
         raw = _deep_merge(raw, overrides)
+    return raw
+
 
+def build_config(raw: dict[str, Any]) -> RegimeConfig:
+    """Typed RegimeConfig from a raw mapping laid out like regime_defaults.yaml."""
     return RegimeConfig(
         layer1=_build_layer1(raw.get("layer1", {})),
         layer2=_build_layer2(raw.get("layer2", {})),
@@ -223,3 +231,14 @@ def load_config(
         position_advisor=_build_position_advisor(raw.get("position_advisor", {})),
         breadth=_build_breadth(raw.get("breadth", {})),
     )
+
+
+def load_config(
+    defaults_path: str | Path | None = None,
+    overrides_path: str | Path | None = None,
+) -> RegimeConfig:
+    """Load configuration from YAML, merging overrides on top of defaults.
+
+    Raises ``FileNotFoundError`` if the defaults file is missing.
+    """
+    return build_config(load_raw_config(defaults_path, overrides_path))
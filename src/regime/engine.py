@@ -14,11 +14,14 @@ import pandas as pd
 
 from .config import RegimeConfig, load_config
 from .envelope import compute_envelope
+from .features import FeatureCache
 from .layer1 import compute_layer1
 from .layer2 import compute_layer2
 from .layer3 import compute_layer3
 from .models import RegimeResult
+from .replay import replay_regime
 from ..data.breadth import compute_s5fi
+from ..data.constituent_breadth import breadth_as_of, load_breadth_history
 
 logger = logging.getLogger(__name__)
 
@@ -33,24 +36,103 @@ class RegimeEngine:
     def __init__(self, config: RegimeConfig | None = None):
         self.config = config or load_config()
 
-    def run(self, df: pd.DataFrame, sector_df: pd.DataFrame | None = None) -> RegimeResult:
-        """Execute full scoring pipeline and return structured result."""
-        # S5FI breadth
-        if sector_df is not None and not sector_df.empty:
+    def run(
+        self,
+        df: pd.DataFrame,
+        sector_df: pd.DataFrame | None = None,
+        features: FeatureCache | None = None,
+    ) -> RegimeResult:
+        """Execute full scoring pipeline and return structured result.
+
+        The three layers share one FeatureCache, so each rolling series is
+        computed once per run. Re-running day by day over one history can pass
+        ``features=FeatureCache(full_df).at(day)`` (with *df* cut at the same
+        day) to compute them once for all days.
+        """
+        features = features if features is not None else FeatureCache(df)
+        # S5FI breadth: constituent % above 50DMA when configured and fresh, else sector ETFs
+        s5fi = None
+        if self.config.breadth.source == "constituents" and not df.empty:
+            s5fi = breadth_as_of(self._constituent_breadth(), df.index[-1],
+                                 max_stale_days=self.config.breadth.max_stale_days)
+        if s5fi is None and sector_df is not None and not sector_df.empty:
             s5fi = compute_s5fi(sector_df, self.config.breadth.sector_weights,
                                 self.config.breadth.fallback_value)
-        else:
+        elif s5fi is None:
             s5fi = self.config.breadth.fallback_value
 
-        l1 = compute_layer1(df, self.config.layer1)
-        l2 = compute_layer2(df, s5fi, self.config.layer2)
-        l3 = compute_layer3(df, self.config.layer3, s5fi)
+        l1 = compute_layer1(features, self.config.layer1)
+        l2 = compute_layer2(features, s5fi, self.config.layer2)
+        l3 = compute_layer3(features, self.config.layer3, s5fi)
         envelope = compute_envelope(l1, l2, l3)
 
         result = RegimeResult(layer1=l1, layer2=l2, layer3=l3, envelope=envelope)
         self._append_history(result, df)
         return result
 
+    def replay(
+        self,
+        df: pd.DataFrame,
+        sector_df: pd.DataFrame | None = None,
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        write_history: bool = True,
+    ) -> pd.DataFrame:
+        """Score every trading day in [start, end] and return one row per day.
+
+        Row t matches what ``run`` returns on ``df`` truncated at t. The whole of
+        *df* is scored so that rolling windows and L3 sentinel state are warm by
+        *start*; pass history well before it. The live sentinel state file is
+        neither read nor written. With *write_history*, the rows replace any
+        history rows in the same date range and the CSV is rewritten once.
+        """
+        breadth = self._constituent_breadth() if self.config.breadth.source == "constituents" else None
+        scored = replay_regime(df, sector_df, self.config,
+                               constituent_breadth=None if breadth is None else breadth["pct_above_50"])
+        scored = scored.loc[start:end]
+        if write_history and not scored.empty:
+            self._write_history(scored)
+        return scored
+
+    @staticmethod
+    def _constituent_breadth() -> pd.DataFrame | None:
+        try:
+            return load_breadth_history()
+        except Exception:
+            logger.warning("Constituent breadth history unreadable; using sector ETFs", exc_info=True)
+            return None
+
+    def _write_history(self, scored: pd.DataFrame) -> None:
+        """Merge replayed rows into the history CSV, replacing rows in their date range."""
+        try:
+            rows = pd.DataFrame({
+                "date": scored.index.strftime("%Y-%m-%d"),
+                "l1_regime": scored["l1_regime"].to_numpy(),
+                "l1_ceiling": scored["l1_ceiling"].to_numpy(),
+                "l2_regime": scored["l2_regime"].to_numpy(),
+                "l2_util_min": scored["l2_util_min"].to_numpy(),
+                "l2_util_max": scored["l2_util_max"].to_numpy(),
+                "l3_triggered": scored["l3_triggered"].to_numpy(),
+                "l3_override": [v if v is not None else "" for v in scored["l3_override"]],
+                "target_min": scored["target_min"].to_numpy(),
+                "target_max": scored["target_max"].to_numpy(),
+                "mode": scored["mode"].to_numpy(),
+                "spx_close": [v if v == v and v else "" for v in scored["spx_close"]],
+            })
+            first, last = rows["date"].iloc[0], rows["date"].iloc[-1]
+
+            path = _HISTORY_FILE
+            if path.exists():
+                existing = pd.read_csv(path, dtype=str, keep_default_na=False)
+                keep = (existing["date"] < first) | (existing["date"] > last)
+                rows = pd.concat([existing[keep], rows], ignore_index=True)
+            rows = rows.sort_values("date", kind="stable")
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            rows[_HISTORY_COLS].to_csv(path, index=False)
+        except Exception:
+            logger.warning("Failed to write replayed regime history", exc_info=True)
+
     def _append_history(self, result: RegimeResult, df: pd.DataFrame) -> None:
         """Append today's scoring snapshot to the history CSV."""
         try:
@@ -0,0 +1,95 @@
+"""Memoized indicator features shared by the regime layers.
+
+L1, L2 and L3 read the same derived series (NaN-dropped SPX / VIX / JNK,
+their 20/50-day means, daily returns). A FeatureCache computes each one once,
+keyed by (column, operation, window), and every ``score_*`` function and
+``compute_layer*`` accepts either a DataFrame or a FeatureCache.
+
+All features are causal: the value on date d only uses rows on or before d.
+So a cache built on a long history can be cut at any day with ``at(day)``;
+the view shares the parent's memo, and ``at(day)`` answers exactly what a
+fresh cache over ``df.loc[:day]`` would. That lets a day-by-day re-run
+(``RegimeEngine.run(..., features=cache.at(day))``) compute every rolling
+window once for the whole history instead of once per day.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from ..analysis.rolling import rolling_corr
+
+
+class FeatureCache:
+    """Derived series of one market DataFrame, computed on first request."""
+
+    def __init__(self, df: pd.DataFrame, end: pd.Timestamp | None = None,
+                 _memo: dict | None = None):
+        self.df = df
+        self.end = None if end is None else pd.Timestamp(end)
+        self._memo = {} if _memo is None else _memo
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.df.columns
+
+    def at(self, end) -> FeatureCache:
+        """View of this cache as of *end* (inclusive); shares the memo."""
+        return FeatureCache(self.df, end, self._memo)
+
+    def cached(self, key: tuple, compute):
+        """Memoize any full-history derivation of df under *key*; not cut by ``at``."""
+        return self._full(key, compute)
+
+    def _full(self, key: tuple, compute) -> pd.Series | pd.DataFrame:
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = compute()
+        return value
+
+    def _cut(self, value: pd.Series | pd.DataFrame) -> pd.Series | pd.DataFrame:
+        if self.end is None:
+            return value
+        return value.iloc[:value.index.searchsorted(self.end, side="right")]
+
+    def _base(self, col: str) -> pd.Series:
+        return self._full((col, "dropna", None), lambda: self.df[col].dropna())
+
+    # ── Features ──────────────────────────────────────────────────────────────
+
+    def series(self, col: str) -> pd.Series:
+        """df[col].dropna(); KeyError when the column is missing."""
+        return self._cut(self._base(col))
+
+    def rolling_mean(self, col: str, window: int) -> pd.Series:
+        """Rolling mean over the NaN-dropped series (NaN for the first window - 1 points)."""
+        return self._cut(self._full((col, "rolling_mean", window),
+                                    lambda: self._base(col).rolling(window).mean()))
+
+    def change_pct(self, col: str, periods: int = 1) -> pd.Series:
+        """Percent change over *periods* points of the NaN-dropped series."""
+        def compute():
+            s = self._base(col)
+            return (s / s.shift(periods) - 1) * 100
+        return self._cut(self._full((col, "change_pct", periods), compute))
+
+    def aligned(self, *cols: str) -> pd.DataFrame:
+        """Rows where every one of *cols* has a value."""
+        return self._cut(self._aligned(cols))
+
+    def _aligned(self, cols: tuple[str, ...]) -> pd.DataFrame:
+        return self._full((cols, "aligned", None),
+                          lambda: pd.concat([self._base(c) for c in cols], axis=1).dropna())
+
+    def rolling_corr(self, a: str, b: str, window: int) -> pd.Series:
+        """Trailing *window*-point correlation of a and b over the rows where both have a value."""
+        def compute():
+            both = self._aligned((a, b))
+            values = rolling_corr(both.iloc[:, 0].to_numpy(), both.iloc[:, 1].to_numpy(), window)
+            return pd.Series(values, index=both.index)
+        return self._cut(self._full(((a, b), "rolling_corr", window), compute))
+
+
+def as_features(df: pd.DataFrame | FeatureCache) -> FeatureCache:
+    """A FeatureCache for *df*; a cache passed in is returned as is."""
+    return df if isinstance(df, FeatureCache) else FeatureCache(df)
@@ -1,6 +1,7 @@
 """Layer 1: Liquidity Foundation Scoring.
 
 Evaluates 4 macro liquidity indicators and outputs a Position Ceiling.
+Scoring functions take a DataFrame or a shared FeatureCache (see features.py).
 """
 
 from __future__ import annotations
@@ -12,6 +13,7 @@ import numpy as np
 import pandas as pd
 
 from .config import Layer1Config
+from .features import FeatureCache, as_features
 from .models import IndicatorResult, L1Regime, Layer1Result
 
 logger = logging.getLogger(__name__)
@@ -24,17 +26,18 @@ _REGIME_COLORS = {
 }
 
 
-def score_net_liquidity_trend(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
+def score_net_liquidity_trend(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> IndicatorResult:
     """L1-1: Score the 20DMA trend of Net Liquidity over consecutive weeks."""
+    fc = as_features(df)
     try:
-        if "Net Liquidity" not in df.columns:
+        if "Net Liquidity" not in fc.columns:
             raise ValueError("Net Liquidity column missing")
 
-        nl = df["Net Liquidity"].dropna()
+        nl = fc.series("Net Liquidity")
         if len(nl) < 25:
             raise ValueError("Insufficient data for 20DMA")
 
-        ma20 = nl.rolling(window=20).mean().dropna()
+        ma20 = fc.rolling_mean("Net Liquidity", 20).dropna()
         latest_nl = nl.iloc[-1]
         latest_ma20 = ma20.iloc[-1]
         deviation_pct = ((latest_nl - latest_ma20) / latest_ma20) * 100
@@ -71,13 +74,14 @@ def score_net_liquidity_trend(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorR
     )
 
 
-def score_tga_trend(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
+def score_tga_trend(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> IndicatorResult:
     """L1-2: Score TGA balance change (direction inverted: TGA down = bullish)."""
+    fc = as_features(df)
     try:
-        if "TGA" not in df.columns:
+        if "TGA" not in fc.columns:
             raise ValueError("TGA column missing")
 
-        tga = df["TGA"].dropna()
+        tga = fc.series("TGA")
         lookback = cfg.tga.lookback_days
         if len(tga) < lookback:
             raise ValueError("Insufficient TGA data")
@@ -108,13 +112,14 @@ def score_tga_trend(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
     )
 
 
-def score_rrp_buffer(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
+def score_rrp_buffer(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> IndicatorResult:
     """L1-3: Score RRP absolute level (high = buffer available = bullish)."""
+    fc = as_features(df)
     try:
-        if "RRP" not in df.columns:
+        if "RRP" not in fc.columns:
             raise ValueError("RRP column missing")
 
-        current = df["RRP"].dropna().iloc[-1]
+        current = fc.series("RRP").iloc[-1]
         high = cfg.rrp.high_threshold_billions
         low = cfg.rrp.low_threshold_billions
 
@@ -139,13 +144,14 @@ def score_rrp_buffer(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
     )
 
 
-def score_policy_rate_direction(df: pd.DataFrame, cfg: Layer1Config) -> IndicatorResult:
+def score_policy_rate_direction(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> IndicatorResult:
     """L1-4: Score policy rate change over lookback period."""
+    fc = as_features(df)
     try:
-        if "SOFR" not in df.columns:
+        if "SOFR" not in fc.columns:
             raise ValueError("SOFR column missing")
 
-        sofr = df["SOFR"].dropna()
+        sofr = fc.series("SOFR")
         lookback = cfg.policy_rate.lookback_days
         if len(sofr) < lookback:
             raise ValueError("Insufficient SOFR data")
@@ -178,13 +184,14 @@ def score_policy_rate_direction(df: pd.DataFrame, cfg: Layer1Config) -> Indicato
     )
 
 
-def compute_layer1(df: pd.DataFrame, cfg: Layer1Config) -> Layer1Result:
+def compute_layer1(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> Layer1Result:
     """Run all L1 indicators and compute regime + ceiling."""
+    fc = as_features(df)
     indicators = [
-        score_net_liquidity_trend(df, cfg),
-        score_tga_trend(df, cfg),
-        score_rrp_buffer(df, cfg),
-        score_policy_rate_direction(df, cfg),
+        score_net_liquidity_trend(fc, cfg),
+        score_tga_trend(fc, cfg),
+        score_rrp_buffer(fc, cfg),
+        score_policy_rate_direction(fc, cfg),
     ]
 
     composite = sum(i.score for i in indicators)
@@ -1,6 +1,7 @@
 """Layer 2: Market Regime Scoring.
 
 Evaluates 8 market indicators with configurable weights and outputs a Utilization Rate range.
+Scoring functions take a DataFrame or a shared FeatureCache (see features.py).
 """
 
 from __future__ import annotations
@@ -11,6 +12,7 @@ import numpy as np
 import pandas as pd
 
 from .config import Layer2Config, L2IndicatorConfig
+from .features import FeatureCache, as_features
 from .models import IndicatorResult, L2Regime, Layer2Result
 
 logger = logging.getLogger(__name__)
@@ -28,16 +30,17 @@ def _get_cfg(cfg: Layer2Config, key: str) -> L2IndicatorConfig:
     return cfg.indicators.get(key, L2IndicatorConfig())
 
 
-def score_spx_vs_50dma(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_spx_vs_50dma(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-1: SPX position relative to its 50DMA."""
     ic = _get_cfg(cfg, "spx_vs_50dma")
+    fc = as_features(df)
     try:
-        if "SPX" not in df.columns:
+        if "SPX" not in fc.columns:
             raise ValueError("SPX column missing")
-        spx = df["SPX"].dropna()
+        spx = fc.series("SPX")
         if len(spx) < 50:
             raise ValueError("Insufficient SPX data")
-        ma50 = spx.rolling(50).mean().iloc[-1]
+        ma50 = fc.rolling_mean("SPX", 50).iloc[-1]
         current = spx.iloc[-1]
         pct_diff = ((current - ma50) / ma50) * 100
         above = ic.params.get("above_threshold_pct", 1.0)
@@ -74,11 +77,12 @@ def score_market_breadth(s5fi: float, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("Market Breadth (S5FI)", s5fi, f"{s5fi:.0f}%", hit, score, ic.weight)
 
 
-def score_vix_level(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_vix_level(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-3: Absolute VIX level."""
     ic = _get_cfg(cfg, "vix_level")
+    fc = as_features(df)
     try:
-        current = df["VIX"].dropna().iloc[-1]
+        current = fc.series("VIX").iloc[-1]
         low = ic.params.get("low_threshold", 18.0)
         high = ic.params.get("high_threshold", 25.0)
 
@@ -97,11 +101,12 @@ def score_vix_level(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("VIX Level", current, display, hit, score, ic.weight)
 
 
-def score_vix_trend(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_vix_trend(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-4: VIX 10-day change rate."""
     ic = _get_cfg(cfg, "vix_trend")
+    fc = as_features(df)
     try:
-        vix = df["VIX"].dropna()
+        vix = fc.series("VIX")
         lookback = int(ic.params.get("lookback_days", 10))
         if len(vix) < lookback + 1:
             raise ValueError("Insufficient VIX data")
@@ -127,11 +132,12 @@ def score_vix_trend(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("VIX Trend (10D)", current, display, hit, score, ic.weight)
 
 
-def score_move_index(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_move_index(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-5: MOVE Index level."""
     ic = _get_cfg(cfg, "move_index")
+    fc = as_features(df)
     try:
-        current = df["MOVE"].dropna().iloc[-1]
+        current = fc.series("MOVE").iloc[-1]
         low = ic.params.get("low_threshold", 85.0)
         high = ic.params.get("high_threshold", 110.0)
 
@@ -150,16 +156,17 @@ def score_move_index(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("MOVE Index", current, display, hit, score, ic.weight)
 
 
-def score_credit_health(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_credit_health(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-6: JNK 20DMA 5-day slope direction."""
     ic = _get_cfg(cfg, "credit_health")
+    fc = as_features(df)
     try:
-        jnk = df["JNK"].dropna()
+        jnk = fc.series("JNK")
         slope_days = int(ic.params.get("jnk_20dma_slope_days", 5))
         if len(jnk) < 25:
             raise ValueError("Insufficient JNK data")
 
-        ma20 = jnk.rolling(20).mean().dropna()
+        ma20 = fc.rolling_mean("JNK", 20).dropna()
         if len(ma20) < slope_days + 1:
             raise ValueError("Insufficient JNK 20DMA data")
 
@@ -181,20 +188,19 @@ def score_credit_health(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("Credit Health (JNK)", current, display, hit, score, ic.weight)
 
 
-def score_gold_spx_correlation(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_gold_spx_correlation(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-7: 30-day rolling correlation between Gold and SPX."""
     ic = _get_cfg(cfg, "gold_spx_correlation")
+    fc = as_features(df)
     try:
         lookback = int(ic.params.get("lookback_days", 30))
-        gold = df["GOLD"].dropna()
-        spx_col = "SPX" if "SPX" in df.columns else "SPY"
-        spx = df[spx_col].dropna()
+        spx_col = "SPX" if "SPX" in fc.columns else "SPY"
 
-        aligned = pd.concat([gold, spx], axis=1).dropna()
-        if len(aligned) < lookback:
+        corr_series = fc.rolling_corr("GOLD", spx_col, lookback)
+        if len(corr_series) < lookback:
             raise ValueError("Insufficient data for correlation")
 
-        corr = aligned.iloc[-lookback:].corr().iloc[0, 1]
+        corr = corr_series.iloc[-1]
         normal_thr = ic.params.get("normal_threshold", 0.2)
         high_thr = ic.params.get("high_threshold", 0.4)
 
@@ -213,11 +219,12 @@ def score_gold_spx_correlation(df: pd.DataFrame, cfg: Layer2Config) -> Indicator
     return IndicatorResult("Gold-SPX Correlation", corr, display, hit, score, ic.weight)
 
 
-def score_dxy_trend(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
+def score_dxy_trend(df: pd.DataFrame | FeatureCache, cfg: Layer2Config) -> IndicatorResult:
     """L2-8: DXY monthly change with non-linear scoring (extreme either way = -1)."""
     ic = _get_cfg(cfg, "dxy_trend")
+    fc = as_features(df)
     try:
-        dxy = df["DXY"].dropna()
+        dxy = fc.series("DXY")
         lookback = int(ic.params.get("lookback_days", 21))
         if len(dxy) < lookback + 1:
             raise ValueError("Insufficient DXY data")
@@ -247,17 +254,18 @@ def score_dxy_trend(df: pd.DataFrame, cfg: Layer2Config) -> IndicatorResult:
     return IndicatorResult("DXY Trend", current, display, hit, score, ic.weight)
 
 
-def compute_layer2(df: pd.DataFrame, s5fi: float, cfg: Layer2Config) -> Layer2Result:
+def compute_layer2(df: pd.DataFrame | FeatureCache, s5fi: float, cfg: Layer2Config) -> Layer2Result:
     """Run all L2 indicators and compute regime + utilization range."""
+    fc = as_features(df)
     indicators = [
-        score_spx_vs_50dma(df, cfg),
+        score_spx_vs_50dma(fc, cfg),
         score_market_breadth(s5fi, cfg),
-        score_vix_level(df, cfg),
-        score_vix_trend(df, cfg),
-        score_move_index(df, cfg),
-        score_credit_health(df, cfg),
-        score_gold_spx_correlation(df, cfg),
-        score_dxy_trend(df, cfg),
+        score_vix_level(fc, cfg),
+        score_vix_trend(fc, cfg),
+        score_move_index(fc, cfg),
+        score_credit_health(fc, cfg),
+        score_gold_spx_correlation(fc, cfg),
+        score_dxy_trend(fc, cfg),
     ]
 
     weighted_composite = sum(i.weighted_score for i in indicators)
@@ -1,290 +1,135 @@
 """Layer 3: Instant Risk Sentinels.
 
 Binary circuit breakers with asymmetric trigger/reset logic and state persistence.
+The trigger/reset conditions are defined here; the state machine and the state
+table are the shared SentinelBank (src/analysis/sentinels.py).
 """
 
 from __future__ import annotations
 
-import json
 import logging
-from datetime import datetime, timezone
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+from ..analysis.sentinels import (
+    STATE_TABLE,
+    STATUS_VALUES,
+    SentinelBank,
+    load_sentinel_bank,
+    save_sentinel_bank,
+)
 from .config import Layer3Config
+from .features import FeatureCache, as_features
 from .models import Layer3Result, SentinelState, SentinelStatus
 
 logger = logging.getLogger(__name__)
 
-_STATE_FILE = Path("data_cache/sentinel_state.json")
+_STATE_FILE = STATE_TABLE
+_LEGACY_STATE_FILE = Path("data_cache/sentinel_state.json")
+_STACK = "us"
 
+# Column order of the sentinel bank (and of Layer3Result.sentinels).
+SENTINEL_IDS: tuple[str, ...] = ("vix_spike", "credit_break", "move_spike", "trend_break")
+SENTINEL_NAMES: tuple[str, ...] = ("VIX Spike", "Credit Break", "Bond Vol Spike", "Trend Break")
 
-def _load_state(path: Path | None = None) -> dict[str, dict]:
-    """Load sentinel state from disk. Returns empty dict on any error."""
-    path = path or _STATE_FILE
-    try:
-        if path.exists():
-            with open(path) as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                return data
-    except Exception:
-        logger.warning("Sentinel state file corrupted, resetting to CLEAR", exc_info=True)
-    return {}
+_STATUS = {s.value: s for s in SentinelStatus}
 
 
-def _save_state(sentinels: list[SentinelState], path: Path | None = None) -> None:
+def _load_state(path: Path | None = None) -> SentinelBank:
+    """Load the US rows of the sentinel state table. All CLEAR on any error."""
     path = path or _STATE_FILE
-    path.parent.mkdir(parents=True, exist_ok=True)
-    data = {}
-    for s in sentinels:
-        data[s.sentinel_id] = {
-            "status": s.status.value,
-            "trigger_timestamp": s.trigger_timestamp,
-            "cooling_days": s.cooling_days,
-        }
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-
-
-def _restore_sentinel(sentinel_id: str, saved: dict[str, dict]) -> tuple[SentinelStatus, str | None, int]:
-    """Restore a single sentinel's persistent state."""
-    entry = saved.get(sentinel_id, {})
-    try:
-        status = SentinelStatus(entry.get("status", "CLEAR"))
-    except ValueError:
-        status = SentinelStatus.CLEAR
-    return (
-        status,
-        entry.get("trigger_timestamp"),
-        int(entry.get("cooling_days", 0)),
-    )
+    legacy = _LEGACY_STATE_FILE if path == STATE_TABLE else None
+    return load_sentinel_bank(_STACK, SENTINEL_IDS, path, legacy_path=legacy)
+
+
+def _save_state(bank: SentinelBank, path: Path | None = None) -> None:
+    save_sentinel_bank(_STACK, bank, path or _STATE_FILE)
 
 
 # ---------------------------------------------------------------------------
-# Individual sentinel evaluation
+# Sentinel conditions (shared by compute_layer3 and the historical replay)
+#
+# Each returns (trigger, reset) for one observation or for whole columns of
+# them; the three-state transition itself lives in SentinelBank.
 # ---------------------------------------------------------------------------
 
-def _eval_vix_spike(df: pd.DataFrame, cfg: Layer3Config, saved: dict) -> SentinelState:
-    sid = "vix_spike"
+def reset_days(cfg: Layer3Config) -> np.ndarray:
+    """Consecutive reset days that clear each sentinel, in SENTINEL_IDS order."""
+    return np.array([
+        cfg.vix_spike.reset_consecutive_days,
+        cfg.credit_break.reset_positive_days or 5,
+        cfg.move_spike.reset_consecutive_days,
+        cfg.trend_break.reset_consecutive_days,
+    ])
+
+
+def forced_ceilings(cfg: Layer3Config) -> tuple[int | None, ...]:
+    """Forced ceiling per sentinel while not CLEAR; MOVE spike is a freeze, not a ceiling."""
+    return (cfg.vix_spike.forced_ceiling_pct, cfg.credit_break.forced_ceiling_pct,
+            None, cfg.trend_break.forced_ceiling_pct)
+
+
+def vix_conditions(vix, cfg: Layer3Config):
+    """Trigger above the trigger level; a reset day closes below reset_below."""
     sc = cfg.vix_spike
-    status, trigger_ts, cooling_days = _restore_sentinel(sid, saved)
-    forced = sc.forced_ceiling_pct
+    return vix > (sc.trigger_level or 35.0), vix < (sc.reset_below or 25.0)
 
-    try:
-        vix = df["VIX"].dropna().iloc[-1]
-    except Exception:
-        vix = None
-
-    if vix is None:
-        return SentinelState(sid, "VIX Spike", status, forced if status != SentinelStatus.CLEAR else None,
-                             trigger_ts, cooling_days, vix, "N/A")
-
-    trigger_level = sc.trigger_level or 35.0
-    reset_below = sc.reset_below or 25.0
-    reset_days = sc.reset_consecutive_days
-
-    if status == SentinelStatus.CLEAR:
-        if vix > trigger_level:
-            status = SentinelStatus.TRIGGERED
-            trigger_ts = datetime.now(timezone.utc).isoformat()
-            cooling_days = 0
-    elif status in (SentinelStatus.TRIGGERED, SentinelStatus.COOLING):
-        if vix <= trigger_level:
-            status = SentinelStatus.COOLING
-        else:
-            status = SentinelStatus.TRIGGERED
-            cooling_days = 0
-
-        if vix < reset_below:
-            cooling_days += 1
-            if cooling_days >= reset_days:
-                status = SentinelStatus.CLEAR
-                trigger_ts = None
-                cooling_days = 0
-        else:
-            cooling_days = 0
-
-    active_ceiling = forced if status != SentinelStatus.CLEAR else None
-    display = f"VIX {vix:.1f}" + (f" (cooling {cooling_days}/{reset_days}d)" if status == SentinelStatus.COOLING else "")
-    return SentinelState(sid, "VIX Spike", status, active_ceiling, trigger_ts, cooling_days, vix, display)
-
-
-def _eval_credit_break(df: pd.DataFrame, cfg: Layer3Config, saved: dict) -> SentinelState:
-    sid = "credit_break"
-    sc = cfg.credit_break
-    status, trigger_ts, cooling_days = _restore_sentinel(sid, saved)
-    forced = sc.forced_ceiling_pct
 
-    try:
-        jnk_ret, hyg_ret = None, None
-        if "JNK" in df.columns:
-            jnk = df["JNK"].dropna()
-            if len(jnk) >= 2:
-                jnk_ret = (jnk.iloc[-1] / jnk.iloc[-2] - 1) * 100
-        if "HYG" in df.columns:
-            hyg = df["HYG"].dropna()
-            if len(hyg) >= 2:
-                hyg_ret = (hyg.iloc[-1] / hyg.iloc[-2] - 1) * 100
-    except Exception:
-        jnk_ret, hyg_ret = None, None
-
-    trigger_thr = sc.trigger_return_pct or -1.5
-    reset_positive = sc.reset_positive_days or 5
-
-    worst_ret = None
-    if jnk_ret is not None and hyg_ret is not None:
-        worst_ret = min(jnk_ret, hyg_ret)
-    elif jnk_ret is not None:
-        worst_ret = jnk_ret
-    elif hyg_ret is not None:
-        worst_ret = hyg_ret
-
-    if worst_ret is None:
-        return SentinelState(sid, "Credit Break", status, forced if status != SentinelStatus.CLEAR else None,
-                             trigger_ts, cooling_days, None, "N/A")
-
-    if status == SentinelStatus.CLEAR:
-        if worst_ret < trigger_thr:
-            status = SentinelStatus.TRIGGERED
-            trigger_ts = datetime.now(timezone.utc).isoformat()
-            cooling_days = 0
-    elif status in (SentinelStatus.TRIGGERED, SentinelStatus.COOLING):
-        if worst_ret < trigger_thr:
-            status = SentinelStatus.TRIGGERED
-            cooling_days = 0
-        else:
-            status = SentinelStatus.COOLING
-
-        # Reset requires both JNK and HYG positive for consecutive days
-        both_positive = True
-        if jnk_ret is not None and jnk_ret <= 0:
-            both_positive = False
-        if hyg_ret is not None and hyg_ret <= 0:
-            both_positive = False
-
-        if both_positive:
-            cooling_days += 1
-            if cooling_days >= reset_positive:
-                status = SentinelStatus.CLEAR
-                trigger_ts = None
-                cooling_days = 0
-        else:
-            cooling_days = 0
-
-    active_ceiling = forced if status != SentinelStatus.CLEAR else None
-    display = f"JNK {jnk_ret:+.2f}%" if jnk_ret is not None else "N/A"
-    if status == SentinelStatus.COOLING:
-        display += f" (cooling {cooling_days}/{reset_positive}d)"
-    return SentinelState(sid, "Credit Break", status, active_ceiling, trigger_ts, cooling_days, worst_ret, display)
-
-
-def _eval_move_spike(df: pd.DataFrame, cfg: Layer3Config, saved: dict) -> SentinelState:
-    sid = "move_spike"
+def move_conditions(move, cfg: Layer3Config):
     sc = cfg.move_spike
-    status, trigger_ts, cooling_days = _restore_sentinel(sid, saved)
+    return move > (sc.trigger_level or 130.0), move < (sc.reset_below or 110.0)
 
+
+def credit_conditions(worst_ret, jnk_up, hyg_up, cfg: Layer3Config):
+    """Trigger on a daily drop below the threshold; a reset day needs JNK and HYG both up."""
+    return worst_ret < (cfg.credit_break.trigger_return_pct or -1.5), jnk_up & hyg_up
+
+
+def trend_conditions(spx, spx_ma50, vix, s5fi, cfg: Layer3Config):
+    """Trigger: SPX below 50DMA with VIX elevated. Reset: SPX > 50DMA, VIX and breadth healthy."""
+    sc = cfg.trend_break
+    breaking = (spx < spx_ma50) & (vix > (sc.trigger_vix or 25.0))
+    healthy = (spx > spx_ma50) & (vix < (sc.reset_vix_below or 22.0)) & (s5fi > (sc.reset_breadth_above or 50.0))
+    return breaking, healthy
+
+
+# ---------------------------------------------------------------------------
+# Latest readings
+# ---------------------------------------------------------------------------
+
+def _latest(fc: FeatureCache, name: str) -> float | None:
     try:
-        move = df["MOVE"].dropna().iloc[-1]
+        return float(fc.series(name).iloc[-1])
     except Exception:
-        move = None
-
-    if move is None:
-        return SentinelState(sid, "Bond Vol Spike", status, None, trigger_ts, cooling_days, None, "N/A")
-
-    trigger_level = sc.trigger_level or 130.0
-    reset_below = sc.reset_below or 110.0
-    reset_days = sc.reset_consecutive_days
-
-    if status == SentinelStatus.CLEAR:
-        if move > trigger_level:
-            status = SentinelStatus.TRIGGERED
-            trigger_ts = datetime.now(timezone.utc).isoformat()
-            cooling_days = 0
-    elif status in (SentinelStatus.TRIGGERED, SentinelStatus.COOLING):
-        if move <= trigger_level:
-            status = SentinelStatus.COOLING
-        else:
-            status = SentinelStatus.TRIGGERED
-            cooling_days = 0
-
-        if move < reset_below:
-            cooling_days += 1
-            if cooling_days >= reset_days:
-                status = SentinelStatus.CLEAR
-                trigger_ts = None
-                cooling_days = 0
-        else:
-            cooling_days = 0
-
-    # MOVE spike has no forced_ceiling; it's a freeze (no new positions)
-    active_ceiling = None  # always None for MOVE
-    display = f"MOVE {move:.0f}"
-    if status == SentinelStatus.COOLING:
-        display += f" (cooling {cooling_days}/{reset_days}d)"
-    return SentinelState(sid, "Bond Vol Spike", status, active_ceiling, trigger_ts, cooling_days, move, display)
-
-
-def _eval_trend_break(df: pd.DataFrame, cfg: Layer3Config, saved: dict, s5fi: float = 50.0) -> SentinelState:
-    sid = "trend_break"
-    sc = cfg.trend_break
-    status, trigger_ts, cooling_days = _restore_sentinel(sid, saved)
-    forced = sc.forced_ceiling_pct
+        return None
+
+
+def _daily_return(fc: FeatureCache, name: str) -> float | None:
+    if name not in fc.columns:
+        return None
+    returns = fc.change_pct(name, 1)
+    if len(returns) < 2:
+        return None
+    return float(returns.iloc[-1])
 
+
+def _spx_trend(fc: FeatureCache) -> tuple[float, float, float] | None:
+    """(SPX, SPX 50DMA, VIX) on the latest bar, None without 50 bars of history."""
     try:
-        spx_col = "SPX" if "SPX" in df.columns else "SPY"
-        spx = df[spx_col].dropna()
-        vix_s = df["VIX"].dropna()
+        spx_col = "SPX" if "SPX" in fc.columns else "SPY"
+        spx = fc.series(spx_col)
+        vix = fc.series("VIX")
         if len(spx) < 50:
             raise ValueError("Insufficient SPX data")
-        spx_ma50 = spx.rolling(50).mean().iloc[-1]
-        spx_latest = spx.iloc[-1]
-        vix_latest = vix_s.iloc[-1]
+        return float(spx.iloc[-1]), float(fc.rolling_mean(spx_col, 50).iloc[-1]), float(vix.iloc[-1])
     except Exception:
-        return SentinelState(sid, "Trend Break", status, forced if status != SentinelStatus.CLEAR else None,
-                             trigger_ts, cooling_days, None, "N/A")
-
-    trigger_vix = sc.trigger_vix or 25.0
-    reset_vix = sc.reset_vix_below or 22.0
-    reset_breadth = sc.reset_breadth_above or 50.0
-    reset_days = sc.reset_consecutive_days
-
-    below_ma50 = spx_latest < spx_ma50
-
-    if status == SentinelStatus.CLEAR:
-        if below_ma50 and vix_latest > trigger_vix:
-            status = SentinelStatus.TRIGGERED
-            trigger_ts = datetime.now(timezone.utc).isoformat()
-            cooling_days = 0
-    elif status in (SentinelStatus.TRIGGERED, SentinelStatus.COOLING):
-        if below_ma50 and vix_latest > trigger_vix:
-            status = SentinelStatus.TRIGGERED
-            cooling_days = 0
-        else:
-            status = SentinelStatus.COOLING
-
-        # Reset: SPX > 50DMA AND VIX < reset_vix AND S5FI > reset_breadth, all for N days
-        all_reset = (spx_latest > spx_ma50) and (vix_latest < reset_vix) and (s5fi > reset_breadth)
-        if all_reset:
-            cooling_days += 1
-            if cooling_days >= reset_days:
-                status = SentinelStatus.CLEAR
-                trigger_ts = None
-                cooling_days = 0
-        else:
-            cooling_days = 0
-
-    active_ceiling = forced if status != SentinelStatus.CLEAR else None
-    display = f"SPX {'below' if below_ma50 else 'above'} 50DMA, VIX {vix_latest:.1f}"
-    if status == SentinelStatus.COOLING:
-        display += f" (cooling {cooling_days}/{reset_days}d)"
-    return SentinelState(sid, "Trend Break", status, active_ceiling, trigger_ts, cooling_days, vix_latest, display)
+        return None
 
 
 def compute_layer3(
-    df: pd.DataFrame,
+    df: pd.DataFrame | FeatureCache,
     cfg: Layer3Config,
     s5fi: float = 50.0,
     state_path: Path | None = None,
@@ -292,14 +137,47 @@ def compute_layer3(
     """Evaluate all sentinels, persist state, and compute override ceiling."""
     saved = _load_state(state_path)
 
-    sentinels = [
-        _eval_vix_spike(df, cfg, saved),
-        _eval_credit_break(df, cfg, saved),
-        _eval_move_spike(df, cfg, saved),
-        _eval_trend_break(df, cfg, saved, s5fi),
+    fc = as_features(df)
+    vix = _latest(fc, "VIX")
+    move = _latest(fc, "MOVE")
+    jnk_ret, hyg_ret = _daily_return(fc, "JNK"), _daily_return(fc, "HYG")
+    rets = [r for r in (jnk_ret, hyg_ret) if r is not None]
+    worst_ret = min(rets) if rets else None
+    trend = _spx_trend(fc)
+
+    conditions = [
+        vix_conditions(vix, cfg) if vix is not None else None,
+        credit_conditions(worst_ret, jnk_ret is None or jnk_ret > 0, hyg_ret is None or hyg_ret > 0, cfg)
+        if worst_ret is not None else None,
+        move_conditions(move, cfg) if move is not None else None,
+        trend_conditions(*trend, s5fi, cfg) if trend is not None else None,
     ]
-
-    _save_state(sentinels, state_path)
+    valid = np.array([c is not None for c in conditions])
+    trigger = np.array([bool(c[0]) if c else False for c in conditions])
+    reset = np.array([bool(c[1]) if c else False for c in conditions])
+    days = reset_days(cfg)
+    bank = saved.step(trigger, reset, valid, days)
+    _save_state(bank, state_path)
+
+    displays = [
+        f"VIX {vix:.1f}" if vix is not None else "N/A",
+        f"JNK {jnk_ret:+.2f}%" if jnk_ret is not None else "N/A",
+        f"MOVE {move:.0f}" if move is not None else "N/A",
+        f"SPX {'below' if trend[0] < trend[1] else 'above'} 50DMA, VIX {trend[2]:.1f}" if trend else "N/A",
+    ]
+    values = [vix, worst_ret, move, trend[2] if trend else None]
+
+    sentinels = []
+    for j, (sid, name, forced) in enumerate(zip(SENTINEL_IDS, SENTINEL_NAMES, forced_ceilings(cfg))):
+        status = _STATUS[STATUS_VALUES[int(bank.status[j])]]
+        cooling_days = int(bank.counter[j])
+        display = displays[j]
+        if valid[j] and status == SentinelStatus.COOLING:
+            display += f" (cooling {cooling_days}/{days[j]}d)"
+        sentinels.append(SentinelState(
+            sid, name, status, forced if status != SentinelStatus.CLEAR else None,
+            bank.trigger_ts[j], cooling_days, values[j], display,
+        ))
 
     any_triggered = any(s.status != SentinelStatus.CLEAR for s in sentinels)
 
@@ -0,0 +1,473 @@
+"""Historical regime replay.
+
+Scores L1 → L2 → L3 → Envelope for every row of a market DataFrame in one
+pass, so the regime history can be rebuilt densely instead of growing one row
+per dashboard visit.
+
+Row t of ``replay_regime(df, ...)`` is what ``RegimeEngine.run`` would have
+produced on ``df.iloc[:t + 1]``. Each ``score_*`` function is re-expressed
+over whole columns: an indicator reads the last valid value at or before t
+(as ``.dropna().iloc[-1]`` does), lookbacks and rolling means run over the
+NaN-dropped series, and a row with too little history scores 0 exactly where
+the scalar version falls into its "Data unavailable" branch. Only the L3
+sentinels carry state; their trigger/reset conditions are the ones
+``compute_layer3`` uses, evaluated over whole columns, and the shared
+SentinelBank advances all four from all CLEAR through every row in one pass.
+
+Every ``replay_*`` function also accepts a FeatureCache: the config-independent
+intermediates (NaN-compacted columns, fixed-window means, lagged changes,
+weekly net-liquidity closes) are memoized on it, so replaying many configs over
+one history (src/regime/sensitivity.py) computes them once.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from ..analysis.rolling import rolling_corr
+from ..analysis.sentinels import CLEAR, SentinelBank
+from ..data.breadth import compute_s5fi_series
+from .config import Layer1Config, Layer2Config, Layer3Config, RegimeConfig
+from .features import FeatureCache, as_features
+from .layer2 import _get_cfg
+from .layer3 import (
+    SENTINEL_IDS,
+    SENTINEL_NAMES,
+    credit_conditions,
+    forced_ceilings,
+    move_conditions,
+    reset_days,
+    trend_conditions,
+    vix_conditions,
+)
+from .models import EnvelopeMode, L1Regime, L2Regime
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Column helpers
+# ---------------------------------------------------------------------------
+
+def _column(fc: FeatureCache, name: str) -> np.ndarray | None:
+    if name not in fc.columns:
+        return None
+    return fc.cached((name, "values", None),
+                     lambda: pd.to_numeric(fc.df[name], errors="coerce").to_numpy(dtype=float))
+
+
+def _compact(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(NaN-dropped values, per-row position of the last valid value; -1 before the first)."""
+    valid = ~np.isnan(values)
+    return values[valid], np.cumsum(valid) - 1
+
+
+def _per_row(compact_values: np.ndarray, pos: np.ndarray, fill=np.nan) -> np.ndarray:
+    """Spread values computed on the NaN-dropped series back onto every row."""
+    out = np.full(len(pos), fill, dtype=np.asarray(compact_values).dtype if len(compact_values) else float)
+    ok = pos >= 0
+    out[ok] = compact_values[pos[ok]]
+    return out
+
+
+def _compacted(fc: FeatureCache, name: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """Memoized ``_compact`` of a column; None when the column is missing."""
+    col = _column(fc, name)
+    if col is None:
+        return None
+    return fc.cached((name, "compact", None), lambda: _compact(col))
+
+
+def _last_valid(fc: FeatureCache, name: str) -> np.ndarray:
+    """Per row, the column's last valid value at or before it (NaN before the first / if missing)."""
+    def compute():
+        compacted = _compacted(fc, name)
+        return np.full(len(fc.df), np.nan) if compacted is None else _per_row(*compacted)
+    return fc.cached((name, "last_valid", None), compute)
+
+
+def _compact_feature(fc: FeatureCache, name: str, op: str, window: int) -> np.ndarray:
+    """Rolling mean ("mean") or lagged % change ("lag_change") over the NaN-dropped column."""
+    def compute():
+        values = _compacted(fc, name)[0]
+        return _rolling_mean(values, window) if op == "mean" else _lag_change_pct(values, window)
+    return fc.cached((name, f"compact_{op}", window), compute)
+
+
+def _lag_change_pct(series: np.ndarray, lag: int) -> np.ndarray:
+    """((x[i] - x[i-lag]) / x[i-lag]) * 100, 0 where the base is 0, NaN without history."""
+    out = np.full(len(series), np.nan)
+    if lag < len(series):
+        current, past = series[lag:], series[:-lag] if lag else series
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[lag:] = np.where(past != 0, ((current - past) / past) * 100, 0.0)
+    return out
+
+
+def _band_score(value: np.ndarray, bullish: np.ndarray, bearish: np.ndarray) -> np.ndarray:
+    """+1 where bullish, -1 where bearish (bullish wins), 0 otherwise or without data."""
+    return np.where(bullish, 1, np.where(bearish, -1, 0)) * ~np.isnan(value)
+
+
+# ---------------------------------------------------------------------------
+# Layer 1
+# ---------------------------------------------------------------------------
+
+def _net_liquidity_weekly(fc: FeatureCache) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(valid-row positions, 20-day mean, W-FRI closes of the mean, weekly closes before each valid row)."""
+    def compute():
+        col = _column(fc, "Net Liquidity")
+        valid = ~np.isnan(col)
+        nl, pos = _compacted(fc, "Net Liquidity")
+        ma20 = pd.Series(nl, index=fc.df.index[valid]).rolling(window=20).mean()
+        weekly = ma20.resample("W-FRI").last().dropna()
+        week_of = ma20.index.to_period("W-FRI").end_time.normalize()
+        # weekly closes strictly before each row's own (still open) week
+        n_prior = np.searchsorted(weekly.index.values, week_of.values, side="left")
+        return pos, ma20.to_numpy(), weekly.to_numpy(), n_prior
+    return fc.cached(("Net Liquidity", "weekly", 20), compute)
+
+
+def _l1_net_liquidity(fc: FeatureCache, cfg: Layer1Config) -> np.ndarray:
+    compacted = _compacted(fc, "Net Liquidity")
+    if compacted is None or len(compacted[0]) < 25:
+        return np.zeros(len(fc.df), dtype=int)
+    nl = compacted[0]
+    pos, ma20, weekly_values, n_prior = _net_liquidity_weekly(fc)
+
+    n_weeks = cfg.net_liquidity.lookback_weeks
+    rising_thr = cfg.net_liquidity.rising_threshold_pct_per_week
+    falling_thr = cfg.net_liquidity.falling_threshold_pct_per_week
+
+    prior_changes = np.full(len(weekly_values), np.nan)
+    prior_changes[1:] = (weekly_values[1:] / weekly_values[:-1] - 1) * 100
+    rising_count = np.concatenate([[0], np.cumsum(prior_changes > rising_thr)])
+    falling_count = np.concatenate([[0], np.cumsum(prior_changes < falling_thr)])
+
+    scores = np.zeros(len(nl), dtype=int)
+    ok = (np.arange(len(nl)) >= 24) & (n_prior >= n_weeks)
+    if n_weeks <= 0:
+        scores[ok] = 1  # all() over no weekly changes
+        return _per_row(scores, pos, 0).astype(int)
+
+    j = n_prior[ok]
+    last_change = (ma20[ok] / weekly_values[j - 1] - 1) * 100
+    first = j - n_weeks + 1
+    all_rising = (rising_count[j] - rising_count[first] == n_weeks - 1) & (last_change > rising_thr)
+    all_falling = (falling_count[j] - falling_count[first] == n_weeks - 1) & (last_change < falling_thr)
+    scores[ok] = np.where(all_rising, 1, np.where(all_falling, -1, 0))
+    return _per_row(scores, pos, 0).astype(int)
+
+
+def _l1_lagged(fc: FeatureCache, name: str, lookback: int) -> np.ndarray:
+    """Per-row (x[-1] - x[-lookback]) change of a column's valid values; NaN without enough history."""
+    compacted = _compacted(fc, name)
+    if compacted is None or lookback < 1:
+        return np.full(len(fc.df), np.nan)
+    return _per_row(_compact_feature(fc, name, "lag_change", lookback - 1), compacted[1])
+
+
+def replay_layer1(df: pd.DataFrame | FeatureCache, cfg: Layer1Config) -> pd.DataFrame:
+    """Per-row L1 composite, regime and ceiling."""
+    fc = as_features(df)
+    df = fc.df
+    tga_change = _l1_lagged(fc, "TGA", cfg.tga.lookback_days)
+    tga = _band_score(tga_change, tga_change < cfg.tga.falling_threshold_pct,
+                      tga_change > cfg.tga.rising_threshold_pct)
+
+    rrp = _last_valid(fc, "RRP")
+    rrp_score = _band_score(rrp, rrp > cfg.rrp.high_threshold_billions, rrp < cfg.rrp.low_threshold_billions)
+
+    compacted = _compacted(fc, "SOFR")
+    lookback = cfg.policy_rate.lookback_days
+    change_bp = np.full(len(df), np.nan)
+    if compacted is not None and lookback >= 1:
+        sofr, pos = compacted
+        diff = np.full(len(sofr), np.nan)
+        if lookback - 1 < len(sofr):
+            diff[lookback - 1:] = (sofr[lookback - 1:] - sofr[:len(sofr) - lookback + 1]) * 100
+        change_bp = _per_row(diff, pos)
+    policy = _band_score(change_bp, change_bp <= -cfg.policy_rate.cut_threshold_bp,
+                         change_bp >= cfg.policy_rate.hike_threshold_bp)
+
+    composite = _l1_net_liquidity(fc, cfg) + tga + rrp_score + policy
+
+    cm = cfg.ceiling_map
+    regime = np.select(
+        [composite >= 3, composite >= 1, composite >= -1],
+        [L1Regime.EXPANSIONARY.value, L1Regime.NEUTRAL.value, L1Regime.CONTRACTING.value],
+        L1Regime.SEVERE_CONTRACTION.value,
+    )
+    ceiling = np.select(
+        [composite >= 3, composite >= 1, composite >= -1],
+        [cm.expansionary, cm.neutral, cm.contracting],
+        cm.severe,
+    )
+    return pd.DataFrame(
+        {"l1_composite": composite, "l1_regime": regime, "l1_ceiling": ceiling},
+        index=df.index,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Layer 2
+# ---------------------------------------------------------------------------
+
+def _rolling_mean(series: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(series).rolling(window).mean().to_numpy()
+
+
+def _l2_spx_vs_50dma(fc: FeatureCache, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "spx_vs_50dma")
+    compacted = _compacted(fc, "SPX")
+    if compacted is None:
+        return np.zeros(len(fc.df))
+    spx, pos = compacted
+    ma50 = _compact_feature(fc, "SPX", "mean", 50)
+    pct_diff = _per_row(((spx - ma50) / ma50) * 100, pos)
+    return _band_score(pct_diff, pct_diff > ic.params.get("above_threshold_pct", 1.0),
+                       pct_diff < ic.params.get("below_threshold_pct", -1.0))
+
+
+def _l2_market_breadth(s5fi: np.ndarray, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "market_breadth")
+    return np.where(s5fi > ic.params.get("risk_on_threshold", 60.0), 1,
+                    np.where(s5fi < ic.params.get("risk_off_threshold", 40.0), -1, 0))
+
+
+def _l2_level(fc: FeatureCache, cfg: Layer2Config, key: str, name: str,
+              low_default: float, high_default: float) -> np.ndarray:
+    ic = _get_cfg(cfg, key)
+    if name not in fc.columns:
+        return np.zeros(len(fc.df))
+    level = _last_valid(fc, name)
+    return _band_score(level, level < ic.params.get("low_threshold", low_default),
+                       level > ic.params.get("high_threshold", high_default))
+
+
+def _l2_vix_trend(fc: FeatureCache, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "vix_trend")
+    compacted = _compacted(fc, "VIX")
+    if compacted is None:
+        return np.zeros(len(fc.df))
+    lag = int(ic.params.get("lookback_days", 10))
+    change = _per_row(_compact_feature(fc, "VIX", "lag_change", lag), compacted[1])
+    return _band_score(change, change < ic.params.get("falling_threshold_pct", -10.0),
+                       change > ic.params.get("rising_threshold_pct", 10.0))
+
+
+def _l2_credit_health(fc: FeatureCache, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "credit_health")
+    compacted = _compacted(fc, "JNK")
+    if compacted is None:
+        return np.zeros(len(fc.df))
+    jnk, pos = compacted
+    slope_days = int(ic.params.get("jnk_20dma_slope_days", 5))
+    ma20 = _compact_feature(fc, "JNK", "mean", 20)
+    slope = np.full(len(jnk), np.nan)
+    start = max(24, slope_days + 19)
+    if start < len(jnk):
+        slope[start:] = ma20[start:] - ma20[start - slope_days:len(jnk) - slope_days]
+    slope = _per_row(slope, pos)
+    return _band_score(slope, slope > 0, slope < 0)
+
+
+def _l2_gold_spx_correlation(fc: FeatureCache, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "gold_spx_correlation")
+    spx_name = "SPX" if "SPX" in fc.columns else "SPY"
+    gold, spx = _column(fc, "GOLD"), _column(fc, spx_name)
+    if gold is None or spx is None:
+        return np.zeros(len(fc.df))
+    lookback = int(ic.params.get("lookback_days", 30))
+
+    def compute():
+        both = ~np.isnan(gold) & ~np.isnan(spx)
+        return _per_row(rolling_corr(gold[both], spx[both], lookback), np.cumsum(both) - 1)
+    corr = fc.cached((("GOLD", spx_name), "replay_corr", lookback), compute)
+    return _band_score(corr, corr < ic.params.get("normal_threshold", 0.2),
+                       corr > ic.params.get("high_threshold", 0.4))
+
+
+def _l2_dxy_trend(fc: FeatureCache, cfg: Layer2Config) -> np.ndarray:
+    ic = _get_cfg(cfg, "dxy_trend")
+    compacted = _compacted(fc, "DXY")
+    if compacted is None:
+        return np.zeros(len(fc.df))
+    lag = int(ic.params.get("lookback_days", 21))
+    change = _per_row(_compact_feature(fc, "DXY", "lag_change", lag), compacted[1])
+    extreme = ((change > ic.params.get("strong_up_threshold_pct", 2.0))
+               | (change < ic.params.get("strong_down_threshold_pct", -3.0)))
+    mild_down = change < ic.params.get("mild_down_threshold_pct", -1.0)
+    return np.where(extreme, -1, np.where(mild_down, 1, 0))
+
+
+def replay_layer2(df: pd.DataFrame | FeatureCache, s5fi: np.ndarray, cfg: Layer2Config) -> pd.DataFrame:
+    """Per-row L2 weighted composite, regime and utilization range."""
+    fc = as_features(df)
+    df = fc.df
+    scored = [
+        ("spx_vs_50dma", _l2_spx_vs_50dma(fc, cfg)),
+        ("market_breadth", _l2_market_breadth(s5fi, cfg)),
+        ("vix_level", _l2_level(fc, cfg, "vix_level", "VIX", 18.0, 25.0)),
+        ("vix_trend", _l2_vix_trend(fc, cfg)),
+        ("move_index", _l2_level(fc, cfg, "move_index", "MOVE", 85.0, 110.0)),
+        ("credit_health", _l2_credit_health(fc, cfg)),
+        ("gold_spx_correlation", _l2_gold_spx_correlation(fc, cfg)),
+        ("dxy_trend", _l2_dxy_trend(fc, cfg)),
+    ]
+    weighted = np.zeros(len(df))
+    for key, scores in scored:
+        weighted = weighted + scores * _get_cfg(cfg, key).weight
+
+    conditions = [weighted >= 5.0, weighted >= 2.0, weighted > -2.0, weighted > -5.0]
+    keys = ["strong_risk_on", "risk_on", "neutral", "risk_off"]
+    key = np.select(conditions, keys, "strong_risk_off")
+    regime = np.select(conditions, [L2Regime.STRONG_RISK_ON.value, L2Regime.RISK_ON.value,
+                                    L2Regime.NEUTRAL.value, L2Regime.RISK_OFF.value],
+                       L2Regime.STRONG_RISK_OFF.value)
+
+    util_min = np.full(len(df), 50)
+    util_max = np.full(len(df), 65)
+    for name, util_range in cfg.utilization_map.items():
+        hit = key == name
+        util_min[hit], util_max[hit] = util_range.min, util_range.max
+
+    return pd.DataFrame({
+        "l2_composite": [round(float(v), 1) for v in weighted],
+        "l2_regime": regime,
+        "l2_util_min": util_min,
+        "l2_util_max": util_max,
+    }, index=df.index)
+
+
+# ---------------------------------------------------------------------------
+# Layer 3
+# ---------------------------------------------------------------------------
+
+def _daily_return_pct(fc: FeatureCache, name: str) -> np.ndarray:
+    def compute():
+        compacted = _compacted(fc, name)
+        if compacted is None:
+            return np.full(len(fc.df), np.nan)
+        series, pos = compacted
+        ret = np.full(len(series), np.nan)
+        ret[1:] = (series[1:] / series[:-1] - 1) * 100
+        return _per_row(ret, pos)
+    return fc.cached((name, "daily_return", None), compute)
+
+
+def replay_layer3(df: pd.DataFrame | FeatureCache, cfg: Layer3Config, s5fi: np.ndarray) -> pd.DataFrame:
+    """Advance the four sentinels through every row; per-row triggered names, override and freeze."""
+    fc = as_features(df)
+    df = fc.df
+    n = len(df)
+    vix, move = _last_valid(fc, "VIX"), _last_valid(fc, "MOVE")
+    jnk_ret = _daily_return_pct(fc, "JNK")
+    hyg_ret = _daily_return_pct(fc, "HYG")
+
+    spx_name = "SPX" if "SPX" in df.columns else "SPY"
+    spx = spx_ma50 = np.full(n, np.nan)
+    if spx_name in df.columns:
+        spx = _last_valid(fc, spx_name)
+        spx_ma50 = _per_row(_compact_feature(fc, spx_name, "mean", 50), _compacted(fc, spx_name)[1])
+
+    worst = np.fmin(jnk_ret, hyg_ret)
+    jnk_up = np.isnan(jnk_ret) | (jnk_ret > 0)
+    hyg_up = np.isnan(hyg_ret) | (hyg_ret > 0)
+    conditions = [
+        vix_conditions(vix, cfg),
+        credit_conditions(worst, jnk_up, hyg_up, cfg),
+        move_conditions(move, cfg),
+        trend_conditions(spx, spx_ma50, vix, s5fi, cfg),
+    ]
+    trigger = np.column_stack([c[0] for c in conditions])
+    reset = np.column_stack([c[1] for c in conditions])
+    valid = np.column_stack([~np.isnan(vix), ~np.isnan(worst), ~np.isnan(move),
+                             ~np.isnan(spx_ma50) & ~np.isnan(vix)])
+    times = fc.cached(("index", "str", None), lambda: df.index.astype(str))
+    history = SentinelBank.clear(SENTINEL_IDS).advance(trigger, reset, valid, reset_days(cfg), times=times)
+    active = history.status != CLEAR
+
+    names = np.array(SENTINEL_NAMES, dtype=object)
+    triggered = ["|".join(names[row]) for row in active]
+    forced = np.array([np.nan if c is None else c for c in forced_ceilings(cfg)])
+    ceiling = np.where(active, forced, np.nan)
+    has_ceiling = (~np.isnan(ceiling)).any(axis=1)
+    lowest = np.nanmin(np.where(has_ceiling[:, None], ceiling, 0.0), axis=1)
+    override = [int(v) if ok else None for v, ok in zip(lowest, has_ceiling)]
+    freeze = active[:, SENTINEL_IDS.index("move_spike")]
+
+    return pd.DataFrame(
+        {"l3_triggered": triggered, "l3_override": pd.Series(override, dtype=object).to_numpy(),
+         "l3_freeze": freeze},
+        index=df.index,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------------
+
+def replay_regime(
+    df: pd.DataFrame,
+    sector_df: pd.DataFrame | None,
+    config: RegimeConfig,
+    constituent_breadth: pd.Series | None = None,
+    features: FeatureCache | None = None,
+) -> pd.DataFrame:
+    """Score every row of *df* (ascending DatetimeIndex); one output row per input row.
+
+    *constituent_breadth* is the S&P 500 constituent % above 50DMA by date (see
+    src/data/constituent_breadth.py); on market dates where it has a value at
+    most ``breadth.max_stale_days`` old it replaces the sector ETF estimate,
+    as ``RegimeEngine.run`` does.
+
+    *features*, a FeatureCache over the sorted *df*, lets repeated replays of
+    one history (different configs) share their config-independent work.
+
+    Columns: l1_composite, l1_regime, l1_ceiling, l2_composite, l2_regime,
+    l2_util_min, l2_util_max, s5fi, l3_triggered, l3_override, l3_freeze,
+    target_min, target_max, mode, spx_close.
+    """
+    if features is None:
+        features = FeatureCache(df.sort_index())
+    df = features.df
+    fallback = config.breadth.fallback_value
+    if sector_df is not None and not sector_df.empty:
+        breadth = compute_s5fi_series(sector_df.sort_index(), config.breadth.sector_weights, fallback)
+        # breadth as of each market date: sector rows on or before it
+        at = np.searchsorted(breadth.index.values, df.index.values, side="right") - 1
+        s5fi = np.where(at >= 0, breadth.to_numpy()[np.maximum(at, 0)], fallback)
+    else:
+        s5fi = np.full(len(df), fallback, dtype=float)
+    if constituent_breadth is not None and not constituent_breadth.dropna().empty:
+        pct = constituent_breadth.dropna().sort_index()
+        at = np.searchsorted(pct.index.values, df.index.values, side="right") - 1
+        age = df.index.values - pct.index.values[np.maximum(at, 0)]
+        fresh = (at >= 0) & (age <= np.timedelta64(config.breadth.max_stale_days, "D"))
+        s5fi = np.where(fresh, pct.to_numpy()[np.maximum(at, 0)], s5fi)
+
+    l1 = replay_layer1(features, config.layer1)
+    l2 = replay_layer2(features, s5fi, config.layer2)
+    l3 = replay_layer3(features, config.layer3, s5fi)
+    out = pd.concat([l1, l2, l3], axis=1)
+    out.insert(out.columns.get_loc("l3_triggered"), "s5fi", s5fi)
+
+    emergency = (l3["l3_triggered"] != "") & l3["l3_override"].notna()
+    override = l3["l3_override"].astype(float).to_numpy()
+    target_min = np.where(emergency, 0.0, l1["l1_ceiling"] * l2["l2_util_min"] / 100.0)
+    target_max = np.where(emergency, override, l1["l1_ceiling"] * l2["l2_util_max"] / 100.0)
+    out["target_min"] = [round(float(v), 1) for v in target_min]
+    out["target_max"] = [round(float(v), 1) for v in target_max]
+    out["mode"] = np.where(emergency, EnvelopeMode.EMERGENCY.value, EnvelopeMode.NORMAL.value)
+
+    spx_close = np.full(len(df), np.nan)
+    for col in ("SPY", "SPX"):  # SPX wins wherever it has a value, as in run()
+        if col in df.columns:
+            last = _last_valid(features, col)
+            spx_close = np.where(np.isnan(last), spx_close, last)
+    out["spx_close"] = [round(float(v), 2) for v in spx_close]
+    return out
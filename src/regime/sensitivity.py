@@ -0,0 +1,208 @@
+"""Regime config sensitivity sweep.
+
+Re-scores one market history under a grid of RegimeConfig variants and
+reports, per variant, how the envelope behaves: regime flip frequency,
+envelope level and day-to-day stability, emergency share, and the forward
+SPX return over the days the variant leaned risk-on vs risk-off.
+
+The grid is keyed by dotted paths into the regime_defaults.yaml layout, so
+any threshold, weight or map entry can be varied without a code change::
+
+    {"layer2.indicators.vix_level.high_threshold": [22, 25, 28],
+     "layer1.ceiling_map.neutral": [70, 80, 90]}
+
+This is a sensitivity / stability report for the annual calibration review
+(ADR-0009 §2): it shows how much each threshold moves the envelope, and the
+baseline row (the configured values) is always included for comparison. It
+deliberately does not rank variants or pick a "best" one — ADR-0009 §2.3
+rules out parameter-optimisation backtests.
+
+Each variant is one vectorized ``replay_regime`` pass. Workers build one
+FeatureCache over the history and share it across all variants they score,
+so config-independent series are computed once per process.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .config import build_config, load_raw_config
+from .features import FeatureCache
+from .models import EnvelopeMode, L2Regime
+from .replay import replay_regime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS = (20, 60)
+_TRADING_DAYS = 252
+_RISK_ON = (L2Regime.STRONG_RISK_ON.value, L2Regime.RISK_ON.value)
+_RISK_OFF = (L2Regime.RISK_OFF.value, L2Regime.STRONG_RISK_OFF.value)
+
+
+# ---------------------------------------------------------------------------
+# Grid
+# ---------------------------------------------------------------------------
+
+def get_path(raw: dict, path: str) -> Any:
+    """Value at a dotted *path* of a raw config mapping; KeyError names the path."""
+    node: Any = raw
+    for part in path.split("."):
+        if not isinstance(node, dict) or part not in node:
+            raise KeyError(f"config path not found: {path}")
+        node = node[part]
+    return node
+
+
+def with_overrides(raw: dict, overrides: dict[str, Any]) -> dict:
+    """Copy of *raw* with each dotted-path override applied; paths must already exist."""
+    out = copy.deepcopy(raw)
+    for path, value in overrides.items():
+        parent, _, leaf = path.rpartition(".")
+        node = get_path(out, parent) if parent else out
+        if not isinstance(node, dict) or leaf not in node:
+            raise KeyError(f"config path not found: {path}")
+        node[leaf] = value
+    return out
+
+
+def expand_grid(grid: dict[str, list]) -> list[dict[str, Any]]:
+    """Cartesian product of a {path: values} grid, one override dict per variant."""
+    paths = list(grid)
+    return [dict(zip(paths, combo)) for combo in itertools.product(*(grid[p] for p in paths))]
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def _flips(values: pd.Series) -> int:
+    return int((values.to_numpy()[1:] != values.to_numpy()[:-1]).sum())
+
+
+def envelope_metrics(
+    scored: pd.DataFrame,
+    horizons: tuple[int, ...] = DEFAULT_HORIZONS,
+) -> dict[str, float]:
+    """Stability and forward-return summary of one replayed history (``replay_regime`` rows).
+
+    - l1_flips_per_year / l2_flips_per_year / mode_flips_per_year: regime changes
+    - target_mid_mean: average envelope midpoint (% equity)
+    - target_mid_abs_change: mean absolute day-to-day move of the midpoint
+    - envelope_change_rate: share of days the envelope moves at all
+    - emergency_pct: share of days in EMERGENCY mode
+    - fwd{h}_risk_on / fwd{h}_risk_off: mean forward h-day SPX return (%) over
+      days L2 was risk-on / risk-off; fwd{h}_mid_corr: correlation of the
+      midpoint with the forward return
+    """
+    days = len(scored)
+    years = max(days / _TRADING_DAYS, 1e-9)
+    mid = (scored["target_min"].to_numpy(dtype=float) + scored["target_max"].to_numpy(dtype=float)) / 2
+    step = np.abs(np.diff(mid))
+    out: dict[str, float] = {
+        "days": days,
+        "l1_flips_per_year": _flips(scored["l1_regime"]) / years,
+        "l2_flips_per_year": _flips(scored["l2_regime"]) / years,
+        "mode_flips_per_year": _flips(scored["mode"]) / years,
+        "target_mid_mean": float(mid.mean()) if days else np.nan,
+        "target_mid_abs_change": float(step.mean()) if len(step) else np.nan,
+        "envelope_change_rate": float((step > 0).mean()) if len(step) else np.nan,
+        "emergency_pct": float((scored["mode"] == EnvelopeMode.EMERGENCY.value).mean() * 100) if days else np.nan,
+    }
+
+    spx = scored["spx_close"].to_numpy(dtype=float)
+    risk_on = scored["l2_regime"].isin(_RISK_ON).to_numpy()
+    risk_off = scored["l2_regime"].isin(_RISK_OFF).to_numpy()
+    for h in horizons:
+        fwd = np.full(days, np.nan)
+        if h < days:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fwd[:-h] = (spx[h:] / spx[:-h] - 1) * 100
+        ok = ~np.isnan(fwd)
+        out[f"fwd{h}_risk_on"] = float(fwd[ok & risk_on].mean()) if (ok & risk_on).any() else np.nan
+        out[f"fwd{h}_risk_off"] = float(fwd[ok & risk_off].mean()) if (ok & risk_off).any() else np.nan
+        flat = ok.sum() < 2 or np.std(mid[ok]) == 0 or np.std(fwd[ok]) == 0
+        out[f"fwd{h}_mid_corr"] = np.nan if flat else float(np.corrcoef(mid[ok], fwd[ok])[0, 1])
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(df, sector_df, raw, constituent_breadth, start, end, horizons) -> None:
+    """Per-process state: one FeatureCache over the history, shared by every variant scored here."""
+    _WORKER.update(
+        features=FeatureCache(df), sector_df=sector_df, raw=raw, breadth=constituent_breadth,
+        start=start, end=end, horizons=horizons,
+    )
+
+
+def _score_variant(overrides: dict[str, Any]) -> dict[str, float]:
+    w = _WORKER
+    config = build_config(with_overrides(w["raw"], overrides))
+    scored = replay_regime(w["features"].df, w["sector_df"], config, constituent_breadth=w["breadth"],
+                           features=w["features"])
+    return envelope_metrics(scored.loc[w["start"]:w["end"]], w["horizons"])
+
+
+def run_sensitivity(
+    df: pd.DataFrame,
+    grid: dict[str, list],
+    sector_df: pd.DataFrame | None = None,
+    raw: dict | None = None,
+    constituent_breadth: pd.Series | None = None,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    horizons: tuple[int, ...] = DEFAULT_HORIZONS,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """One row per grid variant (plus the baseline first): the grid values and ``envelope_metrics``.
+
+    *raw* is the base config mapping (default: ``load_raw_config()``). The whole
+    of *df* is replayed so rolling windows and sentinels are warm; metrics
+    cover [start, end]. Unknown grid paths raise KeyError before any work.
+    """
+    raw = load_raw_config() if raw is None else raw
+    variants = expand_grid(grid)
+    baseline = {path: get_path(raw, path) for path in grid}
+    jobs = [{}] + variants
+    init_args = (df.sort_index(), sector_df, raw, constituent_breadth, start, end, tuple(horizons))
+
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(*init_args)
+        try:
+            metrics = [_score_variant(j) for j in jobs]
+        finally:
+            _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            metrics = list(pool.map(_score_variant, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    rows = [{"variant": "baseline", **baseline, **metrics[0]}]
+    rows += [{"variant": f"v{i}", **{**baseline, **o}, **m} for i, (o, m) in enumerate(zip(variants, metrics[1:]), 1)]
+    return pd.DataFrame(rows).set_index("variant")
+
+
+def parameter_sensitivity(results: pd.DataFrame, grid: dict[str, list], metric: str) -> pd.DataFrame:
+    """Per grid path: spread (max - min) of the mean *metric* across that path's values.
+
+    Averages over the other paths' values, so a large spread means the
+    envelope is sensitive to that one threshold. Baseline row excluded.
+    """
+    variants = results.drop(index="baseline", errors="ignore")
+    rows = []
+    for path in grid:
+        by_value = variants.groupby(path)[metric].mean()
+        rows.append({"path": path, "min": by_value.min(), "max": by_value.max(),
+                     "spread": by_value.max() - by_value.min()})
+    return pd.DataFrame(rows).set_index("path").sort_values("spread", ascending=False)
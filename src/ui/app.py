@@ -3,28 +3,21 @@ import pandas as pd
 import plotly.graph_objects as go
 from pathlib import Path
 from src.data.loader import DataLoader
+from src.data.cache_store import cache_mtime
 from src.analysis.engine import calculate_net_liquidity, calculate_changes, analyze_signals, analyze_china_signals
 from src.analysis.china_regime import (
-    ChinaInputData,
     ChinaRegimeResult,
     compute_china_regime,
     save_china_sentinel_state,
     write_china_regime_snapshot,
 )
 from src.data.china_market_fetcher import (
-    fetch_margin_ratio,
     fetch_csi300_pe,
     fetch_cgb10y_yield,
-    fetch_equity_bond_spread,
     fetch_index_close,
-    fetch_limit_counts,
-    fetch_northbound_flow,
-    fetch_southbound_flow,
     fetch_m2_monthly,
-    fetch_market_total_amount,
-    fetch_deposit_ratio,
-    fetch_qvix,
 )
+from src.data.china_inputs import INDICATOR_KEYS, IndicatorStatus, gather_china_inputs
 from src.llm.analyst import MacroAnalyst
 from src.llm.report_manager import ReportManager
 from src.llm.regime_narrator import generate_regime_narrative, NarrativeResult
@@ -384,6 +377,19 @@ def render_us_dashboard(days_back):
     # 4. AI Report (with regime narrative integration)
     render_ai_report(df, signals, changes, market="us", narrative=narrative)
 
+# Indicator key (src.data.china_inputs) → i18n display name for the fetch log
+_CHINA_INDICATOR_LABELS = {
+    "margin_ratio": "cn_margin_ratio_card",
+    "equity_bond_spread": "cn_equity_bond_card",
+    "deposit_ratio": "cn_deposit_ratio_card",
+    "limit_counts": "cn_sentinel_limit_up_heat",
+    "northbound": "northbound",
+    "southbound": "southbound",
+    "total_amount": "turnover",
+    "qvix": "cn_sentinel_volume_spike",
+}
+
+
 def _fetch_china_regime_data(today: date, progress=None) -> tuple[ChinaRegimeResult | None, dict]:
     """
     Fetch all new indicators and run compute_china_regime.
@@ -392,184 +398,31 @@ def _fetch_china_regime_data(today: date, progress=None) -> tuple[ChinaRegimeRes
 
     progress: optional st.status() object; when provided, each fetch step is written to it.
     """
-    import time as _time
-    from src.data.china_market_fetcher import _load_cache as _lc
-
-    _t0 = _time.monotonic()
-    _GLOBAL_TIMEOUT = 30.0
-
-    def _timed_out() -> bool:
-        return (_time.monotonic() - _t0) >= _GLOBAL_TIMEOUT
-
-    def _step_start(name: str) -> None:
-        if progress is not None:
-            progress.write(t("loading_fetching").format(name=name))
-
-    def _step_done(name: str, stale: bool, timed_out: bool = False, last_date: str = "") -> None:
+    def _step_done(status: IndicatorStatus) -> None:
         if progress is None:
             return
-        if timed_out:
+        name = t(_CHINA_INDICATOR_LABELS[status.key])
+        if status.timed_out:
             progress.write(t("loading_timeout_stale").format(name=name))
-        elif stale and last_date:
-            progress.write(t("loading_done_stale").format(name=name, date=last_date))
-        elif stale:
-            progress.write(t("loading_done_stale").format(name=name, date="—"))
+        elif status.stale:
+            progress.write(t("loading_done_stale").format(name=name, date=status.last_date or "—"))
         else:
             progress.write(t("loading_done_fresh").format(name=name))
 
-    def _stale_last_date(cache_file: str, col: str) -> str:
-        try:
-            df = _lc(cache_file)
-            if not df.empty and col in df.columns:
-                return str(df[col].dropna().index[-1])[:10]
-        except Exception:
-            pass
-        return "—"
-
     data_dates: dict[str, str] = {}
 
     try:
-        # ── New indicator fetchers ────────────────────────────────────────
-        _name = t("cn_margin_ratio_card")
-        _step_start(_name)
-        if not _timed_out():
-            margin_df, m_stale = fetch_margin_ratio(today)
-            _step_done(_name, m_stale, last_date=_stale_last_date("margin_ratio.csv", "Margin_Ratio_Pct") if m_stale else "")
-        else:
-            margin_df = _lc("margin_ratio.csv") or None
-            m_stale = True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("cn_equity_bond_card")
-        _step_start(_name)
-        if not _timed_out():
-            equity_bond_spread, eb_stale = fetch_equity_bond_spread(today)
-            _step_done(_name, eb_stale, last_date=_stale_last_date("equity_bond_spread.csv", "EBS_Pct") if eb_stale else "")
-        else:
-            equity_bond_spread, eb_stale = None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("cn_deposit_ratio_card")
-        _step_start(_name)
-        if not _timed_out():
-            _, dep_month, dep_stale = fetch_deposit_ratio(today)
-            _step_done(_name, dep_stale, last_date=_stale_last_date("deposit_ratio.csv", "Deposit_Ratio") if dep_stale else "")
-        else:
-            _, dep_month, dep_stale = None, None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("cn_sentinel_limit_up_heat")
-        _step_start(_name)
-        if not _timed_out():
-            limit_data, lim_stale = fetch_limit_counts(today)
-            _step_done(_name, lim_stale, last_date=_stale_last_date("limit_counts.csv", "LimitUp_Count") if lim_stale else "")
-        else:
-            limit_data, lim_stale = None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("northbound")
-        _step_start(_name)
-        if not _timed_out():
-            nb_data, nb_stale = fetch_northbound_flow(today)
-            _step_done(_name, nb_stale, last_date=_stale_last_date("northbound_flow.csv", "Northbound_Net_Yi") if nb_stale else "")
-        else:
-            nb_data, nb_stale = None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("southbound")
-        _step_start(_name)
-        if not _timed_out():
-            sb_data, sb_stale = fetch_southbound_flow(today)
-            _step_done(_name, sb_stale, last_date=_stale_last_date("southbound_flow.csv", "Southbound_Net_Yi") if sb_stale else "")
-        else:
-            sb_data, sb_stale = None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("turnover")
-        _step_start(_name)
-        if not _timed_out():
-            total_amount, amount_ma20, amt_stale = fetch_market_total_amount(today)
-            _step_done(_name, amt_stale, last_date=_stale_last_date("total_amount.csv", "Total_Amount_Yi") if amt_stale else "")
-        else:
-            total_amount, amount_ma20, amt_stale = None, None, True
-            _step_done(_name, True, timed_out=True)
-
-        _name = t("cn_sentinel_volume_spike")
-        _step_start(_name)
-        if not _timed_out():
-            qvix_val, qvix_stale = fetch_qvix(today)
-            _step_done(_name, qvix_stale, last_date=_stale_last_date("qvix.csv", "QVIX_Close") if qvix_stale else "")
-        else:
-            qvix_val, qvix_stale = None, True
-            _step_done(_name, True, timed_out=True)
-
-        any_stale = any([m_stale, eb_stale, dep_stale, lim_stale, nb_stale, sb_stale, amt_stale, qvix_stale])
-
-        if dep_month:
-            data_dates["M2/Deposit"] = dep_month
-        data_dates["Market"] = today.strftime("%Y-%m-%d")
-
-        # Extract scalar values from fetched data
-        latest_margin_pct: float | None = None
-        if margin_df is not None and not margin_df.empty and "Margin_Ratio_Pct" in margin_df.columns:
-            series = margin_df["Margin_Ratio_Pct"].dropna()
-            if not series.empty:
-                latest_margin_pct = float(series.iloc[-1])
+        # All indicators are fetched concurrently under one shared deadline
+        if progress is not None:
+            for key in INDICATOR_KEYS:
+                progress.write(t("loading_fetching").format(name=t(_CHINA_INDICATOR_LABELS[key])))
 
-        # ── Existing China data for L1 signals ───────────────────────────
-        # Use the @st.cache_data-wrapped function to avoid re-reading CSV
+        # Use the @st.cache_data-wrapped function to avoid re-reading the L1 cache
         china_df = get_china_data(90, _cache_mtime("china_data.csv"))
-        m1_yoy = m1_yoy_prev = None
-        m1_m2_spread = m1_m2_spread_prev = None
-        tsf_yoy = tsf_yoy_prev = None
-        dr007 = omo_rate = None
-        if not china_df.empty:
-            if "M1_YoY" in china_df.columns:
-                m1_vals = china_df["M1_YoY"].dropna()
-                if len(m1_vals) >= 1:
-                    m1_yoy = float(m1_vals.iloc[-1])
-                if len(m1_vals) >= 2:
-                    m1_yoy_prev = float(m1_vals.iloc[-2])
-            if "M1_M2_Gap" in china_df.columns:
-                gap_vals = china_df["M1_M2_Gap"].dropna()
-                if len(gap_vals) >= 1:
-                    m1_m2_spread = float(gap_vals.iloc[-1])
-                if len(gap_vals) >= 2:
-                    m1_m2_spread_prev = float(gap_vals.iloc[-2])
-            if "DR007" in china_df.columns:
-                dr007_vals = china_df["DR007"].dropna()
-                if not dr007_vals.empty:
-                    dr007 = float(dr007_vals.iloc[-1])
-            # OMO 7-day rate ≈ 1.5–2.0% (hardcode current PBoC rate as fallback)
-            omo_rate = 1.5  # current 7-day OMO rate
-
-        # ── Assemble input data ────────────────────────────────────────
-        input_data = ChinaInputData(
-            dr007=dr007,
-            omo_rate=omo_rate,
-            m1_yoy=m1_yoy,
-            m1_yoy_prev=m1_yoy_prev,
-            m1_m2_spread=m1_m2_spread,
-            m1_m2_spread_prev=m1_m2_spread_prev,
-            tsf_yoy=tsf_yoy,
-            tsf_yoy_prev=tsf_yoy_prev,
-            equity_bond_spread=equity_bond_spread,
-            margin_ratio_pct=latest_margin_pct,
-            qvix=qvix_val,
-            northbound_5d_cumulative=nb_data["cumulative_5d_yi"] if nb_data else None,
-            limit_up_count=limit_data["up_count"] if limit_data else None,
-            limit_down_count=limit_data["down_count"] if limit_data else None,
-            zt_count=limit_data["up_count"] if limit_data else None,
-            dt_count=limit_data["down_count"] if limit_data else None,
-            southbound_net_buy=sb_data["net_buy_yi"] if sb_data else None,
-            southbound_sigma_dev=sb_data["sigma_deviation"] if sb_data else None,
-            total_amount=total_amount,
-            total_amount_ma20=amount_ma20,
-            data_date=today,
-        )
+        gathered = gather_china_inputs(today, deadline=30.0, china_df=china_df, on_progress=_step_done)
+        data_dates = gathered.data_dates
 
-        _step("🧮 计算 A 股三层体制评分...")
-        regime_result = compute_china_regime(input_data)
+        regime_result = compute_china_regime(gathered.inputs)
 
         # Persist history snapshot
         try:
@@ -579,15 +432,14 @@ def _fetch_china_regime_data(today: date, progress=None) -> tuple[ChinaRegimeRes
                 l2_result=regime_result.layer2,
                 l3_state=regime_result.layer3,
                 envelope=regime_result.envelope,
-                csi300_close=None,
+                csi300_close=gathered.inputs.csi300_close,
             )
         except Exception as e:
             st.warning(f"Failed to write regime history snapshot: {e}")
 
         if progress is not None:
-            stale_count = sum([m_stale, eb_stale, dep_stale, lim_stale, nb_stale, sb_stale, amt_stale, qvix_stale])
-            if stale_count:
-                label = t("progress_partial_stale").format(n=stale_count)
+            if gathered.stale_count:
+                label = t("progress_partial_stale").format(n=gathered.stale_count)
             else:
                 label = t("progress_all_fresh")
             progress.update(label=label, state="complete", expanded=False)
@@ -669,11 +521,11 @@ def render_china_dashboard(days_back):
 
     # ── Three indicator cards ──────────────────────────────────────────────────
     # get_china_card_data uses _load_cache (no side effects) so cache key is stable;
-    # invalidates on margin_ratio.csv mtime change (i.e., after force refresh).
+    # invalidates on margin_ratio store mtime change (i.e., after force refresh).
     try:
         margin_history, eb_history, dep_history = get_china_card_data(
             today.strftime("%Y-%m-%d"),
-            _cache_mtime("china/margin_ratio.csv"),
+            cache_mtime("china/margin_ratio.csv"),
         )
     except Exception:
         margin_history = eb_history = dep_history = None
@@ -4,7 +4,7 @@
 不触网、不放任何市场行情图。按序回答三个问题：
 (a) 我偏离基准了吗（基准未设定 → 展示真实暴露并引导定基准）
 (b) 卫星仓穿透后真实占比超没超 35%（ADR-0018）
-(c) 目标进度（真实年化 vs 17.5% 需求线）
+(c) 目标进度（真实年化 vs 17.5% 需求线），附逐周总额 / 暴露 / 卫星占比走势
 
 可视化三规则（ADR-0015）：区间画色带、图上标"我"、红色只给需要动作的事。
 """
@@ -15,6 +15,7 @@ import plotly.graph_objects as go
 import streamlit as st
 
 from src.ledger import Ledger
+from src.ledger.core import SATELLITE_CAP
 from src.utils.i18n import t
 
 DEFAULT_DB_PATH = "data_cache/ledger.db"
@@ -31,13 +32,16 @@ def _market_label(key: str) -> str:
 _OK_COLOR = "#2e7d32"
 _ACTION_COLOR = "#c62828"  # 红色只给需要动作的事
 _BAND_COLOR = "rgba(46, 125, 50, 0.15)"
+_INFO_COLOR = "#546e7a"
+_TREND_WEEKS = 104
 
 
 def render_total_asset_page(
     db_path: str = DEFAULT_DB_PATH,
     baseline_path: str = DEFAULT_BASELINE_PATH,
 ) -> None:
-    ledger = Ledger(db_path=db_path, baseline_path=baseline_path)
+    # 只读池化连接：每次渲染不重开库、不跑建表，job 写快照时也不阻塞
+    ledger = Ledger(db_path=db_path, baseline_path=baseline_path, read_only=True)
     snap = ledger.get_latest_snapshot()
     if snap is None:
         st.info(t("ledger_empty"))
@@ -52,6 +56,7 @@ def render_total_asset_page(
     _render_baseline_question(ledger, snap)
     _render_satellite_question(ledger)
     _render_goal_question(ledger)
+    _render_trend(ledger)
     _render_detail(ledger)
     _render_integrity(ledger)
 
@@ -235,6 +240,43 @@ def _render_goal_question(ledger: Ledger) -> None:
         ))
 
 
+def _render_trend(ledger: Ledger) -> None:
+    """逐周走势（weekly_rollup 一次查询）：总额、穿透暴露占比、卫星占比对 35% 上限。"""
+    trend = ledger.get_weekly_trend(weeks=_TREND_WEEKS)
+    if len(trend) < 2:
+        return
+    dates = [w.as_of for w in trend]
+    with st.expander(f"📈 {t('ledger_trend_title')}（{len(trend)} 周）"):
+        total = go.Figure(go.Scatter(
+            x=dates, y=[w.total_cny for w in trend], mode="lines+markers",
+            line=dict(color=_INFO_COLOR), name=t("ledger_total_value"),
+        ))
+        total.update_layout(height=260, margin=dict(l=10, r=10, t=10, b=10),
+                            yaxis=dict(tickprefix="¥"), showlegend=False)
+        st.plotly_chart(total, use_container_width=True)
+
+        exposure = go.Figure()
+        for key in _EXPOSURE_ORDER:
+            values = [w.market_exposure[key] / w.total_cny * 100 if w.total_cny > 0 else 0.0
+                      for w in trend]
+            if any(values):
+                exposure.add_trace(go.Scatter(
+                    x=dates, y=values, mode="lines", stackgroup="exposure",
+                    name=_market_label(key),
+                ))
+        exposure.add_trace(go.Scatter(
+            x=dates, y=[w.satellite_ratio * 100 for w in trend], mode="lines",
+            line=dict(color="black", dash="dot"), name=t("ledger_satellite_ratio"),
+        ))
+        cap = trend[-1].satellite_ratio > SATELLITE_CAP
+        exposure.add_hline(y=SATELLITE_CAP * 100, line_dash="dash",
+                           line_color=_ACTION_COLOR if cap else _OK_COLOR)
+        exposure.update_layout(height=320, margin=dict(l=10, r=10, t=10, b=10),
+                               yaxis=dict(range=[0, 100], ticksuffix="%"))
+        st.plotly_chart(exposure, use_container_width=True)
+        st.caption(t("ledger_trend_hint"))
+
+
 def _render_integrity(ledger: Ledger) -> None:
     issues = ledger.validate_integrity()
     if issues:
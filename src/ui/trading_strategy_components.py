@@ -13,7 +13,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from src.analysis.trending_up import TrendAnalysis, analyze
+from src.analysis.trending_up import TrendAnalysis, analyze_panel
 from src.portfolio.stock_pool import (
     StockPoolItem,
     add_item,
@@ -740,20 +740,36 @@ def render_trading_strategy_page():
     today_str = date.today().isoformat()
     analysis_map: dict[str, TrendAnalysis] = {}
 
+    # Refresh every pending ticker in one bulk pass (trade_date slices / multi-ticker download)
+    pending = [
+        item for item in filtered
+        if item.strategy_type == "trending_up" and item.market != "港股"
+        and f"analysis_{item.ticker}_{today_str}" not in st.session_state
+    ]
+    bars: dict = {}
+    if pending:
+        from src.data.stock_daily_fetcher import fetch_daily_bars_bulk
+        with st.spinner(f"正在获取 {len(pending)} 只股票数据..."):
+            bars = fetch_daily_bars_bulk(pending)
+
+    # Indicators advance incrementally from the persisted state (only new bars are
+    # computed); rule checks for all pending tickers run in one panel pass
+    panel_results: dict[str, TrendAnalysis] = {}
+    if pending:
+        from src.data.trend_indicator_store import get_trend_indicators
+        pending_bars = {item.ticker: bars.get(item.ticker, (None, True))[0] for item in pending}
+        indicators = {t: get_trend_indicators(t, df) for t, df in pending_bars.items() if df is not None and len(df)}
+        panel_results, _ = analyze_panel(pending_bars, indicators=indicators)
+
     for item in filtered:
         if item.strategy_type == "trending_up" and item.market != "港股":
             cache_key = f"analysis_{item.ticker}_{today_str}"
             df_key = f"df_{item.ticker}_{today_str}"
             if cache_key not in st.session_state:
-                from src.data.stock_daily_fetcher import fetch_daily_bars
-                with st.spinner(f"正在获取 {item.ticker} 数据..."):
-                    df, stale = fetch_daily_bars(item)
-                st.session_state[df_key] = df  # cache df to avoid re-reading CSV on every rerun
-                if df is not None and not df.empty:
-                    result = analyze(df, ticker=item.ticker)
-                else:
-                    result = TrendAnalysis(ticker=item.ticker, data_insufficient=True)
-                st.session_state[cache_key] = result
+                st.session_state[df_key] = bars.get(item.ticker, (None, True))[0]  # avoid re-reading bars on rerun
+                st.session_state[cache_key] = panel_results.get(
+                    item.ticker, TrendAnalysis(ticker=item.ticker, data_insufficient=True),
+                )
             analysis_map[item.ticker] = st.session_state[cache_key]
 
     # Table
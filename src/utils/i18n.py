@@ -493,6 +493,15 @@ TRANSLATIONS = {
         "dm_status_unknown": "⬜ 未知",
         "dm_status_synced_stale": "🕐 今日同步 / 数据滞后 {n} 天",
         "dm_backfill_note": "（含历史补全）",
+        "dm_net_section": "网络调用（本进程）",
+        "dm_net_caption": "超时 = 调用方放弃等待；遗弃 = 已超时但仍在后台运行的请求。",
+        "dm_net_empty": "本进程尚无网络调用。",
+        "dm_net_col_endpoint": "接口",
+        "dm_net_col_in_flight": "进行中",
+        "dm_net_col_completed": "完成",
+        "dm_net_col_failed": "失败",
+        "dm_net_col_timed_out": "超时",
+        "dm_net_col_abandoned": "遗弃（当前 / 累计）",
         # 加载进度弹窗 (fetch-progress-dialog)
         "progress_all_fresh": "✅ 所有A股数据已更新",
         "progress_partial_stale": "⚠️ 数据加载完成（{n} 项使用历史值）",
@@ -574,6 +583,8 @@ TRANSLATIONS = {
         "ledger_real_annualized": "真实年化",
         "ledger_required_line": "需求线（10 年 5 倍）",
         "ledger_cumulative": "起点以来累计",
+        "ledger_trend_title": "逐周走势",
+        "ledger_trend_hint": "面积 = 穿透暴露占比；点线 = 卫星仓占比，虚线 = 35% 上限（ADR-0018）。",
         "ledger_unpenetrated": "未穿透",
         "ledger_detail_title": "配置明细（review 用）",
         "ledger_detail_hint": "🛰 = 卫星仓。调整分类：xray/tag 命令（见 docs/code-standards.md 账本写入契约）；调整基准：编辑 config/baseline.yaml。",
@@ -0,0 +1,200 @@
+"""
+Unit tests for src/data/bar_store — versioned writes, zero-copy date-sliced
+reads, and the migrated readers (legacy stock CSV import, index closes,
+ledger FX/HK quotes served from the store). No network.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import bar_store
+from src.data import china_market_fetcher as cmf
+from src.data import stock_daily_fetcher as sdf
+from src.data.bar_store import BarStore, get_bar_store
+from src.ledger import market_quotes
+
+
+def _bars(start: str, n: int, base: float = 10.0) -> pd.DataFrame:
+    idx = pd.bdate_range(start, periods=n, name="date")
+    close = base + np.arange(n, dtype=float)
+    return pd.DataFrame(
+        {"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1000.0},
+        index=idx,
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+    return get_bar_store()
+
+
+class TestBarStore:
+    def test_round_trip_and_date_slice(self, store):
+        df = _bars("2026-01-05", 20)
+        store.write("600519.SH", df)
+        out = store.frame("600519.SH", start="2026-01-12", end="2026-01-16")
+        assert list(out.index) == list(df.loc["2026-01-12":"2026-01-16"].index)
+        assert out["close"].tolist() == df.loc["2026-01-12":"2026-01-16", "close"].tolist()
+        assert store.last_date("600519.SH") == df.index[-1].date()
+        assert store.symbols() == ["600519.SH"]
+
+    def test_reads_are_zero_copy_and_read_only(self, store):
+        store.write("AAPL", _bars("2026-01-05", 10))
+        arrays = store.arrays("AAPL")
+        assert isinstance(arrays["close"].base, np.memmap) or isinstance(arrays["close"], np.memmap)
+        df = store.frame("AAPL")
+        assert np.shares_memory(df["close"].to_numpy(), arrays["close"])
+        with pytest.raises(ValueError):
+            df.iloc[0, 0] = 1.0
+        assert store.frame("AAPL") is not None  # memoized maps still valid
+
+    def test_upsert_new_rows_win_and_old_versions_pruned(self, store, tmp_path):
+        store.write("USDCNY=X", _bars("2026-01-05", 10, base=7.0), kind="fx")
+        stale_view = store.frame("USDCNY=X")
+        tail = _bars("2026-01-14", 5, base=8.0)
+        for _ in range(3):
+            merged = store.upsert("USDCNY=X", tail, kind="fx")
+        assert len(merged) == 12
+        assert store.frame("USDCNY=X")["close"].iloc[-1] == 12.0
+        assert len(stale_view) == 10  # earlier reader keeps its snapshot
+        versions = sorted(p.name for p in (tmp_path / "bars" / "USDCNY_X").glob("v*"))
+        assert versions == ["v3", "v4"]
+        assert store.symbols("fx") == ["USDCNY=X"]
+
+    def test_attrs_survive_write_and_upsert(self, store):
+        df = _bars("2026-01-05", 5)
+        df.attrs = {"source": "yfinance", "as_of": "2026-01-09"}
+        store.write("AAPL", df)
+        assert store.frame("AAPL").attrs == {"source": "yfinance", "as_of": "2026-01-09"}
+        tail = _bars("2026-01-12", 2)
+        tail.attrs = {"as_of": "2026-01-13"}
+        merged = store.upsert("AAPL", tail)
+        assert merged.attrs == {"source": "yfinance", "as_of": "2026-01-13"}
+        assert store.frame("AAPL").attrs == {"source": "yfinance", "as_of": "2026-01-13"}
+        store.upsert("AAPL", _bars("2026-01-14", 1))
+        assert store.frame("AAPL", start="2026-01-12").attrs["source"] == "yfinance"
+
+    def test_unknown_symbol_is_none(self, store):
+        assert store.frame("NOPE") is None
+        assert store.last_date("NOPE") is None
+
+    def test_instances_share_root(self, store, tmp_path):
+        other = BarStore(tmp_path / "bars")
+        store.write("MSFT", _bars("2026-01-05", 3))
+        assert other.frame("MSFT")["close"].tolist() == [10.0, 11.0, 12.0]
+
+
+class TestMigratedReaders:
+    def test_legacy_stock_csv_imported_once(self, store, tmp_path, monkeypatch):
+        monkeypatch.setattr(sdf, "_CACHE_BASE", tmp_path / "stocks")
+        legacy = sdf._cache_path("600519.SH")
+        legacy.parent.mkdir(parents=True)
+        _bars("2026-01-05", 5).to_csv(legacy)
+
+        df = sdf._load_daily_cache("600519.SH")
+        assert len(df) == 5
+        legacy.unlink()
+        assert len(sdf._load_daily_cache("600519.SH")) == 5
+
+    def test_index_close_served_from_store(self, store, monkeypatch):
+        yesterday = pd.Timestamp(cmf._last_weekday_before(date.today()))
+        start = pd.bdate_range(end=yesterday, periods=5)[0]
+        store.write("sh000300", _bars(start, 5), kind="index")
+
+        def _no_network(**kwargs):
+            raise AssertionError("should not fetch")
+
+        monkeypatch.setattr(cmf.ak, "stock_zh_index_daily", _no_network)
+        series, stale = cmf.fetch_index_close("sh000300")
+        assert not stale and series.name == "Close" and len(series) == 5
+
+    def test_fx_rate_uses_store_and_tops_up_tail(self, store, monkeypatch):
+        today = date.today()
+        days = pd.bdate_range(end=today - timedelta(days=1), periods=10)
+        history = pd.DataFrame({"Close": np.linspace(7.0, 7.9, 10)}, index=days)
+        calls: list[date] = []
+
+        def _fake_download(ticker, start, end):
+            calls.append(start)
+            return history[history.index >= pd.Timestamp(start)]
+
+        monkeypatch.setattr(market_quotes, "_yf_download", _fake_download)
+        provider = market_quotes.MarketQuoteProvider()
+        assert provider.get_fx_rate("USD", today) == pytest.approx(7.9)
+        assert len(calls) == 1
+        # Covered through T-1: no request; historical as_of reads on/before it
+        assert provider.get_fx_rate("USD", days[3].date()) == pytest.approx(history["Close"].iloc[3])
+        assert provider.get_fx_rate("USD", today) == pytest.approx(7.9)
+        assert len(calls) == 1
+
+    def test_hk_quote_stale_on_download_failure(self, store, monkeypatch):
+        store.write("0700.HK", _bars("2026-01-05", 3, base=400.0))
+
+        def _down(ticker, start, end):
+            raise ConnectionError("yahoo down")
+
+        monkeypatch.setattr(market_quotes, "_yf_download", _down)
+        quote = market_quotes.MarketQuoteProvider().get_stock_price("700", "HK", date.today())
+        assert quote.price == 402.0 and quote.stale
+
+    def test_prefetch_fetches_each_upstream_ticker_once(self, store, monkeypatch):
+        today = date.today()
+        days = pd.bdate_range(end=today - timedelta(days=1), periods=10)
+        calls: list[str] = []
+
+        def _fake_download(ticker, start, end):
+            calls.append(ticker)
+            return pd.DataFrame({"Close": np.linspace(1.0, 2.0, 10)}, index=days)
+
+        monkeypatch.setattr(market_quotes, "_yf_download", _fake_download)
+        QR = market_quotes.QuoteRequest
+        requests = [QR("stock", "700", "HK"), QR("stock", "00700", "HK"),
+                    QR("fx", "USD"), QR("fx", "USD"), QR("fund", "016532"), QR("fx", "EUR")]
+        resolved = market_quotes.MarketQuoteProvider().prefetch(requests, today)
+        assert sorted(calls) == ["0700.HK", "USDCNY=X"]
+        assert resolved[QR("stock", "700", "HK")] == resolved[QR("stock", "00700", "HK")]
+        assert resolved[QR("fx", "USD")].price == pytest.approx(2.0)
+        assert resolved[QR("fund", "016532")] is None and resolved[QR("fx", "EUR")] is None
+        assert store.symbols("hk_stock") == ["0700.HK"] and store.symbols("stock") == []
+
+    def test_fx_fallback_to_old_store_close_is_not_fresh(self, store, monkeypatch):
+        old = date.today() - timedelta(days=40)
+        store.write("USDCNY=X", _bars(old.isoformat(), 1, base=7.0), kind="fx")
+
+        def _down(ticker, start, end):
+            raise ConnectionError("yahoo down")
+
+        monkeypatch.setattr(market_quotes, "_yf_download", _down)
+        provider = market_quotes.MarketQuoteProvider()
+        assert provider.get_fx_rate("USD", date.today()) is None
+        QR = market_quotes.QuoteRequest
+        quote = provider.prefetch([QR("fx", "USD")], date.today())[QR("fx", "USD")]
+        assert quote.stale and quote.price == 7.0 and quote.quoted_on < date.today()
+
+    def test_prefetch_returns_at_deadline_on_daemon_workers(self, store, monkeypatch):
+        release = threading.Event()
+        workers: list[bool] = []
+
+        def _hang(ticker, start, end):
+            workers.append(threading.current_thread().daemon)
+            release.wait(5.0)
+            return None
+
+        monkeypatch.setattr(market_quotes, "_yf_download", _hang)
+        QR = market_quotes.QuoteRequest
+        t0 = time.monotonic()
+        resolved = market_quotes.MarketQuoteProvider().prefetch(
+            [QR("stock", "700", "HK"), QR("fx", "USD")], date.today(), deadline=0.2,
+        )
+        assert time.monotonic() - t0 < 1.0
+        assert resolved == {QR("stock", "700", "HK"): None, QR("fx", "USD"): None}
+        assert workers and all(workers)  # 遗弃的请求不拖住解释器退出
+        release.set()
@@ -0,0 +1,164 @@
+"""
+Unit tests for src/data/cache_store.py — parquet backend, CSV migration,
+partitioned writes, manifest-backed last_date and CSV export.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+import pytest
+
+from src.data.cache_store import CacheStore, CsvCacheStore, ParquetCacheStore, _csv_tail_date, upsert_frame
+
+
+def _frame(dates: list[str], values: list[float], col: str = "Margin_Ratio_Pct") -> pd.DataFrame:
+    df = pd.DataFrame({col: values}, index=pd.to_datetime(dates))
+    df.index.name = "date"
+    return df
+
+
+class TestParquetCacheStore:
+    def test_roundtrip_preserves_datetime_index_and_dtypes(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        df = _frame(["2023-12-29", "2024-01-02"], [2.1, 2.2])
+        df["Data_Month"] = ["2023-12", "2024-01"]
+        store.save("margin_ratio.csv", df)
+
+        # Fresh instance so the in-memory frame cache is not used
+        loaded = ParquetCacheStore(tmp_path).load("margin_ratio.csv")
+        assert isinstance(loaded.index, pd.DatetimeIndex)
+        assert loaded.index.name == "date"
+        assert loaded["Margin_Ratio_Pct"].dtype == float
+        pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+
+    def test_missing_dataset_loads_empty(self, tmp_path):
+        assert ParquetCacheStore(tmp_path).load("qvix.csv").empty
+
+    def test_object_numeric_column_is_typed(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        df = pd.DataFrame({"LimitUp_Count": [12, None]}, index=pd.to_datetime(["2024-01-02", "2024-01-03"]), dtype=object)
+        store.save("limit_counts.csv", df)
+        loaded = ParquetCacheStore(tmp_path).load("limit_counts.csv")
+        assert loaded["LimitUp_Count"].dtype == float
+        assert loaded["LimitUp_Count"].iloc[0] == pytest.approx(12.0)
+
+    def test_save_rewrites_only_changed_partitions(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        df = _frame(["2023-06-01", "2024-06-03"], [2.0, 2.1])
+        store.save("margin_ratio.csv", df)
+        old_2023 = (tmp_path / "margin_ratio" / "2023.parquet").stat().st_mtime_ns
+        os.utime(tmp_path / "margin_ratio" / "2023.parquet", ns=(1, 1))
+
+        appended = pd.concat([df, _frame(["2024-06-04"], [2.2])])
+        store.save("margin_ratio.csv", appended)
+        assert (tmp_path / "margin_ratio" / "2023.parquet").stat().st_mtime_ns == 1
+        assert old_2023 != 1
+        assert len(store.load("margin_ratio.csv")) == 3
+
+    def test_dropped_year_partition_is_removed(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        store.save("qvix.csv", _frame(["2023-06-01", "2024-06-03"], [20.0, 21.0], "QVIX_Close"))
+        store.save("qvix.csv", _frame(["2024-06-03"], [21.0], "QVIX_Close"))
+        assert not (tmp_path / "qvix" / "2023.parquet").exists()
+        assert len(ParquetCacheStore(tmp_path).load("qvix.csv")) == 1
+
+    def test_last_date_reads_manifest(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        store.save("qvix.csv", _frame(["2024-06-03", "2024-06-04"], [20.0, 21.0], "QVIX_Close"))
+        assert store.last_date("qvix.csv") == "2024-06-04"
+        assert store.last_date("missing.csv") is None
+
+
+class TestCsvMigration:
+    def test_legacy_csv_is_migrated_on_first_load(self, tmp_path):
+        _frame(["2014-12-31", "2026-05-08"], [2.0, 2.1]).to_csv(tmp_path / "margin_ratio.csv")
+        store = ParquetCacheStore(tmp_path)
+        loaded = store.load("margin_ratio.csv")
+        assert len(loaded) == 2
+        assert (tmp_path / "margin_ratio" / "_manifest.json").exists()
+        assert store.last_date("margin_ratio.csv") == "2026-05-08"
+
+    def test_hand_edited_csv_is_reimported(self, tmp_path):
+        path = tmp_path / "qvix.csv"
+        _frame(["2024-06-03"], [20.0], "QVIX_Close").to_csv(path)
+        store = ParquetCacheStore(tmp_path)
+        store.load("qvix.csv")
+
+        _frame(["2024-06-03", "2024-06-04"], [20.0, 25.0], "QVIX_Close").to_csv(path)
+        os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+        assert len(store.load("qvix.csv")) == 2
+
+    def test_export_writes_csv_and_does_not_retrigger_migration(self, tmp_path):
+        store = ParquetCacheStore(tmp_path)
+        df = _frame(["2024-06-03", "2024-06-04"], [20.0, 21.0], "QVIX_Close")
+        store.save("qvix.csv", df)
+        out = store.export_csv("qvix.csv")
+        assert out == tmp_path / "qvix.csv"
+        exported = pd.read_csv(out, index_col=0, parse_dates=True)
+        assert list(exported["QVIX_Close"]) == [20.0, 21.0]
+        assert not store._csv_is_newer("qvix.csv", store._read_manifest("qvix.csv"))
+
+    def test_delete_removes_dataset_and_legacy_csv(self, tmp_path):
+        _frame(["2024-06-03"], [2.0]).to_csv(tmp_path / "margin_ratio.csv")
+        store = ParquetCacheStore(tmp_path)
+        store.load("margin_ratio.csv")
+        store.delete("margin_ratio.csv")
+        assert store.load("margin_ratio.csv").empty
+        assert store.names() == []
+
+
+class TestCacheStoreBase:
+    def test_backend_missing_a_method_cannot_be_instantiated(self, tmp_path):
+        class Partial(CacheStore):
+            def load(self, name):
+                return pd.DataFrame()
+
+        with pytest.raises(TypeError, match="abstract"):
+            Partial(tmp_path)
+
+
+class TestCsvBackend:
+    def test_roundtrip_and_last_date(self, tmp_path):
+        store = CsvCacheStore(tmp_path)
+        store.save("qvix.csv", _frame(["2024-06-03", "2024-06-04"], [20.0, 21.0], "QVIX_Close"))
+        assert len(store.load("qvix.csv")) == 2
+        assert store.last_date("qvix.csv") == "2024-06-04"
+
+    def test_tail_date_header_only(self, tmp_path):
+        path = tmp_path / "empty.csv"
+        path.write_text("date,QVIX_Close\n")
+        assert _csv_tail_date(path) is None
+
+
+class TestUpsertFrame:
+    def test_last_write_wins_and_sorted(self):
+        cache = _frame(["2024-01-03", "2024-01-02"], [1.0, 2.0])
+        new = _frame(["2024-01-03", "2024-01-04"], [9.0, 4.0])
+        merged = upsert_frame(cache, new)
+        assert list(merged.index.strftime("%Y-%m-%d")) == ["2024-01-02", "2024-01-03", "2024-01-04"]
+        assert list(merged["Margin_Ratio_Pct"]) == [2.0, 9.0, 4.0]
+
+    def test_colliding_rows_are_replaced_whole(self):
+        cache = _frame(["2024-01-02"], [1.0])
+        cache["Total_MV_Yi"] = [800000.0]
+        merged = upsert_frame(cache, _frame(["2024-01-02"], [2.0]))
+        assert merged["Margin_Ratio_Pct"].iloc[0] == 2.0
+        assert pd.isna(merged["Total_MV_Yi"].iloc[0])
+
+    def test_duplicates_in_new_frame_keep_last(self):
+        merged = upsert_frame(pd.DataFrame(), _frame(["2024-01-02", "2024-01-02"], [1.0, 3.0]))
+        assert len(merged) == 1
+        assert merged["Margin_Ratio_Pct"].iloc[0] == 3.0
+        assert merged.index.name == "date"
+
+    def test_empty_new_frame_returns_cache(self):
+        cache = _frame(["2024-01-02"], [1.0])
+        assert upsert_frame(cache, pd.DataFrame()) is cache
+
+    def test_column_key(self):
+        cache = pd.DataFrame({"ticker": ["A", "B"], "close": [1.0, 2.0]})
+        new = pd.DataFrame({"ticker": ["B", "C"], "close": [5.0, 6.0]})
+        merged = upsert_frame(cache, new, key="ticker")
+        assert dict(zip(merged["ticker"], merged["close"])) == {"A": 1.0, "B": 5.0, "C": 6.0}
@@ -0,0 +1,179 @@
+"""
+Unit tests for src/data/china_inputs.py — concurrent fan-out, shared deadline,
+last-known fallback for timed-out / failing indicators, ChinaInputData assembly.
+No network: every fetcher is replaced with a fake.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.data import bar_store
+from src.data import china_inputs
+from src.data import china_market_fetcher as fetcher
+
+TODAY = date(2026, 5, 25)
+
+
+def _frame(col: str, value: float, idx_date: str = "2026-05-22") -> pd.DataFrame:
+    df = pd.DataFrame({col: [value]}, index=pd.to_datetime([idx_date]))
+    df.index.name = "date"
+    return df
+
+
+@pytest.fixture
+def fresh_fetchers(tmp_path, monkeypatch):
+    """Point the cache at tmp_path and make every fetcher return fresh data instantly."""
+    monkeypatch.setattr(fetcher, "_CACHE_DIR", tmp_path)
+    fakes = {
+        "fetch_margin_ratio": lambda d: (_frame("Margin_Ratio_Pct", 2.4), False),
+        "fetch_equity_bond_spread": lambda d: (4.1, False),
+        "fetch_deposit_ratio": lambda d: (1.9, "2026-04", False),
+        "fetch_limit_counts": lambda d: ({"up_count": 80, "down_count": 5, "zt_dt_ratio": 16.0}, False),
+        "fetch_northbound_flow": lambda d: ({"net_buy_yi": 12.0, "cumulative_5d_yi": 55.0}, False),
+        "fetch_southbound_flow": lambda d: ({"net_buy_yi": 30.0, "sigma_deviation": 1.2}, False),
+        "fetch_market_total_amount": lambda d: (11000.0, 9500.0, False),
+        "fetch_qvix": lambda d: (18.5, False),
+        "fetch_index_close": lambda symbol, start_date=None: (
+            pd.Series([3850.0, 3900.0], index=pd.to_datetime(["2026-05-21", "2026-05-22"])), False),
+    }
+    for name, fn in fakes.items():
+        monkeypatch.setattr(fetcher, name, fn)
+    return tmp_path
+
+
+class TestGatherChinaInputs:
+    def test_all_fresh_builds_input_data(self, fresh_fetchers):
+        china_df = pd.DataFrame({"M1_YoY": [1.0, 2.0], "M1_M2_Gap": [-5.0, -4.0], "DR007": [1.8, 1.7]})
+        result = china_inputs.gather_china_inputs(TODAY, deadline=5.0, china_df=china_df)
+
+        assert result.stale_count == 0
+        assert list(result.status) == list(china_inputs.INDICATOR_KEYS)
+        data = result.inputs
+        assert data.margin_ratio_pct == pytest.approx(2.4)
+        assert data.equity_bond_spread == pytest.approx(4.1)
+        assert data.limit_up_count == 80 and data.dt_count == 5
+        assert data.northbound_5d_cumulative == pytest.approx(55.0)
+        assert data.southbound_sigma_dev == pytest.approx(1.2)
+        assert (data.total_amount, data.total_amount_ma20) == (11000.0, 9500.0)
+        assert data.m1_yoy == 2.0 and data.m1_yoy_prev == 1.0
+        assert data.m1_m2_spread == -4.0 and data.dr007 == pytest.approx(1.7)
+        assert result.data_dates == {"M2/Deposit": "2026-04", "Market": "2026-05-25"}
+        assert data.csi300_close == 3900.0
+
+    def test_slow_indicator_times_out_to_cached_value(self, fresh_fetchers, monkeypatch):
+        fetcher._save_cache("qvix.csv", _frame("QVIX_Close", 21.0))
+        release = threading.Event()
+        workers: list[threading.Thread] = []
+
+        def _slow_qvix(d):
+            workers.append(threading.current_thread())
+            release.wait(5.0)
+            return 99.0, False
+
+        monkeypatch.setattr(fetcher, "fetch_qvix", _slow_qvix)
+        try:
+            result = china_inputs.gather_china_inputs(TODAY, deadline=0.3, china_df=pd.DataFrame())
+        finally:
+            release.set()
+
+        # the straggler runs on a daemon worker, so it cannot hold up interpreter exit
+        assert workers and all(w.daemon for w in workers)
+        status = result.status["qvix"]
+        assert status.timed_out and status.stale
+        assert status.latency_s is None
+        assert status.last_date == "2026-05-22"
+        assert result.inputs.qvix == pytest.approx(21.0)
+        # Fast indicators were not held back by the slow one
+        assert result.stale_count == 1
+        assert result.inputs.equity_bond_spread == pytest.approx(4.1)
+
+    def test_failing_fetcher_falls_back_without_raising(self, fresh_fetchers, monkeypatch):
+        fetcher._save_cache("total_amount.csv", pd.concat(
+            [_frame("Total_Amount_Yi", 9000.0), _frame("Amount_MA20_Yi", 8800.0)], axis=1,
+        ))
+
+        def _boom(d):
+            raise RuntimeError("tushare down")
+
+        monkeypatch.setattr(fetcher, "fetch_market_total_amount", _boom)
+        result = china_inputs.gather_china_inputs(TODAY, deadline=5.0, china_df=pd.DataFrame())
+
+        status = result.status["total_amount"]
+        assert status.stale and not status.timed_out
+        assert status.error == "tushare down"
+        assert result.inputs.total_amount == pytest.approx(9000.0)
+        assert result.inputs.total_amount_ma20 == pytest.approx(8800.0)
+
+    def test_csi300_close_falls_back_to_bar_store(self, fresh_fetchers, monkeypatch):
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", fresh_fetchers / "bars")
+        bars = pd.DataFrame({"close": [3700.0, 3750.0]}, index=pd.to_datetime(["2026-05-21", "2026-05-26"]))
+        bar_store.get_bar_store().write("sh000300", bars, kind="index")
+
+        def _boom(symbol, start_date=None):
+            raise ConnectionError("akshare down")
+
+        monkeypatch.setattr(fetcher, "fetch_index_close", _boom)
+        result = china_inputs.gather_china_inputs(TODAY, deadline=5.0, china_df=pd.DataFrame())
+        assert result.inputs.csi300_close == 3700.0  # last close on or before TODAY
+
+    def test_on_progress_called_once_per_indicator(self, fresh_fetchers):
+        seen: list[str] = []
+        china_inputs.gather_china_inputs(
+            TODAY, deadline=5.0, china_df=pd.DataFrame(), on_progress=lambda s: seen.append(s.key),
+        )
+        assert sorted(seen) == sorted(china_inputs.INDICATOR_KEYS)
+
+
+class TestBackfillChinaRegime:
+    @pytest.fixture
+    def caches(self, tmp_path, monkeypatch):
+        from src.analysis import china_regime
+
+        monkeypatch.setattr(fetcher, "_CACHE_DIR", tmp_path / "china")
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+        monkeypatch.setattr(china_inputs, "_CHINA_DATA_FILE", tmp_path / "china_data.csv")
+        monkeypatch.setattr(china_regime, "_REGIME_HISTORY_FILE", tmp_path / "history.csv")
+
+        days = pd.bdate_range("2026-05-04", periods=5, name="date")
+        fetcher._save_cache("limit_counts.csv", pd.DataFrame(
+            {"LimitUp_Count": [80, 250, 60, 70, 90], "LimitDown_Count": [10, 30, 9, 12, 11]}, index=days))
+        fetcher._save_cache("total_amount.csv", pd.DataFrame(
+            {"Total_Amount_Yi": [9000.0] * 5, "Amount_MA20_Yi": [8800.0] * 5}, index=days))
+        # Level series only updated on two days; carried forward in between
+        fetcher._save_cache("equity_bond_spread.csv", pd.DataFrame(
+            {"Equity_Bond_Spread": [4.0, 0.5]}, index=days[[0, 3]]))
+        fetcher._save_cache("margin_ratio.csv", pd.DataFrame(
+            {"Margin_Ratio_Pct": [2.7]}, index=days[[0]]))
+        pd.DataFrame({"M1_YoY": [1.0, 2.0], "M1_M2_Gap": [-3.0, -2.0], "DR007": [1.4, 1.6]},
+                     index=pd.to_datetime(["2026-03-31", "2026-04-30"])).to_csv(tmp_path / "china_data.csv")
+        return tmp_path
+
+    def test_aligns_cached_history(self, caches):
+        inputs = china_inputs.china_input_history()
+
+        assert len(inputs) == 5
+        assert list(inputs["equity_bond_spread"]) == [4.0, 4.0, 4.0, 0.5, 0.5]
+        assert inputs["margin_ratio_pct"].tolist() == [2.7] * 5
+        assert inputs["qvix"].isna().all()
+        assert inputs["zt_count"].tolist() == inputs["limit_up_count"].tolist()
+        assert (inputs["m1_yoy"].iloc[0], inputs["m1_yoy_prev"].iloc[0]) == (2.0, 1.0)
+        assert inputs["dr007"].iloc[-1] == 1.6
+
+    def test_backfill_scores_and_writes_range(self, caches):
+        frame = china_inputs.backfill_china_regime(start="2026-05-05")
+
+        assert list(frame.index.strftime("%Y-%m-%d")) == [
+            "2026-05-05", "2026-05-06", "2026-05-07", "2026-05-08"]
+        # 250 limit-ups on 05-05 → TRIGGERED, then the 3-day hold-down
+        assert list(frame["limit_up_heat"]) == ["TRIGGERED", "COOLING", "COOLING", "CLEAR"]
+        assert list(frame["l2_regime"]) == [
+            "SENTIMENT_BULL", "SENTIMENT_BULL", "OVERVALUATION_RISK", "OVERVALUATION_RISK"]
+
+        history = pd.read_csv(caches / "history.csv")
+        assert history["date"].tolist() == list(frame.index.strftime("%Y-%m-%d"))
+        assert history["L3_active_sentinels"].iloc[0] == "limit_up_heat"
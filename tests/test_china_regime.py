@@ -12,8 +12,11 @@ import tempfile
 from datetime import date, datetime, timezone
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 
+from src.analysis import china_regime
 from src.analysis.china_regime import (
     # Enums
     ChinaL1Regime,
@@ -48,6 +51,10 @@ from src.analysis.china_regime import (
     evaluate_china_sentinels,
     # Envelope
     compute_china_envelope,
+    # Orchestration / replay
+    compute_china_regime,
+    china_regime_frame,
+    write_china_regime_history,
     # State persistence
     load_china_sentinel_state,
     save_china_sentinel_state,
@@ -620,6 +627,89 @@ class TestSentinelStatePersistence:
         assert not state.any_triggered()
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Full-history Replay Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _history_inputs(days: int = 120) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+
+    def sparse(values, p=0.2):
+        values = np.asarray(values, dtype=float)
+        values[rng.random(days) < p] = np.nan
+        return values
+
+    return pd.DataFrame({
+        "dr007": sparse(rng.normal(1.6, 0.2, days)),
+        "omo_rate": np.full(days, 1.5),
+        "m1_yoy": sparse(rng.normal(0, 2, days)),
+        "m1_yoy_prev": sparse(rng.normal(0, 2, days)),
+        "m1_m2_spread": sparse(rng.normal(-1, 2, days)),
+        "m1_m2_spread_prev": sparse(rng.normal(-1, 2, days)),
+        "equity_bond_spread": sparse(rng.normal(3, 1.5, days), 0.4),
+        "csi300_pe_ttm": sparse(rng.normal(13, 3, days)),
+        "cgb10y_yield": sparse(rng.normal(2, 0.3, days)),
+        "margin_ratio_pct": sparse(rng.normal(2, 0.5, days)),
+        "qvix": sparse(rng.normal(22, 8, days)),
+        "northbound_5d_cumulative": sparse(rng.normal(0, 30, days)),
+        "limit_up_count": sparse(rng.integers(0, 260, days), 0.1),
+        "limit_down_count": sparse(rng.integers(0, 70, days), 0.1),
+        "zt_count": sparse(rng.integers(0, 260, days), 0.1),
+        "dt_count": sparse(rng.integers(0, 30, days), 0.1),
+        "southbound_sigma_dev": sparse(rng.normal(0, 1.3, days)),
+        "total_amount": sparse(rng.normal(10000, 3000, days)),
+        "total_amount_ma20": sparse(rng.normal(9000, 500, days)),
+    }, index=pd.bdate_range("2025-01-02", periods=days, name="date"))
+
+
+class TestChinaRegimeFrame:
+    def test_matches_daily_pipeline(self, tmp_path, monkeypatch):
+        """Row t == compute_china_regime on row t's snapshot, sentinels carried from row 0."""
+        monkeypatch.setattr(china_regime, "_SENTINEL_STATE_FILE", tmp_path / "state.json")
+        inputs = _history_inputs()
+        frame = china_regime_frame(inputs)
+
+        for t in range(len(inputs)):
+            snapshot = {k: None if pd.isna(v) else float(v) for k, v in inputs.iloc[t].items()}
+            result = compute_china_regime(ChinaInputData(**snapshot))
+            row = frame.iloc[t]
+            assert row["l1_regime"] == result.layer1.regime.value
+            assert row["l2_regime"] == result.layer2.regime.value
+            assert (row["l2_util_min"], row["l2_util_max"]) == (
+                result.layer2.utilization_min, result.layer2.utilization_max)
+            assert row["l3_active"] == "|".join(result.layer3.triggered_ids())
+            assert (row["target_min"], row["target_max"], row["is_emergency"]) == (
+                result.envelope.target_min, result.envelope.target_max, result.envelope.is_emergency)
+
+    def test_hold_down_sequence(self):
+        """Trigger → COOLING ×2 → CLEAR; a missing count does not trigger."""
+        counts = [250, 100, np.nan, 100, 100]
+        inputs = pd.DataFrame({"limit_up_count": counts},
+                              index=pd.bdate_range("2025-03-03", periods=len(counts)))
+        frame = china_regime_frame(inputs)
+        assert list(frame["limit_up_heat"]) == ["TRIGGERED", "COOLING", "COOLING", "CLEAR", "CLEAR"]
+        assert list(frame["l3_active"]) == ["limit_up_heat"] * 3 + ["", ""]
+
+    def test_history_bulk_write_replaces_range(self, tmp_path, monkeypatch):
+        history_file = tmp_path / "china_regime_history.csv"
+        monkeypatch.setattr(china_regime, "_REGIME_HISTORY_FILE", history_file)
+        pd.DataFrame([
+            {"date": "2024-12-31", "L1_regime": "NEUTRAL", "L2_regime": "NEUTRAL",
+             "L3_active_sentinels": "", "target_min": 30.0, "target_max": 42.0, "csi300_close": None},
+            {"date": "2025-01-10", "L1_regime": "NEUTRAL", "L2_regime": "NEUTRAL",
+             "L3_active_sentinels": "", "target_min": 1.0, "target_max": 2.0, "csi300_close": None},
+        ]).to_csv(history_file, index=False)
+
+        frame = china_regime_frame(_history_inputs(30))
+        write_china_regime_history(frame)
+
+        history = pd.read_csv(history_file)
+        assert len(history) == 31
+        assert history["date"].is_monotonic_increasing and history["date"].is_unique
+        replaced = history.set_index("date").loc["2025-01-10"]
+        assert replaced["target_max"] == frame.loc["2025-01-10", "target_max"]
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Utility Function Tests
 # ──────────────────────────────────────────────────────────────────────────────
@@ -736,6 +826,42 @@ class TestBackfillTrigger:
         assert "margin" not in calls
 
 
+class TestBackfillMerge:
+    """Backfills merge whole batches into the cache (one upsert per dataset)."""
+
+    def test_margin_backfill_joins_total_mv(self, tmp_path, monkeypatch):
+        import pandas as pd
+        import src.data.china_market_fetcher as fetcher
+
+        class FakePro:
+            def margin(self, start_date, end_date, fields):
+                if not start_date.startswith("2024"):
+                    return pd.DataFrame(columns=["trade_date", "rzrqye"])
+                # Two exchanges per day; 20240104 has no total_mv row → skipped
+                return pd.DataFrame({
+                    "trade_date": ["20240102", "20240102", "20240103", "20240104"],
+                    "rzrqye": [1.0e12, 0.5e12, 1.6e12, 1.7e12],
+                })
+
+        monkeypatch.setattr(fetcher, "_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(fetcher, "_get_pro", lambda: FakePro())
+        mv = pd.DataFrame(
+            {"Total_MV_Yi": [750000.0, 800000.0]},
+            index=pd.to_datetime(["2024-01-02", "2024-01-03"]),
+        )
+        fetcher._save_cache("total_mv_daily.csv", mv)
+        stale = pd.DataFrame({"Margin_Ratio_Pct": [9.9]}, index=pd.to_datetime(["2024-01-03"]))
+        fetcher._save_cache("margin_ratio.csv", stale)
+
+        fetcher._backfill_margin_ratio(date(2024, 1, 1))
+        cache = fetcher._load_cache("margin_ratio.csv")
+
+        assert list(cache.index.strftime("%Y-%m-%d")) == ["2024-01-02", "2024-01-03"]
+        assert cache.loc["2024-01-02", "Margin_Balance_Yi"] == pytest.approx(15000.0)
+        assert cache.loc["2024-01-02", "Margin_Ratio_Pct"] == pytest.approx(2.0)
+        assert cache.loc["2024-01-03", "Margin_Ratio_Pct"] == pytest.approx(2.0)
+
+
 # ── Distance Card Logic Tests ─────────────────────────────────────────────────
 
 class TestBullDistanceCards:
@@ -0,0 +1,168 @@
+"""
+Tests for the constituent-level S&P 500 breadth engine (src/data/constituent_breadth.py).
+
+Downloads are replaced by slices of a synthetic closes panel; no network.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import bar_store
+from src.data import constituent_breadth as cb
+
+TICKERS = [f"T{i:02d}" for i in range(8)]
+
+
+def _panel(rows=700, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=rows)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (rows, len(TICKERS))), axis=0))
+    panel = pd.DataFrame(closes, index=dates, columns=TICKERS)
+    panel.iloc[:250, 5] = np.nan          # listed later
+    panel.iloc[300:310, 2] = np.nan       # trading halt
+    return panel
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+    monkeypatch.setattr(cb, "_CONSTITUENTS_FILE", tmp_path / "sp500_constituents.csv")
+    return bar_store.get_bar_store()
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    """Serve batches from a synthetic panel cut at `state['today']`; records every call."""
+    state = {"panel": _panel(), "today": None, "calls": []}
+
+    def download(tickers, start):
+        state["calls"].append((list(tickers), start))
+        panel = state["panel"].loc[pd.Timestamp(start):state["today"], list(tickers)]
+        return panel.dropna(axis=1, how="all")
+
+    monkeypatch.setattr(cb, "_download_closes", download)
+    monkeypatch.setattr(cb, "_BATCH_SIZE", 3)
+    return state
+
+
+class TestClosesPanel:
+    def test_batched_then_incremental(self, store, fake_download):
+        panel = fake_download["panel"]
+        fake_download["today"] = panel.index[600]
+        cb.update_constituent_closes(TICKERS, store, today=panel.index[600].date())
+        assert [len(t) for t, _ in fake_download["calls"]] == [3, 3, 2]
+
+        fake_download["calls"].clear()
+        fake_download["today"] = panel.index[610]
+        stored = cb.update_constituent_closes(TICKERS + ["T99"], store, today=panel.index[610].date())
+        starts = {start for tickers, start in fake_download["calls"] if "T99" not in tickers}
+        assert starts == {(panel.index[600] - timedelta(days=cb._TAIL_OVERLAP_DAYS)).date()}
+        expected = panel.loc[panel.index[610] - timedelta(days=cb._INITIAL_DAYS):panel.index[610]]
+        pd.testing.assert_frame_equal(stored.loc[expected.index[0]:], expected,
+                                      check_freq=False, check_names=False)
+
+    def test_failed_batch_keeps_stored_cells(self, store, fake_download, monkeypatch):
+        panel = fake_download["panel"]
+        fake_download["today"] = panel.index[400]
+        cb.update_constituent_closes(TICKERS, store, today=panel.index[400].date())
+        ok = cb._download_closes
+
+        def flaky(tickers, start):
+            if "T00" in tickers:
+                raise ConnectionError("timeout")
+            return ok(tickers, start)
+
+        monkeypatch.setattr(cb, "_download_closes", flaky)
+        fake_download["today"] = panel.index[405]
+        stored = cb.update_constituent_closes(TICKERS, store, today=panel.index[405].date())
+        assert stored.index[-1] == panel.index[405]
+        assert stored["T00"].loc[:panel.index[400]].notna().sum() > 0
+        assert np.isnan(stored["T00"].iloc[-1]) and stored["T05"].iloc[-1] == panel["T05"].iloc[405]
+
+    def test_split_refetches_ticker_and_recomputes_breadth(self, store, fake_download):
+        panel = fake_download["panel"]
+        fake_download["today"] = panel.index[400]
+        cb.update_constituent_closes(TICKERS, store, today=panel.index[400].date())
+        cb.update_breadth_history(store)
+
+        split = panel.copy()
+        split.loc[:panel.index[398], "T03"] /= 2  # 2:1 split: history restated, last stored bar untouched
+        fake_download.update(panel=split, today=panel.index[405], calls=[])
+        stored = cb.update_constituent_closes(TICKERS, store, today=panel.index[405].date())
+
+        full_start = (panel.index[405] - timedelta(days=cb._INITIAL_DAYS)).date()
+        assert fake_download["calls"][-1] == (["T03"], full_start)
+        pd.testing.assert_series_equal(stored["T03"], split["T03"].loc[:panel.index[405]],
+                                       check_freq=False, check_names=False)
+        assert store.attrs(cb.PANEL_SYMBOL)[cb._RECOMPUTE_FROM] == stored.index[0].strftime("%Y-%m-%d")
+
+        history = cb.update_breadth_history(store)
+        full = cb.compute_breadth_frame(split.loc[:panel.index[405]])
+        pd.testing.assert_frame_equal(history, full[list(cb.BREADTH_COLUMNS)],
+                                      check_freq=False, check_names=False)
+        assert cb._RECOMPUTE_FROM not in store.attrs(cb.PANEL_SYMBOL)
+
+    def test_added_constituent_recomputes_breadth(self, store, fake_download):
+        panel = fake_download["panel"]
+        fake_download["today"] = panel.index[400]
+        cb.update_constituent_closes(TICKERS, store, today=panel.index[400].date())
+        cb.update_breadth_history(store)
+
+        grown = panel.assign(T99=panel["T01"] * 1.1)
+        fake_download.update(panel=grown, today=panel.index[405])
+        stored = cb.update_constituent_closes(TICKERS + ["T99"], store, today=panel.index[405].date())
+        history = cb.update_breadth_history(store)
+
+        full = cb.compute_breadth_frame(stored.copy())
+        pd.testing.assert_frame_equal(history, full[list(cb.BREADTH_COLUMNS)],
+                                      check_freq=False, check_names=False)
+        assert history["members"].iloc[0] == 8
+
+
+class TestBreadthFrame:
+    def test_counts(self):
+        dates = pd.bdate_range("2024-01-01", periods=300)
+        closes = pd.DataFrame({"UP": np.linspace(10, 40, 300), "DOWN": np.linspace(40, 10, 300),
+                               "FLAT": np.full(300, 20.0)}, index=dates)
+        frame = cb.compute_breadth_frame(closes)
+        last = frame.iloc[-1]
+        assert last["pct_above_20"] == last["pct_above_200"] == pytest.approx(100 / 3)
+        assert (last["new_highs"], last["new_lows"]) == (2, 2)  # FLAT sits at both
+        assert (last["advances"], last["declines"], last["members"]) == (1, 1, 3)
+        assert frame["ad_line"].iloc[-1] == 0
+        assert np.isnan(frame["pct_above_200"].iloc[100])
+
+    def test_ticker_without_a_close_stops_counting(self):
+        dates = pd.bdate_range("2024-01-01", periods=120)
+        closes = pd.DataFrame({"UP": np.linspace(10, 40, 120), "LEFT": np.linspace(40, 10, 120)},
+                              index=dates)
+        closes.iloc[100:, 1] = np.nan  # left the index, history kept in the panel
+        frame = cb.compute_breadth_frame(closes)
+        assert frame["members"].iloc[-1] == 1
+        assert frame["pct_above_50"].iloc[-1] == 100.0
+        assert frame["pct_above_50"].iloc[99] == 50.0
+
+    def test_incremental_matches_full(self, store):
+        panel = _panel()
+        store.write(cb.PANEL_SYMBOL, panel.iloc[:500], kind="panel")
+        cb.update_breadth_history(store)
+        revised = panel.copy()
+        revised.iloc[497, 0] *= 1.05  # a revised bar inside the overlap
+        store.write(cb.PANEL_SYMBOL, revised, kind="panel")
+        incremental = cb.update_breadth_history(store)
+
+        full = cb.compute_breadth_frame(revised)
+        pd.testing.assert_frame_equal(incremental, full[list(cb.BREADTH_COLUMNS)],
+                                      check_freq=False, check_names=False)
+
+    def test_as_of_and_stale(self):
+        history = pd.DataFrame({"pct_above_50": [40.0, np.nan]},
+                               index=pd.to_datetime(["2024-03-01", "2024-03-04"]))
+        assert cb.breadth_as_of(history, "2024-03-02") == 40.0
+        assert cb.breadth_as_of(history, "2024-03-05") is None
+        assert cb.breadth_as_of(history, "2024-02-29") is None
+        assert cb.breadth_as_of(history, "2024-03-20", max_stale_days=5) is None
+
@@ -0,0 +1,110 @@
+"""
+Unit tests for FredClient's per-series cache — full pull, vintage-gated
+skips, trailing-window re-pulls and revision fallback. No network.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from src.data import fred_client as fc
+from src.data.fred_client import FredClient
+from src.data.network_executor import get_executor
+
+
+class FakeFredApi:
+    def __init__(self, data: dict[str, pd.Series]) -> None:
+        self.data = data
+        self.vintage = {sid: "2026-05-01 15:00:00-05" for sid in data}
+        self.requests: list[tuple[str, str | None]] = []
+
+    def get_series(self, series_id: str, observation_start: str | None = None) -> pd.Series:
+        self.requests.append((series_id, observation_start))
+        s = self.data[series_id]
+        return s[s.index >= pd.Timestamp(observation_start)] if observation_start else s
+
+    def get_series_info(self, series_id: str) -> dict:
+        return {"last_updated": self.vintage[series_id]}
+
+
+def _weekly(n: int, start: float = 7000.0) -> pd.Series:
+    idx = pd.date_range("2025-01-01", periods=n, freq="W-WED")
+    return pd.Series([start + i for i in range(n)], index=idx, dtype=float)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(fc, "_RECHECK_S", 0)
+    c = FredClient(cache_dir=tmp_path)
+    c.fred = FakeFredApi({sid: _weekly(60) for sid in fc.LIQUIDITY_SERIES.values()})
+    return c
+
+
+class TestSeriesCache:
+    def test_unchanged_vintage_skips_data_request(self, client):
+        client.get_cached_series("WALCL", "2025-01-01")
+        client.fred.requests.clear()
+        s = client.get_cached_series("WALCL", "2025-01-01")
+        assert client.fred.requests == []
+        assert len(s) == 60
+
+    def test_new_vintage_pulls_only_trailing_window(self, client):
+        client.get_cached_series("WALCL", "2025-01-01")
+        api = client.fred
+        new_date = api.data["WALCL"].index[-1] + pd.Timedelta(days=7)
+        api.data["WALCL"] = pd.concat([api.data["WALCL"], pd.Series([9999.0], index=[new_date])])
+        api.data["WALCL"].iloc[-2] += 5.0          # recent revision inside the window
+        api.vintage["WALCL"] = "2026-05-08 15:00:00-05"
+        api.requests.clear()
+
+        s = client.get_cached_series("WALCL", "2025-01-01")
+        (sid, start), = api.requests
+        assert sid == "WALCL" and pd.Timestamp(start) > pd.Timestamp("2025-12-01")
+        assert s.iloc[-1] == 9999.0
+        assert s.iloc[-2] == api.data["WALCL"].iloc[-2]
+        assert len(s) == 61
+
+    def test_revision_reaching_past_window_repulls_full(self, client):
+        client.get_cached_series("WALCL", "2025-01-01")
+        api = client.fred
+        api.data["WALCL"] = api.data["WALCL"] + 1.0   # whole history revised
+        api.vintage["WALCL"] = "2026-05-08 15:00:00-05"
+        api.requests.clear()
+
+        s = client.get_cached_series("WALCL", "2025-01-01")
+        assert api.requests[-1] == ("WALCL", "2025-01-01")
+        assert list(s) == list(api.data["WALCL"])
+
+    def test_earlier_start_than_cached_repulls_full(self, client):
+        client.get_cached_series("SOFR", "2025-06-01")
+        client.fred.requests.clear()
+        client.get_cached_series("SOFR", "2025-01-01")
+        assert client.fred.requests == [("SOFR", "2025-01-01")]
+
+    def test_fred_error_returns_cached(self, client):
+        client.get_cached_series("WTREGEN", "2025-01-01")
+
+        def _down(series_id):
+            raise ConnectionError("FRED unavailable")
+
+        client.fred.get_series_info = _down
+        assert len(client.get_cached_series("WTREGEN", "2025-01-01")) == 60
+
+
+class TestLiquidityData:
+    def test_combines_series_daily_with_vintage(self, client):
+        df = client.get_liquidity_data("2025-01-01")
+        assert list(df.columns) == ["WALCL", "RRP", "TGA", "SOFR"]
+        assert (df.index[1] - df.index[0]) == pd.Timedelta(days=1)
+        assert df.attrs["fred_vintage"]["WALCL"] == "2026-05-01 15:00:00-05"
+
+    def test_fetches_run_on_shared_executor(self, client):
+        before = get_executor().metrics().get("fred", {}).get("completed", 0)
+        client.get_liquidity_data("2025-01-01")
+        assert get_executor().metrics()["fred"]["completed"] - before == len(fc.LIQUIDITY_SERIES)
+
+    def test_uncached_series_failure_raises(self, client):
+        del client.fred.data["SOFR"]
+        with pytest.raises(KeyError):
+            client.get_liquidity_data("2025-01-01")
@@ -7,11 +7,13 @@
 
 from __future__ import annotations
 
+import json
+import sqlite3
 from datetime import date
 
 import pytest
 
-from src.ledger import Ledger, Quote, StaticQuoteProvider
+from src.ledger import Ledger, Quote, QuoteRequest, StaticQuoteProvider
 
 
 def make_quotes(prices=None, navs=None, fx=None):
@@ -402,6 +404,7 @@ class TestSnapshotSeries:
         assert len(history) == 1
         assert snap2.total_cny == pytest.approx(2000.0)
         assert history[0].total_cny == pytest.approx(2000.0)
+        assert [p.value_cny for p in history[0].positions] == [pytest.approx(2000.0)]
 
     def test_history_ordered_across_weeks(self, tmp_path):
         ledger = self.fund_only_ledger(tmp_path)
@@ -415,6 +418,32 @@ class TestSnapshotSeries:
         assert [s.week_id for s in history] == ["2026-W33", "2026-W34"]
         assert history[1].total_cny == pytest.approx(1600.0)
 
+    def test_history_keeps_positions_and_exposure_across_instances(self, tmp_path):
+        ledger = self.fund_only_ledger(tmp_path)
+        ledger.record_fund_xray("016532", date(2026, 6, 30), {"US_equity": 0.9, "cash": 0.1})
+        ledger.take_snapshot(
+            as_of=date(2026, 8, 10), quotes=make_quotes(navs={"016532": 1.5}),
+        )
+        taken = ledger.take_snapshot(
+            as_of=date(2026, 8, 17), quotes=make_quotes(navs={"016532": 1.6}),
+        )
+        reopened = Ledger(db_path=tmp_path / "ledger.db")
+        assert reopened.get_snapshot_history()[-1] == taken
+        assert reopened.get_latest_snapshot().market_exposure == pytest.approx(
+            {"US": 1440.0, "CASH": 160.0}
+        )
+
+    def test_summaries_are_totals_without_positions(self, tmp_path):
+        ledger = self.fund_only_ledger(tmp_path)
+        for day, nav in ((10, 1.5), (17, 1.6), (24, 1.4)):
+            ledger.take_snapshot(
+                as_of=date(2026, 8, day), quotes=make_quotes(navs={"016532": nav}),
+            )
+        summaries = ledger.get_snapshot_summaries()
+        assert [s.week_id for s in summaries] == ["2026-W33", "2026-W34", "2026-W35"]
+        assert [s.total_cny for s in summaries] == pytest.approx([1500.0, 1600.0, 1400.0])
+        assert not hasattr(summaries[0], "positions")
+
     def test_goal_progress_annualized_vs_required_line(self, tmp_path):
         """一年 +17.5% → 年化 17.5%，恰好贴在需求线上。"""
         ledger = self.fund_only_ledger(tmp_path)
@@ -469,6 +498,69 @@ class TestSnapshotSeries:
         assert not progress.on_track
 
 
+class TestTrendHistory:
+    """逐周走势：单持仓市值、穿透暴露、卫星占比；物化走势表与即时聚合口径一致。"""
+
+    def three_week_ledger(self, tmp_path, weekly_rollup=True):
+        db = tmp_path / "ledger.db"
+        ledger = Ledger(db_path=db, weekly_rollup=weekly_rollup)
+        ledger.import_fund_holdings(fund_payload(), as_of=date(2026, 8, 3))
+        ledger.record_fund_xray("016532", date(2026, 6, 30), {"HK_equity": 0.5, "bond": 0.5})
+        ledger.set_theme_mapping("fund", "CN", "016532", "港股科技", is_satellite=True)
+        ledger.upsert_cash_account(
+            account="人民币现金", currency="CNY", balance=1000.0, as_of=date(2026, 8, 3),
+        )
+        ledger.take_snapshot(as_of=date(2026, 8, 10), quotes=make_quotes(navs={"016532": 1.0}))
+        ledger.take_snapshot(as_of=date(2026, 8, 17), quotes=make_quotes(navs={"016532": 2.0}))
+        ledger.import_fund_holdings(fund_payload(shares=0.0), as_of=date(2026, 8, 20))
+        ledger.take_snapshot(as_of=date(2026, 8, 24), quotes=make_quotes(navs={"016532": 2.0}))
+        return ledger
+
+    def test_position_history_includes_weeks_not_held(self, tmp_path):
+        ledger = self.three_week_ledger(tmp_path)
+        history = ledger.position_history("fund", "016532")
+        assert [p.week_id for p in history] == ["2026-W33", "2026-W34", "2026-W35"]
+        assert [p.value_cny for p in history] == pytest.approx([1000.0, 2000.0, 0.0])
+        assert history[1].share == pytest.approx(2000.0 / 3000.0)
+        assert [p.week_id for p in ledger.position_history("fund", "016532", weeks=2)] == [
+            "2026-W34", "2026-W35",
+        ]
+
+    @pytest.mark.parametrize("weekly_rollup", [True, False])
+    def test_exposure_and_satellite_history(self, tmp_path, weekly_rollup):
+        ledger = self.three_week_ledger(tmp_path, weekly_rollup=weekly_rollup)
+        hk = ledger.exposure_history("HK")
+        assert [p.value_cny for p in hk] == pytest.approx([500.0, 1000.0, 0.0])
+        assert [p.share for p in ledger.exposure_history("CASH")] == pytest.approx(
+            [0.5, 1000.0 / 3000.0, 1.0]
+        )
+        satellite = ledger.satellite_history()
+        assert [p.value_cny for p in satellite] == pytest.approx([500.0, 1000.0, 0.0])
+
+    def test_trend_is_one_query(self, tmp_path):
+        ledger = self.three_week_ledger(tmp_path)
+        statements = []
+        ledger._conn.set_trace_callback(statements.append)
+        trend = ledger.get_weekly_trend(weeks=52)
+        ledger._conn.set_trace_callback(None)
+        assert len(statements) == 1
+        assert [w.total_cny for w in trend] == pytest.approx([2000.0, 3000.0, 1000.0])
+        assert trend[0].market_exposure["BOND"] == pytest.approx(500.0)
+        assert trend[0].market_exposure["US"] == 0.0
+
+    def test_rollup_catches_up_after_running_without_it(self, tmp_path):
+        self.three_week_ledger(tmp_path, weekly_rollup=False)
+        with_rollup = Ledger(db_path=tmp_path / "ledger.db").get_weekly_trend()
+        without = Ledger(db_path=tmp_path / "ledger.db", weekly_rollup=False).get_weekly_trend()
+        assert with_rollup == without
+        assert len(with_rollup) == 3
+
+    def test_unknown_exposure_category_rejected(self, tmp_path):
+        ledger = Ledger(db_path=tmp_path / "ledger.db")
+        with pytest.raises(ValueError):
+            ledger.exposure_history("JP")
+
+
 def write_baseline(tmp_path, content):
     path = tmp_path / "baseline.yaml"
     path.write_text(content, encoding="utf-8")
@@ -603,6 +695,161 @@ class TestPersistenceAcrossInstances:
         )
         assert snap.total_cny == pytest.approx(50000.0)
 
+    def test_legacy_json_snapshots_readable_after_upgrade(self, tmp_path):
+        """旧版账本文件把快照明细存为 JSON；升级后历史照常可读、可续写。"""
+        db = tmp_path / "ledger.db"
+        payload = {
+            "positions": [{
+                "asset_type": "cash", "market": "CN", "symbol": "人民币现金", "name": "人民币现金",
+                "quantity": 50000.0, "currency": "CNY", "price": 1.0, "value_cny": 50000.0,
+                "stale": False, "xray_as_of": None,
+            }],
+            "market_exposure": {"CASH": 50000.0},
+            "satellite_cny": 0.0,
+            "satellite_ratio": 0.0,
+        }
+        legacy = sqlite3.connect(db)
+        legacy.execute(
+            "CREATE TABLE snapshots (id INTEGER PRIMARY KEY, week_id TEXT NOT NULL UNIQUE,"
+            " as_of TEXT NOT NULL, total_cny REAL NOT NULL, stale INTEGER NOT NULL DEFAULT 0,"
+            " payload TEXT NOT NULL)"
+        )
+        legacy.execute(
+            "INSERT INTO snapshots (week_id, as_of, total_cny, stale, payload)"
+            " VALUES ('2026-W33', '2026-08-10', 50000.0, 0, ?)",
+            (json.dumps(payload, ensure_ascii=False),),
+        )
+        legacy.commit()
+        legacy.close()
+
+        ledger = Ledger(db_path=db)
+        (snap,) = ledger.get_snapshot_history()
+        assert snap.positions[0].value_cny == pytest.approx(50000.0)
+        assert snap.market_exposure == {"CASH": 50000.0}
+        ledger.upsert_cash_account(
+            account="人民币现金", currency="CNY", balance=60000.0, as_of=date(2026, 8, 17),
+        )
+        ledger.take_snapshot(as_of=date(2026, 8, 17), quotes=make_quotes())
+        assert ledger.get_goal_progress().total_return == pytest.approx(0.2)
+
+
+class TestSnapshotAtScale:
+    """快照估值为集合查询：读库语句数不随持仓数增长，写入单事务提交。"""
+
+    def many_funds_ledger(self, tmp_path, n):
+        ledger = Ledger(db_path=tmp_path / f"ledger_{n}.db")
+        funds = [
+            {"code": f"F{i:04d}", "name": f"基金{i}", "shares": 100.0, "nav": 1.0,
+             "currency": "USD" if i % 2 else "CNY", "market": "US" if i % 2 else "CN"}
+            for i in range(n)
+        ]
+        ledger.import_fund_holdings({"schema_version": 1, "funds": funds}, as_of=date(2026, 8, 10))
+        for i in range(0, n, 3):
+            ledger.record_fund_xray(f"F{i:04d}", date(2026, 6, 30), {"US_equity": 0.8, "cash": 0.2})
+            ledger.set_theme_mapping("fund", "US" if i % 2 else "CN", f"F{i:04d}", "主线", is_satellite=True)
+        return ledger
+
+    def count_statements(self, ledger, as_of):
+        statements = []
+        ledger._conn.set_trace_callback(statements.append)
+        snap = ledger.take_snapshot(as_of=as_of, quotes=make_quotes(fx={"USD": 7.0}))
+        ledger._conn.set_trace_callback(None)
+        reads = sum(1 for sql in statements if sql.lstrip().upper().startswith("SELECT"))
+        commits = sum(1 for sql in statements if sql.strip().upper() == "COMMIT")
+        return snap, reads, commits
+
+    def test_statement_count_independent_of_holdings(self, tmp_path):
+        _, small_reads, _ = self.count_statements(self.many_funds_ledger(tmp_path, 6), date(2026, 8, 10))
+        large, large_reads, commits = self.count_statements(
+            self.many_funds_ledger(tmp_path, 300), date(2026, 8, 10)
+        )
+        assert large_reads == small_reads
+        assert commits == 1
+        assert large.total_cny == pytest.approx(150 * 100.0 + 150 * 700.0)
+        # 1/3 基金为卫星，按 80% 权益暴露折算
+        satellite = sum(
+            p.value_cny * 0.8 for i, p in enumerate(large.positions) if i % 3 == 0
+        )
+        assert large.satellite_cny == pytest.approx(satellite)
+
+    def test_batched_prices_survive_new_instance(self, tmp_path):
+        db = tmp_path / "ledger.db"
+        ledger = Ledger(db_path=db)
+        ledger.upsert_stock_holding(
+            market="US", symbol="AAPL", name="Apple", shares=10, currency="USD",
+            as_of=date(2026, 8, 10),
+        )
+        ledger.take_snapshot(
+            as_of=date(2026, 8, 10), quotes=make_quotes(prices={"AAPL": 100.0}, fx={"USD": 7.0}),
+        )
+        # 报价源整体失效：沿用上次快照批量写入的股价与汇率
+        snap = Ledger(db_path=db).take_snapshot(as_of=date(2026, 8, 12), quotes=make_quotes())
+        assert snap.total_cny == pytest.approx(7000.0)
+        assert not snap.stale
+
+    def test_stale_fx_quote_marks_position_stale_and_keeps_last_rate(self, tmp_path):
+        class StaleFxQuotes(StaticQuoteProvider):
+            def prefetch(self, requests, as_of):
+                resolved = super().prefetch(requests, as_of)
+                resolved[QuoteRequest("fx", "USD")] = Quote(6.5, date(2026, 7, 1), stale=True)
+                return resolved
+
+        db = tmp_path / "ledger.db"
+        ledger = Ledger(db_path=db)
+        ledger.upsert_stock_holding(
+            market="US", symbol="AAPL", name="Apple", shares=10, currency="USD",
+            as_of=date(2026, 8, 10),
+        )
+        ledger.take_snapshot(
+            as_of=date(2026, 8, 10), quotes=make_quotes(prices={"AAPL": 100.0}, fx={"USD": 7.0}),
+        )
+        snap = ledger.take_snapshot(
+            as_of=date(2026, 8, 12), quotes=StaleFxQuotes(prices={"AAPL": 100.0}),
+        )
+        assert snap.stale
+        assert snap.total_cny == pytest.approx(6500.0)
+        # 旧汇率没有被当作当日价写回：报价源失效时沿用的仍是 8/10 的 7.0
+        fallback = Ledger(db_path=db).take_snapshot(
+            as_of=date(2026, 8, 12), quotes=make_quotes(prices={"AAPL": 100.0}),
+        )
+        assert fallback.total_cny == pytest.approx(7000.0)
+
+    def test_quotes_prefetched_in_one_deduplicated_batch(self, tmp_path):
+        batches = []
+
+        class RecordingQuotes(StaticQuoteProvider):
+            def prefetch(self, requests, as_of):
+                batches.append(list(requests))
+                return super().prefetch(batches[-1], as_of)
+
+        ledger = Ledger(db_path=tmp_path / "ledger.db")
+        for symbol in ("AAPL", "MSFT"):
+            ledger.upsert_stock_holding(
+                market="US", symbol=symbol, name=symbol, shares=10, currency="USD",
+                as_of=date(2026, 8, 10),
+            )
+        ledger.upsert_stock_holding(
+            market="HK", symbol="00700", name="腾讯控股", shares=100, currency="HKD",
+            as_of=date(2026, 8, 10),
+        )
+        ledger.upsert_cash_account(
+            account="美元现金", currency="USD", balance=1000.0, as_of=date(2026, 8, 10),
+        )
+        snap = ledger.take_snapshot(
+            as_of=date(2026, 8, 10),
+            quotes=RecordingQuotes(
+                prices={"AAPL": 200.0, "MSFT": 400.0, "00700": 300.0},
+                fx={"USD": 7.0, "HKD": 0.9},
+            ),
+        )
+        assert len(batches) == 1
+        (batch,) = batches
+        assert len(batch) == len(set(batch)) == 5  # 3 只股票 + USD/HKD 各一次
+        assert QuoteRequest("fx", "USD") in batch and QuoteRequest("fx", "HKD") in batch
+        assert snap.total_cny == pytest.approx(
+            (2000.0 + 4000.0 + 1000.0) * 7.0 + 30000.0 * 0.9
+        )
+
 
 class TestAllocationDetail:
     """配置明细只读视图：供用户 review 穿透分类与卫星标签。"""
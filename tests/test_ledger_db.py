@@ -0,0 +1,98 @@
+"""
+Unit tests for src/ledger/db — connection manager: WAL, schema versioning
+(migrations run once per database file), read-only connections and the
+per-process connection pool. Ledger behaviour itself lives in test_ledger.py.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+
+import pytest
+
+from src.ledger import Ledger, StaticQuoteProvider
+from src.ledger import db
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    db.close_connections()
+    yield
+    db.close_connections()
+
+
+def _cash_ledger(path, balance=1000.0, as_of=date(2026, 8, 10)):
+    ledger = Ledger(db_path=path)
+    ledger.upsert_cash_account(account="人民币现金", currency="CNY", balance=balance, as_of=as_of)
+    ledger.take_snapshot(as_of=as_of, quotes=StaticQuoteProvider())
+    return ledger
+
+
+class TestSchemaVersioning:
+    def test_migrations_run_once_per_file(self, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(db, "MIGRATIONS", tuple(
+            (lambda conn, m=m: (calls.append(m.__name__), m(conn))[1]) for m in db.MIGRATIONS
+        ))
+        path = tmp_path / "ledger.db"
+        db.connect(path).close()
+        db.connect(path).close()
+        db.connect(path, read_only=True).close()
+        assert calls == ["_migrate_v1"]
+
+    def test_newer_schema_rejected(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        conn = sqlite3.connect(path)
+        conn.execute(f"PRAGMA user_version = {db.SCHEMA_VERSION + 1}")
+        conn.close()
+        with pytest.raises(ValueError):
+            db.connect(path)
+
+    def test_write_connection_uses_wal(self, tmp_path):
+        conn = db.connect(tmp_path / "ledger.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+class TestPool:
+    def test_same_file_and_mode_share_one_connection(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        assert db.get_connection(path) is db.get_connection(str(path))
+        assert db.get_connection(path, read_only=True) is not db.get_connection(path)
+
+
+class TestReadOnly:
+    def test_reader_sees_new_snapshots_and_cannot_write(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        writer = _cash_ledger(path)
+        reader = Ledger(db_path=path, read_only=True)
+        assert reader.get_latest_snapshot().total_cny == pytest.approx(1000.0)
+
+        writer.upsert_cash_account(
+            account="人民币现金", currency="CNY", balance=1500.0, as_of=date(2026, 8, 17),
+        )
+        writer.take_snapshot(as_of=date(2026, 8, 17), quotes=StaticQuoteProvider())
+        assert [w.total_cny for w in reader.get_weekly_trend()] == pytest.approx([1000.0, 1500.0])
+        with pytest.raises(sqlite3.OperationalError):
+            reader.upsert_cash_account(
+                account="人民币现金", currency="CNY", balance=1.0, as_of=date(2026, 8, 18),
+            )
+
+    def test_reader_not_blocked_by_open_write_transaction(self, tmp_path):
+        path = tmp_path / "ledger.db"
+        _cash_ledger(path)
+        job = sqlite3.connect(path, timeout=0)
+        job.execute("BEGIN EXCLUSIVE")  # 模拟 job 正在写快照
+        try:
+            reader = Ledger(db_path=path, read_only=True)
+            assert reader.get_goal_progress() is None
+            assert reader.get_latest_snapshot().total_cny == pytest.approx(1000.0)
+        finally:
+            job.rollback()
+            job.close()
+
+    def test_reader_on_missing_file_creates_current_schema(self, tmp_path):
+        reader = Ledger(db_path=tmp_path / "ledger.db", read_only=True)
+        assert reader.get_latest_snapshot() is None
+        assert reader.get_weekly_trend() == []
@@ -0,0 +1,120 @@
+"""
+Unit tests for DataLoader.fetch_all_data incremental refresh — tail-only
+requests, merge into the raw cache, and full-refresh fallback on revisions.
+No network: FRED and Yahoo clients are replaced with fakes.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.data.loader import DataLoader, _find_revisions
+
+
+def _days(n: int, end: pd.Timestamp) -> pd.DatetimeIndex:
+    return pd.date_range(end=end, periods=n, freq="D")
+
+
+class FakeFred:
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.starts: list[str | None] = []
+
+    def get_liquidity_data(self, start_date: str | None = None) -> pd.DataFrame:
+        self.starts.append(start_date)
+        return self.frame[self.frame.index >= pd.Timestamp(start_date)] if start_date else self.frame
+
+
+class FakeMarket:
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.calls: list[dict] = []
+
+    def get_market_data(self, period: str = "1y", start: str | None = None) -> pd.DataFrame:
+        self.calls.append({"period": period, "start": start})
+        if start:
+            return self.frame[self.frame.index >= pd.Timestamp(start)]
+        return self.frame.iloc[-365:] if period == "1y" else self.frame
+
+
+@pytest.fixture
+def loader(tmp_path):
+    dl = DataLoader(data_dir=str(tmp_path))
+    today = pd.Timestamp(datetime.now().date())
+    idx = _days(420, today)
+    fred = pd.DataFrame({"WALCL": range(420), "RRP": 1.0}, index=idx, dtype=float)
+    market = pd.DataFrame({"SPY": [500.0 + i for i in range(420)]}, index=idx)
+    dl.fred_client = FakeFred(fred)
+    dl.market_client = FakeMarket(market)
+    return dl
+
+
+def _age_cache(data_dir: str) -> None:
+    """Make macro_data.csv look like it was written yesterday."""
+    path = os.path.join(data_dir, "macro_data.csv")
+    old = (datetime.now() - timedelta(days=1)).timestamp()
+    os.utime(path, (old, old))
+
+
+class TestIncrementalMacroRefresh:
+    def test_second_refresh_requests_only_the_tail(self, loader):
+        loader.fetch_all_data(365)
+        assert loader.market_client.calls[-1]["start"] is None
+
+        # One more day of data arrives
+        tomorrow = loader.fred_client.frame.index[-1] + pd.Timedelta(days=1)
+        loader.fred_client.frame.loc[tomorrow] = [999.0, 1.0]
+        loader.market_client.frame.loc[tomorrow] = [1234.0]
+        _age_cache(loader.data_dir)
+
+        df = loader.fetch_all_data(365)
+        tail_start = pd.Timestamp(loader.market_client.calls[-1]["start"])
+        assert (tomorrow - tail_start).days <= 15
+        assert df.index[-1] == tomorrow
+        assert df["SPY"].iloc[-1] == 1234.0
+        assert df["WALCL"].iloc[-1] == 999.0
+
+    def test_revised_history_triggers_full_refresh(self, loader):
+        loader.fetch_all_data(365)
+        # Split-adjust SPY history inside the checked part of the overlap
+        loader.market_client.frame["SPY"] = loader.market_client.frame["SPY"] / 2
+        _age_cache(loader.data_dir)
+
+        df = loader.fetch_all_data(365)
+        # Incremental attempt, then a full re-download (period=, no start=)
+        assert loader.market_client.calls[-2]["start"] is not None
+        assert loader.market_client.calls[-1]["start"] is None
+        assert df["SPY"].iloc[0] == pytest.approx(loader.market_client.frame["SPY"].loc[df.index[0]])
+
+    def test_incremental_disabled_refetches_in_full(self, loader):
+        loader.fetch_all_data(365)
+        _age_cache(loader.data_dir)
+        loader.fetch_all_data(365, incremental=False)
+        assert loader.market_client.calls[-1]["start"] is None
+
+    def test_longer_window_than_cache_refetches_in_full(self, loader):
+        loader.fetch_all_data(90)
+        _age_cache(loader.data_dir)
+        loader.fetch_all_data(365)
+        assert loader.market_client.calls[-1]["start"] is None
+
+
+class TestFindRevisions:
+    def test_volatile_tail_is_ignored(self):
+        idx = _days(10, pd.Timestamp("2026-05-10"))
+        cached = pd.DataFrame({"SPY": range(10)}, index=idx, dtype=float)
+        fresh = cached.copy()
+        fresh.iloc[-1, 0] = 42.0   # partial intraday bar replaced
+        assert _find_revisions(cached, fresh, idx[-2]) == []
+        fresh.iloc[0, 0] = 42.0
+        assert _find_revisions(cached, fresh, idx[-2]) == ["SPY"]
+
+    def test_missing_fresh_values_are_not_revisions(self):
+        idx = _days(3, pd.Timestamp("2026-05-10"))
+        cached = pd.DataFrame({"BTC": [1.0, 2.0, 3.0]}, index=idx)
+        fresh = pd.DataFrame({"BTC": [1.0, None, 3.0]}, index=idx)
+        assert _find_revisions(cached, fresh, idx[-1]) == []
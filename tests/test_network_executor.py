@@ -0,0 +1,114 @@
+"""
+Unit tests for src/data/network_executor.py — caller-side timeouts that do not
+wait for the worker, per-endpoint concurrency caps, and metrics bookkeeping.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from src.data.network_executor import NetworkExecutor
+
+
+class TestNetworkExecutor:
+    def test_returns_result_and_counts_completion(self):
+        ex = NetworkExecutor()
+        assert ex.run(lambda: 42, timeout_s=1.0, endpoint="cn_m") == 42
+        m = ex.metrics()["cn_m"]
+        assert m["completed"] == 1 and m["in_flight"] == 0
+
+    def test_exception_propagates_and_counts_failure(self):
+        ex = NetworkExecutor()
+
+        def _boom():
+            raise ValueError("empty response")
+
+        with pytest.raises(ValueError):
+            ex.run(_boom, timeout_s=1.0, endpoint="cn_m")
+        assert ex.metrics()["cn_m"]["failed"] == 1
+
+    def test_timeout_returns_without_waiting_and_abandons(self):
+        ex = NetworkExecutor()
+        release = threading.Event()
+
+        t0 = time.monotonic()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            ex.run(lambda: release.wait(5.0), timeout_s=0.1, endpoint="qvix")
+        assert time.monotonic() - t0 < 1.0
+
+        m = ex.metrics()["qvix"]
+        assert m["timed_out"] == 1
+        assert m["abandoned"] == 1 and m["in_flight"] == 1
+
+        release.set()
+        for _ in range(100):
+            if ex.metrics()["qvix"]["in_flight"] == 0:
+                break
+            time.sleep(0.01)
+        m = ex.metrics()["qvix"]
+        assert m["abandoned"] == 0 and m["in_flight"] == 0
+        assert m["abandoned_total"] == 1
+
+    def test_abandoned_call_holds_endpoint_slot(self):
+        ex = NetworkExecutor(endpoint_concurrency={"stk_limit": 1})
+        release = threading.Event()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            ex.run(lambda: release.wait(5.0), timeout_s=0.05, endpoint="stk_limit")
+
+        # The hung call still occupies the only slot, so the next one times out
+        # waiting for it instead of piling another request onto the endpoint
+        with pytest.raises(concurrent.futures.TimeoutError):
+            ex.run(lambda: 1, timeout_s=0.05, endpoint="stk_limit")
+        # Other endpoints are unaffected
+        assert ex.run(lambda: 2, timeout_s=1.0, endpoint="cn_m") == 2
+
+        release.set()
+        for _ in range(100):
+            if ex.metrics()["stk_limit"]["in_flight"] == 0:
+                break
+            time.sleep(0.01)
+        assert ex.run(lambda: 3, timeout_s=1.0, endpoint="stk_limit") == 3
+        assert ex.metrics()["stk_limit"]["timed_out"] == 2
+
+    def test_workers_are_daemon_threads(self):
+        ex = NetworkExecutor()
+        assert ex.run(lambda: threading.current_thread().daemon, timeout_s=1.0)
+
+    def test_run_many_shares_one_deadline(self):
+        ex = NetworkExecutor(endpoint_concurrency={"batch": 2})
+        release = threading.Event()
+
+        def _boom():
+            raise ValueError("bad ticker")
+
+        t0 = time.monotonic()
+        out = ex.run_many(
+            {"a": lambda: 1, "hang": lambda: release.wait(5.0), "b": _boom, "c": lambda: 3},
+            timeout_s=0.2, endpoint="batch",
+        )
+        assert time.monotonic() - t0 < 1.0
+        assert list(out) == ["a", "hang", "b", "c"]
+        assert out["a"] == 1 and out["c"] == 3
+        assert isinstance(out["b"], ValueError)
+        assert isinstance(out["hang"], concurrent.futures.TimeoutError)
+        m = ex.metrics()["batch"]
+        assert (m["completed"], m["failed"], m["timed_out"], m["abandoned"]) == (2, 1, 1, 1)
+        release.set()
+
+    def test_run_many_reports_each_call_as_it_settles(self):
+        ex = NetworkExecutor()
+        release = threading.Event()
+        seen: list[tuple[str, object, str]] = []
+        out = ex.run_many(
+            {"slow": lambda: release.wait(5.0), "fast": lambda: 1},
+            timeout_s=0.2, endpoint="batch",
+            on_settle=lambda key, value: seen.append((key, value, threading.current_thread().name)),
+        )
+        release.set()
+        assert [key for key, _, _ in seen] == ["fast", "slow"]
+        assert seen[0][1] == 1 and seen[1][1] is out["slow"]
+        assert {name for _, _, name in seen} == {threading.current_thread().name}
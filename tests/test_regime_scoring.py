@@ -12,15 +12,23 @@ import pytest
 from src.regime.config import load_config
 from src.regime.layer1 import compute_layer1
 from src.regime.layer2 import compute_layer2
+from src.regime import layer3
 from src.regime.layer3 import compute_layer3, _save_state, _load_state
 from src.regime.envelope import compute_envelope
+from src.regime.features import FeatureCache
+from src.regime.config import build_config, load_raw_config
+from src.regime.replay import replay_regime
+from src.regime.sensitivity import envelope_metrics, parameter_sensitivity, run_sensitivity, with_overrides
 from src.regime.models import (
     L1Regime, L2Regime, SentinelStatus, EnvelopeMode,
     Layer1Result, Layer2Result, Layer3Result, SentinelState, RegimeResult,
 )
 from src.portfolio.models import Holding
 from src.portfolio.advisor import compute_advisory
-from src.data.breadth import compute_s5fi
+from src.data import bar_store, constituent_breadth
+from src.data.breadth import compute_s5fi, compute_s5fi_series
+from src.regime import engine as regime_engine
+from src.regime.engine import RegimeEngine
 
 
 @pytest.fixture
@@ -211,6 +219,14 @@ class TestLayer3:
         for s in result.sentinels:
             assert s.status == SentinelStatus.CLEAR
 
+    def test_legacy_json_only_imported_into_shared_table(self, tmp_path, monkeypatch):
+        """A redirected state table (tests, replays) never picks up the legacy JSON."""
+        legacy = tmp_path / "sentinel_state.json"
+        legacy.write_text(json.dumps({"vix_spike": {"status": "TRIGGERED", "trigger_timestamp": "t"}}))
+        monkeypatch.setattr(layer3, "_LEGACY_STATE_FILE", legacy)
+        monkeypatch.setattr(layer3, "_STATE_FILE", tmp_path / "sentinel_state.csv")
+        assert not _load_state().status.any()
+
 
 # ============================================================
 # Envelope Tests
@@ -277,6 +293,215 @@ class TestS5FI:
         assert result == 50.0
 
 
+    def test_series_matches_scalar_per_row(self):
+        """compute_s5fi_series row t == compute_s5fi on the first t+1 rows."""
+        rng = np.random.default_rng(3)
+        dates = pd.date_range("2024-01-01", periods=80, freq="B")
+        df = pd.DataFrame(
+            {etf: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 80))) for etf in ["XLK", "XLF", "XLE"]},
+            index=dates,
+        )
+        df.iloc[::9, 1] = np.nan
+        weights = {"XLK": 0.3, "XLF": 0.13, "XLE": 0.04}
+        series = compute_s5fi_series(df, weights, 50.0)
+        for t in range(len(df)):
+            assert series.iloc[t] == compute_s5fi(df.iloc[:t + 1], weights, 50.0)
+
+
+# ============================================================
+# Historical Replay Tests
+# ============================================================
+
+def _replay_df(days=160):
+    """Noisy market frame with a VIX spike and recovery, plus gaps."""
+    rng = np.random.default_rng(7)
+    x = np.arange(days)
+    walk = lambda base, vol: base * np.exp(np.cumsum(rng.normal(0, vol, days)))
+    vix = np.where((x > 90) & (x < 100), 40.0, 16.0) + rng.normal(0, 1, days)
+    df = _make_df(
+        days,
+        **{
+            "Net Liquidity": 5800 * np.exp(np.cumsum(0.004 * np.sin(x / 20))),
+            "TGA": walk(500, 0.03),
+            "SOFR": 4.5 - 0.002 * x,
+            "SPX": walk(5000, 0.012),
+            "VIX": vix,
+            "MOVE": 100 + 20 * np.sin(x / 15),
+            "JNK": walk(90, 0.006),
+            "HYG": walk(70, 0.006),
+            "DXY": walk(104, 0.005),
+            "GOLD": walk(1900, 0.01),
+        },
+    )
+    df.iloc[::11, df.columns.get_loc("TGA")] = np.nan
+    df.iloc[5::13, df.columns.get_loc("JNK")] = np.nan
+    return df
+
+
+class TestReplay:
+    @pytest.fixture(autouse=True)
+    def _history(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(regime_engine, "_HISTORY_FILE", tmp_path / "regime_history.csv")
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+        self.history = tmp_path / "regime_history.csv"
+
+    def test_matches_daily_scoring(self, config, tmp_path):
+        """Every replayed day equals L1/L2/L3/envelope run on the data up to that day."""
+        df = _replay_df()
+        replayed = RegimeEngine(config).replay(df, write_history=False)
+        state_path = tmp_path / "sentinel.json"
+
+        for t in range(len(df)):
+            day = df.iloc[:t + 1]
+            l1 = compute_layer1(day, config.layer1)
+            l2 = compute_layer2(day, 50.0, config.layer2)
+            l3 = compute_layer3(day, config.layer3, 50.0, state_path=state_path)
+            env = compute_envelope(l1, l2, l3)
+            row = replayed.iloc[t]
+            assert row["l1_regime"] == l1.regime.value
+            assert row["l2_composite"] == l2.weighted_composite
+            assert row["l3_override"] == l3.override_ceiling_pct
+            assert row["l3_triggered"] == "|".join(
+                s.name for s in l3.sentinels if s.status != SentinelStatus.CLEAR)
+            assert (row["target_min"], row["target_max"], row["mode"]) == (
+                env.target_min, env.target_max, env.mode.value)
+
+        assert "VIX Spike" in replayed["l3_triggered"].iloc[95]
+        assert "VIX Spike" not in replayed["l3_triggered"].iloc[-1]
+
+    def test_range_selection_keeps_warm_state(self, config):
+        """start/end only trim the output; state is carried from the first row."""
+        df = _replay_df()
+        full = RegimeEngine(config).replay(df, write_history=False)
+        start, end = df.index[95], df.index[120]
+        window = RegimeEngine(config).replay(df, start=start, end=end, write_history=False)
+        assert len(window) == 26
+        pd.testing.assert_frame_equal(window, full.loc[start:end])
+
+    def test_history_replaces_range(self, config):
+        """Dense rows replace history rows in the replayed range; others are kept."""
+        df = _replay_df()
+        self.history.write_text(
+            ",".join(regime_engine._HISTORY_COLS) + "\n"
+            + "2000-01-03,NEUTRAL,80,NEUTRAL,50,65,,,40.0,52.0,NORMAL,1000.0\n"
+            + f"{df.index[100]:%Y-%m-%d},NEUTRAL,80,NEUTRAL,50,65,,,40.0,52.0,NORMAL,1.0\n"
+        )
+        RegimeEngine(config).replay(df, start=df.index[60])
+
+        history = pd.read_csv(self.history, dtype=str, keep_default_na=False)
+        assert list(history.columns) == regime_engine._HISTORY_COLS
+        assert len(history) == 1 + len(df) - 60
+        assert history["date"].iloc[0] == "2000-01-03"
+        assert history["date"].is_monotonic_increasing
+        assert history["date"].is_unique
+        replaced = history[history["date"] == f"{df.index[100]:%Y-%m-%d}"].iloc[0]
+        assert replaced["spx_close"] == str(round(df["SPX"].iloc[100], 2))
+
+
+class TestConstituentBreadthFeed:
+    @pytest.fixture(autouse=True)
+    def _isolate(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(regime_engine, "_HISTORY_FILE", tmp_path / "regime_history.csv")
+        monkeypatch.setattr(layer3, "_STATE_FILE", tmp_path / "sentinel_state.csv")
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+        self.store = bar_store.get_bar_store()
+
+    @pytest.fixture
+    def config(self):
+        """Constituent breadth is opt-in; the shipped default stays on sector ETFs."""
+        return build_config(with_overrides(load_raw_config(), {"breadth.source": "constituents"}))
+
+    def _write_breadth(self, df, pct):
+        history = pd.DataFrame({c: 0.0 for c in constituent_breadth.BREADTH_COLUMNS}, index=df.index[-30:])
+        history["pct_above_50"] = pct
+        history.index.name = "date"
+        self.store.write(constituent_breadth.BREADTH_SYMBOL, history, kind="breadth")
+
+    def test_run_scores_constituent_breadth(self, config):
+        df = _replay_df()
+        self._write_breadth(df, 72.0)
+        result = RegimeEngine(config).run(df)
+        breadth = next(i for i in result.layer2.indicators if i.name == "Market Breadth (S5FI)")
+        assert breadth.raw_value == 72.0 and breadth.score == 1
+
+    def test_replay_uses_breadth_where_fresh(self, config):
+        df = _replay_df()
+        self._write_breadth(df, 30.0)
+        replayed = RegimeEngine(config).replay(df, write_history=False)
+        assert (replayed["s5fi"].iloc[-30:] == 30.0).all()
+        assert (replayed["s5fi"].iloc[:-30] == 50.0).all()
+
+
+
+class TestSensitivity:
+    GRID = {"layer1.ceiling_map.neutral": [70, 90],
+            "layer3.vix_spike.trigger_level": [30.0, 35.0, 45.0]}
+
+    def test_variants_match_plain_replay(self):
+        """Variants scored over a shared FeatureCache equal an uncached replay of the same config."""
+        df, raw = _replay_df(), load_raw_config()
+        results = run_sensitivity(df, self.GRID, raw=raw)
+        assert len(results) == 1 + 6
+        assert results.loc["baseline", "layer1.ceiling_map.neutral"] == 80
+
+        for variant, row in results.iloc[[0, 3, 6]].iterrows():
+            overrides = {p: row[p] for p in self.GRID}
+            expected = envelope_metrics(replay_regime(df, None, build_config(with_overrides(raw, overrides))))
+            for name, value in expected.items():
+                assert row[name] == pytest.approx(value, nan_ok=True), (variant, name)
+
+    def test_process_pool_matches_serial(self):
+        df = _replay_df()
+        serial = run_sensitivity(df, self.GRID, start=df.index[60])
+        pooled = run_sensitivity(df, self.GRID, start=df.index[60], workers=2)
+        pd.testing.assert_frame_equal(serial, pooled)
+        assert (serial["days"] == len(df) - 60).all()
+
+    def test_sensitivity_report(self):
+        results = run_sensitivity(_replay_df(), self.GRID)
+        report = parameter_sensitivity(results, self.GRID, "target_mid_mean")
+        assert list(report.index)[0] in self.GRID
+        assert (report["spread"] >= 0).all()
+
+    def test_unknown_path_rejected(self):
+        with pytest.raises(KeyError, match="layer2.indicators.vix_levle"):
+            run_sensitivity(_replay_df(), {"layer2.indicators.vix_levle.weight": [1.0]})
+
+class TestFeatureCache:
+    def test_feature_computed_once(self):
+        df = _replay_df()
+        fc = FeatureCache(df)
+        assert fc.rolling_mean("SPX", 50) is fc.rolling_mean("SPX", 50)
+        assert fc.at(df.index[80]).rolling_mean("SPX", 50).iloc[-1] == fc.rolling_mean("SPX", 50).iloc[80]
+
+    def test_view_matches_fresh_cache(self):
+        """at(day) answers what a cache over df.loc[:day] would."""
+        df = _replay_df()
+        cache = FeatureCache(df)
+        for t in (0, 24, 60, 159):
+            day = df.index[t]
+            view, fresh = cache.at(day), FeatureCache(df.loc[:day])
+            pd.testing.assert_series_equal(view.rolling_mean("JNK", 20), fresh.rolling_mean("JNK", 20),
+                                           check_freq=False)
+            pd.testing.assert_series_equal(view.change_pct("JNK"), fresh.change_pct("JNK"), check_freq=False)
+            pd.testing.assert_frame_equal(view.aligned("GOLD", "SPX"), fresh.aligned("GOLD", "SPX"),
+                                          check_freq=False)
+
+    def test_daily_runs_share_one_cache(self, config, tmp_path):
+        """Layers fed a shared cache's daily views score like layers fed the cut frame."""
+        df = _replay_df()
+        cache = FeatureCache(df)
+        for t in range(40, len(df), 7):
+            day = df.iloc[:t + 1]
+            view = cache.at(df.index[t])
+            assert compute_layer1(view, config.layer1) == compute_layer1(day, config.layer1)
+            assert compute_layer2(view, 55.0, config.layer2) == compute_layer2(day, 55.0, config.layer2)
+            l3_view = compute_layer3(view, config.layer3, 55.0, state_path=tmp_path / "a.csv")
+            l3_day = compute_layer3(day, config.layer3, 55.0, state_path=tmp_path / "b.csv")
+            assert [(s.status, s.display_value) for s in l3_view.sentinels] == \
+                [(s.status, s.display_value) for s in l3_day.sentinels]
+
+
 # ============================================================
 # Position Advisor Tests
 # ============================================================
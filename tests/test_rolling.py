@@ -0,0 +1,62 @@
+"""Unit tests for the cumulative-sum rolling kernels and the breadth series built on them."""
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.rolling import above_rolling_mean, rolling_corr, rolling_sum
+from src.data.breadth import compute_breadth_series
+
+
+def _walks(rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, cols)), axis=0))
+
+
+class TestRollingKernels:
+    def test_rolling_sum(self):
+        out = rolling_sum([1, 2, 3, 4], 3)
+        assert np.isnan(out[:2]).all()
+        assert list(out[2:]) == [6, 9]
+
+    def test_corr_matches_pandas(self):
+        x, y = _walks(800, 2).T
+        expected = pd.Series(x).rolling(30).corr(pd.Series(y)).to_numpy()
+        np.testing.assert_allclose(rolling_corr(x, y, 30), expected, atol=1e-9, equal_nan=True)
+
+    def test_corr_flat_window_is_nan(self):
+        x = np.r_[np.linspace(1, 2, 40), np.full(30, 2.0)]
+        assert np.isnan(rolling_corr(x, np.arange(70.0), 30)[-1])
+
+    def test_corr_prefix_invariant(self):
+        """A live call on data up to t gives row t of the full history exactly."""
+        x, y = _walks(300, 2, seed=1).T
+        full = rolling_corr(x, y, 30)
+        assert rolling_corr(x[:200], y[:200], 30)[-1] == full[199]
+
+    def test_above_mean_skips_nans(self):
+        panel = _walks(200, 20, seed=2)
+        panel[np.random.default_rng(3).random(panel.shape) < 0.1] = np.nan
+        above, eligible = above_rolling_mean(panel, 50)
+        for j in (0, 7, 19):
+            s = pd.Series(panel[:, j]).dropna()
+            hit = (s > s.rolling(50).mean()).to_numpy()
+            count = np.cumsum(~np.isnan(panel[:, j]))
+            np.testing.assert_array_equal(eligible[:, j], count >= 50)
+            np.testing.assert_array_equal(above[:, j], (count >= 50) & hit[np.maximum(count - 1, 0)])
+
+
+class TestBreadthSeries:
+    def test_equal_weight_fraction(self):
+        dates = pd.date_range("2024-01-01", periods=60, freq="B")
+        prices = pd.DataFrame({"UP": np.linspace(100, 120, 60), "DOWN": np.linspace(120, 100, 60),
+                               "NEW": [np.nan] * 30 + list(np.linspace(10, 11, 30))}, index=dates)
+        breadth = compute_breadth_series(prices, fallback_value=42.0)
+        assert breadth.iloc[0] == 42.0
+        assert breadth.iloc[-1] == 50.0
+
+    def test_constituent_panel(self):
+        dates = pd.date_range("2015-01-01", periods=1500, freq="B")
+        prices = pd.DataFrame(_walks(1500, 500, seed=4), index=dates)
+        breadth = compute_breadth_series(prices)
+        assert breadth.between(0, 100).all()
+        assert breadth.iloc[100] == compute_breadth_series(prices.iloc[:101]).iloc[-1]
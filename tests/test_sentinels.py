@@ -0,0 +1,107 @@
+"""
+Tests for the shared array-backed sentinel engine (src/analysis/sentinels.py).
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.analysis import sentinels
+from src.analysis.sentinels import (
+    CLEAR,
+    COOLING,
+    TRIGGERED,
+    SentinelBank,
+    load_sentinel_bank,
+    save_sentinel_bank,
+)
+
+IDS = ("a", "b", "c")
+
+
+def _random_history(seed=0, days=60):
+    rng = np.random.default_rng(seed)
+    trigger = rng.random((days, len(IDS))) < 0.15
+    reset = (rng.random((days, len(IDS))) < 0.7) & ~trigger
+    valid = rng.random((days, len(IDS))) < 0.85
+    return trigger, reset, valid
+
+
+class TestSentinelBank:
+    def test_trigger_then_hold_down(self):
+        history = SentinelBank.clear(["x"]).advance(
+            np.array([[True], [False], [False], [False], [False]]), reset_days=3,
+        )
+        assert list(history.status[:, 0]) == [TRIGGERED, COOLING, COOLING, CLEAR, CLEAR]
+        assert list(history.counter[:, 0]) == [0, 1, 2, 0, 0]
+
+    def test_invalid_days_keep_state(self):
+        trigger = np.array([[True], [False], [False], [False]])
+        valid = np.array([[True], [False], [False], [True]])
+        history = SentinelBank.clear(["x"]).advance(trigger, valid=valid, reset_days=2)
+        assert list(history.status[:, 0]) == [TRIGGERED, TRIGGERED, TRIGGERED, COOLING]
+
+    def test_advance_matches_daily_steps(self):
+        """One vectorized pass equals stepping the same bank one day at a time."""
+        trigger, reset, valid = _random_history()
+        reset_days = np.array([1, 3, 5])
+        times = [f"2024-01-{d:02d}" for d in range(1, len(trigger) + 1)]
+        start = SentinelBank.clear(IDS)
+        start.status[1], start.counter[1], start.trigger_ts[1] = COOLING, 2, "2023-12-29"
+
+        history = start.advance(trigger, reset, valid, reset_days, times=times)
+
+        bank = start
+        for t in range(len(trigger)):
+            bank = bank.step(trigger[t], reset[t], valid[t], reset_days, now=times[t])
+            np.testing.assert_array_equal(bank.status, history.status[t])
+            np.testing.assert_array_equal(bank.counter, history.counter[t])
+            assert list(bank.trigger_ts) == list(history.trigger_ts[t])
+
+    def test_trigger_timestamp_kept_until_clear(self):
+        trigger = np.array([[True], [True], [False], [False]])
+        history = SentinelBank.clear(["x"]).advance(trigger, reset_days=2, times=["d0", "d1", "d2", "d3"])
+        assert list(history.trigger_ts[:, 0]) == ["d0", "d0", "d0", None]
+
+
+class TestStateTable:
+    def test_stacks_share_one_table(self, tmp_path):
+        path = tmp_path / "sentinel_state.csv"
+        us = SentinelBank.clear(IDS).step([True, False, False], now="2024-03-01T00:00:00+00:00")
+        china = SentinelBank.clear(["x"]).step([True])
+        save_sentinel_bank("us", us, path)
+        save_sentinel_bank("china", china, path)
+        save_sentinel_bank("china", SentinelBank.clear(["x"]), path)
+
+        loaded = load_sentinel_bank("us", IDS, path)
+        assert loaded.status_value("a") == "TRIGGERED"
+        assert loaded.trigger_ts[0] == "2024-03-01T00:00:00+00:00"
+        assert load_sentinel_bank("china", ["x"], path).status_value("x") == "CLEAR"
+
+    def test_concurrent_stacks_keep_each_others_rows(self, tmp_path, monkeypatch):
+        path = tmp_path / "sentinel_state.csv"
+        read = sentinels._read_table
+        # widen the read-modify-write window so unlocked writers would overwrite each other
+        monkeypatch.setattr(sentinels, "_read_table", lambda p: (read(p), time.sleep(0.05))[0])
+        stacks = [f"s{i}" for i in range(4)]
+        triggered = SentinelBank.clear(["x"]).step([True])
+        with ThreadPoolExecutor(max_workers=len(stacks)) as pool:
+            list(pool.map(lambda st: save_sentinel_bank(st, triggered, path), stacks))
+
+        assert all(load_sentinel_bank(st, ["x"], path).status_value("x") == "TRIGGERED" for st in stacks)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["sentinel_state.csv", "sentinel_state.csv.lock"]
+
+    def test_legacy_json_imported(self, tmp_path):
+        legacy = tmp_path / "sentinel_state.json"
+        legacy.write_text(json.dumps({"b": {"status": "COOLING", "trigger_timestamp": "t", "cooling_days": 2}}))
+        bank = load_sentinel_bank("us", IDS, tmp_path / "missing.csv", legacy_path=legacy)
+        assert bank.status_value("b") == "COOLING"
+        assert bank.counter[bank.index("b")] == 2
+
+    def test_corrupt_table_resets_clear(self, tmp_path):
+        path = tmp_path / "sentinel_state.csv"
+        path.write_text("not,a,state,table\n")
+        bank = load_sentinel_bank("us", IDS, path)
+        assert (bank.status == CLEAR).all()
@@ -0,0 +1,133 @@
+"""
+Unit tests for src/data/stock_daily_fetcher.fetch_daily_bars_bulk — request
+grouping (trade_date slices, range calls, multi-ticker yfinance) and cache
+writes. No network: Tushare and yfinance are replaced with fakes.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from src.data import bar_store
+from src.data import stock_daily_fetcher as sdf
+from src.data.tushare_scheduler import TushareScheduler
+from src.portfolio.stock_pool import StockPoolItem
+
+
+def _item(ticker: str, market: str) -> StockPoolItem:
+    return StockPoolItem(ticker=ticker, name=ticker, market=market, sector="", strategy_type="trending_up", status="watching")
+
+
+def _bars(days: list[date], base: float = 10.0) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {"open": base, "high": base + 1, "low": base - 1, "close": base, "volume": 1000.0},
+        index=pd.to_datetime(days),
+    )
+    df.index.name = "date"
+    return df
+
+
+def _weekdays_back(n: int) -> list[date]:
+    days, d = [], date.today()
+    while len(days) < n:
+        d -= timedelta(days=1)
+        if d.weekday() < 5:
+            days.append(d)
+    return sorted(days)
+
+
+class FakePro:
+    def __init__(self, days: list[date]) -> None:
+        self.days = [d.strftime("%Y%m%d") for d in days]
+        self.calls: list[dict] = []
+
+    def trade_cal(self, **kwargs) -> pd.DataFrame:
+        self.calls.append({"api": "trade_cal", **kwargs})
+        return pd.DataFrame({"cal_date": [d for d in self.days if kwargs["start_date"] <= d <= kwargs["end_date"]]})
+
+    def daily(self, **kwargs) -> pd.DataFrame:
+        self.calls.append({"api": "daily", **kwargs})
+        if "trade_date" in kwargs:
+            codes, days = ["600519.SH", "000001.SZ", "300750.SZ"], [kwargs["trade_date"]]
+        else:
+            codes = [kwargs["ts_code"]]
+            days = [d for d in self.days if kwargs["start_date"] <= d <= kwargs["end_date"]]
+        return pd.DataFrame([
+            {"ts_code": c, "trade_date": d, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "vol": 10.0}
+            for c in codes for d in days
+        ])
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setattr(sdf, "_CACHE_BASE", tmp_path / "stocks")
+    monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+    monkeypatch.setattr(sdf, "get_scheduler", lambda: TushareScheduler(default_calls_per_minute=10_000))
+    days = _weekdays_back(30)
+    pro = FakePro(days)
+    monkeypatch.setattr(sdf, "_get_pro", lambda: pro)
+    return pro, days
+
+
+class TestFetchDailyBarsBulk:
+    def test_warm_ashare_pool_uses_trade_date_slices(self, env):
+        pro, days = env
+        # Caches end three trading days ago
+        for t in ("600519.SH", "000001.SZ"):
+            sdf._save_daily_cache(t, _bars(days[:-3]))
+
+        out = sdf.fetch_daily_bars_bulk([_item("600519.SH", "A股"), _item("000001.SZ", "A股")])
+
+        daily_calls = [c for c in pro.calls if c["api"] == "daily"]
+        assert all("trade_date" in c for c in daily_calls)
+        assert len(daily_calls) == 3          # one per missing day, shared by both tickers
+        for t in ("600519.SH", "000001.SZ"):
+            df, stale = out[t]
+            assert not stale
+            assert df.index[-1].date() == days[-1]
+            assert sdf._load_daily_cache(t).index[-1].date() == days[-1]
+
+    def test_cold_ashare_ticker_uses_range_call(self, env):
+        pro, days = env
+        out = sdf.fetch_daily_bars_bulk([_item("300750.SZ", "A股")])
+        (call,) = [c for c in pro.calls if c["api"] == "daily"]
+        assert call["ts_code"] == "300750.SZ"
+        assert len(out["300750.SZ"][0]) == len(days)
+
+    def test_fresh_cache_and_hk_make_no_requests(self, env):
+        pro, days = env
+        yesterday = sdf._last_weekday(date.today() - timedelta(days=1))
+        sdf._save_daily_cache("600519.SH", _bars([yesterday]))
+        out = sdf.fetch_daily_bars_bulk([_item("600519.SH", "A股"), _item("0700.HK", "港股")])
+        assert pro.calls == []
+        assert out["600519.SH"][1] is False
+        assert out["0700.HK"] == (None, True)
+
+    def test_us_tickers_share_one_download(self, env, monkeypatch):
+        _, days = env
+        downloads: list[list[str]] = []
+
+        def _fake_download(tickers, start, end):
+            downloads.append(list(tickers))
+            frames = {t: _bars(days, base=100.0).rename(columns=str.capitalize) for t in tickers}
+            return pd.concat(frames, axis=1)
+
+        monkeypatch.setattr(sdf, "_yf_download", _fake_download)
+        out = sdf.fetch_daily_bars_bulk([_item("AAPL", "美股"), _item("MSFT", "美股")])
+        assert downloads == [["AAPL", "MSFT"]]
+        assert out["MSFT"][0]["close"].iloc[-1] == 100.0
+        assert sdf._load_daily_cache("AAPL") is not None
+
+    def test_failed_fetch_returns_stale_cache(self, env, monkeypatch):
+        _, days = env
+        sdf._save_daily_cache("AAPL", _bars(days[:-5]))
+
+        def _down(tickers, start, end):
+            raise ConnectionError("yahoo down")
+
+        monkeypatch.setattr(sdf, "_yf_download", _down)
+        df, stale = sdf.fetch_daily_bars_bulk([_item("AAPL", "美股")])["AAPL"]
+        assert stale and len(df) == len(days) - 5
@@ -0,0 +1,57 @@
+"""Unit tests for the vectorized swing-point detector and its use in trend confirmation."""
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.swing_points import recent_swings, swing_highs, swing_lows
+from src.analysis.trending_up import _check_higher_lows
+
+
+class TestSwingPoints:
+    def test_order_one(self):
+        x = [5, 3, 4, 2, 2, 6, 1, 7]
+        assert list(np.nonzero(swing_lows(x))[0]) == [1, 6]       # flat bottom 2,2 is not strict
+        assert list(np.nonzero(swing_highs(x))[0]) == [2, 5]
+
+    def test_higher_order_and_edges(self):
+        x = [9, 8, 7, 1, 7, 8, 9, 5, 9]
+        assert list(np.nonzero(swing_lows(x, order=3))[0]) == [3]
+        assert list(np.nonzero(swing_lows(x, order=1))[0]) == [3, 7]
+        assert not swing_lows([1, 2], order=1).any()
+
+    def test_nan_is_never_a_swing_nor_a_confirmation(self):
+        x = [5, 3, np.nan, 2, 4]
+        assert not swing_lows(x).any()
+
+    def test_panel_matches_columns(self):
+        rng = np.random.default_rng(0)
+        panel = rng.normal(size=(300, 50)).cumsum(axis=0)
+        mask = swing_highs(panel, order=2)
+        for j in (0, 17, 49):
+            assert (mask[:, j] == swing_highs(panel[:, j], order=2)).all()
+
+    def test_recent_swings_oldest_first_and_padded(self):
+        x = np.array([5, 1, 5, 2, 5, 3, 5, 4, 5], dtype=float)
+        assert list(recent_swings(x, swing_lows(x), 3)) == [2.0, 3.0, 4.0]
+        padded = recent_swings(x[:5], swing_lows(x[:5]), 3)
+        assert np.isnan(padded[0]) and list(padded[1:]) == [1.0, 2.0]
+
+        panel = np.column_stack([x, x[::-1]])
+        out = recent_swings(panel, swing_lows(panel), 2)
+        assert out.shape == (2, 2) and list(out[:, 0]) == [3.0, 4.0] and list(out[:, 1]) == [2.0, 1.0]
+
+
+class TestHigherLows:
+    @staticmethod
+    def _df(lows: list[float]) -> pd.DataFrame:
+        return pd.DataFrame({"low": lows})
+
+    def test_uses_most_recent_lows(self):
+        # Oldest three lows rise (1, 2, 3) but the latest three fall (3, 2.5, 2.2)
+        falling = [9, 1, 9, 2, 9, 3, 9, 2.5, 9, 2.2, 9]
+        assert _check_higher_lows(self._df(falling)) is False
+        rising = [9, 3, 9, 2, 9, 1, 9, 1.5, 9, 2.0, 9]
+        assert _check_higher_lows(self._df(rising)) is True
+
+    def test_fewer_than_three_lows(self):
+        assert _check_higher_lows(self._df([9, 1, 9, 2, 9])) is False
@@ -0,0 +1,108 @@
+"""
+Unit tests for the trending-up walk-forward backtest — per-bar rule signals
+against analyze() on every prefix, trade outcome simulation, and the
+headless job over a temporary bar store. No network.
+"""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from jobs import trend_backtest as job
+from src.analysis.trend_backtest import (
+    EXHAUSTION_FLAGS,
+    PHASES,
+    backtest_ticker,
+    rule_signals,
+    simulate_trades,
+    summarize,
+)
+from src.analysis.trending_up import analyze
+from src.data import bar_store
+
+
+def _walk(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.001, 0.02, n)))
+    idx = pd.bdate_range("2023-01-02", periods=n, name="date")
+    return pd.DataFrame({
+        "open": close * (1 + rng.uniform(-0.01, 0.015, n)),
+        "high": close * (1 + rng.uniform(0, 0.03, n)),
+        "low": close * (1 - rng.uniform(0, 0.02, n)),
+        "close": close,
+        "volume": rng.uniform(1e5, 1e6, n) * (1 + (rng.random(n) > 0.9) * 2),
+    }, index=idx)
+
+
+class TestRuleSignals:
+    @pytest.mark.parametrize("seed", [1, 7])
+    def test_matches_analyze_on_every_prefix(self, seed):
+        df = _walk(160, seed)
+        signals = rule_signals(df)
+        for t in range(29, len(df)):
+            result = analyze(df.iloc[:t + 1])
+            row = signals.iloc[t]
+            assert row["trend_phase"] == result.trend_phase, t
+            for flag in EXHAUSTION_FLAGS:
+                assert row[flag] == bool(getattr(result.exhaustion_signals, flag)), (t, flag)
+            assert row["exit_warning"] == result.exit_warning
+
+    def test_short_history_has_no_phase(self):
+        signals = rule_signals(_walk(40, 3))
+        assert (signals["trend_phase"].iloc[:29] == "").all()
+        assert not signals[EXHAUSTION_FLAGS].iloc[:29].to_numpy().any()
+
+
+class TestSimulateTrades:
+    def _path(self, highs: list[float], lows: list[float]) -> pd.DataFrame:
+        n = len(highs) + 1
+        idx = pd.bdate_range("2024-01-01", periods=n)
+        return pd.DataFrame({
+            "open": 100.0, "close": 100.0, "volume": 1.0,
+            "high": [100.0, *highs], "low": [100.0, *lows],
+        }, index=idx)
+
+    def test_target_stop_and_tie(self):
+        flat = [101.0] * 4
+        target = simulate_trades(self._path([101, 126, 101, 101, 101], [99, 99, 99, 99, 99]), horizon=4)
+        assert target["outcome"].iloc[0] == "target" and target["trade_return"].iloc[0] == 0.25
+        assert target["bars_held"].iloc[0] == 2 and target["max_drawdown"].iloc[0] == pytest.approx(-0.01)
+
+        stop = simulate_trades(self._path(flat + [101], [99, 93, 99, 99, 99]), horizon=4)
+        assert stop["outcome"].iloc[0] == "stop" and stop["trade_return"].iloc[0] == -0.065
+
+        tie = simulate_trades(self._path([130, 101, 101, 101, 101], [90, 99, 99, 99, 99]), horizon=4)
+        assert tie["outcome"].iloc[0] == "stop"
+
+    def test_timeout_and_open(self):
+        df = self._path([101.0] * 5, [99.0] * 5)
+        out = simulate_trades(df, horizon=4)
+        assert out["outcome"].iloc[0] == "timeout" and out["trade_return"].iloc[0] == 0.0
+        assert out["outcome"].iloc[-1] == "open" and np.isnan(out["trade_return"].iloc[-1])
+
+
+class TestSummaryAndJob:
+    def test_summarize_tables(self):
+        events = backtest_ticker(_walk(400, 2), ticker="X", horizon=20)
+        summary = summarize(events)
+        assert list(summary["by_phase"].index) == PHASES
+        assert summary["by_phase"]["signals"].sum() == len(events)
+        assert summary["by_signal"].loc["all_bars", "signals"] == len(events)
+
+    def test_job_reads_bar_store(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+        store = bar_store.get_bar_store()
+        store.write("600519_SH", _walk(300, 4))
+        store.write("AAPL", _walk(250, 5))
+        store.write("USDCNY=X", _walk(250, 6), kind="fx")
+        store.write("0700.HK", _walk(250, 7))  # ledger HK quote from an older store (kind="stock")
+
+        assert job.main(["--workers", "1", "--horizon", "20"]) == 0
+        out = json.loads(capsys.readouterr().out)
+        assert out["tickers"] == 2 and out["tickers_with_data"] == 2
+        assert out["bars"] == (300 - 29) + (250 - 29)
+        assert set(out["by_phase"]) == set(PHASES)
@@ -0,0 +1,104 @@
+"""
+Unit tests for the streaming trend indicators (src/analysis/trend_incremental)
+and their persistence next to the bar cache (src/data/trend_indicator_store).
+The streaming values must equal analyze()'s batch indicators exactly.
+"""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis import trend_incremental as ti
+from src.analysis import trending_up
+from src.analysis.trending_up import analyze
+from src.data import bar_store
+from src.data import trend_indicator_store as tis
+
+
+def _bars(n: int = 400, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    close[200:215] = close[199]  # flat stretch: zero ranges and repeated values
+    idx = pd.bdate_range("2024-01-01", periods=n, name="date")
+    df = pd.DataFrame({
+        "open": close * (1 + rng.uniform(-0.01, 0.01, n)),
+        "high": close * (1 + rng.uniform(0, 0.02, n)),
+        "low": close * (1 - rng.uniform(0, 0.02, n)),
+        "close": close,
+        "volume": rng.uniform(1e5, 1e6, n),
+    }, index=idx)
+    df.iloc[200:215, [1, 2]] = close[199]
+    return df
+
+
+def _batch(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(analyze(df).indicators)[ti.INDICATOR_COLUMNS]
+
+
+def _assert_identical(a: pd.DataFrame, b: pd.DataFrame) -> None:
+    x, y = a.to_numpy(), b.to_numpy()
+    assert ((x == y) | (np.isnan(x) & np.isnan(y))).all()
+
+
+class TestStreamingEngine:
+    def test_bar_by_bar_equals_batch(self):
+        df = _bars()
+        state = ti.TrendIndicatorState()
+        head = ti.advance_frame(state, df.iloc[:-30])
+        # round-trip through JSON as the store does
+        state = ti.TrendIndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+        tail = [ti.advance_frame(state, df.iloc[i:i + 1]) for i in range(len(df) - 30, len(df))]
+        _assert_identical(pd.concat([head, *tail]), _batch(df))
+        assert state.n_bars == len(df) and state.last_date == df.index[-1].strftime("%Y-%m-%d")
+
+    def test_other_state_version_is_rejected(self):
+        data = ti.TrendIndicatorState().to_dict()
+        data["version"] = ti.STATE_VERSION + 1
+        assert ti.TrendIndicatorState.from_dict(data) is None
+
+
+class TestIndicatorStore:
+    @pytest.fixture(autouse=True)
+    def _store(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bar_store, "_DEFAULT_ROOT", tmp_path / "bars")
+
+    def test_refresh_advances_only_new_bars(self, monkeypatch):
+        df = _bars()
+        tis.get_trend_indicators("600519.SH", df.iloc[:-3])
+
+        seen: list[int] = []
+        upserted: list[int] = []
+        real, real_upsert = tis.advance_frame, bar_store.BarStore.upsert
+        monkeypatch.setattr(tis, "advance_frame", lambda s, b: seen.append(len(b)) or real(s, b))
+        monkeypatch.setattr(bar_store.BarStore, "upsert",
+                            lambda self, sym, rows, **kw: upserted.append(len(rows)) or real_upsert(self, sym, rows, **kw))
+        out = tis.get_trend_indicators("600519.SH", df)
+        assert seen == [3] and upserted == [3]
+        _assert_identical(out, _batch(df))
+        _assert_identical(bar_store.get_bar_store().frame("600519_SH@trend"), out)
+
+    def test_revised_history_rebuilds(self):
+        df = _bars()
+        tis.get_trend_indicators("AAPL", df.iloc[:-3])
+        adjusted = df.copy()
+        adjusted[["open", "high", "low", "close"]] /= 2  # split adjustment
+        out = tis.get_trend_indicators("AAPL", adjusted)
+        _assert_identical(out, _batch(adjusted))
+
+    def test_refresh_streams_adx_without_full_recompute(self, monkeypatch):
+        df = _bars()
+        expected = analyze(df).indicators["adx"].to_frame()
+        tis.get_trend_indicators("MSFT", df.iloc[:-2])
+        monkeypatch.setattr(trending_up, "compute_adx", lambda d, period=14: pytest.fail("full-history ADX"))
+        _assert_identical(tis.get_trend_indicators("MSFT", df)[["adx"]], expected)
+
+    def test_analyze_with_precomputed_indicators(self):
+        df = _bars()
+        result = analyze(df, ticker="X", indicators=tis.get_trend_indicators("X", df))
+        expected = analyze(df, ticker="X")
+        result.indicators, expected.indicators = {}, {}
+        assert result == expected
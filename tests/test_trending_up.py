@@ -9,6 +9,7 @@ from src.analysis.trending_up import (
     TrendAnalysis,
     _compute_pyramid_position,
     analyze,
+    analyze_panel,
 )
 
 
@@ -279,3 +280,39 @@ class TestExhaustionWarning:
     def test_exhaustion_count_correct(self):
         e = ExhaustionSignals(vol_no_price=True, rsi_divergence=True, macd_histogram_shrink=True)
         assert e.triggered_count() == 3
+
+
+class TestAnalyzePanel:
+    def _bars(self) -> dict:
+        gapped = _make_uptrend_df(300, seed=3)
+        gapped = gapped.drop(gapped.index[100:110])  # suspension: missing dates
+        return {
+            "UP": _make_uptrend_df(),
+            "PB": _make_pullback_df(),
+            "GAP": gapped,
+            "SHORT": _make_uptrend_df(20),
+            "NONE": None,
+        }
+
+    def test_matches_per_ticker_analyze(self):
+        bars = self._bars()
+        results, _ = analyze_panel(bars, entry_order=2, regime_multiplier=0.5)
+        for ticker, df in bars.items():
+            single = analyze(df, ticker=ticker, entry_order=2, regime_multiplier=0.5)
+            panel = results[ticker]
+            for key, series in single.indicators.items():
+                pd.testing.assert_series_equal(series, panel.indicators[key], check_names=False)
+            single.indicators, panel.indicators = {}, {}
+            assert single == panel
+
+    def test_ranked_table(self):
+        _, table = analyze_panel(self._bars())
+        assert set(table.index) == {"UP", "PB", "GAP", "SHORT", "NONE"}
+        assert list(table.index[-2:]) == ["SHORT", "NONE"]
+        usable = table[~table["data_insufficient"]]
+        keys = list(zip(~usable["is_uptrend"], usable["exit_warning"], -usable["trend_score"]))
+        assert keys == sorted(keys)
+
+    def test_empty_input(self):
+        results, table = analyze_panel({})
+        assert results == {} and table.empty
@@ -0,0 +1,95 @@
+"""
+Unit tests for src/data/tushare_scheduler.py — token bucket pacing, retry,
+failure isolation and checkpoint batching. No network, no real sleeps.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from src.data.tushare_scheduler import TokenBucket, TushareScheduler, concat_results
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, s: float) -> None:
+        self.slept.append(s)
+        self.now += s
+
+
+class FakeClient:
+    def __init__(self, fail_times: dict[str, int] | None = None) -> None:
+        self.fail_times = dict(fail_times or {})
+        self.calls: list[str] = []
+
+    def daily_basic(self, trade_date: str, fields: str) -> pd.DataFrame:
+        self.calls.append(trade_date)
+        if self.fail_times.get(trade_date, 0) > 0:
+            self.fail_times[trade_date] -= 1
+            raise ConnectionError("抱歉，您每分钟最多访问该接口200次")
+        return pd.DataFrame({"ts_code": ["600519.SH"], "total_mv": [float(trade_date[-2:])]})
+
+
+class TestTokenBucket:
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_minute=60, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(4):
+            bucket.acquire()
+        # Two burst tokens free, then one token per second
+        assert clock.now == pytest.approx(2.0)
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_minute=0)
+
+
+class TestTushareScheduler:
+    def _scheduler(self, **kwargs) -> TushareScheduler:
+        return TushareScheduler(default_calls_per_minute=10_000, sleep=lambda s: None, **kwargs)
+
+    def test_results_keyed_like_input(self):
+        client = FakeClient()
+        calls = {d: {"trade_date": d, "fields": "ts_code,total_mv"} for d in ("20240131", "20240229")}
+        results = self._scheduler().run("daily_basic", calls, client=client)
+        assert set(results) == set(calls)
+        assert results["20240229"]["total_mv"].iloc[0] == 29.0
+
+    def test_retries_transient_failure(self):
+        client = FakeClient(fail_times={"20240131": 2})
+        results = self._scheduler(max_retries=3).run(
+            "daily_basic", {"20240131": {"trade_date": "20240131", "fields": "x"}}, client=client,
+        )
+        assert "20240131" in results
+        assert client.calls.count("20240131") == 3
+
+    def test_exhausted_retries_are_dropped_not_raised(self):
+        client = FakeClient(fail_times={"20240131": 5})
+        calls = {d: {"trade_date": d, "fields": "x"} for d in ("20240131", "20240229")}
+        results = self._scheduler(max_retries=1).run("daily_basic", calls, client=client)
+        assert set(results) == {"20240229"}
+
+    def test_checkpoint_batches_cover_every_result(self):
+        batches: list[int] = []
+        calls = {f"202401{d:02d}": {"trade_date": f"202401{d:02d}", "fields": "x"} for d in range(1, 8)}
+        self._scheduler(max_workers=2).run(
+            "daily_basic", calls, client=FakeClient(),
+            checkpoint_every=3, on_checkpoint=lambda batch: batches.append(len(batch)),
+        )
+        assert batches == [3, 3, 1]
+
+    def test_endpoint_limit_override(self):
+        sched = TushareScheduler(calls_per_minute={"daily_basic": 50}, default_calls_per_minute=500)
+        assert sched._bucket("daily_basic")._rate_per_s == pytest.approx(50 / 60)
+        assert sched._bucket("margin")._rate_per_s == pytest.approx(500 / 60)
+
+    def test_concat_results_orders_by_key(self):
+        frames = {2025: pd.DataFrame({"v": [2]}), 2024: pd.DataFrame({"v": [1]}), 2026: pd.DataFrame()}
+        assert list(concat_results(frames)["v"]) == [1, 2]